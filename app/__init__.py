@@ -6,16 +6,19 @@ from flask_jwt_extended import JWTManager
 from flask_migrate import Migrate
 from datetime import timedelta
 from flask_mail import Mail
+from .utils.db_engine import init_engine_options
+from .utils.read_replica import RoutingSession
 
 import os
 
-db = SQLAlchemy()
+# Reads inside read_replica scopes go to the replica (app.utils.read_replica)
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 bcrypt = Bcrypt()
 jwt = JWTManager()
 migrate = Migrate()
 mail = Mail()
 
-def create_app():
+def create_app(role=None):
     app = Flask(__name__)
     CORS(app)
 
@@ -31,6 +34,9 @@ def create_app():
     app.config['MAIL_PASSWORD'] = 'hsgv uimz esrk frqs'         # Replace with your Gmail app password
     app.config['MAIL_DEFAULT_SENDER'] = 'minhalawais1@gmail.com'  # Default sender email
 
+    # Pool sizing, pre-ping, recycle and the role's statement timeout (config.py DB_*)
+    init_engine_options(app, role)
+
     db.init_app(app)
     bcrypt.init_app(app)
     jwt.init_app(app)
@@ -43,8 +49,18 @@ def create_app():
         from .auth import auth
         from . import models
         from . import whatsapp_models  # Import WhatsApp models
+        from .commands import register_commands
+        from .services.audit_log_writer import AuditLogWriter
+        from .services.sql_instrumentation import SQLInstrumentation
+        from .services.dashboard_cache import DashboardCache
+        from .utils import read_replica
         app.register_blueprint(main)
         app.register_blueprint(auth, url_prefix='/auth')
+        register_commands(app)
+        AuditLogWriter.init_app(app)
+        SQLInstrumentation.init_app(app)
+        read_replica.init_app(app)
+        DashboardCache.init_app(app)
         db.create_all()
 
     return app
\ No newline at end of file
@@ -0,0 +1,45 @@
+"""
+CLI Commands
+Maintenance commands registered on the Flask app (run with `flask <command>`).
+"""
+
+import click
+import uuid
+
+
+def register_commands(app):
+    """
+    Register the maintenance commands on the Flask app.
+
+    Args:
+        app: Flask application instance
+    """
+
+    @app.cli.command('rebuild-rollups')
+    @click.option('--company-id', default=None, help='Rebuild a single company (default: all companies)')
+    def rebuild_rollups(company_id):
+        """Recompute the dashboard rollup tables from scratch."""
+        from app.services.dashboard_rollup_service import DashboardRollupService
+
+        stats = DashboardRollupService.rebuild(uuid.UUID(company_id) if company_id else None)
+        click.echo(
+            f"Rebuilt {stats['daily_rows']} daily and {stats['monthly_rows']} monthly rollup rows "
+            f"in {stats['elapsed_seconds']}s"
+        )
+
+    @app.cli.command('maintain-log-partitions')
+    @click.option('--archive-dir', default=None, help='Directory for archived partitions (default: LOG_ARCHIVE_DIR)')
+    def maintain_log_partitions(archive_dir):
+        """Create upcoming detailed_logs partitions and archive expired ones."""
+        from app.services.log_partition_service import LogPartitionService
+
+        if not LogPartitionService.is_partitioned():
+            click.echo("detailed_logs is not partitioned; run the migrations first")
+            return
+        stats = LogPartitionService.maintain(
+            archive_dir or app.config.get('LOG_ARCHIVE_DIR') or 'database_backups/log_archive'
+        )
+        click.echo(
+            f"Created {len(stats['created'])} partitions, archived {len(stats['retired'])} "
+            f"in {stats['elapsed_seconds']}s"
+        )
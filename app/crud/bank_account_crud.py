@@ -1,6 +1,7 @@
 from app import db
 from app.models import BankAccount
 from app.utils.logging_utils import log_action
+from app.services.dashboard_cache import DashboardCache
 import uuid
 import logging
 from decimal import Decimal
@@ -65,6 +66,7 @@ def add_bank_account(data, user_role, current_user_id, ip_address, user_agent):
         )
 
         db.session.add(new_bank_account)
+        DashboardCache.invalidate_on_commit(new_bank_account.company_id, DashboardCache.TAG_BANK_ACCOUNT)
         db.session.commit()
 
         log_action(
@@ -129,6 +131,7 @@ def update_bank_account(id, data, company_id, user_role, current_user_id, ip_add
         if 'is_active' in data:
             bank_account.is_active = data['is_active']
 
+        DashboardCache.invalidate_on_commit(bank_account.company_id, DashboardCache.TAG_BANK_ACCOUNT)
         db.session.commit()
 
         log_action(
@@ -177,6 +180,7 @@ def delete_bank_account(id, company_id, user_role, current_user_id, ip_address,
 
         # Soft delete by setting is_active to False
         bank_account.is_active = False
+        DashboardCache.invalidate_on_commit(bank_account.company_id, DashboardCache.TAG_BANK_ACCOUNT)
         db.session.commit()
 
         log_action(
@@ -1,6 +1,9 @@
 from app import db
 from app.models import Customer, Invoice, Payment, Complaint, Area, ServicePlan, RecoveryTask,ISP,InventoryItem,BankAccount
 from app.utils.logging_utils import log_action
+from app.utils.db_executor import offload
+from app.services.bulk_customer_importer import BulkCustomerImporter, REQUIRED_FIELDS
+from app.services.dashboard_rollup_service import DashboardRollupService
 import uuid
 from sqlalchemy.exc import SQLAlchemyError, IntegrityError
 import logging
@@ -15,78 +18,170 @@ import json
 
 logger = logging.getLogger(__name__)
 
-async def get_all_customers(company_id, user_role, employee_id):
+def _str_or_none(value):
+    return str(value) if value else None
+
+def _iso_or_none(value):
+    return value.isoformat() if value else None
+
+# Output key -> (Customer columns it needs, formatter(row, lookups))
+CUSTOMER_LIST_FIELDS = {
+    'id': ((Customer.id,), lambda r, l: str(r.id)),
+    'internet_id': ((Customer.internet_id,), lambda r, l: r.internet_id),
+    'first_name': ((Customer.first_name,), lambda r, l: r.first_name),
+    'last_name': ((Customer.last_name,), lambda r, l: r.last_name),
+    'email': ((Customer.email,), lambda r, l: r.email),
+    'phone_1': ((Customer.phone_1,), lambda r, l: r.phone_1),
+    'phone_2': ((Customer.phone_2,), lambda r, l: r.phone_2),
+    'area': ((Customer.area_id,), lambda r, l: l['areas'].get(r.area_id, 'Unassigned')),
+    'installation_address': ((Customer.installation_address,), lambda r, l: r.installation_address),
+    'service_plan': ((Customer.service_plan_id,), lambda r, l: l['plans'][r.service_plan_id][0] if r.service_plan_id in l['plans'] else 'Unassigned'),
+    'servicePlanPrice': ((Customer.service_plan_id,), lambda r, l: float(l['plans'][r.service_plan_id][1]) if r.service_plan_id in l['plans'] and l['plans'][r.service_plan_id][1] else 0),
+    'isp': ((Customer.isp_id,), lambda r, l: l['isps'].get(r.isp_id, 'Unassigned')),
+    'isp_id': ((Customer.isp_id,), lambda r, l: _str_or_none(r.isp_id)),
+    'connection_type': ((Customer.connection_type,), lambda r, l: r.connection_type),
+    'internet_connection_type': ((Customer.internet_connection_type,), lambda r, l: r.internet_connection_type),
+    'tv_cable_connection_type': ((Customer.tv_cable_connection_type,), lambda r, l: r.tv_cable_connection_type),
+    'installation_date': ((Customer.installation_date,), lambda r, l: _iso_or_none(r.installation_date)),
+    'is_active': ((Customer.is_active,), lambda r, l: r.is_active),
+    'cnic': ((Customer.cnic,), lambda r, l: r.cnic),
+    'cnic_front_image': ((Customer.cnic_front_image,), lambda r, l: r.cnic_front_image),
+    'cnic_back_image': ((Customer.cnic_back_image,), lambda r, l: r.cnic_back_image),
+    'gps_coordinates': ((Customer.gps_coordinates,), lambda r, l: r.gps_coordinates),
+    'agreement_document': ((Customer.agreement_document,), lambda r, l: r.agreement_document),
+    'company_id': ((Customer.company_id,), lambda r, l: str(r.company_id)),
+    'area_id': ((Customer.area_id,), lambda r, l: _str_or_none(r.area_id)),
+    'service_plan_id': ((Customer.service_plan_id,), lambda r, l: _str_or_none(r.service_plan_id)),
+    'wire_length': ((Customer.wire_length,), lambda r, l: r.wire_length),
+    'wire_ownership': ((Customer.wire_ownership,), lambda r, l: r.wire_ownership),
+    'router_ownership': ((Customer.router_ownership,), lambda r, l: r.router_ownership),
+    'router_id': ((Customer.router_id,), lambda r, l: _str_or_none(r.router_id)),
+    'router_serial_number': ((Customer.router_serial_number,), lambda r, l: r.router_serial_number),
+    'patch_cord_ownership': ((Customer.patch_cord_ownership,), lambda r, l: r.patch_cord_ownership),
+    'patch_cord_count': ((Customer.patch_cord_count,), lambda r, l: r.patch_cord_count),
+    'patch_cord_ethernet_ownership': ((Customer.patch_cord_ethernet_ownership,), lambda r, l: r.patch_cord_ethernet_ownership),
+    'patch_cord_ethernet_count': ((Customer.patch_cord_ethernet_count,), lambda r, l: r.patch_cord_ethernet_count),
+    'splicing_box_ownership': ((Customer.splicing_box_ownership,), lambda r, l: r.splicing_box_ownership),
+    'splicing_box_serial_number': ((Customer.splicing_box_serial_number,), lambda r, l: r.splicing_box_serial_number),
+    'ethernet_cable_ownership': ((Customer.ethernet_cable_ownership,), lambda r, l: r.ethernet_cable_ownership),
+    'ethernet_cable_length': ((Customer.ethernet_cable_length,), lambda r, l: r.ethernet_cable_length),
+    'dish_ownership': ((Customer.dish_ownership,), lambda r, l: r.dish_ownership),
+    'dish_id': ((Customer.dish_id,), lambda r, l: _str_or_none(r.dish_id)),
+    'dish_mac_address': ((Customer.dish_mac_address,), lambda r, l: r.dish_mac_address),
+    'node_count': ((Customer.node_count,), lambda r, l: r.node_count),
+    'stb_serial_number': ((Customer.stb_serial_number,), lambda r, l: r.stb_serial_number),
+    'discount_amount': ((Customer.discount_amount,), lambda r, l: r.discount_amount),
+    'recharge_date': ((Customer.recharge_date,), lambda r, l: _iso_or_none(r.recharge_date)),
+    'miscellaneous_details': ((Customer.miscellaneous_details,), lambda r, l: r.miscellaneous_details),
+    'miscellaneous_charges': ((Customer.miscellaneous_charges,), lambda r, l: r.miscellaneous_charges),
+    'created_at': ((Customer.created_at,), lambda r, l: _iso_or_none(r.created_at)),
+    'updated_at': ((Customer.updated_at,), lambda r, l: _iso_or_none(r.updated_at)),
+}
+
+def _customer_lookups(company_ids, field_names):
+    # One query per lookup table for the companies in scope (None = all companies)
+    def load(*columns):
+        query = db.session.query(*columns)
+        if company_ids is not None:
+            query = query.filter(columns[0].class_.company_id.in_(company_ids))
+        return query.all()
+
+    lookups = {'areas': {}, 'plans': {}, 'isps': {}}
+    if 'area' in field_names:
+        lookups['areas'] = {row.id: row.name for row in load(Area.id, Area.name)}
+    if 'service_plan' in field_names or 'servicePlanPrice' in field_names:
+        lookups['plans'] = {row.id: (row.name, row.price) for row in load(ServicePlan.id, ServicePlan.name, ServicePlan.price)}
+    if 'isp' in field_names:
+        lookups['isps'] = {row.id: row.name for row in load(ISP.id, ISP.name)}
+    return lookups
+
+@offload
+def get_all_customers(company_id, user_role, employee_id, fields=None, page=None, page_size=50):
+    """
+    List customers with one column projection plus one lookup query per
+    area/plan/ISP table.
+
+    fields limits the output to the given keys of CUSTOMER_LIST_FIELDS
+    (unknown keys are ignored, all fields when empty). Without page the full
+    list is returned; with page a dict with items, total, page and page_size.
+    """
+    field_names = [name for name in (fields or []) if name in CUSTOMER_LIST_FIELDS] or list(CUSTOMER_LIST_FIELDS)
+
+    columns = []
+    for name in field_names:
+        for column in CUSTOMER_LIST_FIELDS[name][0]:
+            if column not in columns:
+                columns.append(column)
+
+    query = db.session.query(*columns)
     if user_role == 'super_admin' or user_role == 'employee':
-        customers = Customer.query.all()
+        company_ids = None
     elif user_role == 'auditor':
-        customers = Customer.query.filter_by(is_active=True, company_id=company_id).all()
+        query = query.filter(Customer.is_active == True, Customer.company_id == company_id)
+        company_ids = [company_id]
     elif user_role == 'company_owner':
-        customers = Customer.query.filter_by(company_id=company_id).all()
-    elif user_role == 'employee':
-        customers = Customer.query.filter_by(company_id=company_id).all()
+        query = query.filter(Customer.company_id == company_id)
+        company_ids = [company_id]
+    else:
+        return {'items': [], 'total': 0, 'page': page, 'page_size': page_size} if page else []
+
+    total = None
+    if page:
+        total = query.count()
+        query = query.order_by(Customer.created_at.desc(), Customer.id).limit(page_size).offset((page - 1) * page_size)
+
+    rows = query.all()
+    lookups = _customer_lookups(company_ids, field_names)
+    formatters = [(name, CUSTOMER_LIST_FIELDS[name][1]) for name in field_names]
+    result = [{name: formatter(row, lookups) for name, formatter in formatters} for row in rows]
+
+    if page:
+        return {'items': result, 'total': total, 'page': page, 'page_size': page_size}
+    return result
 
-    result = []
-    for customer in customers:
-        area = Area.query.get(customer.area_id)
-        service_plan = ServicePlan.query.get(customer.service_plan_id)
-        isp = ISP.query.get(customer.isp_id)
 
-        result.append({
-            # --- Old fields you already had ---
-            'id': str(customer.id),
-            'internet_id': customer.internet_id,
-            'first_name': customer.first_name,
-            'last_name': customer.last_name,
-            'email': customer.email,
-            'phone_1': customer.phone_1,
-            'phone_2': customer.phone_2,
-            'area': area.name if area else 'Unassigned',
-            'installation_address': customer.installation_address,
-            'service_plan': service_plan.name if service_plan else 'Unassigned',
-            'servicePlanPrice': float(service_plan.price) if service_plan and service_plan.price else 0,
-            'isp': isp.name if isp else 'Unassigned',
-            'isp_id': str(customer.isp_id) if customer.isp_id else None,
-            'connection_type': customer.connection_type,
-            'internet_connection_type': customer.internet_connection_type,
-            'tv_cable_connection_type': customer.tv_cable_connection_type,
-            'installation_date': customer.installation_date.isoformat() if customer.installation_date else None,
-            'is_active': customer.is_active,
-            'cnic': customer.cnic,
-            'cnic_front_image': customer.cnic_front_image,
-            'cnic_back_image': customer.cnic_back_image,
-            'gps_coordinates': customer.gps_coordinates,
-            'agreement_document': customer.agreement_document,
+def export_customers_query(company_id, user_role, q=None):
+    """Customers in the same scope as get_all_customers, as labelled columns for ExportService"""
+    query = db.session.query(
+        Customer.internet_id.label('internet_id'),
+        Customer.first_name.label('first_name'),
+        Customer.last_name.label('last_name'),
+        Customer.email.label('email'),
+        Customer.phone_1.label('phone_1'),
+        Customer.phone_2.label('phone_2'),
+        Customer.cnic.label('cnic'),
+        Area.name.label('area'),
+        ServicePlan.name.label('service_plan'),
+        ISP.name.label('isp'),
+        Customer.connection_type.label('connection_type'),
+        Customer.installation_address.label('installation_address'),
+        Customer.installation_date.label('installation_date'),
+        Customer.is_active.label('is_active'),
+        Customer.created_at.label('created_at'),
+    ).select_from(Customer) \
+        .outerjoin(Area, Customer.area_id == Area.id) \
+        .outerjoin(ServicePlan, Customer.service_plan_id == ServicePlan.id) \
+        .outerjoin(ISP, Customer.isp_id == ISP.id)
 
-            # --- Extra fields from add_customer ---
-            'company_id': str(customer.company_id),
-            'area_id': str(customer.area_id) if customer.area_id else None,
-            'service_plan_id': str(customer.service_plan_id) if customer.service_plan_id else None,
-            'wire_length': customer.wire_length,
-            'wire_ownership': customer.wire_ownership,
-            'router_ownership': customer.router_ownership,
-            'router_id': str(customer.router_id) if customer.router_id else None,
-            'router_serial_number': customer.router_serial_number,
-            'patch_cord_ownership': customer.patch_cord_ownership,
-            'patch_cord_count': customer.patch_cord_count,
-            'patch_cord_ethernet_ownership': customer.patch_cord_ethernet_ownership,
-            'patch_cord_ethernet_count': customer.patch_cord_ethernet_count,
-            'splicing_box_ownership': customer.splicing_box_ownership,
-            'splicing_box_serial_number': customer.splicing_box_serial_number,
-            'ethernet_cable_ownership': customer.ethernet_cable_ownership,
-            'ethernet_cable_length': customer.ethernet_cable_length,
-            'dish_ownership': customer.dish_ownership,
-            'dish_id': str(customer.dish_id) if customer.dish_id else None,
-            'dish_mac_address': customer.dish_mac_address,
-            'node_count': customer.node_count,
-            'stb_serial_number': customer.stb_serial_number,
-            'discount_amount': customer.discount_amount,
-            'recharge_date': customer.recharge_date.isoformat() if customer.recharge_date else None,
-            'miscellaneous_details': customer.miscellaneous_details,
-            'miscellaneous_charges': customer.miscellaneous_charges,
-            'created_at': customer.created_at.isoformat() if customer.created_at else None,
-            'updated_at': customer.updated_at.isoformat() if customer.updated_at else None,
-        })
-    return result
+    if user_role == 'super_admin' or user_role == 'employee':
+        pass
+    elif user_role == 'auditor':
+        query = query.filter(Customer.is_active == True, Customer.company_id == company_id)
+    elif user_role == 'company_owner':
+        query = query.filter(Customer.company_id == company_id)
+    else:
+        return None
+
+    if q:
+        like = f"%{q}%"
+        query = query.filter(or_(
+            Customer.internet_id.ilike(like),
+            Customer.first_name.ilike(like),
+            Customer.last_name.ilike(like),
+            Customer.phone_1.ilike(like),
+            Customer.cnic.ilike(like),
+        ))
+    return query.order_by(Customer.created_at.desc(), Customer.id)
 
 
 def format_phone_number(phone):
@@ -116,7 +211,8 @@ def check_existing_cnic(cnic, company_id):
     ).first()
     return existing_customer
 
-async def add_customer(data, user_role, current_user_id, ip_address, user_agent, company_id):
+@offload
+def add_customer(data, user_role, current_user_id, ip_address, user_agent, company_id):
     try:
         # Check if internet ID already exists
         existing_customer = check_existing_internet_id(data.get('internet_id'), company_id)
@@ -234,7 +330,8 @@ async def add_customer(data, user_role, current_user_id, ip_address, user_agent,
         logger.error(f"Unexpected error in add_customer: {str(e)}")
         raise ValueError(f"Unexpected error: {str(e)}")
 
-async def update_customer(id, data, company_id, user_role, current_user_id, ip_address, user_agent):
+@offload
+def update_customer(id, data, company_id, user_role, current_user_id, ip_address, user_agent):
     try:
         if user_role == 'super_admin' or user_role == 'employee':
             customer = Customer.query.get(id)
@@ -251,6 +348,7 @@ async def update_customer(id, data, company_id, user_role, current_user_id, ip_a
             'cnic_back_image': customer.cnic_back_image,
             'agreement_document': customer.agreement_document,
         }
+        rollup_dims_before = (customer.area_id, customer.service_plan_id)
 
         # Handle file field updates - if empty string is passed, set to None
         file_fields = ['cnic_front_image', 'cnic_back_image', 'agreement_document']
@@ -364,6 +462,10 @@ async def update_customer(id, data, company_id, user_role, current_user_id, ip_a
             else:
                 setattr(customer, key, value)
 
+        # The rollups attribute invoices and payments to the customer's current area and plan
+        DashboardRollupService.reattribute_customer(
+            customer.id, rollup_dims_before, (customer.area_id, customer.service_plan_id)
+        )
         db.session.commit()
 
         # Create new_values for logging
@@ -406,7 +508,8 @@ async def update_customer(id, data, company_id, user_role, current_user_id, ip_a
         logger.error(f"Unexpected error in update_customer: {str(e)}")
         raise ValueError(f"Unexpected error: {str(e)}")
 
-async def delete_customer(id, company_id, user_role, current_user_id, ip_address, user_agent):
+@offload
+def delete_customer(id, company_id, user_role, current_user_id, ip_address, user_agent):
     if user_role == 'super_admin' or user_role == 'employee':
         customer = Customer.query.get(id)
     elif user_role == 'auditor':
@@ -444,7 +547,8 @@ async def delete_customer(id, company_id, user_role, current_user_id, ip_address
     )
 
     return True
-async def validate_customer_data(data, is_update=False, customer_id=None):
+@offload
+def validate_customer_data(data, is_update=False, customer_id=None):
     errors = {}
     
     # Required field validation
@@ -520,7 +624,8 @@ async def validate_customer_data(data, is_update=False, customer_id=None):
     
     return errors
 
-async def toggle_customer_status(id, company_id, user_role, current_user_id, ip_address, user_agent):
+@offload
+def toggle_customer_status(id, company_id, user_role, current_user_id, ip_address, user_agent):
     if user_role == 'super_admin' or user_role == 'employee':
         customer = Customer.query.get(id)
     elif user_role == 'auditor':
@@ -549,7 +654,8 @@ async def toggle_customer_status(id, company_id, user_role, current_user_id, ip_
 
     return customer
 
-async def get_customer_details(id, company_id):
+@offload
+def get_customer_details(id, company_id):
     try:
         # Check if customer exists
         customer = Customer.query.filter_by(id=id, company_id=company_id).first()
@@ -766,7 +872,8 @@ async def get_customer_details(id, company_id):
         print(f"Error in get_customer_details: {str(e)}")
         return {'error': 'Internal server error'}, 500
 
-async def get_customer_invoices(id, company_id):
+@offload
+def get_customer_invoices(id, company_id):
     invoices = Invoice.query.join(Customer).filter(
         Customer.id == id,
         Customer.company_id == company_id
@@ -793,7 +900,8 @@ async def get_customer_invoices(id, company_id):
     
     return result
 
-async def get_customer_payments(id, company_id):
+@offload
+def get_customer_payments(id, company_id):
     # Fetch all payments for a customer under a specific company
     payments = (
         Payment.query
@@ -838,7 +946,8 @@ async def get_customer_payments(id, company_id):
     return payment_list
 
 
-async def get_customer_complaints(id, company_id):
+@offload
+def get_customer_complaints(id, company_id):
     complaints = Complaint.query.join(Customer).filter(
         Customer.id == id,
         Customer.company_id == company_id
@@ -851,7 +960,8 @@ async def get_customer_complaints(id, company_id):
         'created_at': complaint.created_at.isoformat()
     } for complaint in complaints]
 
-async def get_customer_cnic(id, company_id):
+@offload
+def get_customer_cnic(id, company_id):
     customer = Customer.query.filter_by(id=id, company_id=company_id).first()
     if customer:
         cnic_front_image_path = str(customer.cnic_front_image)
@@ -864,7 +974,8 @@ async def get_customer_cnic(id, company_id):
     return None
 
 
-async def search_customer(company_id, search_term):
+@offload
+def search_customer(company_id, search_term):
     customer = Customer.query.filter(
         Customer.company_id == company_id,
         or_(
@@ -891,7 +1002,8 @@ async def search_customer(company_id, search_term):
     return None
 
 
-async def bulk_add_customers(df, company_id, user_role, current_user_id, ip_address, user_agent):
+@offload
+def bulk_add_customers(df, company_id, user_role, current_user_id, ip_address, user_agent):
     """
     Process a dataframe of customer data and add valid customers to the database
     
@@ -906,246 +1018,64 @@ async def bulk_add_customers(df, company_id, user_role, current_user_id, ip_addr
     Returns:
         Dictionary with results of the bulk add operation
     """
-    # Initialize counters and error tracking
-    total_records = len(df)
-    success_count = 0
-    failed_count = 0
-    errors = []
-    
-    # Required fields
-    required_fields = [
-        'internet_id', 'first_name', 'last_name', 'email', 'phone_1',
-        'area_id', 'installation_address', 'service_plan_id', 'isp_id',
-        'connection_type', 'cnic', 'installation_date'
-    ]
-    
-    # Validate and process each row
-    for index, row in df.iterrows():
-        row_errors = []
-        
-        # Check for missing required fields
-        for field in required_fields:
-            if field not in row or pd.isna(row[field]) or str(row[field]).strip() == '':
-                row_errors.append(f"Missing required field: {field}")
-        
-        # If there are missing fields, skip this row
-        if row_errors:
-            errors.append({"row": index, "errors": row_errors})
-            failed_count += 1
-            continue
-        
-        # Validate email format
-        email = str(row['email']).strip()
-        email_pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-        if not re.match(email_pattern, email):
-            row_errors.append("Invalid email format")
-        
-        # Validate phone number format
-        phone_1 = str(row['phone_1']).strip()
-        # Remove all non-numeric characters
-        phone_1 = ''.join(filter(str.isdigit, phone_1))
-        if not phone_1.startswith('92'):
-            phone_1 = '92' + phone_1
-        if len(phone_1) < 10 or len(phone_1) > 13:
-            row_errors.append("Invalid phone number format for phone_1")
-        
-        # Validate phone_2 if provided
-        if 'phone_2' in row and not pd.isna(row['phone_2']) and str(row['phone_2']).strip() != '':
-            phone_2 = str(row['phone_2']).strip()
-            phone_2 = ''.join(filter(str.isdigit, phone_2))
-            if not phone_2.startswith('92'):
-                phone_2 = '92' + phone_2
-            if len(phone_2) < 10 or len(phone_2) > 13:
-                row_errors.append("Invalid phone number format for phone_2")
-        else:
-            phone_2 = None
-        
-        # Validate CNIC format (13 digits)
-        cnic = str(row['cnic']).strip()
-        cnic = ''.join(filter(str.isdigit, cnic))
-        if len(cnic) != 13:
-            row_errors.append("CNIC must be 13 digits")
-        
-        # Validate connection_type
-        connection_type = str(row['connection_type']).strip().lower()
-        if connection_type not in ['internet', 'tv_cable', 'both']:
-            row_errors.append("connection_type must be one of: internet, tv_cable, both")
-        
-        # Validate internet_connection_type if connection_type is internet or both
-        if connection_type in ['internet', 'both']:
-            if 'internet_connection_type' not in row or pd.isna(row['internet_connection_type']) or str(row['internet_connection_type']).strip() == '':
-                row_errors.append("internet_connection_type is required when connection_type is internet or both")
-            else:
-                internet_connection_type = str(row['internet_connection_type']).strip().lower()
-                if internet_connection_type not in ['wire', 'wireless']:
-                    row_errors.append("internet_connection_type must be one of: wire, wireless")
-        
-        # Validate tv_cable_connection_type if connection_type is tv_cable or both
-        if connection_type in ['tv_cable', 'both']:
-            if 'tv_cable_connection_type' not in row or pd.isna(row['tv_cable_connection_type']) or str(row['tv_cable_connection_type']).strip() == '':
-                row_errors.append("tv_cable_connection_type is required when connection_type is tv_cable or both")
-            else:
-                tv_cable_connection_type = str(row['tv_cable_connection_type']).strip().lower()
-                if tv_cable_connection_type not in ['analog', 'digital']:
-                    row_errors.append("tv_cable_connection_type must be one of: analog, digital")
-        
-        # Validate installation_date format
-        try:
-            installation_date = row['installation_date']
-            if isinstance(installation_date, str):
-                installation_date = datetime.strptime(installation_date, '%Y-%m-%d').date()
-            elif isinstance(installation_date, pd.Timestamp):
-                installation_date = installation_date.date()
-            else:
-                row_errors.append("Invalid installation_date format. Use YYYY-MM-DD")
-        except (ValueError, TypeError):
-            row_errors.append("Invalid installation_date format. Use YYYY-MM-DD")
-        
-        # Validate UUIDs
-        try:
-            area_id = uuid.UUID(str(row['area_id']).strip())
-            service_plan_id = uuid.UUID(str(row['service_plan_id']).strip())
-            isp_id = uuid.UUID(str(row['isp_id']).strip())
-            
-            # Check if these IDs exist in the database
-            area = Area.query.get(area_id)
-            if not area:
-                row_errors.append(f"Area with ID {area_id} does not exist")
-            
-            service_plan = ServicePlan.query.get(service_plan_id)
-            if not service_plan:
-                row_errors.append(f"Service Plan with ID {service_plan_id} does not exist")
-            
-            isp = ISP.query.get(isp_id)
-            if not isp:
-                row_errors.append(f"ISP with ID {isp_id} does not exist")
-        except ValueError:
-            row_errors.append("Invalid UUID format for area_id, service_plan_id, or isp_id")
-        
-        # Check if internet_id or email already exists
-        existing_customer = Customer.query.filter(
-            (Customer.internet_id == str(row['internet_id']).strip()) | 
-            (Customer.email == email)
-        ).first()
-        
-        if existing_customer:
-            if existing_customer.internet_id == str(row['internet_id']).strip():
-                row_errors.append(f"Customer with internet_id {row['internet_id']} already exists")
-            if existing_customer.email == email:
-                row_errors.append(f"Customer with email {email} already exists")
-        
-        # If there are validation errors, skip this row
-        if row_errors:
-            errors.append({"row": index, "errors": row_errors})
-            failed_count += 1
-            continue
-        
-        # Prepare customer data
-        customer_data = {
-            'company_id': company_id,
-            'area_id': str(area_id),
-            'service_plan_id': str(service_plan_id),
-            'isp_id': str(isp_id),
-            'first_name': str(row['first_name']).strip(),
-            'last_name': str(row['last_name']).strip(),
-            'email': email,
-            'internet_id': str(row['internet_id']).strip(),
-            'phone_1': phone_1,
-            'phone_2': phone_2,
-            'installation_address': str(row['installation_address']).strip(),
-            'installation_date': installation_date,
-            'connection_type': connection_type,
-            'cnic': cnic,
-            'is_active': True
-        }
-        
-        # Add optional fields if they exist
-        if connection_type in ['internet', 'both'] and 'internet_connection_type' in row and not pd.isna(row['internet_connection_type']):
-            customer_data['internet_connection_type'] = str(row['internet_connection_type']).strip().lower()
-        
-        if connection_type in ['tv_cable', 'both'] and 'tv_cable_connection_type' in row and not pd.isna(row['tv_cable_connection_type']):
-            customer_data['tv_cable_connection_type'] = str(row['tv_cable_connection_type']).strip().lower()
-        
-        if 'gps_coordinates' in row and not pd.isna(row['gps_coordinates']) and str(row['gps_coordinates']).strip() != '':
-            customer_data['gps_coordinates'] = str(row['gps_coordinates']).strip()
-        
-        # Add additional fields if they exist in the CSV
-        optional_fields = [
-            'wire_length', 'wire_ownership', 'router_ownership', 'router_serial_number',
-            'patch_cord_ownership', 'patch_cord_count', 'patch_cord_ethernet_ownership',
-            'patch_cord_ethernet_count', 'splicing_box_ownership', 'splicing_box_serial_number',
-            'ethernet_cable_ownership', 'ethernet_cable_length', 'dish_ownership',
-            'dish_mac_address', 'node_count', 'stb_serial_number', 'discount_amount',
-            'recharge_date', 'miscellaneous_details', 'miscellaneous_charges'
-        ]
-        
-        for field in optional_fields:
-            if field in row and not pd.isna(row[field]) and str(row[field]).strip() != '':
-                customer_data[field] = row[field]
-        
-        try:
-            # Create the customer
-            new_customer = add_customer(customer_data, user_role, current_user_id, ip_address, user_agent, company_id)
-            success_count += 1
-        except Exception as e:
-            row_errors.append(f"Error adding customer: {str(e)}")
-            errors.append({"row": index, "errors": row_errors})
-            failed_count += 1
-            continue
-    
-    # Commit all successful additions
-    try:
-        db.session.commit()
-    except Exception as e:
-        db.session.rollback()
+    importer = BulkCustomerImporter(company_id, current_user_id, ip_address, user_agent)
+    validation = validate_bulk_customers.__wrapped__(df, company_id, importer=importer)
+    if validation.get('error'):
         return {
             'success': False,
-            'totalRecords': total_records,
+            'totalRecords': validation['totalRecords'],
             'successCount': 0,
-            'failedCount': total_records,
-            'errors': [{"row": 0, "errors": [f"Database error: {str(e)}"]}]
+            'failedCount': validation['failedCount'],
+            'errors': [{"row": 0, "errors": [validation['error']]}],
+            'rowErrors': []
         }
-    
-    # Return the results
+
+    results = importer.insert(validation['validRows'], validation['validRowLabels'])
+    errors = sorted(
+        [{"row": error['row'], "errors": error['errors']} for error in validation['errors']] +
+        [{"row": error['row'], "errors": error['errors']} for error in results['errors']],
+        key=lambda error: error['row']
+    )
+    failed_count = validation['failedCount'] + results['failedCount']
+
     return {
         'success': failed_count == 0,
-        'totalRecords': total_records,
-        'successCount': success_count,
+        'totalRecords': validation['totalRecords'],
+        'successCount': results['successCount'],
         'failedCount': failed_count,
-        'errors': errors
+        'errors': errors,
+        'rowErrors': validation['rowErrors'] + results['rowErrors']
     }
 
-async def get_company_areas(company_id):
+@offload
+def get_company_areas(company_id):
     """Get all areas for a company for dropdown population"""
     areas = Area.query.filter_by(company_id=company_id, is_active=True).all()
     return [{'id': str(area.id), 'name': area.name} for area in areas]
 
-async def get_company_service_plans(company_id):
+@offload
+def get_company_service_plans(company_id):
     """Get all service plans for a company for dropdown population"""
     service_plans = ServicePlan.query.filter_by(company_id=company_id, is_active=True).all()
     return [{'id': str(plan.id), 'name': plan.name} for plan in service_plans]
 
-async def get_company_isps(company_id):
+@offload
+def get_company_isps(company_id):
     """Get all ISPs for a company for dropdown population"""
     isps = ISP.query.filter_by(company_id=company_id, is_active=True).all()
     return [{'id': str(isp.id), 'name': isp.name} for isp in isps]
 
 
-import traceback
-
-async def validate_bulk_customers(df, company_id):
+@offload
+def validate_bulk_customers(df, company_id, importer=None):
     """
     Validate bulk customer data without saving to database
     Returns detailed validation results with field-specific errors
     """
     try:
-        print(f"Starting bulk customer validation for company_id: {company_id}")
-        logger.info(f"Starting bulk customer validation for company_id: {company_id}")
-        
         # Validate input parameters
         if df is None or df.empty:
             error_msg = "Input DataFrame is None or empty"
-            print(f"ERROR: {error_msg}")
             logger.error(error_msg)
             return {
                 'success': False,
@@ -1159,7 +1089,6 @@ async def validate_bulk_customers(df, company_id):
         
         if company_id is None:
             error_msg = "Company ID is required"
-            print(f"ERROR: {error_msg}")
             logger.error(error_msg)
             return {
                 'success': False,
@@ -1171,48 +1100,12 @@ async def validate_bulk_customers(df, company_id):
                 'errors': []
             }
         
-        # Initialize counters and tracking
         total_records = len(df)
-        success_count = 0
-        failed_count = 0
-        errors = []
-        valid_rows = []
-        
-        print(f"Processing {total_records} records")
-        logger.info(f"Processing {total_records} records")
-        
-        # Required fields - CORE COLUMNS
-        required_fields = [
-            'internet_id', 'first_name', 'last_name', 'email', 'phone_1',
-            'area_id', 'installation_address', 'service_plan_id', 'isp_id',
-            'connection_type', 'cnic', 'installation_date'
-        ]
-        
-        # All possible columns to preserve (including optional ones)
-        all_columns = [
-            'internet_id', 'first_name', 'last_name', 'email', 'phone_1', 'phone_2',
-            'area_id', 'installation_address', 'service_plan_id', 'isp_id',
-            'connection_type', 'internet_connection_type', 'tv_cable_connection_type',
-            'installation_date', 'cnic', 'gps_coordinates',
-            # Optional fields
-            'wire_length', 'wire_ownership', 'router_ownership', 'router_id',
-            'router_serial_number', 'patch_cord_ownership', 'patch_cord_count',
-            'patch_cord_ethernet_ownership', 'patch_cord_ethernet_count',
-            'splicing_box_ownership', 'splicing_box_serial_number',
-            'ethernet_cable_ownership', 'ethernet_cable_length',
-            'dish_ownership', 'dish_id', 'dish_mac_address',
-            'node_count', 'stb_serial_number', 'discount_amount',
-            'recharge_date', 'miscellaneous_details', 'miscellaneous_charges'
-        ]
-        
-        print(f"Required fields: {required_fields}")
-        print(f"Available columns in DataFrame: {df.columns.tolist()}")
         
         # Check if required columns exist in DataFrame
-        missing_columns = [field for field in required_fields if field not in df.columns]
+        missing_columns = [field for field in REQUIRED_FIELDS if field not in df.columns]
         if missing_columns:
             error_msg = f"Missing required columns in CSV: {missing_columns}"
-            print(f"ERROR: {error_msg}")
             logger.error(error_msg)
             return {
                 'success': False,
@@ -1224,360 +1117,14 @@ async def validate_bulk_customers(df, company_id):
                 'errors': [{'row': 'all', 'fieldErrors': {col: error_msg for col in missing_columns}, 'errors': [error_msg], 'data': {}}]
             }
         
-        # Validate each row
-        for index, row in df.iterrows():
-            try:
-                print(f"Validating row {index + 1}/{total_records}")
-                
-                field_errors = {}  # Changed to dictionary for field-specific errors
-                general_errors = []  # For non-field specific errors
-                
-                # Convert row to dict and preserve ALL columns
-                row_data = {}
-                for col in all_columns:
-                    if col in df.columns:
-                        value = row[col]
-                        # Convert NaN to None
-                        if pd.isna(value):
-                            row_data[col] = None
-                        else:
-                            row_data[col] = value
-                    else:
-                        row_data[col] = None
-                
-                # Check for missing required fields
-                for field in required_fields:
-                    try:
-                        if field not in row or pd.isna(row[field]) or str(row[field]).strip() == '':
-                            error_msg = f"Missing required field: {field}"
-                            field_errors[field] = error_msg
-                            print(f"  Row {index}: {error_msg}")
-                    except Exception as e:
-                        error_msg = f"Error checking field {field}: {str(e)}"
-                        field_errors[field] = error_msg
-                        print(f"  Row {index}: {error_msg}")
-                        logger.error(f"Row {index}: {error_msg}", exc_info=True)
-                
-                # If there are missing required fields, add to errors and continue
-                if field_errors:
-                    all_errors = list(field_errors.values()) + general_errors
-                    errors.append({
-                        "row": index, 
-                        "fieldErrors": field_errors,  # Field-specific errors
-                        "errors": all_errors,  # All errors for backward compatibility
-                        "data": row_data  # Include ALL columns
-                    })
-                    failed_count += 1
-                    print(f"  Row {index}: Failed validation due to missing required fields")
-                    continue
-                
-                # Detailed field validation
-                try:
-                    # Email format validation
-                    email = str(row['email']).strip()
-                    email_pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-                    if not re.match(email_pattern, email):
-                        error_msg = "Invalid email format"
-                        field_errors['email'] = error_msg
-                        print(f"  Row {index}: {error_msg} - {email}")
-                except Exception as e:
-                    error_msg = f"Error validating email: {str(e)}"
-                    field_errors['email'] = error_msg
-                    print(f"  Row {index}: {error_msg}")
-                    logger.error(f"Row {index}: {error_msg}", exc_info=True)
-                
-                try:
-                    # Phone number validation
-                    phone_1 = str(row['phone_1']).strip()
-                    phone_1 = ''.join(filter(str.isdigit, phone_1))
-                    if not phone_1.startswith('92'):
-                        phone_1 = '92' + phone_1
-                    if len(phone_1) < 10 or len(phone_1) > 13:
-                        error_msg = "Invalid phone number format for phone_1"
-                        field_errors['phone_1'] = error_msg
-                        print(f"  Row {index}: {error_msg} - {phone_1}")
-                    else:
-                        row_data['phone_1'] = phone_1  # Update with formatted phone
-                except Exception as e:
-                    error_msg = f"Error validating phone_1: {str(e)}"
-                    field_errors['phone_1'] = error_msg
-                    print(f"  Row {index}: {error_msg}")
-                    logger.error(f"Row {index}: {error_msg}", exc_info=True)
-                
-                try:
-                    # Phone_2 validation if provided
-                    if 'phone_2' in row and not pd.isna(row['phone_2']) and str(row['phone_2']).strip() != '':
-                        phone_2 = str(row['phone_2']).strip()
-                        phone_2 = ''.join(filter(str.isdigit, phone_2))
-                        if not phone_2.startswith('92'):
-                            phone_2 = '92' + phone_2
-                        if len(phone_2) < 10 or len(phone_2) > 13:
-                            error_msg = "Invalid phone number format for phone_2"
-                            field_errors['phone_2'] = error_msg
-                            print(f"  Row {index}: {error_msg} - {phone_2}")
-                        else:
-                            row_data['phone_2'] = phone_2  # Update with formatted phone
-                except Exception as e:
-                    error_msg = f"Error validating phone_2: {str(e)}"
-                    field_errors['phone_2'] = error_msg
-                    print(f"  Row {index}: {error_msg}")
-                    logger.error(f"Row {index}: {error_msg}", exc_info=True)
-                
-                try:
-                    # CNIC validation
-                    cnic = str(row['cnic']).strip()
-                    cnic = ''.join(filter(str.isdigit, cnic))
-                    if len(cnic) != 13:
-                        error_msg = "CNIC must be exactly 13 digits"
-                        field_errors['cnic'] = error_msg
-                        print(f"  Row {index}: {error_msg} - {cnic} (length: {len(cnic)})")
-                    else:
-                        row_data['cnic'] = cnic  # Update with cleaned CNIC
-                except Exception as e:
-                    error_msg = f"Error validating CNIC: {str(e)}"
-                    field_errors['cnic'] = error_msg
-                    print(f"  Row {index}: {error_msg}")
-                    logger.error(f"Row {index}: {error_msg}", exc_info=True)
-                
-                try:
-                    # Connection type validation
-                    connection_type = str(row['connection_type']).strip().lower()
-                    valid_connection_types = ['internet', 'tv_cable', 'both']
-                    if connection_type not in valid_connection_types:
-                        error_msg = f"connection_type must be one of: {', '.join(valid_connection_types)}"
-                        field_errors['connection_type'] = error_msg
-                        print(f"  Row {index}: {error_msg} - got '{connection_type}'")
-                    else:
-                        row_data['connection_type'] = connection_type  # Update with normalized value
-                except Exception as e:
-                    error_msg = f"Error validating connection_type: {str(e)}"
-                    field_errors['connection_type'] = error_msg
-                    print(f"  Row {index}: {error_msg}")
-                    logger.error(f"Row {index}: {error_msg}", exc_info=True)
-                
-                try:
-                    # Conditional validation for connection types
-                    if connection_type in ['internet', 'both']:
-                        if 'internet_connection_type' not in row or pd.isna(row['internet_connection_type']) or str(row['internet_connection_type']).strip() == '':
-                            error_msg = "internet_connection_type is required when connection_type is internet or both"
-                            field_errors['internet_connection_type'] = error_msg
-                            print(f"  Row {index}: {error_msg}")
-                        else:
-                            internet_connection_type = str(row['internet_connection_type']).strip().lower()
-                            valid_internet_types = ['wire', 'wireless']
-                            if internet_connection_type not in valid_internet_types:
-                                error_msg = f"internet_connection_type must be one of: {', '.join(valid_internet_types)}"
-                                field_errors['internet_connection_type'] = error_msg
-                                print(f"  Row {index}: {error_msg} - got '{internet_connection_type}'")
-                            else:
-                                row_data['internet_connection_type'] = internet_connection_type
-                except Exception as e:
-                    error_msg = f"Error validating internet_connection_type: {str(e)}"
-                    field_errors['internet_connection_type'] = error_msg
-                    print(f"  Row {index}: {error_msg}")
-                    logger.error(f"Row {index}: {error_msg}", exc_info=True)
-                
-                try:
-                    if connection_type in ['tv_cable', 'both']:
-                        if 'tv_cable_connection_type' not in row or pd.isna(row['tv_cable_connection_type']) or str(row['tv_cable_connection_type']).strip() == '':
-                            error_msg = "tv_cable_connection_type is required when connection_type is tv_cable or both"
-                            field_errors['tv_cable_connection_type'] = error_msg
-                            print(f"  Row {index}: {error_msg}")
-                        else:
-                            tv_cable_connection_type = str(row['tv_cable_connection_type']).strip().lower()
-                            valid_tv_types = ['analog', 'digital']
-                            if tv_cable_connection_type not in valid_tv_types:
-                                error_msg = f"tv_cable_connection_type must be one of: {', '.join(valid_tv_types)}"
-                                field_errors['tv_cable_connection_type'] = error_msg
-                                print(f"  Row {index}: {error_msg} - got '{tv_cable_connection_type}'")
-                            else:
-                                row_data['tv_cable_connection_type'] = tv_cable_connection_type
-                except Exception as e:
-                    error_msg = f"Error validating tv_cable_connection_type: {str(e)}"
-                    field_errors['tv_cable_connection_type'] = error_msg
-                    print(f"  Row {index}: {error_msg}")
-                    logger.error(f"Row {index}: {error_msg}", exc_info=True)
-                
-                try:
-                    # Date validation
-                    installation_date = row['installation_date']
-                    if isinstance(installation_date, str):
-                        # Try parsing the date
-                        parsed_date = datetime.strptime(installation_date, '%Y-%m-%d').date()
-                        row_data['installation_date'] = parsed_date.isoformat()
-                    elif isinstance(installation_date, pd.Timestamp):
-                        row_data['installation_date'] = installation_date.date().isoformat()
-                    else:
-                        error_msg = "Invalid installation_date format. Use YYYY-MM-DD"
-                        field_errors['installation_date'] = error_msg
-                        print(f"  Row {index}: {error_msg} - got type {type(installation_date)}")
-                except (ValueError, TypeError) as e:
-                    error_msg = f"Invalid installation_date format. Use YYYY-MM-DD - {str(e)}"
-                    field_errors['installation_date'] = error_msg
-                    print(f"  Row {index}: {error_msg}")
-                except Exception as e:
-                    error_msg = f"Error validating installation_date: {str(e)}"
-                    field_errors['installation_date'] = error_msg
-                    print(f"  Row {index}: {error_msg}")
-                    logger.error(f"Row {index}: {error_msg}", exc_info=True)
-                
-                try:
-                    # UUID validation and database checks
-                    area_id = uuid.UUID(str(row['area_id']).strip())
-                    service_plan_id = uuid.UUID(str(row['service_plan_id']).strip())
-                    isp_id = uuid.UUID(str(row['isp_id']).strip())
-                    
-                    print(f"  Row {index}: UUIDs validated - Area: {area_id}, ServicePlan: {service_plan_id}, ISP: {isp_id}")
-                    
-                    # Update row_data with validated UUIDs
-                    row_data['area_id'] = str(area_id)
-                    row_data['service_plan_id'] = str(service_plan_id)
-                    row_data['isp_id'] = str(isp_id)
-                    
-                    # Database existence checks
-                    try:
-                        area = Area.query.get(area_id)
-                        if not area:
-                            error_msg = f"Area with ID {area_id} does not exist"
-                            field_errors['area_id'] = error_msg
-                            print(f"  Row {index}: {error_msg}")
-                    except Exception as e:
-                        error_msg = f"Error checking Area existence: {str(e)}"
-                        field_errors['area_id'] = error_msg
-                        print(f"  Row {index}: {error_msg}")
-                        logger.error(f"Row {index}: {error_msg}", exc_info=True)
-                    
-                    try:
-                        service_plan = ServicePlan.query.get(service_plan_id)
-                        if not service_plan:
-                            error_msg = f"Service Plan with ID {service_plan_id} does not exist"
-                            field_errors['service_plan_id'] = error_msg
-                            print(f"  Row {index}: {error_msg}")
-                    except Exception as e:
-                        error_msg = f"Error checking ServicePlan existence: {str(e)}"
-                        field_errors['service_plan_id'] = error_msg
-                        print(f"  Row {index}: {error_msg}")
-                        logger.error(f"Row {index}: {error_msg}", exc_info=True)
-                    
-                    try:
-                        isp = ISP.query.get(isp_id)
-                        if not isp:
-                            error_msg = f"ISP with ID {isp_id} does not exist"
-                            field_errors['isp_id'] = error_msg
-                            print(f"  Row {index}: {error_msg}")
-                    except Exception as e:
-                        error_msg = f"Error checking ISP existence: {str(e)}"
-                        field_errors['isp_id'] = error_msg
-                        print(f"  Row {index}: {error_msg}")
-                        logger.error(f"Row {index}: {error_msg}", exc_info=True)
-                        
-                except ValueError as e:
-                    error_msg = f"Invalid UUID format for area_id, service_plan_id, or isp_id: {str(e)}"
-                    field_errors['area_id'] = error_msg
-                    field_errors['service_plan_id'] = error_msg
-                    field_errors['isp_id'] = error_msg
-                    print(f"  Row {index}: {error_msg}")
-                except Exception as e:
-                    error_msg = f"Error validating UUIDs: {str(e)}"
-                    field_errors['area_id'] = error_msg
-                    field_errors['service_plan_id'] = error_msg
-                    field_errors['isp_id'] = error_msg
-                    print(f"  Row {index}: {error_msg}")
-                    logger.error(f"Row {index}: {error_msg}", exc_info=True)
-                
-                try:
-                    # Check for duplicates
-                    existing_customer = Customer.query.filter(
-                        (Customer.internet_id == str(row['internet_id']).strip()) | 
-                        (Customer.email == email)
-                    ).first()
-                    
-                    if existing_customer:
-                        if existing_customer.internet_id == str(row['internet_id']).strip():
-                            error_msg = f"Customer with internet_id {row['internet_id']} already exists"
-                            field_errors['internet_id'] = error_msg
-                            print(f"  Row {index}: {error_msg}")
-                        if existing_customer.email == email:
-                            error_msg = f"Customer with email {email} already exists"
-                            field_errors['email'] = error_msg
-                            print(f"  Row {index}: {error_msg}")
-                except Exception as e:
-                    error_msg = f"Error checking for duplicate customers: {str(e)}"
-                    general_errors.append(error_msg)
-                    print(f"  Row {index}: {error_msg}")
-                    logger.error(f"Row {index}: {error_msg}", exc_info=True)
-                
-                # Categorize row with ALL columns preserved
-                all_errors = list(field_errors.values()) + general_errors
-                if all_errors:
-                    errors.append({
-                        "row": index, 
-                        "fieldErrors": field_errors,  # Field-specific errors
-                        "errors": all_errors,  # All errors for backward compatibility
-                        "data": row_data  # Contains ALL columns
-                    })
-                    failed_count += 1
-                    print(f"  Row {index}: FAILED with {len(all_errors)} errors")
-                else:
-                    valid_rows.append(row_data)  # Contains ALL columns
-                    success_count += 1
-                    print(f"  Row {index}: PASSED validation")
-                    
-            except Exception as e:
-                error_msg = f"Unexpected error processing row {index}: {str(e)}"
-                print(f"ERROR: {error_msg}")
-                logger.error(error_msg, exc_info=True)
-                
-                # Still preserve all row data
-                row_dict = {}
-                for col in all_columns:
-                    if col in df.columns:
-                        value = row[col]
-                        row_dict[col] = None if pd.isna(value) else value
-                    else:
-                        row_dict[col] = None
-                
-                errors.append({
-                    "row": index, 
-                    "fieldErrors": {'general': error_msg},  # Field-specific errors
-                    "errors": [error_msg],  # All errors for backward compatibility
-                    "data": row_dict
-                })
-                failed_count += 1
-        
-        # Final summary
-        print(f"\nValidation Summary:")
-        print(f"Total Records: {total_records}")
-        print(f"Success Count: {success_count}")
-        print(f"Failed Count: {failed_count}")
-        print(f"Success Rate: {(success_count/total_records)*100:.2f}%" if total_records > 0 else "N/A")
-        
-        logger.info(f"Validation completed - Total: {total_records}, Success: {success_count}, Failed: {failed_count}")
-        
-        if errors:
-            print(f"\nFirst 5 errors:")
-            for i, error in enumerate(errors[:5]):
-                print(f"  Row {error['row']}: {error['fieldErrors']}")
-        
-        result = {
-            'success': failed_count == 0,
-            'totalRecords': total_records,
-            'successCount': success_count,
-            'failedCount': failed_count,
-            'validRows': valid_rows,
-            'errors': errors
-        }
-        
-        # Return as dictionary (NOT JSON string)
-        return result
+        importer = importer or BulkCustomerImporter(company_id)
+        return importer.validate(df)
         
     except Exception as e:
         error_msg = f"Critical error in validate_bulk_customers: {str(e)}"
-        print(f"CRITICAL ERROR: {error_msg}")
         logger.error(error_msg, exc_info=True)
-        print(f"Traceback: {traceback.format_exc()}")
         
-        result = {
+        return {
             'success': False,
             'error': error_msg,
             'totalRecords': len(df) if df is not None else 0,
@@ -1586,139 +1133,22 @@ async def validate_bulk_customers(df, company_id):
             'validRows': [],
             'errors': [{'row': 'function', 'fieldErrors': {'general': error_msg}, 'errors': [error_msg], 'data': {}}]
         }
-        
-        return result
 
 
-# Update process_validated_customers to handle all columns
-async def process_validated_customers(validated_data, company_id, user_role, current_user_id, ip_address, user_agent):
+@offload
+def process_validated_customers(validated_data, company_id, user_role, current_user_id, ip_address, user_agent):
     """
     Process pre-validated customer data and save to database
     Handles all core and optional columns
     """
-    success_count = 0
-    failed_count = 0
-    errors = []
-    
-    print(f"Processing {len(validated_data)} validated customer records")
     logger.info(f"Processing {len(validated_data)} validated customer records")
     
-    for index, customer_data in enumerate(validated_data):
-        try:
-            print(f"Processing record {index + 1}/{len(validated_data)}")
-            
-            # Format the data properly with all fields
-            formatted_data = {
-                'company_id': company_id,
-                # Core required fields
-                'area_id': str(customer_data.get('area_id')),
-                'service_plan_id': str(customer_data.get('service_plan_id')),
-                'isp_id': str(customer_data.get('isp_id')),
-                'first_name': str(customer_data.get('first_name', '')).strip(),
-                'last_name': str(customer_data.get('last_name', '')).strip(),
-                'email': str(customer_data.get('email', '')).strip(),
-                'internet_id': str(customer_data.get('internet_id', '')).strip(),
-                'phone_1': format_phone_number(customer_data.get('phone_1')),
-                'installation_address': str(customer_data.get('installation_address', '')).strip(),
-                'installation_date': customer_data.get('installation_date'),
-                'connection_type': str(customer_data.get('connection_type', '')).strip().lower(),
-                'cnic': ''.join(filter(str.isdigit, str(customer_data.get('cnic', '')))),
-                'is_active': True
-            }
-            
-            # Add optional phone_2 if provided
-            if customer_data.get('phone_2'):
-                formatted_data['phone_2'] = format_phone_number(customer_data.get('phone_2'))
-            
-            # Add connection type specific fields
-            if customer_data.get('internet_connection_type'):
-                formatted_data['internet_connection_type'] = str(customer_data.get('internet_connection_type')).strip().lower()
-            
-            if customer_data.get('tv_cable_connection_type'):
-                formatted_data['tv_cable_connection_type'] = str(customer_data.get('tv_cable_connection_type')).strip().lower()
-            
-            # Add GPS coordinates if provided
-            if customer_data.get('gps_coordinates'):
-                formatted_data['gps_coordinates'] = str(customer_data.get('gps_coordinates')).strip()
-            
-            # Add all other optional fields if they exist and are not empty
-            optional_fields = [
-                'wire_length', 'wire_ownership', 'router_ownership', 'router_id',
-                'router_serial_number', 'patch_cord_ownership', 'patch_cord_count',
-                'patch_cord_ethernet_ownership', 'patch_cord_ethernet_count',
-                'splicing_box_ownership', 'splicing_box_serial_number',
-                'ethernet_cable_ownership', 'ethernet_cable_length',
-                'dish_ownership', 'dish_id', 'dish_mac_address',
-                'node_count', 'stb_serial_number', 'discount_amount',
-                'recharge_date', 'miscellaneous_details', 'miscellaneous_charges'
-            ]
-            
-            for field in optional_fields:
-                if customer_data.get(field) is not None and str(customer_data.get(field)).strip() != '':
-                    # Handle numeric fields
-                    if field in ['wire_length', 'ethernet_cable_length', 'discount_amount', 'miscellaneous_charges']:
-                        try:
-                            formatted_data[field] = float(customer_data[field])
-                        except (ValueError, TypeError):
-                            pass
-                    # Handle integer fields
-                    elif field in ['patch_cord_count', 'patch_cord_ethernet_count', 'node_count']:
-                        try:
-                            formatted_data[field] = int(customer_data[field])
-                        except (ValueError, TypeError):
-                            pass
-                    # Handle UUID fields
-                    elif field in ['router_id', 'dish_id']:
-                        try:
-                            formatted_data[field] = str(uuid.UUID(str(customer_data[field])))
-                        except (ValueError, TypeError):
-                            pass
-                    # Handle date fields
-                    elif field == 'recharge_date':
-                        try:
-                            if isinstance(customer_data[field], str):
-                                formatted_data[field] = datetime.strptime(customer_data[field], '%Y-%m-%d').date()
-                            else:
-                                formatted_data[field] = customer_data[field]
-                        except (ValueError, TypeError):
-                            pass
-                    # Handle string fields
-                    else:
-                        formatted_data[field] = str(customer_data[field]).strip()
-            
-            # Create the customer using the existing add_customer function
-            new_customer = await add_customer(
-                formatted_data, 
-                user_role, 
-                current_user_id, 
-                ip_address, 
-                user_agent, 
-                company_id
-            )
-            
-            success_count += 1
-            print(f"  Successfully created customer: {formatted_data['internet_id']}")
-            
-        except Exception as e:
-            error_msg = f"Error creating customer: {str(e)}"
-            print(f"  Error on record {index + 1}: {error_msg}")
-            logger.error(f"Error processing record {index}: {error_msg}", exc_info=True)
-            
-            errors.append({
-                "row": index, 
-                "errors": [error_msg],
-                "data": customer_data
-            })
-            failed_count += 1
-    
-    # Commit all successful additions
     try:
-        db.session.commit()
-        print(f"Successfully committed {success_count} customer records to database")
+        importer = BulkCustomerImporter(company_id, current_user_id, ip_address, user_agent)
+        return importer.insert(validated_data)
     except Exception as e:
         db.session.rollback()
-        error_msg = f"Database error during commit: {str(e)}"
-        print(f"ERROR: {error_msg}")
+        error_msg = f"Database error during import: {str(e)}"
         logger.error(error_msg, exc_info=True)
         
         return {
@@ -1731,17 +1161,3 @@ async def process_validated_customers(validated_data, company_id, user_role, cur
                 "errors": [error_msg]
             }]
         }
-    
-    # Return the results
-    result = {
-        'success': failed_count == 0,
-        'totalRecords': len(validated_data),
-        'successCount': success_count,
-        'failedCount': failed_count,
-        'errors': errors
-    }
-    
-    print(f"\nProcessing Summary:")
-    print(f"Total: {result['totalRecords']}, Success: {result['successCount']}, Failed: {result['failedCount']}")
-    
-    return result
\ No newline at end of file
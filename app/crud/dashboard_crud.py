@@ -1,6 +1,10 @@
 from app import db
-from app.models import Customer, Invoice, Payment,ISPPayment, Complaint, InventoryItem, User, BankAccount, ServicePlan, Area, Task, Supplier, InventoryAssignment, InventoryTransaction,Expense, ExtraIncome
-from sqlalchemy import func, case
+from app.utils.read_replica import read_replica
+from app.utils.parallel_queries import run_parallel
+from app.utils.keyset_pagination import keyset_page
+from flask import current_app
+from app.models import Customer, Invoice, Payment,ISPPayment, Complaint, InventoryItem, User, BankAccount, ServicePlan, Area, Task, Supplier, InventoryAssignment, InventoryTransaction,Expense, ExtraIncome, FinancialDailyRollup, FinancialMonthlyRollup
+from sqlalchemy import func, case, true, cast, literal, String
 from datetime import datetime, timedelta
 from decimal import Decimal
 import logging
@@ -16,64 +20,88 @@ def _signed_payment_amount():
     # Refund invoices should subtract from collections
     return case((Invoice.invoice_type == 'refund', -Payment.amount), else_=Payment.amount)
 
+def _rollup_monthly_series(company_id, flow_type, start_date, end_date=None):
+    # Sum the daily rollups of one flow type from start_date (inclusive) and
+    # bucket them by month, so partial first/last months stay exact
+    query = db.session.query(
+        FinancialDailyRollup.period_start,
+        func.sum(FinancialDailyRollup.amount)
+    ).filter(
+        FinancialDailyRollup.company_id == company_id,
+        FinancialDailyRollup.flow_type == flow_type,
+        FinancialDailyRollup.period_start >= start_date
+    )
+    if end_date is not None:
+        query = query.filter(FinancialDailyRollup.period_start <= end_date)
+
+    series = {}
+    for day, amount in query.group_by(FinancialDailyRollup.period_start).all():
+        month = day.replace(day=1)
+        series[month] = series.get(month, Decimal(0)) + (amount or 0)
+    return dict(sorted(series.items()))
+
+@read_replica
 def get_executive_summary_data(company_id):
     if not company_id:
         return {'error': 'Invalid company_id. Please provide a valid company ID.'}
 
     try:
-        # Fetch data from the database
-        customers = Customer.query.filter_by(company_id=company_id).all()
-        invoices = Invoice.query.filter_by(company_id=company_id).all()
-        complaints = Complaint.query.join(Customer).filter(Customer.company_id == company_id).all()
-        service_plans = ServicePlan.query.filter_by(company_id=company_id).all()
-
-        if not customers:
-            print(f"No customers found for company_id {company_id}")
-        if not invoices:
-            print(f"No invoices found for company_id {company_id}")
-        if not complaints:
-            print(f"No complaints found for company_id {company_id}")
-        if not service_plans:
-            print(f"No service plans found for company_id {company_id}")
-
-        # Calculate metrics
-        total_active_customers = sum(1 for c in customers if c.is_active)
-        monthly_recurring_revenue = sum(float(i.total_amount) for i in invoices if i.invoice_type == 'subscription')
-        outstanding_payments = sum(float(i.total_amount) for i in invoices if i.status == 'pending')
-        active_complaints = sum(1 for c in complaints if c.status in ['open', 'in_progress'])
-
-        # Generate customer growth data (last 6 months)
+        # Month-end boundaries for the customer growth series (last 6 months)
         today = datetime.now(UTC)
-        customer_growth_data = []
+        growth_months = []
         for i in range(5, -1, -1):
-            try:
-                month_start = (today.replace(day=1) - timedelta(days=30 * i)).replace(tzinfo=UTC)
-                month_end = (month_start + timedelta(days=32)).replace(day=1, tzinfo=UTC) - timedelta(days=1)
-                customer_count = sum(1 for c in customers if c.created_at.replace(tzinfo=UTC) <= month_end)
-                customer_growth_data.append({
-                    'month': month_start.strftime('%b'),
-                    'customers': customer_count
-                })
-            except Exception as e:
-                print(f"Error generating growth data for month index {i}: {e}")
-
-        # Generate service plan distribution data
-        service_plan_data = []
-        for plan in service_plans:
-            try:
-                count = sum(1 for c in customers if c.service_plan_id == plan.id)
-                service_plan_data.append({
-                    'name': plan.name,
-                    'value': count
-                })
-            except Exception as e:
-                print(f"Error processing service plan {plan.name}: {e}")
+            month_start = (today.replace(day=1) - timedelta(days=30 * i)).replace(tzinfo=UTC)
+            month_end = (month_start + timedelta(days=32)).replace(day=1, tzinfo=UTC) - timedelta(days=1)
+            growth_months.append((month_start.strftime('%b'), month_end))
+
+        # One aggregate row per table; the three one-row subqueries are cross joined
+        # so every count and sum comes back in a single round trip
+        customer_stats = db.session.query(
+            func.count(Customer.id).filter(Customer.is_active == True).label('total_active_customers'),
+            *[
+                func.count(Customer.id).filter(Customer.created_at <= month_end).label(f'growth_{index}')
+                for index, (_, month_end) in enumerate(growth_months)
+            ]
+        ).filter(Customer.company_id == company_id).subquery()
+
+        invoice_stats = db.session.query(
+            func.coalesce(func.sum(Invoice.total_amount).filter(Invoice.invoice_type == 'subscription'), 0).label('monthly_recurring_revenue'),
+            func.coalesce(func.sum(Invoice.total_amount).filter(Invoice.status == 'pending'), 0).label('outstanding_payments')
+        ).filter(Invoice.company_id == company_id).subquery()
+
+        complaint_stats = db.session.query(
+            func.count(Complaint.id).filter(Complaint.status.in_(['open', 'in_progress'])).label('active_complaints')
+        ).join(Customer, Complaint.customer_id == Customer.id).filter(Customer.company_id == company_id).subquery()
+
+        summary = db.session.query(customer_stats, invoice_stats, complaint_stats).select_from(customer_stats).join(
+            invoice_stats, true()
+        ).join(
+            complaint_stats, true()
+        ).one()
+
+        customer_growth_data = [
+            {'month': label, 'customers': getattr(summary, f'growth_{index}')}
+            for index, (label, _) in enumerate(growth_months)
+        ]
+
+        # Service plan distribution, including plans with no customers
+        plan_counts = db.session.query(
+            ServicePlan.name,
+            func.count(Customer.id)
+        ).outerjoin(
+            Customer,
+            (Customer.service_plan_id == ServicePlan.id) & (Customer.company_id == company_id)
+        ).filter(
+            ServicePlan.company_id == company_id
+        ).group_by(ServicePlan.id, ServicePlan.name).order_by(ServicePlan.created_at, ServicePlan.name).all()
+
+        service_plan_data = [{'name': name, 'value': count} for name, count in plan_counts]
 
         return {
-            'total_active_customers': total_active_customers,
-            'monthly_recurring_revenue': monthly_recurring_revenue,
-            'outstanding_payments': outstanding_payments,
-            'active_complaints': active_complaints,
+            'total_active_customers': summary.total_active_customers,
+            'monthly_recurring_revenue': float(summary.monthly_recurring_revenue),
+            'outstanding_payments': float(summary.outstanding_payments),
+            'active_complaints': summary.active_complaints,
             'customer_growth_data': customer_growth_data,
             'service_plan_data': service_plan_data
         }
@@ -90,6 +118,7 @@ def get_executive_summary_data(company_id):
         }
 
 
+@read_replica
 def get_customer_analytics_data(company_id):
     try:
         today = datetime.now(UTC)
@@ -170,6 +199,7 @@ def get_customer_analytics_data(company_id):
         print(f"Unexpected error in get_customer_analytics_data: {e}")
         return {'error': 'An unexpected error occurred while fetching customer analytics data.'}
 
+@read_replica
 def get_financial_analytics_data(company_id):
     try:
         today = datetime.now()
@@ -180,26 +210,22 @@ def get_financial_analytics_data(company_id):
             raise ValueError("Invalid company_id provided.")
 
         # Calculate monthly revenue for the last 6 months
-        monthly_revenue = db.session.query(
-            func.date_trunc('month', Invoice.billing_start_date).label('month'),
-            func.sum(Invoice.total_amount).label('revenue')
-        ).filter(
-            Invoice.company_id == company_id,
-            Invoice.billing_start_date >= six_months_ago
-        ).group_by('month').order_by('month').all()
+        monthly_revenue = _rollup_monthly_series(company_id, 'invoice', six_months_ago.date()).items()
 
-        # Calculate revenue by service plan
+        # Calculate revenue by service plan (plan at invoicing time)
         revenue_by_plan = db.session.query(
             ServicePlan.name,
-            func.sum(Invoice.total_amount).label('revenue')
-        ).join(Customer, Customer.id == Invoice.customer_id
-        ).join(ServicePlan, ServicePlan.id == Customer.service_plan_id
-        ).filter(Invoice.company_id == company_id
+            func.sum(FinancialMonthlyRollup.amount).label('revenue')
+        ).join(ServicePlan, ServicePlan.id == FinancialMonthlyRollup.service_plan_id
+        ).filter(
+            FinancialMonthlyRollup.company_id == company_id,
+            FinancialMonthlyRollup.flow_type == 'invoice'
         ).group_by(ServicePlan.name).all()
 
         # Calculate total revenue
-        total_revenue = db.session.query(func.sum(Invoice.total_amount)).filter(
-            Invoice.company_id == company_id
+        total_revenue = db.session.query(func.sum(FinancialMonthlyRollup.amount)).filter(
+            FinancialMonthlyRollup.company_id == company_id,
+            FinancialMonthlyRollup.flow_type == 'invoice'
         ).scalar() or Decimal(0)
 
         # Calculate average revenue per user
@@ -238,6 +264,7 @@ def get_financial_analytics_data(company_id):
         return {'error': 'An unexpected error occurred while fetching financial analytics data.'}
 
 
+@read_replica
 def get_service_support_metrics(company_id):
     try:
         # Get complaints for the last 30 days
@@ -301,6 +328,7 @@ def get_service_support_metrics(company_id):
         print(f"Error fetching service support metrics: {e}")
         return {'error': 'An error occurred while fetching service support metrics.'}
 
+@read_replica
 def get_stock_level_data(company_id):
     try:
         # Query inventory items grouped by item_type instead of name
@@ -317,6 +345,7 @@ def get_stock_level_data(company_id):
         print(f"Error fetching stock level data: {e}")
         return {'error': 'An occurred while fetching stock level data.'}
     
+@read_replica
 def get_inventory_movement_data(company_id):
     try:
         six_months_ago = datetime.utcnow() - timedelta(days=180)
@@ -347,6 +376,7 @@ def get_inventory_movement_data(company_id):
         print(f"Error fetching inventory movement data: {e}")
         return {'error': 'An error occurred while fetching inventory movement data.'}
 
+@read_replica
 def get_inventory_metrics(company_id):
     try:
         # Calculate total inventory value
@@ -409,6 +439,7 @@ def get_inventory_metrics(company_id):
         print(f"Error fetching inventory metrics: {e}")
         return {'error': 'An error occurred while fetching inventory metrics.'}
 
+@read_replica
 def get_inventory_management_data(company_id):
     try:
         return {
@@ -420,6 +451,7 @@ def get_inventory_management_data(company_id):
         print(f"Error fetching inventory management data: {e}")
         return {'error': 'An error occurred while fetching inventory management data.'}
 
+@read_replica
 def get_employee_analytics_data(company_id):
     try:
         # Get performance data
@@ -498,18 +530,33 @@ def get_employee_analytics_data(company_id):
         print(f"Error fetching employee analytics data: {e}")
         return {'error': 'An error occurred while fetching employee analytics data.'}
 
+@read_replica
 def get_area_analytics_data(company_id):
     try:
-        # Get area performance data
-        area_performance = db.session.query(
+        # Get area performance data: customers per area, invoiced revenue
+        # per area (area at invoicing time) from the monthly rollups
+        area_customers = db.session.query(
             Area.name.label('area'),
-            func.count(Customer.id).label('customers'),
-            func.sum(Invoice.total_amount).label('revenue')
+            func.count(Customer.id).label('customers')
         ).join(Customer, Customer.area_id == Area.id
-        ).outerjoin(Invoice, Invoice.customer_id == Customer.id
         ).filter(Area.company_id == company_id
         ).group_by(Area.name).all()
 
+        area_revenue = dict(db.session.query(
+            Area.name,
+            func.sum(FinancialMonthlyRollup.amount)
+        ).join(FinancialMonthlyRollup, FinancialMonthlyRollup.area_id == Area.id
+        ).filter(
+            Area.company_id == company_id,
+            FinancialMonthlyRollup.company_id == company_id,
+            FinancialMonthlyRollup.flow_type == 'invoice'
+        ).group_by(Area.name).all())
+
+        area_performance = [
+            {'area': area.area, 'customers': area.customers or 0, 'revenue': area_revenue.get(area.area) or 0}
+            for area in area_customers
+        ]
+
         # Get service plan distribution data
         service_plan_distribution = db.session.query(
             ServicePlan.name,
@@ -519,17 +566,17 @@ def get_area_analytics_data(company_id):
         ).group_by(ServicePlan.name).all()
 
         # Calculate metrics
-        total_customers = sum(area.customers or 0 for area in area_performance)
-        total_revenue = sum(area.revenue or 0 for area in area_performance)
-        best_performing_area = max(area_performance, key=lambda x: x.revenue or 0, default=None)
+        total_customers = sum(area['customers'] for area in area_performance)
+        total_revenue = sum(area['revenue'] for area in area_performance)
+        best_performing_area = max(area_performance, key=lambda x: x['revenue'], default=None)
         avg_revenue_per_customer = total_revenue / total_customers if total_customers > 0 else 0
 
         return {
             'areaPerformanceData': [
                 {
-                    'area': area.area,
-                    'customers': area.customers or 0,
-                    'revenue': float(area.revenue or 0)
+                    'area': area['area'],
+                    'customers': area['customers'],
+                    'revenue': float(area['revenue'])
                 } for area in area_performance
             ],
             'servicePlanDistributionData': [
@@ -541,7 +588,7 @@ def get_area_analytics_data(company_id):
             'metrics': {
                 'totalCustomers': total_customers,
                 'totalRevenue': float(total_revenue),
-                'bestPerformingArea': best_performing_area.area if best_performing_area else None,
+                'bestPerformingArea': best_performing_area['area'] if best_performing_area else None,
                 'avgRevenuePerCustomer': float(avg_revenue_per_customer)
             }
         }
@@ -549,6 +596,7 @@ def get_area_analytics_data(company_id):
         print(f"Error fetching area analytics data: {e}")
         return {'error': 'An error occurred while fetching area analytics data.'}
 
+@read_replica
 def get_service_plan_analytics_data(company_id):
     try:
         # Get service plan performance data
@@ -607,20 +655,19 @@ def get_service_plan_analytics_data(company_id):
         print(f"Error fetching service plan analytics data: {e}")
         return {'error': 'An error occurred while fetching service plan analytics data.'}
 
+@read_replica
 def get_recovery_collections_data(company_id):
     try:
-        # Get recovery performance data for the last 6 months
+        # Get recovery performance data for the last 6 months: payments
+        # received vs invoices billed per month, from the daily rollups
         end_date = datetime.utcnow()
         start_date = end_date - timedelta(days=180)
-        recovery_performance = db.session.query(
-            func.date_trunc('month', Payment.payment_date).label('month'),
-            func.sum(Payment.amount).label('recovered'),
-            func.sum(Invoice.total_amount).label('total_amount')
-        ).join(Invoice, Payment.invoice_id == Invoice.id
-        ).filter(Payment.company_id == company_id,
-                 Payment.payment_date.between(start_date, end_date)
-        ).group_by('month'
-        ).order_by('month').all()
+        recovered_by_month = _rollup_monthly_series(company_id, 'payment', start_date.date(), end_date.date())
+        invoiced_by_month = _rollup_monthly_series(company_id, 'invoice', start_date.date(), end_date.date())
+        recovery_performance = [
+            (month, recovered_by_month.get(month, 0), invoiced_by_month.get(month, 0))
+            for month in sorted(set(recovered_by_month) | set(invoiced_by_month))
+        ]
 
         # Get outstanding by age data
         current_date = datetime.utcnow().date()
@@ -655,9 +702,14 @@ def get_recovery_collections_data(company_id):
         ).outerjoin(total_payments_subquery, Invoice.id == total_payments_subquery.c.invoice_id
         ).filter(Invoice.company_id == company_id, Invoice.status != 'paid').scalar() or 0
 
-        total_recovered = db.session.query(func.sum(_signed_payment_amount())
-        ).join(Invoice, Payment.invoice_id == Invoice.id
-        ).filter(Payment.company_id == company_id).scalar() or 0
+        # Refund invoices subtract from collections
+        total_recovered = db.session.query(func.sum(case(
+            (FinancialMonthlyRollup.category == 'refund', -FinancialMonthlyRollup.amount),
+            else_=FinancialMonthlyRollup.amount
+        ))).filter(
+            FinancialMonthlyRollup.company_id == company_id,
+            FinancialMonthlyRollup.flow_type == 'payment'
+        ).scalar() or 0
 
         total_invoiced = total_recovered + total_outstanding
         recovery_rate = (total_recovered / total_invoiced * 100) if total_invoiced > 0 else 0
@@ -699,6 +751,7 @@ def get_recovery_collections_data(company_id):
         return {'error': 'An error occurred while fetching recovery and collections data.'}
 
 
+@read_replica
 def get_bank_account_analytics_data(company_id, filters=None):
     try:
         if filters is None:
@@ -950,7 +1003,20 @@ def get_bank_account_analytics_data(company_id, filters=None):
         }
 
 # In get_unified_financial_data function, add initial balance calculations:
-def get_unified_financial_data(company_id, filters=None):
+def _active_bank_account_options(company_id):
+    bank_accounts = BankAccount.query.filter_by(company_id=company_id, is_active=True).all()
+    return [{'id': str(acc.id), 'name': f"{acc.bank_name} - {acc.account_number}"} for acc in bank_accounts]
+
+@read_replica
+def get_unified_financial_data(company_id, filters=None, mode=None):
+    """
+    All financial dashboard sections in one response.
+
+    mode 'parallel' (the DASHBOARD_QUERY_MODE default) runs the sections
+    concurrently on separate connections sharing one snapshot, so latency
+    follows the slowest section rather than the sum; 'serial' runs them one
+    after another in the request's session.
+    """
     try:
         if filters is None:
             filters = {}
@@ -962,17 +1028,31 @@ def get_unified_financial_data(company_id, filters=None):
         payment_method = filters.get('payment_method')
         isp_payment_type = filters.get('isp_payment_type')
 
-        kpi_data = get_financial_kpis(company_id, start_date, end_date, bank_account_id, invoice_status, payment_method, isp_payment_type)
-        cash_flow_data = get_cash_flow_analysis(company_id, start_date, end_date, bank_account_id, payment_method, isp_payment_type)
-        revenue_expense_data = get_revenue_expense_comparison(company_id, start_date, end_date, bank_account_id, invoice_status)
-        bank_performance_data = get_bank_account_performance(company_id, start_date, end_date, bank_account_id)
-        collections_data = get_collections_analysis(company_id, start_date, end_date, bank_account_id, invoice_status)
-        isp_payment_data = get_isp_payment_analysis(company_id, start_date, end_date, bank_account_id, isp_payment_type)
-
-        cash_payments_data = get_cash_payments_data(company_id, start_date, end_date)
-
-        # NEW: Calculate initial balance summary
-        initial_balance_summary = get_initial_balance_summary(company_id, bank_account_id)
+        calls = {
+            'kpis': (get_financial_kpis, (company_id, start_date, end_date, bank_account_id, invoice_status, payment_method, isp_payment_type)),
+            'cash_flow': (get_cash_flow_analysis, (company_id, start_date, end_date, bank_account_id, payment_method, isp_payment_type)),
+            'revenue_expense': (get_revenue_expense_comparison, (company_id, start_date, end_date, bank_account_id, invoice_status)),
+            'bank_performance': (get_bank_account_performance, (company_id, start_date, end_date, bank_account_id)),
+            'collections': (get_collections_analysis, (company_id, start_date, end_date, bank_account_id, invoice_status)),
+            'isp_payments': (get_isp_payment_analysis, (company_id, start_date, end_date, bank_account_id, isp_payment_type)),
+            'cash_payments': (get_cash_payments_data, (company_id, start_date, end_date)),
+            'initial_balance_summary': (get_initial_balance_summary, (company_id, bank_account_id)),
+            'bank_accounts': (_active_bank_account_options, (company_id,))
+        }
+        if (mode or current_app.config.get('DASHBOARD_QUERY_MODE', 'parallel')) == 'parallel':
+            results = run_parallel(calls)
+        else:
+            results = {name: func(*args) for name, (func, args) in calls.items()}
+
+        kpi_data = results['kpis']
+        cash_flow_data = results['cash_flow']
+        revenue_expense_data = results['revenue_expense']
+        bank_performance_data = results['bank_performance']
+        collections_data = results['collections']
+        isp_payment_data = results['isp_payments']
+        cash_payments_data = results['cash_payments']
+        initial_balance_summary = results['initial_balance_summary']
+        bank_accounts_list = results['bank_accounts']
         
         # Update KPI data with initial balance
         kpi_data['total_initial_balance'] = initial_balance_summary['total_initial_balance']
@@ -986,8 +1066,6 @@ def get_unified_financial_data(company_id, filters=None):
         for monthly_trend in cash_flow_data['monthly_trends']:
             monthly_trend['adjusted_flow'] = monthly_trend['net_flow'] + initial_balance_summary['total_initial_balance']
 
-        bank_accounts = BankAccount.query.filter_by(company_id=company_id, is_active=True).all()
-        bank_accounts_list = [{'id': str(acc.id), 'name': f"{acc.bank_name} - {acc.account_number}"} for acc in bank_accounts]
         print('cash_payments_data', cash_payments_data)
         return {
             'kpis': kpi_data,
@@ -1006,6 +1084,7 @@ def get_unified_financial_data(company_id, filters=None):
         return {'error': 'Failed to fetch unified financial data'}
 
 # NEW: Add function to calculate initial balance summary
+@read_replica
 def get_initial_balance_summary(company_id, bank_account_id=None):
     try:
         query = BankAccount.query.filter_by(
@@ -1035,6 +1114,118 @@ def get_initial_balance_summary(company_id, bank_account_id=None):
             'average_balance': 0
         }
 
+CASH_FLOW_GRANULARITIES = ('day', 'week', 'month')
+
+def cash_flow_query(company_id, start_date=None, end_date=None, bank_account_id=None, payment_method=None, isp_payment_type=None, granularity='month'):
+    """
+    Signed cash flows as one UNION ALL of invoice payments (refunds
+    negative), extra income, ISP payments and expenses (both negative),
+    summed per period, bank account and flow type. granularity is 'day',
+    'week' or 'month', or None for totals over the whole range.
+
+    Only paid payments and completed ISP payments count; payment_method
+    narrows payments and extra income, isp_payment_type ISP payments.
+    """
+    if granularity is not None and granularity not in CASH_FLOW_GRANULARITIES:
+        raise ValueError(f"Unsupported granularity: {granularity}")
+
+    def scoped(query, model, date_column):
+        query = query.filter(
+            model.company_id == company_id,
+            model.is_active == True
+        )
+        if start_date: query = query.filter(date_column >= start_date)
+        if end_date: query = query.filter(date_column <= end_date)
+        if bank_account_id and bank_account_id != 'all':
+            query = query.filter(model.bank_account_id == uuid.UUID(bank_account_id))
+        return query
+
+    payments = scoped(db.session.query(
+        Payment.payment_date.label('ts'),
+        Payment.bank_account_id.label('bank_account_id'),
+        literal('collection').label('flow_type'),
+        _signed_payment_amount().label('amount')
+    ).join(Invoice, Payment.invoice_id == Invoice.id
+    ).filter(Payment.status == 'paid'), Payment, Payment.payment_date)
+    if payment_method and payment_method != 'all':
+        payments = payments.filter(Payment.payment_method == payment_method)
+
+    extra_incomes = scoped(db.session.query(
+        ExtraIncome.income_date,
+        ExtraIncome.bank_account_id,
+        literal('extra_income'),
+        ExtraIncome.amount
+    ), ExtraIncome, ExtraIncome.income_date)
+    if payment_method and payment_method != 'all':
+        extra_incomes = extra_incomes.filter(ExtraIncome.payment_method == payment_method)
+
+    isp_payments = scoped(db.session.query(
+        ISPPayment.payment_date,
+        ISPPayment.bank_account_id,
+        literal('isp_payment'),
+        -ISPPayment.amount
+    ).filter(ISPPayment.status == 'completed'), ISPPayment, ISPPayment.payment_date)
+    if isp_payment_type and isp_payment_type != 'all':
+        isp_payments = isp_payments.filter(ISPPayment.payment_type == isp_payment_type)
+
+    expenses = scoped(db.session.query(
+        Expense.expense_date,
+        Expense.bank_account_id,
+        literal('expense'),
+        -Expense.amount
+    ), Expense, Expense.expense_date)
+
+    flows = payments.union_all(extra_incomes, isp_payments, expenses).subquery()
+    columns = [flows.c.bank_account_id, flows.c.flow_type]
+    if granularity is not None:
+        columns.insert(0, func.date_trunc(granularity, flows.c.ts).label('period'))
+    return db.session.query(
+        *columns,
+        func.coalesce(func.sum(flows.c.amount), 0).label('amount')
+    ).group_by(*columns).order_by(*columns)
+
+def _cash_flow_totals(rows):
+    # Sum cash_flow_query rows per flow type across periods and bank
+    # accounts; outflows come back as positive amounts
+    totals = {'collection': Decimal(0), 'extra_income': Decimal(0), 'isp_payment': Decimal(0), 'expense': Decimal(0)}
+    for row in rows:
+        if row.flow_type in ('isp_payment', 'expense'):
+            totals[row.flow_type] -= Decimal(row.amount or 0)
+        else:
+            totals[row.flow_type] += Decimal(row.amount or 0)
+    return totals
+
+def _cash_flow_trends(rows, granularity):
+    # Roll daily cash_flow_query rows up to day, week (from Monday, like
+    # date_trunc) or month buckets in the shape of the dashboard trends
+    buckets = {}
+    for row in rows:
+        day = row.period.date() if isinstance(row.period, datetime) else row.period
+        if granularity == 'month':
+            day = day.replace(day=1)
+        elif granularity == 'week':
+            day = day - timedelta(days=day.weekday())
+        buckets.setdefault(day, []).append(row)
+
+    trends = []
+    for day in sorted(buckets):
+        totals = _cash_flow_totals(buckets[day])
+        inflow = float(totals['collection']) + float(totals['extra_income'])
+        isp_outflow = float(totals['isp_payment'])
+        expense_outflow = float(totals['expense'])
+        total_outflow = isp_outflow + expense_outflow
+        period = {'month': day.strftime('%Y-%m')} if granularity == 'month' else {'period': day.strftime('%Y-%m-%d')}
+        trends.append({
+            **period,
+            'inflow': inflow,
+            'outflow': total_outflow,
+            'isp_outflow': isp_outflow,
+            'expense_outflow': expense_outflow,
+            'net_flow': inflow - total_outflow
+        })
+    return trends
+
+@read_replica
 def get_financial_kpis(company_id, start_date=None, end_date=None, bank_account_id=None, invoice_status=None, payment_method=None, isp_payment_type=None):
     try:
         revenue_query = db.session.query(func.sum(Invoice.total_amount)).filter(
@@ -1044,68 +1235,20 @@ def get_financial_kpis(company_id, start_date=None, end_date=None, bank_account_
         if invoice_status and invoice_status != 'all':
             revenue_query = revenue_query.filter(Invoice.status == invoice_status)
 
-        collections_query = db.session.query(func.coalesce(func.sum(_signed_payment_amount()), 0)).join(
-            Invoice, Payment.invoice_id == Invoice.id
-        ).filter(
-            Payment.company_id == company_id,
-            Payment.is_active == True,
-            Payment.status == 'paid'
-        )
-        if bank_account_id and bank_account_id != 'all':
-            collections_query = collections_query.filter(Payment.bank_account_id == uuid.UUID(bank_account_id))
-        if payment_method and payment_method != 'all':
-            collections_query = collections_query.filter(Payment.payment_method == payment_method)
-
-        isp_payments_query = db.session.query(func.sum(ISPPayment.amount)).filter(
-            ISPPayment.company_id == company_id,
-            ISPPayment.is_active == True,
-            ISPPayment.status == 'completed'
-        )
-        if bank_account_id and bank_account_id != 'all':
-            isp_payments_query = isp_payments_query.filter(ISPPayment.bank_account_id == uuid.UUID(bank_account_id))
-        if isp_payment_type and isp_payment_type != 'all':
-            isp_payments_query = isp_payments_query.filter(ISPPayment.payment_type == isp_payment_type)
-
-        # NEW: Extra income query
-        extra_income_query = db.session.query(func.sum(ExtraIncome.amount)).filter(
-            ExtraIncome.company_id == company_id,
-            ExtraIncome.is_active == True
-        )
-        if bank_account_id and bank_account_id != 'all':
-            extra_income_query = extra_income_query.filter(ExtraIncome.bank_account_id == uuid.UUID(bank_account_id))
-        if payment_method and payment_method != 'all':
-            extra_income_query = extra_income_query.filter(ExtraIncome.payment_method == payment_method)
-        if start_date:
-            extra_income_query = extra_income_query.filter(ExtraIncome.income_date >= start_date)
-        if end_date:
-            extra_income_query = extra_income_query.filter(ExtraIncome.income_date <= end_date)
-
-        # Expenses
-        expenses_query = db.session.query(func.sum(Expense.amount)).filter(
-            Expense.company_id == company_id,
-            Expense.is_active == True
-        )
-        if bank_account_id and bank_account_id != 'all':
-            expenses_query = expenses_query.filter(Expense.bank_account_id == uuid.UUID(bank_account_id))
-        if start_date:
-            expenses_query = expenses_query.filter(Expense.expense_date >= start_date)
-        if end_date:
-            expenses_query = expenses_query.filter(Expense.expense_date <= end_date)
-
         if start_date:
             revenue_query = revenue_query.filter(Invoice.billing_start_date >= start_date)
-            collections_query = collections_query.filter(Payment.payment_date >= start_date)
-            isp_payments_query = isp_payments_query.filter(ISPPayment.payment_date >= start_date)
         if end_date:
             revenue_query = revenue_query.filter(Invoice.billing_start_date <= end_date)
-            collections_query = collections_query.filter(Payment.payment_date <= end_date)
-            isp_payments_query = isp_payments_query.filter(ISPPayment.payment_date <= end_date)
 
         total_revenue = revenue_query.scalar() or 0
-        total_collections = collections_query.scalar() or 0
-        total_isp_payments = isp_payments_query.scalar() or 0
-        total_expenses = expenses_query.scalar() or 0
-        total_extra_income = extra_income_query.scalar() or 0  # NEW
+
+        totals = _cash_flow_totals(cash_flow_query(
+            company_id, start_date, end_date, bank_account_id, payment_method, isp_payment_type, granularity=None
+        ).all())
+        total_collections = totals['collection']
+        total_isp_payments = totals['isp_payment']
+        total_expenses = totals['expense']
+        total_extra_income = totals['extra_income']
 
         # UPDATED: include extra income as inflow
         net_cash_flow = float(total_collections) + float(total_extra_income) - float(total_isp_payments) - float(total_expenses)
@@ -1126,114 +1269,15 @@ def get_financial_kpis(company_id, start_date=None, end_date=None, bank_account_
         logger.error(f"Error calculating financial KPIs: {str(e)}")
         return {}
 
+@read_replica
 def get_cash_flow_analysis(company_id, start_date=None, end_date=None, bank_account_id=None, payment_method=None, isp_payment_type=None):
     try:
-        # Get monthly collections (inflow)
-        monthly_collections = db.session.query(
-            func.date_trunc('month', Payment.payment_date).label('month'),
-            func.coalesce(func.sum(_signed_payment_amount()), 0).label('inflow')
-        ).join(Invoice, Payment.invoice_id == Invoice.id
-        ).filter(
-            Payment.company_id == company_id,
-            Payment.is_active == True,
-            Payment.status == 'paid'
-        )
-        
-        if bank_account_id and bank_account_id != 'all':
-            monthly_collections = monthly_collections.filter(Payment.bank_account_id == uuid.UUID(bank_account_id))
-        if payment_method and payment_method != 'all':
-            monthly_collections = monthly_collections.filter(Payment.payment_method == payment_method)
-        if start_date:
-            monthly_collections = monthly_collections.filter(Payment.payment_date >= start_date)
-        if end_date:
-            monthly_collections = monthly_collections.filter(Payment.payment_date <= end_date)
-            
-        monthly_collections = monthly_collections.group_by('month').order_by('month').all()
-
-        # NEW: Monthly extra income (inflow)
-        monthly_extra_income = db.session.query(
-            func.date_trunc('month', ExtraIncome.income_date).label('month'),
-            func.sum(ExtraIncome.amount).label('extra_inflow')
-        ).filter(
-            ExtraIncome.company_id == company_id,
-            ExtraIncome.is_active == True
-        )
-        if bank_account_id and bank_account_id != 'all':
-            monthly_extra_income = monthly_extra_income.filter(ExtraIncome.bank_account_id == uuid.UUID(bank_account_id))
-        if payment_method and payment_method != 'all':
-            monthly_extra_income = monthly_extra_income.filter(ExtraIncome.payment_method == payment_method)
-        if start_date:
-            monthly_extra_income = monthly_extra_income.filter(ExtraIncome.income_date >= start_date)
-        if end_date:
-            monthly_extra_income = monthly_extra_income.filter(ExtraIncome.income_date <= end_date)
-        monthly_extra_income = monthly_extra_income.group_by('month').order_by('month').all()
-
-
-        # Get monthly ISP payments (outflow)
-        monthly_isp_payments = db.session.query(
-            func.date_trunc('month', ISPPayment.payment_date).label('month'),
-            func.sum(ISPPayment.amount).label('isp_outflow')
-        ).filter(
-            ISPPayment.company_id == company_id,
-            ISPPayment.is_active == True,
-            ISPPayment.status == 'completed'
-        )
-        
-        if bank_account_id and bank_account_id != 'all':
-            monthly_isp_payments = monthly_isp_payments.filter(ISPPayment.bank_account_id == uuid.UUID(bank_account_id))
-        if isp_payment_type and isp_payment_type != 'all':
-            monthly_isp_payments = monthly_isp_payments.filter(ISPPayment.payment_type == isp_payment_type)
-        if start_date:
-            monthly_isp_payments = monthly_isp_payments.filter(ISPPayment.payment_date >= start_date)
-        if end_date:
-            monthly_isp_payments = monthly_isp_payments.filter(ISPPayment.payment_date <= end_date)
-            
-        monthly_isp_payments = monthly_isp_payments.group_by('month').order_by('month').all()
-
-        # NEW: Get monthly expenses (additional outflow)
-        monthly_expenses = db.session.query(
-            func.date_trunc('month', Expense.expense_date).label('month'),
-            func.sum(Expense.amount).label('expense_outflow')
-        ).filter(
-            Expense.company_id == company_id,
-            Expense.is_active == True
-        )
-        
-        if bank_account_id and bank_account_id != 'all':
-            monthly_expenses = monthly_expenses.filter(Expense.bank_account_id == uuid.UUID(bank_account_id))
-        if start_date:
-            monthly_expenses = monthly_expenses.filter(Expense.expense_date >= start_date)
-        if end_date:
-            monthly_expenses = monthly_expenses.filter(Expense.expense_date <= end_date)
-            
-        monthly_expenses = monthly_expenses.group_by('month').order_by('month').all()
-
-        # Create dictionaries for easy merging
-        collections_dict = {month.strftime('%Y-%m'): float(inflow or 0) for month, inflow in monthly_collections}
-        extra_income_dict = {month.strftime('%Y-%m'): float(extra_inflow or 0) for month, extra_inflow in monthly_extra_income}
-        isp_dict = {month.strftime('%Y-%m'): float(isp_outflow or 0) for month, isp_outflow in monthly_isp_payments}
-        expenses_dict = {month.strftime('%Y-%m'): float(expense_outflow or 0) for month, expense_outflow in monthly_expenses}
-
-        # Get all unique months
-        all_months = sorted(set(list(collections_dict.keys()) + list(extra_income_dict.keys()) + list(isp_dict.keys()) + list(expenses_dict.keys())))
-
-        # Combine data
-        monthly_trends = []
-        for month in all_months:
-            inflow = collections_dict.get(month, 0) + extra_income_dict.get(month, 0)  # include extra income
-            isp_outflow = isp_dict.get(month, 0)
-            expense_outflow = expenses_dict.get(month, 0)
-            total_outflow = isp_outflow + expense_outflow
-            net_flow = inflow - total_outflow
-            
-            monthly_trends.append({
-                'month': month,
-                'inflow': inflow,
-                'outflow': total_outflow,
-                'isp_outflow': isp_outflow,  # NEW: Separate ISP outflow
-                'expense_outflow': expense_outflow,  # NEW: Separate expense outflow
-                'net_flow': net_flow
-            })
+        # One daily round trip, rolled up so the dashboard can zoom between
+        # day, week and month without asking again
+        daily_flows = cash_flow_query(
+            company_id, start_date, end_date, bank_account_id, payment_method, isp_payment_type, granularity='day'
+        ).all()
+        monthly_trends = _cash_flow_trends(daily_flows, 'month')
 
         # Inflow breakdown by payment method
         inflow_methods = db.session.query(
@@ -1327,6 +1371,8 @@ def get_cash_flow_analysis(company_id, start_date=None, end_date=None, bank_acco
 
         return {
             'monthly_trends': monthly_trends,
+            'weekly_trends': _cash_flow_trends(daily_flows, 'week'),
+            'daily_trends': _cash_flow_trends(daily_flows, 'day'),
             'inflow_breakdown': [{'method': m, 'amount': a} for m, a in method_totals.items()],
             'outflow_breakdown': outflow_types
         }
@@ -1334,6 +1380,7 @@ def get_cash_flow_analysis(company_id, start_date=None, end_date=None, bank_acco
         logger.error(f"Error calculating cash flow analysis: {str(e)}")
         return {}
 
+@read_replica
 def get_revenue_expense_comparison(company_id, start_date=None, end_date=None, bank_account_id=None, invoice_status=None):
     try:
         # Calculate REVENUE separately (from Invoices)
@@ -1484,98 +1531,21 @@ def get_revenue_expense_comparison(company_id, start_date=None, end_date=None, b
             'average_ratio': 0
         }
 
+@read_replica
 def get_bank_account_performance(company_id, start_date=None, end_date=None, bank_account_id=None):
     try:
-        collections_query = db.session.query(
-            BankAccount.bank_name,
-            BankAccount.account_number,
-            func.coalesce(func.sum(_signed_payment_amount()), 0).label('collections')
-        ).join(Payment, BankAccount.id == Payment.bank_account_id
-        ).join(Invoice, Payment.invoice_id == Invoice.id
-        ).filter(
-            BankAccount.company_id == company_id,
-            BankAccount.is_active == True,
-            Payment.is_active == True,
-            Payment.status == 'paid',
-            Payment.bank_account_id.isnot(None)
-        )
-        if bank_account_id and bank_account_id != 'all':
-            collections_query = collections_query.filter(BankAccount.id == uuid.UUID(bank_account_id))
-        if start_date:
-            collections_query = collections_query.filter(Payment.payment_date >= start_date)
-        if end_date:
-            collections_query = collections_query.filter(Payment.payment_date <= end_date)
-        collections_data = collections_query.group_by(BankAccount.bank_name, BankAccount.account_number).all()
-
-        isp_payments_query = db.session.query(
-            BankAccount.bank_name,
-            BankAccount.account_number,
-            func.sum(ISPPayment.amount).label('isp_payments')
-        ).join(ISPPayment, BankAccount.id == ISPPayment.bank_account_id
-        ).filter(
-            BankAccount.company_id == company_id,
-            BankAccount.is_active == True,
-            ISPPayment.is_active == True,
-            ISPPayment.status == 'completed'
-        )
-        if bank_account_id and bank_account_id != 'all':
-            isp_payments_query = isp_payments_query.filter(BankAccount.id == uuid.UUID(bank_account_id))
-        if start_date:
-            isp_payments_query = isp_payments_query.filter(ISPPayment.payment_date >= start_date)
-        if end_date:
-            isp_payments_query = isp_payments_query.filter(ISPPayment.payment_date <= end_date)
-        isp_payments_data = isp_payments_query.group_by(BankAccount.bank_name, BankAccount.account_number).all()
-
-        expenses_query = db.session.query(
-            BankAccount.bank_name,
-            BankAccount.account_number,
-            func.sum(Expense.amount).label('expenses')
-        ).join(Expense, BankAccount.id == Expense.bank_account_id
-        ).filter(
-            BankAccount.company_id == company_id,
-            BankAccount.is_active == True,
-            Expense.is_active == True
-        )
-        if bank_account_id and bank_account_id != 'all':
-            expenses_query = expenses_query.filter(BankAccount.id == uuid.UUID(bank_account_id))
-        if start_date:
-            expenses_query = expenses_query.filter(Expense.expense_date >= start_date)
-        if end_date:
-            expenses_query = expenses_query.filter(Expense.expense_date <= end_date)
-        expenses_data = expenses_query.group_by(BankAccount.bank_name, BankAccount.account_number).all()
-
-        # NEW: extra income per bank account
-        extra_income_query = db.session.query(
-            BankAccount.bank_name,
-            BankAccount.account_number,
-            func.sum(ExtraIncome.amount).label('extra_income')
-        ).join(ExtraIncome, BankAccount.id == ExtraIncome.bank_account_id
-        ).filter(
-            BankAccount.company_id == company_id,
-            BankAccount.is_active == True,
-            ExtraIncome.is_active == True
-        )
-        if bank_account_id and bank_account_id != 'all':
-            extra_income_query = extra_income_query.filter(BankAccount.id == uuid.UUID(bank_account_id))
-        if start_date:
-            extra_income_query = extra_income_query.filter(ExtraIncome.income_date >= start_date)
-        if end_date:
-            extra_income_query = extra_income_query.filter(ExtraIncome.income_date <= end_date)
-        extra_income_data = extra_income_query.group_by(BankAccount.bank_name, BankAccount.account_number).all()
-
-        collections_dict = {f"{bn}-{an}": float(c or 0) for bn, an, c in collections_data}
-        isp_payments_dict = {f"{bn}-{an}": float(v or 0) for bn, an, v in isp_payments_data}
-        expenses_dict = {f"{bn}-{an}": float(v or 0) for bn, an, v in expenses_data}
-        extra_income_dict = {f"{bn}-{an}": float(v or 0) for bn, an, v in extra_income_data}
+        flows_by_account = {}
+        for row in cash_flow_query(company_id, start_date, end_date, bank_account_id, granularity=None):
+            flows_by_account.setdefault(str(row.bank_account_id), []).append(row)
 
         all_bank_accounts = BankAccount.query.filter_by(company_id=company_id, is_active=True).all()
         performance_data = []
         for account in all_bank_accounts:
-            key = f"{account.bank_name}-{account.account_number}"
-            collections = collections_dict.get(key, 0)
-            isp_payments = isp_payments_dict.get(key, 0)
-            expenses = expenses_dict.get(key, 0)
-            extra_income = extra_income_dict.get(key, 0)
+            totals = _cash_flow_totals(flows_by_account.get(str(account.id), []))
+            collections = float(totals['collection'])
+            isp_payments = float(totals['isp_payment'])
+            expenses = float(totals['expense'])
+            extra_income = float(totals['extra_income'])
             total_payments = isp_payments + expenses
             net_flow = collections + extra_income - total_payments
             initial_balance = float(account.initial_balance or 0)
@@ -1600,6 +1570,7 @@ def get_bank_account_performance(company_id, start_date=None, end_date=None, ban
         logger.error(f"Error calculating bank account performance: {str(e)}")
         return []
 
+@read_replica
 def get_collections_analysis(company_id, start_date=None, end_date=None, bank_account_id=None, invoice_status=None):
     try:
         current_date = datetime.utcnow().date()
@@ -1683,6 +1654,7 @@ def get_collections_analysis(company_id, start_date=None, end_date=None, bank_ac
         logger.error(f"Error calculating collections analysis: {str(e)}")
         return {}
 
+@read_replica
 def get_isp_payment_analysis(company_id, start_date=None, end_date=None, bank_account_id=None, isp_payment_type=None):
     try:
         payment_types = db.session.query(
@@ -1750,6 +1722,7 @@ def get_isp_payment_analysis(company_id, start_date=None, end_date=None, bank_ac
         logger.error(f"Error calculating ISP payment analysis: {str(e)}")
         return {}
 
+@read_replica
 def get_cash_payments_data(company_id, start_date=None, end_date=None):
     """
     Calculate cash payments (payments without bank_account_id)
@@ -1840,6 +1813,7 @@ def _refund_signed_amount():
     # Treat invoice payments on refund invoices as negative (debit)
     return case((Invoice.invoice_type == 'refund', -Payment.amount), else_=Payment.amount)
 
+@read_replica
 def get_ledger_data(company_id, filters=None):
     """
     Returns a unified list of ledger items across:
@@ -2051,4 +2025,161 @@ def get_ledger_data(company_id, filters=None):
             'items': [], 
             'bank_accounts': bank_accounts_list, 
             'stats': { 'credits': 0, 'debits': 0, 'net': 0, 'count': 0 } 
-        }
\ No newline at end of file
+        }
+
+def _ledger_union(company_id, filters=None):
+    # The ledger of get_ledger_data as one UNION ALL subquery with the
+    # export columns plus the row id; same sources, filters and direction rules
+    filters = filters or {}
+    start_date = filters.get('start_date')
+    end_date = filters.get('end_date')
+    bank_account_id = filters.get('bank_account_id')
+    payment_method = filters.get('payment_method')
+
+    def scoped(query, model, date_column, method_column):
+        query = query.outerjoin(BankAccount, model.bank_account_id == BankAccount.id).filter(
+            model.company_id == company_id,
+            model.is_active == True
+        )
+        if start_date: query = query.filter(date_column >= start_date)
+        if end_date: query = query.filter(date_column <= end_date)
+        if bank_account_id and bank_account_id != 'all':
+            query = query.filter(model.bank_account_id == uuid.UUID(bank_account_id))
+        if payment_method and payment_method != 'all':
+            query = query.filter(method_column == payment_method)
+        return query
+
+    bank_account = (BankAccount.bank_name + ' - ' + BankAccount.account_number).label('bank_account')
+    is_refund = (func.lower(Invoice.invoice_type) == 'refund') | (func.lower(Payment.status) == 'refunded')
+
+    payments = scoped(db.session.query(
+        Payment.payment_date.label('date'),
+        case((is_refund, 'refund'), else_='invoice_payment').label('type'),
+        func.coalesce(Payment.transaction_id, Invoice.invoice_number).label('reference'),
+        func.trim(
+            'Invoice payment - ' + func.coalesce(Customer.first_name, '') + ' ' + func.coalesce(Customer.last_name, '')
+        ).label('description'),
+        Payment.payment_method.label('method'),
+        bank_account,
+        Payment.amount.label('amount'),
+        case((is_refund, 'debit'), else_='credit').label('direction'),
+        Payment.status.label('status'),
+        Payment.id.label('id'),
+    ).join(Invoice, Payment.invoice_id == Invoice.id
+    ).join(Customer, Invoice.customer_id == Customer.id
+    ).filter(Payment.status.in_(['paid', 'refunded'])), Payment, Payment.payment_date, Payment.payment_method)
+    if filters.get('invoice_status') and filters['invoice_status'] != 'all':
+        payments = payments.filter(Invoice.status == filters['invoice_status'])
+
+    isp_payments = scoped(db.session.query(
+        ISPPayment.payment_date,
+        literal('isp_payment'),
+        ISPPayment.reference_number,
+        func.coalesce(ISPPayment.description, cast(ISPPayment.payment_type, String)),
+        cast(ISPPayment.payment_method, String),
+        bank_account,
+        ISPPayment.amount,
+        literal('debit'),
+        func.coalesce(ISPPayment.status, 'completed'),
+        ISPPayment.id,
+    ), ISPPayment, ISPPayment.payment_date, ISPPayment.payment_method)
+    if filters.get('isp_payment_type') and filters['isp_payment_type'] != 'all':
+        isp_payments = isp_payments.filter(ISPPayment.payment_type == filters['isp_payment_type'])
+
+    expenses = scoped(db.session.query(
+        Expense.expense_date,
+        literal('expense'),
+        Expense.vendor_payee,
+        Expense.description,
+        Expense.payment_method,
+        bank_account,
+        Expense.amount,
+        literal('debit'),
+        literal('posted'),
+        Expense.id,
+    ), Expense, Expense.expense_date, Expense.payment_method)
+
+    extra_incomes = scoped(db.session.query(
+        ExtraIncome.income_date,
+        literal('extra_income'),
+        ExtraIncome.payer,
+        ExtraIncome.description,
+        ExtraIncome.payment_method,
+        bank_account,
+        ExtraIncome.amount,
+        literal('credit'),
+        literal('posted'),
+        ExtraIncome.id,
+    ), ExtraIncome, ExtraIncome.income_date, ExtraIncome.payment_method)
+
+    return payments.union_all(isp_payments, expenses, extra_incomes).subquery()
+
+def ledger_export_query(company_id, filters=None):
+    """
+    The ledger of get_ledger_data as one UNION ALL column query, newest
+    first, for the export endpoints. Same sources, filters and direction rules.
+    """
+    ledger = _ledger_union(company_id, filters)
+    return db.session.query(*[c for c in ledger.c if c.key != 'id']).order_by(ledger.c.date.desc())
+
+LEDGER_PAGE_SIZE = 50
+LEDGER_MAX_PAGE_SIZE = 500
+
+@read_replica
+def get_ledger_page(company_id, filters=None, page_size=LEDGER_PAGE_SIZE, cursor=None):
+    """
+    One page of the ledger, newest first, seeking on (date, id) with the
+    cursor tokens of keyset_pagination instead of loading every row.
+
+    Ordering, the limit and the window functions run in the database: each
+    item carries the running balance (credits minus debits of the filtered
+    ledger up to and including it, oldest first) and stats holds the credit,
+    debit and count totals of the whole filtered ledger, not just the page.
+
+    Returns:
+        dict: items, bank_accounts, stats, next_cursor and prev_cursor.
+        Raises CursorError for a malformed cursor.
+    """
+    page_size = min(max(int(page_size or LEDGER_PAGE_SIZE), 1), LEDGER_MAX_PAGE_SIZE)
+    ledger = _ledger_union(company_id, filters)
+
+    is_credit = ledger.c.direction == 'credit'
+    windowed = db.session.query(
+        *ledger.c,
+        func.sum(case((is_credit, ledger.c.amount), else_=-ledger.c.amount)).over(
+            order_by=(ledger.c.date.asc(), ledger.c.id.asc())
+        ).label('running_balance'),
+        func.sum(case((is_credit, ledger.c.amount), else_=0)).over().label('total_credits'),
+        func.sum(case((is_credit, 0), else_=ledger.c.amount)).over().label('total_debits'),
+        func.count().over().label('total_count')
+    ).subquery()
+
+    # The keyset filter sits outside the windows so they still see every row
+    rows, next_cursor, prev_cursor = keyset_page(
+        db.session.query(windowed), windowed.c.date, windowed.c.id, True, page_size,
+        cursor=cursor, sort_key='ledger:date:desc'
+    )
+
+    items = [{
+        'id': str(r.id),
+        'date': r.date.isoformat() if r.date else None,
+        'type': r.type,
+        'reference': r.reference,
+        'description': r.description,
+        'method': r.method,
+        'bank_account': r.bank_account,
+        'amount': float(r.amount or 0),
+        'direction': r.direction,
+        'status': r.status,
+        'running_balance': float(r.running_balance or 0),
+    } for r in rows]
+
+    credits = float(rows[0].total_credits or 0) if rows else 0
+    debits = float(rows[0].total_debits or 0) if rows else 0
+    return {
+        'items': items,
+        'bank_accounts': _active_bank_account_options(company_id),
+        'stats': {'credits': credits, 'debits': debits, 'net': credits - debits, 'count': rows[0].total_count if rows else 0},
+        'next_cursor': next_cursor,
+        'prev_cursor': prev_cursor
+    }
@@ -1,5 +1,6 @@
 from app import db
 from app.models import Expense, ExpenseType
+from app.services.dashboard_rollup_service import DashboardRollupService
 import uuid
 import logging
 from decimal import Decimal
@@ -72,6 +73,7 @@ def add_expense(data, user_role, current_user_id, ip_address, user_agent):
             is_active=data.get('is_active', True)
         )
 
+        DashboardRollupService.record(DashboardRollupService.snapshot(new_expense))
         db.session.add(new_expense)
         db.session.commit()
         return new_expense
@@ -90,6 +92,8 @@ def update_expense(id, data, company_id, user_role, current_user_id, ip_address,
         if not expense:
             raise ValueError(f"Expense with id {id} not found")
 
+        rollup_before = DashboardRollupService.snapshot(expense)
+
         # Update fields
         updatable_fields = ['expense_type_id', 'description', 'amount', 'payment_method', 'vendor_payee', 'bank_account_id', 'is_active']
         for field in updatable_fields:
@@ -110,6 +114,7 @@ def update_expense(id, data, company_id, user_role, current_user_id, ip_address,
             expense_date = datetime.strptime(data['expense_date'], "%Y-%m-%d").date()
             expense.expense_date = datetime.combine(expense_date, existing_time)
 
+        DashboardRollupService.record_change(rollup_before, DashboardRollupService.snapshot(expense))
         db.session.commit()
         return expense
     except Exception as e:
@@ -127,7 +132,9 @@ def delete_expense(id, company_id, user_role, current_user_id, ip_address, user_
         if not expense:
             raise ValueError(f"Expense with id {id} not found")
 
+        rollup_before = DashboardRollupService.snapshot(expense)
         expense.is_active = False
+        DashboardRollupService.record_change(rollup_before, DashboardRollupService.snapshot(expense))
         db.session.commit()
         return True
     except Exception as e:
@@ -1,5 +1,6 @@
 from app import db
 from app.models import ExtraIncome, ExtraIncomeType
+from app.services.dashboard_rollup_service import DashboardRollupService
 import uuid
 import logging
 from decimal import Decimal
@@ -80,6 +81,7 @@ def add_extra_income(data, user_role, current_user_id, ip_address, user_agent):
             is_active=data.get('is_active', True)
         )
 
+        DashboardRollupService.record(DashboardRollupService.snapshot(new_income))
         db.session.add(new_income)
         db.session.commit()
         return new_income
@@ -98,6 +100,8 @@ def update_extra_income(id, data, company_id, user_role, current_user_id, ip_add
         if not income:
             raise ValueError(f"Extra income with id {id} not found")
 
+        rollup_before = DashboardRollupService.snapshot(income)
+
         # Update fields
         updatable_fields = ['income_type_id', 'description', 'amount', 'payment_method', 'payer', 'bank_account_id', 'is_active']
         for field in updatable_fields:
@@ -118,6 +122,7 @@ def update_extra_income(id, data, company_id, user_role, current_user_id, ip_add
             income_date = datetime.strptime(data['income_date'], "%Y-%m-%d").date()
             income.income_date = datetime.combine(income_date, existing_time)
 
+        DashboardRollupService.record_change(rollup_before, DashboardRollupService.snapshot(income))
         db.session.commit()
         return income
     except Exception as e:
@@ -136,6 +141,7 @@ def delete_extra_income(id, company_id, user_role, current_user_id, ip_address,
             raise ValueError(f"Extra income with id {id} not found")
 
         # Actually delete the record
+        DashboardRollupService.record(DashboardRollupService.snapshot(income), -1)
         db.session.delete(income)
         db.session.commit()
         return True
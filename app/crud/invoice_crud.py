@@ -2,6 +2,11 @@ from app import db
 from app.models import Invoice, Customer, Payment, ServicePlan, User
 from app.utils.logging_utils import log_action
 from app.services.whatsapp_invoice_sender import WhatsAppInvoiceSender
+from app.services.bulk_invoice_generator import BulkInvoiceGenerator
+from app.services.invoice_number_allocator import InvoiceNumberAllocator
+from app.services.dashboard_rollup_service import DashboardRollupService
+from app.utils.keyset_pagination import keyset_page, count_total
+from app.utils.read_replica import read_replica
 import uuid
 from sqlalchemy.exc import SQLAlchemyError, IntegrityError, DatabaseError
 import logging
@@ -59,18 +64,7 @@ def invoice_to_dict(invoice):
 
 def generate_invoice_number():
     try:
-        year = datetime.now().year
-        last_invoice = Invoice.query.order_by(Invoice.created_at.desc()).first()
-        if last_invoice and last_invoice.invoice_number.startswith(f'INV-{year}-'):
-            try:
-                last_number = int(last_invoice.invoice_number.split('-')[-1])
-                new_number = last_number + 1
-            except (ValueError, IndexError) as e:
-                logger.error(f"Error parsing invoice number: {str(e)}")
-                raise InvoiceError("Failed to generate invoice number")
-        else:
-            new_number = 1
-        return f'INV-{year}-{new_number:04d}'
+        return InvoiceNumberAllocator.next_number()
     except Exception as e:
         logger.error(f"Error generating invoice number: {str(e)}")
         raise InvoiceError("Failed to generate invoice number")
@@ -157,6 +151,7 @@ def add_invoice(data, current_user_id, user_role, ip_address, user_agent):
             invoice_data['discount_percentage'] = 0
 
         new_invoice = Invoice(**invoice_data)
+        DashboardRollupService.record(DashboardRollupService.snapshot(new_invoice))
         db.session.add(new_invoice)
         db.session.commit()
 
@@ -206,6 +201,7 @@ def update_invoice(id, data, company_id, user_role, current_user_id, ip_address,
             raise ValueError(f"Invoice with id {id} not found")
 
         old_values = invoice_to_dict(invoice)
+        rollup_before = DashboardRollupService.snapshot(invoice)
 
         # Prepare data for logging by converting datetime objects to strings
         log_data = data.copy()
@@ -253,6 +249,7 @@ def update_invoice(id, data, company_id, user_role, current_user_id, ip_address,
                 
                 setattr(invoice, field, data[field])
 
+        DashboardRollupService.record_change(rollup_before, DashboardRollupService.snapshot(invoice))
         db.session.commit()
 
         log_action(
@@ -309,10 +306,12 @@ def delete_invoice(id, company_id, user_role, current_user_id, ip_address, user_
                     user_agent,
                     company_id
                 )
+                DashboardRollupService.record(DashboardRollupService.snapshot(payment), -1)
                 db.session.delete(payment)
 
         old_values = invoice_to_dict(invoice)
 
+        DashboardRollupService.record(DashboardRollupService.snapshot(invoice), -1)
         db.session.delete(invoice)
         db.session.commit()
 
@@ -365,107 +364,42 @@ def generate_monthly_invoices(company_id, user_role, current_user_id, ip_address
         - generated: Number of invoices generated
         - skipped: Number of invoices skipped (already exist)
         - total_customers: Total number of customers processed
+        - stats: Throughput statistics from the bulk generator
     """
     try:
         today = datetime.now().date()
         
-        # Get all active customers whose recharge date is today
-        customers = Customer.query.filter(
-            Customer.is_active == True,
-            Customer.company_id == company_id,
-            Customer.recharge_date != None,
-            db.func.extract('day', Customer.recharge_date) == today.day,
-            db.func.extract('month', Customer.recharge_date) == today.month
-        ).all()
-        
-        logger.info(f"Found {len(customers)} customers with recharge date today for company {company_id}")
-        
         # Check if invoices have already been generated this month
-        current_month_start = datetime(today.year, today.month, 1).date()
-        next_month_start = (datetime(today.year, today.month, 1) + timedelta(days=32)).replace(day=1).date()
-        
-        invoice_count = 0
-        skipped_count = 0
-        error_count = 0
+        current_month_start = today.replace(day=1)
+        next_month_start = (current_month_start + timedelta(days=32)).replace(day=1)
         
-        for customer in customers:
-            try:
-                # Check if an invoice already exists for this customer in the current month
-                existing_invoice = Invoice.query.filter(
-                    Invoice.customer_id == customer.id,
-                    Invoice.billing_start_date >= current_month_start,
-                    Invoice.billing_start_date < next_month_start,
-                    Invoice.invoice_type == 'subscription'
-                ).first()
-                
-                if existing_invoice:
-                    logger.info(f"Invoice already exists for customer {customer.id} this month")
-                    skipped_count += 1
-                    continue
-                
-                # Get the customer's service plan
-                service_plan = ServicePlan.query.get(customer.service_plan_id)
-                if not service_plan:
-                    logger.error(f"Service plan not found for customer {customer.id}")
-                    error_count += 1
-                    continue
-                
-                # Calculate billing period
-                billing_start_date = today
-                next_month = (today.replace(day=1) + timedelta(days=32)).replace(day=1)
-                billing_end_date = (next_month - timedelta(days=1))
-                
-                # Calculate due date (5 days from invoice start date)
-                due_date = billing_start_date + timedelta(days=5)
-                
-                # Calculate amounts
-                subtotal = float(service_plan.price)
-                discount_percentage = 0
-                if customer.discount_amount:
-                    discount_percentage = (float(customer.discount_amount) / subtotal) * 100
-                
-                total_amount = subtotal - (subtotal * discount_percentage / 100)
-                
-                # Create invoice data
-                invoice_data = {
-                    'company_id': str(company_id),
-                    'customer_id': str(customer.id),
-                    'billing_start_date': billing_start_date.isoformat(),
-                    'billing_end_date': billing_end_date.isoformat(),
-                    'due_date': due_date.isoformat(),
-                    'subtotal': subtotal,
-                    'discount_percentage': discount_percentage,
-                    'total_amount': total_amount,
-                    'invoice_type': 'subscription',
-                    'notes': f"Manually generated invoice for {service_plan.name} plan"
-                }
-                
-                # Add the invoice
-                new_invoice = add_invoice(
-                    invoice_data, 
-                    current_user_id, 
-                    user_role, 
-                    ip_address,
-                    user_agent
-                )
-                
-                invoice_count += 1
-                logger.info(f"Generated invoice for customer {customer.id} ({customer.first_name} {customer.last_name})")
-                
-                # WhatsApp notification is already sent by add_invoice() function
-                # No need to call it again here
-                
-            except Exception as e:
-                logger.error(f"Error generating invoice for customer {customer.id}: {str(e)}")
-                error_count += 1
+        generator = BulkInvoiceGenerator(current_user_id, ip_address, user_agent)
+        result = generator.generate(
+            customer_filters=[
+                Customer.is_active == True,
+                Customer.company_id == company_id,
+                Customer.recharge_date != None,
+                db.func.extract('day', Customer.recharge_date) == today.day,
+                db.func.extract('month', Customer.recharge_date) == today.month
+            ],
+            billing_start_date=today,
+            billing_end_date=next_month_start - timedelta(days=1),
+            # Due date is 5 days from invoice start date
+            due_date=today + timedelta(days=5),
+            existing_start=current_month_start,
+            existing_end=next_month_start,
+            notes_template="Manually generated invoice for {plan_name} plan"
+        )
+        stats = result['stats']
         
-        logger.info(f"Monthly invoice generation completed. Generated: {invoice_count}, Skipped: {skipped_count}, Errors: {error_count}")
+        logger.info(f"Monthly invoice generation completed. Generated: {stats['generated']}, Skipped: {stats['skipped']}, Errors: {stats['errors']}")
         
         return {
-            'generated': invoice_count,
-            'skipped': skipped_count,
-            'errors': error_count,
-            'total_customers': len(customers)
+            'generated': stats['generated'],
+            'skipped': stats['skipped'],
+            'errors': stats['errors'],
+            'total_customers': stats['total_customers'],
+            'stats': stats
         }
         
     except Exception as e:
@@ -666,105 +600,62 @@ def generate_bulk_monthly_invoices(company_id, customer_ids, target_month, curre
         year = datetime.now().year
         target_date = datetime(year, int(target_month), 1)
         
-        generated_invoices = []
-        failed_invoices = []
+        billing_start_date = target_date.date()
+        next_month = (billing_start_date + timedelta(days=32)).replace(day=1)
         
-        for customer_id in customer_ids:
-            try:
-                # Get customer details
-                customer = Customer.query.options(
-                    joinedload(Customer.service_plan)
-                ).filter(
-                    Customer.id == customer_id,
-                    Customer.company_id == company_id,
-                    Customer.is_active == True
-                ).first()
-                
-                if not customer:
-                    failed_invoices.append({
-                        'customer_id': customer_id,
-                        'error': 'Customer not found or inactive'
-                    })
-                    continue
-                
-                # Check if invoice already exists for this month
-                billing_start_date = datetime(target_date.year, target_date.month, 1)
-                next_month = (billing_start_date.replace(day=1) + timedelta(days=32)).replace(day=1)
-                billing_end_date = (next_month - timedelta(days=1))
-                
-                existing_invoice = Invoice.query.filter(
-                    Invoice.customer_id == customer_id,
-                    Invoice.invoice_type == 'subscription',
-                    Invoice.billing_start_date >= billing_start_date,
-                    Invoice.billing_start_date < next_month,
-                    Invoice.is_active == True
-                ).first()
-                
-                if existing_invoice:
-                    failed_invoices.append({
-                        'customer_id': customer_id,
-                        'customer_name': f"{customer.first_name} {customer.last_name}",
-                        'error': f'Invoice already exists: {existing_invoice.invoice_number}'
-                    })
-                    continue
-                
-                # Calculate billing period
-                due_date = billing_start_date + timedelta(days=5)
-                
-                # Calculate amounts
-                service_plan_price = float(customer.service_plan.price) if customer.service_plan else 0
-                discount_amount = float(customer.discount_amount) if customer.discount_amount else 0
-                discount_percentage = (discount_amount / service_plan_price * 100) if service_plan_price > 0 else 0
-                total_amount = service_plan_price - discount_amount
-                
-                # Create invoice data
-                invoice_data = {
-                    'company_id': str(company_id),
-                    'customer_id': str(customer_id),
-                    'billing_start_date': billing_start_date.date().isoformat(),
-                    'billing_end_date': billing_end_date.date().isoformat(),
-                    'due_date': due_date.date().isoformat(),
-                    'subtotal': service_plan_price,
-                    'discount_percentage': discount_percentage,
-                    'total_amount': total_amount,
-                    'invoice_type': 'subscription',
-                    'notes': f"Monthly subscription invoice for {customer.service_plan.name if customer.service_plan else 'N/A'} plan"
-                }
-                
-                # Generate invoice
-                new_invoice = add_invoice(
-                    invoice_data, 
-                    current_user_id, 
-                    user_role, 
-                    ip_address,
-                    user_agent
-                )
-                
-                # WhatsApp notification is automatically sent by add_invoice()
-                
-                generated_invoices.append({
-                    'customer_id': customer_id,
-                    'customer_name': f"{customer.first_name} {customer.last_name}",
-                    'invoice_number': new_invoice.invoice_number,
-                    'amount': total_amount
-                })
-                
-                logger.info(f"Generated invoice for customer {customer_id}: {new_invoice.invoice_number}")
-                
-            except Exception as e:
-                logger.error(f"Failed to generate invoice for customer {customer_id}: {str(e)}")
-                failed_invoices.append({
-                    'customer_id': customer_id,
-                    'customer_name': f"{customer.first_name} {customer.last_name}" if customer else 'Unknown',
-                    'error': str(e)
-                })
+        try:
+            selected_ids = [uuid.UUID(str(customer_id)) for customer_id in customer_ids]
+        except ValueError:
+            raise ValueError("Invalid customer_id format")
+        
+        generator = BulkInvoiceGenerator(current_user_id, ip_address, user_agent)
+        result = generator.generate(
+            customer_filters=[
+                Customer.id.in_(selected_ids),
+                Customer.company_id == company_id,
+                Customer.is_active == True
+            ],
+            billing_start_date=billing_start_date,
+            billing_end_date=next_month - timedelta(days=1),
+            due_date=billing_start_date + timedelta(days=5),
+            existing_start=billing_start_date,
+            existing_end=next_month,
+            notes_template="Monthly subscription invoice for {plan_name} plan",
+            active_invoices_only=True
+        )
+        
+        generated_invoices = [
+            {
+                'customer_id': item['customer_id'],
+                'customer_name': item['customer_name'],
+                'invoice_number': item['invoice_number'],
+                'amount': item['amount']
+            }
+            for item in result['generated']
+        ]
+        failed_invoices = [
+            {
+                'customer_id': item['customer_id'],
+                'customer_name': item['customer_name'],
+                'error': f"Invoice already exists: {item['invoice_number']}"
+            }
+            for item in result['skipped']
+        ] + result['failed']
+        
+        processed = {item['customer_id'] for item in generated_invoices + failed_invoices}
+        failed_invoices.extend(
+            {'customer_id': customer_id, 'error': 'Customer not found or inactive'}
+            for customer_id in customer_ids
+            if str(uuid.UUID(str(customer_id))) not in processed
+        )
         
         return {
             'generated': generated_invoices,
             'failed': failed_invoices,
             'total_generated': len(generated_invoices),
             'total_failed': len(failed_invoices),
-            'target_month': target_date.strftime('%B %Y')
+            'target_month': target_date.strftime('%B %Y'),
+            'stats': result['stats']
         }
         
     except Exception as e:
@@ -778,7 +669,7 @@ def _apply_role_scope(query, company_id, user_role, employee_id):
         q = q.filter(Invoice.generated_by == employee_id)
     return q
 
-def get_invoices_page(company_id, user_role, employee_id, page=1, page_size=20, sort=None, q=None):
+def _invoices_page_query(company_id, user_role, employee_id, q=None):
     base = db.session.query(
         Invoice.id,
         Invoice.invoice_number,
@@ -809,64 +700,145 @@ def get_invoices_page(company_id, user_role, employee_id, page=1, page_size=20,
             Customer.last_name.ilike(like),
             Invoice.status.ilike(like),
         ))
+    return base
+
+def _parse_invoice_sort(sort):
+    mapping = {
+        'invoice_number': Invoice.invoice_number,
+        'due_date': Invoice.due_date,
+        'billing_start_date': Invoice.billing_start_date,
+        'billing_end_date': Invoice.billing_end_date,
+        'total_amount': Invoice.total_amount,
+        'status': Invoice.status,
+        'internet_id': Customer.internet_id,
+        'customer_name': func.concat(Customer.first_name, ' ', Customer.last_name),
+    }
+    parsed = []
+    for part in (sort or '').split(','):
+        if not part.strip():
+            continue
+        try:
+            col, direction = part.split(':')
+            direction = direction.lower().strip()
+        except ValueError:
+            col, direction = part, 'asc'
+        col = col.strip()
+        column = mapping.get(col)
+        if column is not None:
+            parsed.append((col, column, direction == 'desc'))
+    return parsed
+
+def _serialize_invoice_row(row):
+    return {
+        'id': str(row.id),
+        'invoice_number': row.invoice_number,
+        'customer_id': str(row.customer_id) if row.customer_id else None,
+        'internet_id': row.internet_id,
+        'customer_name': row.customer_name,
+        'customer_phone': row.phone_1 or "",  # For backward compatibility
+        'phone_1': row.phone_1 or "",
+        'phone_2': row.phone_2 or "",
+        'billing_start_date': row.billing_start_date.isoformat() if row.billing_start_date else None,
+        'billing_end_date': row.billing_end_date.isoformat() if row.billing_start_date else None,
+        'due_date': row.due_date.isoformat() if row.due_date else None,
+        'subtotal': float(row.subtotal) if row.subtotal is not None else 0,
+        'discount_percentage': float(row.discount_percentage) if row.discount_percentage is not None else 0,
+        'total_amount': float(row.total_amount) if row.total_amount is not None else 0,
+        'invoice_type': row.invoice_type,
+        'notes': row.notes,
+        'status': row.status,
+    }
+
+def _invoice_status_stats(company_id, total, total_mode='exact'):
+    # Counted like the page total, so cursor pages don't pay for exact counts
+    def status_count(status):
+        query = db.session.query(Invoice.id).filter(Invoice.company_id == company_id, Invoice.status == status)
+        return count_total(query, total_mode)[0]
+
+    return {
+        'total': total,
+        'paid': status_count('paid'),
+        'pending': status_count('pending'),
+    }
+
+@read_replica
+def get_invoices_page(company_id, user_role, employee_id, page=1, page_size=20, sort=None, q=None):
+    base = _invoices_page_query(company_id, user_role, employee_id, q)
+
     # sorting
-    if sort:
-        for part in sort.split(','):
-            try:
-                col, direction = part.split(':')
-                direction = direction.lower().strip()
-            except ValueError:
-                col, direction = part, 'asc'
-            col = col.strip()
-            mapping = {
-                'invoice_number': Invoice.invoice_number,
-                'due_date': Invoice.due_date,
-                'billing_start_date': Invoice.billing_start_date,
-                'billing_end_date': Invoice.billing_end_date,
-                'total_amount': Invoice.total_amount,
-                'status': Invoice.status,
-                'internet_id': Customer.internet_id,
-                'customer_name': func.concat(Customer.first_name, ' ', Customer.last_name),
-            }
-            column = mapping.get(col)
-            if column is not None:
-                base = base.order_by(desc(column) if direction == 'desc' else asc(column))
+    sort_columns = _parse_invoice_sort(sort)
+    if sort_columns:
+        for _, column, descending in sort_columns:
+            base = base.order_by(desc(column) if descending else asc(column))
     else:
         base = base.order_by(desc(Invoice.created_at))
 
     total = base.count()
     items = base.limit(page_size).offset((page - 1) * page_size).all()
 
-    def serialize(row):
-        return {
-            'id': str(row.id),
-            'invoice_number': row.invoice_number,
-            'customer_id': str(row.customer_id) if row.customer_id else None,
-            'internet_id': row.internet_id,
-            'customer_name': row.customer_name,
-            'customer_phone': row.phone_1 or "",  # For backward compatibility
-            'phone_1': row.phone_1 or "",
-            'phone_2': row.phone_2 or "",
-            'billing_start_date': row.billing_start_date.isoformat() if row.billing_start_date else None,
-            'billing_end_date': row.billing_end_date.isoformat() if row.billing_start_date else None,
-            'due_date': row.due_date.isoformat() if row.due_date else None,
-            'subtotal': float(row.subtotal) if row.subtotal is not None else 0,
-            'discount_percentage': float(row.discount_percentage) if row.discount_percentage is not None else 0,
-            'total_amount': float(row.total_amount) if row.total_amount is not None else 0,
-            'invoice_type': row.invoice_type,
-            'notes': row.notes,
-            'status': row.status,
-        }
-
     # quick stats (optional)
-    stats = {
+    stats = _invoice_status_stats(company_id, total)
+
+    return {'items': [_serialize_invoice_row(x) for x in items], 'total': total, 'stats': stats}
+
+@read_replica
+def get_invoices_cursor_page(company_id, user_role, employee_id, page_size=20, sort=None, q=None, cursor=None, total_mode='estimate'):
+    """
+    Keyset-paginated variant of get_invoices_page.
+    Seeks on (first sort column, invoice id) so deep pages cost the same as
+    the first one; only the first sort column is used in this mode.
+    total_mode is passed to count_total ('exact', 'capped', 'estimate', 'none'),
+    for the page total and the status stats alike.
+    """
+    base = _invoices_page_query(company_id, user_role, employee_id, q)
+
+    sort_columns = _parse_invoice_sort(sort)
+    if sort_columns:
+        name, sort_column, descending = sort_columns[0]
+    else:
+        name, sort_column, descending = 'created_at', Invoice.created_at, True
+    sort_key = f"{name}:{'desc' if descending else 'asc'}"
+
+    total, total_is_estimate = count_total(base, total_mode)
+    rows, next_cursor, prev_cursor = keyset_page(
+        base, sort_column, Invoice.id, descending, page_size, cursor=cursor, sort_key=sort_key
+    )
+
+    return {
+        'items': [_serialize_invoice_row(x) for x in rows],
         'total': total,
-        'paid': db.session.query(func.count(Invoice.id)).filter(Invoice.company_id == company_id, Invoice.status == 'paid').scalar(),
-        'pending': db.session.query(func.count(Invoice.id)).filter(Invoice.company_id == company_id, Invoice.status == 'pending').scalar(),
+        'total_is_estimate': total_is_estimate,
+        'next_cursor': next_cursor,
+        'prev_cursor': prev_cursor,
+        'stats': _invoice_status_stats(company_id, total, total_mode),
     }
 
-    return {'items': [serialize(x) for x in items], 'total': total, 'stats': stats}
-
+def export_invoices_query(company_id, user_role, employee_id, sort=None, q=None):
+    """Invoices of get_invoices_page (same scope, search and sort) as labelled columns for ExportService"""
+    base = _invoices_page_query(company_id, user_role, employee_id, q)
+    sort_columns = _parse_invoice_sort(sort)
+    if sort_columns:
+        for _, column, descending in sort_columns:
+            base = base.order_by(desc(column) if descending else asc(column))
+    else:
+        base = base.order_by(desc(Invoice.created_at))
+    return base.with_entities(
+        Invoice.invoice_number.label('invoice_number'),
+        Customer.internet_id.label('internet_id'),
+        (Customer.first_name + ' ' + Customer.last_name).label('customer_name'),
+        Customer.phone_1.label('phone_1'),
+        Invoice.billing_start_date.label('billing_start_date'),
+        Invoice.billing_end_date.label('billing_end_date'),
+        Invoice.due_date.label('due_date'),
+        Invoice.subtotal.label('subtotal'),
+        Invoice.discount_percentage.label('discount_percentage'),
+        Invoice.total_amount.label('total_amount'),
+        Invoice.invoice_type.label('invoice_type'),
+        Invoice.status.label('status'),
+        Invoice.notes.label('notes'),
+    )
+
+@read_replica
 def get_invoices_summary(company_id, user_role, employee_id):
     q = db.session.query(Invoice).filter(Invoice.company_id == company_id)
     if user_role not in ['super_admin', 'company_owner', 'manager']:
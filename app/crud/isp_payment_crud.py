@@ -1,6 +1,7 @@
 from app import db
 from app.models import ISPPayment, ISP, BankAccount, User
 from app.utils.logging_utils import log_action
+from app.services.dashboard_rollup_service import DashboardRollupService
 import uuid
 import logging
 import os
@@ -56,6 +57,7 @@ def add_isp_payment(data, user_role, current_user_id, ip_address, user_agent):
             is_active=True
         )
 
+        DashboardRollupService.record(DashboardRollupService.snapshot(new_payment))
         db.session.add(new_payment)
         db.session.commit()
 
@@ -111,6 +113,7 @@ def update_isp_payment(id, data, company_id, user_role, current_user_id, ip_addr
             'processed_by': str(payment.processed_by),
             'is_active': payment.is_active
         }
+        rollup_before = DashboardRollupService.snapshot(payment)
 
         # Only require bank_account_id for bank_transfer payments
         if data.get('payment_method') == 'bank_transfer' and 'bank_account_id' not in data:
@@ -166,6 +169,7 @@ def update_isp_payment(id, data, company_id, user_role, current_user_id, ip_addr
                 logger.error(f"Error updating payment proof: {str(e)}")
                 raise ISPPaymentError("Failed to update payment proof")
 
+        DashboardRollupService.record_change(rollup_before, DashboardRollupService.snapshot(payment))
         db.session.commit()
 
         log_action(
@@ -285,6 +289,7 @@ def delete_isp_payment(id, company_id, user_role, current_user_id, ip_address, u
             except OSError as e:
                 logger.error(f"Error deleting payment proof file: {str(e)}")
 
+        DashboardRollupService.record(DashboardRollupService.snapshot(payment), -1)
         db.session.delete(payment)
         db.session.commit()
 
@@ -4,80 +4,120 @@ from sqlalchemy.exc import SQLAlchemyError
 import logging
 from sqlalchemy import and_, or_, desc, asc
 from sqlalchemy import func
+from app.utils.keyset_pagination import keyset_page, count_total
+from datetime import datetime, timedelta
 
 logger = logging.getLogger(__name__)
 
 
+def _parse_log_date(value, end=False):
+    """Parse an ISO date/datetime filter; a bare end date includes that whole day"""
+    parsed = datetime.fromisoformat(value)
+    if end and len(value) == 10:
+        parsed += timedelta(days=1)
+    return parsed
+
+def _apply_date_range(query, filters):
+    # A created_at range lets PostgreSQL prune the monthly detailed_logs partitions
+    if filters.get('date_from'):
+        query = query.filter(DetailedLog.created_at >= _parse_log_date(filters['date_from']))
+    if filters.get('date_to'):
+        query = query.filter(DetailedLog.created_at < _parse_log_date(filters['date_to'], end=True))
+    return query
+
+def _logs_page_query(company_id, user_role, q=None, filters=None, columns=None):
+    """
+    Scoped and filtered log query with the author's name from one outer join.
+    Rows are (DetailedLog, first_name, last_name), or the given columns
+    followed by first_name and last_name.
+    """
+    filters = filters or {}
+
+    entities = columns or [DetailedLog]
+    query = db.session.query(*entities, User.first_name, User.last_name).select_from(DetailedLog) \
+        .outerjoin(User, DetailedLog.user_id == User.id)
+
+    # Role-based filtering
+    if user_role == 'super_admin':
+        pass
+    elif user_role in ['auditor', 'company_owner']:
+        query = query.filter(DetailedLog.company_id == company_id)
+    else:
+        return None
+
+    # Apply text search
+    if q:
+        search_term = f"%{q}%"
+        query = query.filter(
+            or_(
+                User.first_name.ilike(search_term),
+                User.last_name.ilike(search_term),
+                DetailedLog.action.ilike(search_term),
+                DetailedLog.table_name.ilike(search_term),
+                DetailedLog.ip_address.ilike(search_term)
+            )
+        )
+
+    # Apply column filters
+    if filters.get('action'):
+        query = query.filter(DetailedLog.action == filters['action'])
+    if filters.get('table_name'):
+        query = query.filter(DetailedLog.table_name == filters['table_name'])
+    if filters.get('user_name'):
+        query = query.filter(
+            or_(
+                User.first_name.ilike(f"%{filters['user_name']}%"),
+                User.last_name.ilike(f"%{filters['user_name']}%")
+            )
+        )
+    return _apply_date_range(query, filters)
+
+def _user_name(first_name, last_name):
+    return f"{first_name} {last_name}" if first_name is not None else "Unknown"
+
+def _sort_column(sort_by):
+    if sort_by not in DetailedLog.__table__.columns:
+        sort_by = 'created_at'
+    return getattr(DetailedLog, sort_by)
+
+def _serialize_log(log, first_name, last_name):
+    return {
+        'id': str(log.id),
+        'user_id': str(log.user_id),
+        'user_name': _user_name(first_name, last_name),
+        'action': log.action,
+        'table_name': log.table_name,
+        'record_id': str(log.record_id),
+        'old_values': log.old_values,
+        'new_values': log.new_values,
+        'ip_address': log.ip_address,
+        'user_agent': log.user_agent,
+        'timestamp': log.created_at.isoformat(),
+        'created_at': log.created_at.isoformat()
+    }
+
 def get_all_logs_paginated(company_id, user_role, page=1, page_size=20, sort_by='created_at', sort_dir='desc', 
                           q=None, filters=None):
     try:
-        filters = filters or {}
-        
-        # Base query with role-based filtering
-        if user_role == 'super_admin':
-            query = DetailedLog.query
-        elif user_role in ['auditor', 'company_owner']:
-            query = DetailedLog.query.filter(DetailedLog.company_id == company_id)
-        else:
+        query = _logs_page_query(company_id, user_role, q, filters)
+        if query is None:
             return [], 0
         
-        # Apply text search
-        if q:
-            search_term = f"%{q}%"
-            query = query.join(User, DetailedLog.user_id == User.id).filter(
-                or_(
-                    User.first_name.ilike(search_term),
-                    User.last_name.ilike(search_term),
-                    DetailedLog.action.ilike(search_term),
-                    DetailedLog.table_name.ilike(search_term),
-                    DetailedLog.ip_address.ilike(search_term)
-                )
-            )
-        
-        # Apply column filters
-        if filters.get('action'):
-            query = query.filter(DetailedLog.action == filters['action'])
-        if filters.get('table_name'):
-            query = query.filter(DetailedLog.table_name == filters['table_name'])
-        if filters.get('user_name'):
-            query = query.join(User, DetailedLog.user_id == User.id).filter(
-                or_(
-                    User.first_name.ilike(f"%{filters['user_name']}%"),
-                    User.last_name.ilike(f"%{filters['user_name']}%")
-                )
-            )
-        
         # Get total count before pagination
         total = query.count()
         
         # Apply sorting
-        sort_column = getattr(DetailedLog, sort_by, DetailedLog.created_at)
+        sort_column = _sort_column(sort_by)
         if sort_dir.lower() == 'desc':
             query = query.order_by(desc(sort_column))
         else:
             query = query.order_by(asc(sort_column))
         
         # Apply pagination
-        logs = query.offset((page - 1) * page_size).limit(page_size).all()
+        rows = query.offset((page - 1) * page_size).limit(page_size).all()
         
         # Format results
-        result = []
-        for log in logs:
-            user = User.query.get(log.user_id)
-            result.append({
-                'id': str(log.id),
-                'user_id': str(log.user_id),
-                'user_name': f"{user.first_name} {user.last_name}" if user else "Unknown",
-                'action': log.action,
-                'table_name': log.table_name,
-                'record_id': str(log.record_id),
-                'old_values': log.old_values,
-                'new_values': log.new_values,
-                'ip_address': log.ip_address,
-                'user_agent': log.user_agent,
-                'timestamp': log.created_at.isoformat(),
-                'created_at': log.created_at.isoformat()
-            })
+        result = [_serialize_log(*row) for row in rows]
         
         return result, total
         
@@ -88,12 +128,54 @@ def get_all_logs_paginated(company_id, user_role, page=1, page_size=20, sort_by=
         logger.error(f"Error retrieving logs: {str(e)}")
         raise
 
-def get_logs_summary(company_id, user_role):
+# Orderable columns a cursor can seek on (the JSON value columns are not)
+CURSOR_SORT_COLUMNS = ('created_at', 'action', 'table_name', 'record_id', 'user_id', 'ip_address', 'user_agent')
+
+def get_logs_cursor_page(company_id, user_role, page_size=20, sort_by='created_at', sort_dir='desc',
+                         q=None, filters=None, cursor=None, total_mode='estimate'):
+    """
+    Keyset-paginated variant of get_all_logs_paginated.
+    Seeks on (sort column, log id) instead of OFFSET and returns
+    (items, page_info) with total, total_is_estimate, next_cursor and prev_cursor.
+    """
+    try:
+        query = _logs_page_query(company_id, user_role, q, filters)
+        if query is None:
+            return [], {'total': 0, 'total_is_estimate': False, 'next_cursor': None, 'prev_cursor': None}
+
+        if sort_by not in CURSOR_SORT_COLUMNS:
+            sort_by = 'created_at'
+        descending = (sort_dir or 'desc').lower() == 'desc'
+        sort_key = f"{sort_by}:{'desc' if descending else 'asc'}"
+
+        total, total_is_estimate = count_total(query, total_mode)
+        rows, next_cursor, prev_cursor = keyset_page(
+            query, getattr(DetailedLog, sort_by), DetailedLog.id, descending, page_size,
+            cursor=cursor, sort_key=sort_key
+        )
+        page_info = {
+            'total': total,
+            'total_is_estimate': total_is_estimate,
+            'next_cursor': next_cursor,
+            'prev_cursor': prev_cursor,
+        }
+        return [_serialize_log(row[0], row[1], row[2]) for row in rows], page_info
+
+    except SQLAlchemyError as e:
+        logger.error(f"Database error: {str(e)}")
+        raise
+    except Exception as e:
+        logger.error(f"Error retrieving logs: {str(e)}")
+        raise
+
+def get_logs_summary(company_id, user_role, filters=None):
     try:
         if user_role == 'super_admin':
-            total = DetailedLog.query.count()
+            total = _apply_date_range(DetailedLog.query, filters or {}).count()
         elif user_role in ['auditor', 'company_owner']:
-            total = DetailedLog.query.filter(DetailedLog.company_id == company_id).count()
+            total = _apply_date_range(
+                DetailedLog.query.filter(DetailedLog.company_id == company_id), filters or {}
+            ).count()
         else:
             total = 0
         
@@ -106,52 +188,64 @@ def get_logs_summary(company_id, user_role):
         logger.error(f"Error getting logs summary: {str(e)}")
         return {'total': 0, 'active': 0, 'inactive': 0}
 
-def stream_logs(company_id, user_role, sort_by, sort_dir, qtext, filters):
+def stream_logs(company_id, user_role, sort_by, sort_dir, qtext, filters, batch_size=5000):
+    """
+    Yield export rows for the filtered logs.
+
+    Only the exported columns are selected, user names come from the same
+    query, and rows are fetched from a server-side cursor in batches of
+    batch_size, so memory stays flat however many rows match.
+    """
     try:
-        # Base query
-        if user_role == 'super_admin':
-            query = DetailedLog.query
-        elif user_role in ['auditor', 'company_owner']:
-            query = DetailedLog.query.filter(DetailedLog.company_id == company_id)
-        else:
+        query = _logs_page_query(company_id, user_role, qtext, filters, columns=[
+            DetailedLog.id,
+            DetailedLog.action,
+            DetailedLog.table_name,
+            DetailedLog.record_id,
+            DetailedLog.ip_address,
+            DetailedLog.created_at
+        ])
+        if query is None:
             return
-        
-        # Apply filters
-        if qtext:
-            search_term = f"%{qtext}%"
-            query = query.join(User, DetailedLog.user_id == User.id).filter(
-                or_(
-                    User.first_name.ilike(search_term),
-                    User.last_name.ilike(search_term),
-                    DetailedLog.action.ilike(search_term),
-                    DetailedLog.table_name.ilike(search_term)
-                )
-            )
-        
+
         # Apply sorting
-        sort_column = getattr(DetailedLog, sort_by, DetailedLog.created_at)
-        if sort_dir.lower() == 'desc':
-            query = query.order_by(desc(sort_column))
-        else:
-            query = query.order_by(asc(sort_column))
-        
+        sort_column = _sort_column(sort_by)
+        order = desc if (sort_dir or 'desc').lower() == 'desc' else asc
+        query = query.order_by(order(sort_column), order(DetailedLog.id))
+
         # Stream results
-        for log in query.yield_per(1000):
-            user = User.query.get(log.user_id)
+        rows = query.execution_options(stream_results=True, yield_per=batch_size)
+        for log_id, action, table_name, record_id, ip_address, created_at, first_name, last_name in rows:
             yield {
-                'id': str(log.id),
-                'user_name': f"{user.first_name} {user.last_name}" if user else "Unknown",
-                'action': log.action,
-                'table_name': log.table_name,
-                'record_id': str(log.record_id),
-                'ip_address': log.ip_address,
-                'timestamp': log.created_at.isoformat()
+                'id': str(log_id),
+                'user_name': _user_name(first_name, last_name),
+                'action': action,
+                'table_name': table_name,
+                'record_id': str(record_id),
+                'ip_address': ip_address,
+                'timestamp': created_at.isoformat()
             }
             
     except Exception as e:
         logger.error(f"Error streaming logs: {str(e)}")
         raise
 
+def export_logs_query(company_id, user_role, sort_by, sort_dir, qtext, filters):
+    """Filtered, sorted logs as labelled columns for ExportService"""
+    query = _logs_page_query(company_id, user_role, qtext, filters)
+    if query is None:
+        return None
+    sort_column = _sort_column(sort_by)
+    order = desc if (sort_dir or 'desc').lower() == 'desc' else asc
+    return query.order_by(order(sort_column), order(DetailedLog.id)).with_entities(
+        func.coalesce(User.first_name + ' ' + User.last_name, 'Unknown').label('user_name'),
+        DetailedLog.action.label('action'),
+        DetailedLog.table_name.label('table_name'),
+        DetailedLog.record_id.label('record_id'),
+        DetailedLog.ip_address.label('ip_address'),
+        DetailedLog.created_at.label('timestamp'),
+    )
+
 # Keep existing functions for backward compatibility
 def get_all_logs(company_id, user_role):
     """Legacy function - use paginated version instead"""
@@ -1,6 +1,8 @@
 from app import db
 from app.models import Payment, Customer, Invoice, Company, BankAccount,User
 from app.utils.logging_utils import log_action
+from app.services.dashboard_rollup_service import DashboardRollupService
+from app.utils.keyset_pagination import keyset_page, count_total
 import uuid
 import logging
 import os
@@ -126,6 +128,7 @@ def add_payment(data, user_role, current_user_id, ip_address, user_agent):
         if 'payment_proof' in data and data['payment_proof']:
             new_payment.payment_proof = data['payment_proof']
 
+        DashboardRollupService.record(DashboardRollupService.snapshot(new_payment))
         db.session.add(new_payment)
         
         # Update invoice status ONLY if payment is successful
@@ -150,7 +153,8 @@ def add_payment(data, user_role, current_user_id, ip_address, user_agent):
             {k: v for k, v in data.items() if k != 'payment_proof'},
             ip_address,
             user_agent,
-            uuid.UUID(data['company_id'])
+            uuid.UUID(data['company_id']),
+            durability='immediate'
         )
 
         return new_payment
@@ -190,6 +194,7 @@ def update_payment(id, data, company_id, user_role, current_user_id, ip_address,
             'bank_account_id': str(payment.bank_account_id) if payment.bank_account_id else None,
             'is_active': payment.is_active
         }
+        rollup_before = DashboardRollupService.snapshot(payment)
 
         # Update fields
         if 'invoice_id' in data:
@@ -244,6 +249,7 @@ def update_payment(id, data, company_id, user_role, current_user_id, ip_address,
             if invoice and invoice.status == 'paid':
                 invoice.status = 'pending'
 
+        DashboardRollupService.record_change(rollup_before, DashboardRollupService.snapshot(payment))
         db.session.commit()
 
         log_action(
@@ -255,7 +261,8 @@ def update_payment(id, data, company_id, user_role, current_user_id, ip_address,
             {k: v for k, v in data.items() if k != 'payment_proof'},
             ip_address,
             user_agent,
-            company_id
+            company_id,
+            durability='immediate'
         )
 
         return payment
@@ -320,6 +327,7 @@ def delete_payment(id, company_id, user_role, current_user_id, ip_address, user_
                 logger.error(f"Error deleting payment proof file: {str(e)}")
 
         # Delete the payment
+        DashboardRollupService.record(DashboardRollupService.snapshot(payment), -1)
         db.session.delete(payment)
         db.session.commit()
 
@@ -366,7 +374,8 @@ def delete_payment(id, company_id, user_role, current_user_id, ip_address, user_
             None,
             ip_address,
             user_agent,
-            company_id
+            company_id,
+            durability='immediate'
         )
 
         return True
@@ -472,17 +481,18 @@ def _apply_filters(q, qtext, filters):
         q = q.filter(Payment.payment_date <= filters['payment_date_to'])
     return q
 
+_SORT_COLUMNS = {
+    'invoice_number': Invoice.invoice_number,
+    'customer_name': Customer.first_name,  # simple first_name sort
+    'amount': Payment.amount,
+    'payment_date': Payment.payment_date,
+    'payment_method': Payment.payment_method,
+    'status': Payment.status,
+    'received_by': User.first_name,
+}
+
 def _apply_sort(q, sort_by, sort_dir):
-    colmap = {
-        'invoice_number': Invoice.invoice_number,
-        'customer_name': Customer.first_name,  # simple first_name sort
-        'amount': Payment.amount,
-        'payment_date': Payment.payment_date,
-        'payment_method': Payment.payment_method,
-        'status': Payment.status,
-        'received_by': User.first_name,
-    }
-    col = colmap.get(sort_by or 'payment_date', Payment.payment_date)
+    col = _SORT_COLUMNS.get(sort_by or 'payment_date', Payment.payment_date)
     direction = desc if (sort_dir or 'desc').lower() == 'desc' else asc
     return q.order_by(direction(col))
 
@@ -514,6 +524,33 @@ def list_payments_paginated(company_id, user_role, employee_id, page, page_size,
     rows = base.limit(page_size).offset((page - 1) * page_size).all()
     return ([_row_to_dict(p) for p in rows], total)
 
+def list_payments_cursor(company_id, user_role, employee_id, page_size, sort_by, sort_dir, q=None, filters=None, cursor=None, total_mode='estimate'):
+    """
+    Keyset-paginated variant of list_payments_paginated.
+    Seeks on (sort column, payment id) instead of OFFSET and returns
+    (items, page_info) with total, total_is_estimate, next_cursor and prev_cursor.
+    """
+    filters = filters or {}
+    base = _base_scope(company_id, user_role, employee_id)
+    base = _apply_filters(base, q, filters)
+
+    if sort_by not in _SORT_COLUMNS:
+        sort_by = 'payment_date'
+    descending = (sort_dir or 'desc').lower() == 'desc'
+    sort_key = f"{sort_by}:{'desc' if descending else 'asc'}"
+
+    total, total_is_estimate = count_total(base, total_mode)
+    rows, next_cursor, prev_cursor = keyset_page(
+        base, _SORT_COLUMNS[sort_by], Payment.id, descending, page_size, cursor=cursor, sort_key=sort_key
+    )
+    page_info = {
+        'total': total,
+        'total_is_estimate': total_is_estimate,
+        'next_cursor': next_cursor,
+        'prev_cursor': prev_cursor,
+    }
+    return [_row_to_dict(row[0]) for row in rows], page_info
+
 def get_payments_summary(company_id, user_role, employee_id):
     base = _base_scope(company_id, user_role, employee_id)
     total = base.count()
@@ -525,6 +562,22 @@ def get_payments_summary(company_id, user_role, employee_id):
         'totalAmount': float(total_amount),
     }
 
+def export_payments_query(company_id, user_role, employee_id, sort_by, sort_dir, qtext, filters):
+    """Filtered, sorted payments as labelled columns for ExportService"""
+    q = _base_scope(company_id, user_role, employee_id)
+    q = _apply_filters(q, qtext, filters or {})
+    q = _apply_sort(q, sort_by, sort_dir)
+    return q.with_entities(
+        Invoice.invoice_number.label('invoice_number'),
+        (Customer.first_name + ' ' + Customer.last_name).label('customer_name'),
+        Payment.amount.label('amount'),
+        Payment.payment_date.label('payment_date'),
+        Payment.payment_method.label('payment_method'),
+        Payment.status.label('status'),
+        (User.first_name + ' ' + User.last_name).label('received_by'),
+        (BankAccount.bank_name + ' - ' + BankAccount.account_number).label('bank_account'),
+    )
+
 def stream_payments(company_id, user_role, employee_id, sort_by, sort_dir, qtext, filters):
     from flask import current_app
     
@@ -18,7 +18,7 @@ payment_type = ENUM(
 )
 payment_method = ENUM('cash', 'online', 'bank_transfer', 'credit_card', name='payment_method')
 isp_payment_type = ENUM('monthly_subscription', 'bandwidth_usage', 'infrastructure', 'other', name='isp_payment_type')
-whatsapp_message_status = ENUM('pending', 'sent', 'failed', 'failed_permanent', name='whatsapp_message_status')
+whatsapp_message_status = ENUM('pending', 'processing', 'sent', 'failed', 'failed_permanent', name='whatsapp_message_status')
 whatsapp_message_type = ENUM('invoice', 'deadline_alert', 'custom', 'promotional', name='whatsapp_message_type')
 whatsapp_media_type = ENUM('text', 'image', 'document', name='whatsapp_media_type')
 
@@ -145,6 +145,11 @@ class Customer(db.Model):
     isp = relationship('ISP', back_populates='customers')
     inventory_assignments = relationship('InventoryAssignment', back_populates='customer')
 
+    __table_args__ = (
+        db.Index('idx_customers_company_created', 'company_id', 'created_at'),
+        db.Index('idx_customers_company_active', 'company_id', postgresql_where=db.text('is_active')),
+    )
+
 class Invoice(db.Model):
     __tablename__ = 'invoices'
     id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
@@ -169,6 +174,29 @@ class Invoice(db.Model):
     company = relationship('Company', back_populates='invoices')
     customer = relationship('Customer', backref='invoices')
     generator = relationship('User', backref='generated_invoices')
+
+    __table_args__ = (
+        db.Index('idx_invoices_company_status', 'company_id', 'status'),
+        db.Index('idx_invoices_company_created', 'company_id', 'created_at'),
+        db.Index('idx_invoices_customer_type_start', 'customer_id', 'invoice_type', 'billing_start_date'),
+        db.Index('idx_invoices_company_type_start', 'company_id', 'invoice_type', 'billing_start_date'),
+        db.Index(
+            'idx_invoices_open_due', 'company_id', 'due_date',
+            postgresql_where=db.text("status <> 'paid'")
+        ),
+    )
+
+class InvoiceNumberCounter(db.Model):
+    """
+    Last invoice sequence number handed out per year.
+    Invoice numbers are globally unique (INV-YYYY-NNNN), so the counter is
+    keyed by year only and advanced with a single UPDATE ... RETURNING.
+    """
+    __tablename__ = 'invoice_number_counters'
+    year = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    last_value = db.Column(db.BigInteger, nullable=False, default=0)
+    updated_at = db.Column(db.TIMESTAMP(timezone=True), server_default=db.func.current_timestamp(), onupdate=db.func.current_timestamp())
+
 class Payment(db.Model):
     __tablename__ = 'payments'
     id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
@@ -192,6 +220,15 @@ class Payment(db.Model):
     bank_account = db.relationship('BankAccount', backref=db.backref('payments', lazy=True))
     invoice = db.relationship('Invoice', backref=db.backref('payments', lazy=True))
     receiver = db.relationship('User', backref=db.backref('received_payments', lazy=True))
+
+    __table_args__ = (
+        db.Index('idx_payments_company_date', 'company_id', 'payment_date'),
+        db.Index('idx_payments_invoice', 'invoice_id'),
+        db.Index(
+            'idx_payments_paid_company_date', 'company_id', 'payment_date',
+            postgresql_where=db.text("status = 'paid' AND is_active")
+        ),
+    )
     
 class ISPPayment(db.Model):
     __tablename__ = 'isp_payments'
@@ -231,6 +268,10 @@ class ISPPayment(db.Model):
     isp = relationship('ISP', backref=db.backref('payments', lazy=True))
     bank_account = relationship('BankAccount', backref=db.backref('isp_payments', lazy=True))
     processor = relationship('User', backref=db.backref('processed_isp_payments', lazy=True))
+
+    __table_args__ = (
+        db.Index('idx_isp_payments_company_date', 'company_id', 'payment_date'),
+    )
     
 class BankAccount(db.Model):
     __tablename__ = 'bank_accounts'
@@ -271,6 +312,10 @@ class Complaint(db.Model):
     customer = db.relationship('Customer', backref=db.backref('complaints', lazy=True))
     assigned_user = db.relationship('User', backref=db.backref('assigned_complaints', lazy=True))
 
+    __table_args__ = (
+        db.Index('idx_complaints_customer', 'customer_id'),
+    )
+
     def __repr__(self):
         return f'<Complaint {self.id}>'
 
@@ -379,6 +424,10 @@ class Task(db.Model):
 
     complaint = db.relationship('Complaint', backref=db.backref('tasks', lazy=True))
 
+    __table_args__ = (
+        db.Index('idx_tasks_company_status', 'company_id', 'status'),
+    )
+
 class Message(db.Model):
     __tablename__ = 'messages'
     id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
@@ -425,6 +474,11 @@ class RecoveryTask(db.Model):
 
     invoice = db.relationship('Invoice', backref=db.backref('recovery_tasks', lazy=True))
 
+    __table_args__ = (
+        db.Index('idx_recovery_tasks_company_status', 'company_id', 'status'),
+        db.Index('idx_recovery_tasks_invoice', 'invoice_id'),
+    )
+
 
 
 class DetailedLog(db.Model):
@@ -439,11 +493,17 @@ class DetailedLog(db.Model):
     new_values = db.Column(db.JSON)
     ip_address = db.Column(db.String(45))
     user_agent = db.Column(db.String(255))
-    created_at = db.Column(db.TIMESTAMP(timezone=True), server_default=db.func.current_timestamp())
+    created_at = db.Column(db.TIMESTAMP(timezone=True), nullable=False, server_default=db.func.current_timestamp())
 
     user = relationship('User', backref=db.backref('detailed_logs', lazy=True))
     companies = relationship('Company', backref=db.backref('detailed_logs', lazy=True))
 
+    # On PostgreSQL the table is range-partitioned by month on created_at (see LogPartitionService)
+    __table_args__ = (
+        db.Index('idx_detailed_logs_company_created', 'company_id', 'created_at'),
+        db.Index('idx_detailed_logs_created', 'created_at'),
+    )
+
 
 class ISP(db.Model):
     __tablename__ = 'isps'
@@ -493,6 +553,10 @@ class Expense(db.Model):
     bank_account = relationship('BankAccount', backref=db.backref('expenses', lazy=True))
     expense_type = relationship('ExpenseType', backref=db.backref('expenses', lazy=True))
 
+    __table_args__ = (
+        db.Index('idx_expenses_company_date', 'company_id', 'expense_date'),
+    )
+
 class ExtraIncomeType(db.Model):
     __tablename__ = 'extra_income_types'
     id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
@@ -524,7 +588,69 @@ class ExtraIncome(db.Model):
     bank_account = relationship('BankAccount', backref=db.backref('extra_incomes', lazy=True))
     income_type = relationship('ExtraIncomeType', backref=db.backref('extra_incomes', lazy=True))
 
-    
+    __table_args__ = (
+        db.Index('idx_extra_incomes_company_date', 'company_id', 'income_date'),
+    )
+
+
+class FinancialDailyRollup(db.Model):
+    """
+    Per-company daily totals of invoices, payments, expenses, extra incomes
+    and ISP payments, kept current by the CRUD write paths.
+    One row per (company, day, dimension_key); dimension_key encodes the
+    flow type and every dimension column so NULL dimensions stay unique.
+    """
+    __tablename__ = 'financial_daily_rollups'
+    id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    company_id = db.Column(UUID(as_uuid=True), db.ForeignKey('companies.id'), nullable=False)
+    period_start = db.Column(db.Date, nullable=False)
+    dimension_key = db.Column(db.String(255), nullable=False)
+    flow_type = db.Column(db.String(20), nullable=False)  # invoice, payment, expense, extra_income, isp_payment
+    bank_account_id = db.Column(UUID(as_uuid=True))
+    payment_method = db.Column(db.String(50))
+    area_id = db.Column(UUID(as_uuid=True))
+    service_plan_id = db.Column(UUID(as_uuid=True))
+    category = db.Column(db.String(50))  # invoice type, expense/income type id or ISP payment type
+    status = db.Column(db.String(20))
+    is_active = db.Column(db.Boolean, nullable=False, default=True)
+    amount = db.Column(db.Numeric(15, 2), nullable=False, default=0)
+    txn_count = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.TIMESTAMP(timezone=True), server_default=func.current_timestamp(), onupdate=func.current_timestamp())
+
+    __table_args__ = (
+        db.UniqueConstraint('company_id', 'period_start', 'dimension_key', name='uq_financial_daily_rollup'),
+        db.Index('idx_financial_daily_rollup_flow', 'company_id', 'flow_type', 'period_start'),
+    )
+
+
+class FinancialMonthlyRollup(db.Model):
+    """
+    Monthly counterpart of FinancialDailyRollup; period_start is the first
+    day of the month.
+    """
+    __tablename__ = 'financial_monthly_rollups'
+    id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    company_id = db.Column(UUID(as_uuid=True), db.ForeignKey('companies.id'), nullable=False)
+    period_start = db.Column(db.Date, nullable=False)
+    dimension_key = db.Column(db.String(255), nullable=False)
+    flow_type = db.Column(db.String(20), nullable=False)
+    bank_account_id = db.Column(UUID(as_uuid=True))
+    payment_method = db.Column(db.String(50))
+    area_id = db.Column(UUID(as_uuid=True))
+    service_plan_id = db.Column(UUID(as_uuid=True))
+    category = db.Column(db.String(50))
+    status = db.Column(db.String(20))
+    is_active = db.Column(db.Boolean, nullable=False, default=True)
+    amount = db.Column(db.Numeric(15, 2), nullable=False, default=0)
+    txn_count = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.TIMESTAMP(timezone=True), server_default=func.current_timestamp(), onupdate=func.current_timestamp())
+
+    __table_args__ = (
+        db.UniqueConstraint('company_id', 'period_start', 'dimension_key', name='uq_financial_monthly_rollup'),
+        db.Index('idx_financial_monthly_rollup_flow', 'company_id', 'flow_type', 'period_start'),
+    )
+
+
 class WhatsAppMessageQueue(db.Model):
     """
     Stores all WhatsApp messages to be sent or already sent.
@@ -554,6 +680,10 @@ class WhatsAppMessageQueue(db.Model):
     scheduled_date = db.Column(db.DateTime(timezone=True))
     sent_at = db.Column(db.DateTime(timezone=True))
     
+    # Claim lease held by the worker currently sending the message
+    lease_expires_at = db.Column(db.DateTime(timezone=True))
+    claimed_by = db.Column(db.String(100))
+    
     # Error handling
     retry_count = db.Column(db.Integer, default=0)
     max_retry = db.Column(db.Integer, default=3)
@@ -582,6 +712,14 @@ class WhatsAppMessageQueue(db.Model):
         db.Index('idx_whatsapp_queue_customer', 'customer_id'),
         db.Index('idx_whatsapp_queue_created', 'created_at'),
         db.Index('idx_whatsapp_queue_scheduled', 'scheduled_date'),
+        db.Index(
+            'idx_whatsapp_queue_pending_claim', 'company_id', 'priority', 'created_at',
+            postgresql_where=db.text("status = 'pending'")
+        ),
+        db.Index(
+            'idx_whatsapp_queue_processing_lease', 'lease_expires_at',
+            postgresql_where=db.text("status = 'processing'")
+        ),
     )
     
     def __repr__(self):
@@ -599,7 +737,7 @@ class WhatsAppDailyQuota(db.Model):
     company_id = db.Column(UUID(as_uuid=True), db.ForeignKey('companies.id'), nullable=False)
     
     # Quota tracking
-    date = db.Column(db.Date, nullable=False, unique=True)  # Date for this quota
+    date = db.Column(db.Date, nullable=False)  # Date for this quota
     messages_sent = db.Column(db.Integer, default=0)
     quota_limit = db.Column(db.Integer, default=200)  # Configurable limit
     
@@ -612,6 +750,7 @@ class WhatsAppDailyQuota(db.Model):
     company = relationship('Company', backref=db.backref('whatsapp_quotas', lazy=True))
     
     __table_args__ = (
+        db.UniqueConstraint('company_id', 'date', name='uq_whatsapp_quota_company_date'),
         db.Index('idx_whatsapp_quota_date', 'date'),
     )
     
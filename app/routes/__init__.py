@@ -46,6 +46,7 @@ from . import employee_routes # Assuming employee_routes provides employee_bp
 from . import bank_account_routes
 from . import expense_routes
 from . import extra_income_routes
+from . import admin_routes
 from .whatsapp_routes import whatsapp_bp  # New WhatsApp blueprint import
 
 # Assuming 'monitoring_bp' is from a 'monitoring_routes' module, adding it here
@@ -0,0 +1,77 @@
+from flask import current_app, jsonify, request
+from flask_jwt_extended import jwt_required, get_jwt
+from . import main
+from .. import db
+from ..services.sql_instrumentation import SQLInstrumentation
+from ..services.dashboard_cache import DashboardCache
+from ..utils.db_engine import pool_stats, InstrumentedQueuePool
+from ..utils.read_replica import replica_status
+
+@main.route('/admin/sql-report', methods=['GET'])
+@jwt_required()
+def sql_report():
+    claims = get_jwt()
+    if claims['role'] != 'super_admin':
+        return jsonify({'error': 'Unauthorized access'}), 403
+
+    limit = request.args.get('limit', 20, type=int)
+    return jsonify(SQLInstrumentation.report(limit=limit)), 200
+
+@main.route('/admin/sql-report/reset', methods=['POST'])
+@jwt_required()
+def reset_sql_report():
+    claims = get_jwt()
+    if claims['role'] != 'super_admin':
+        return jsonify({'error': 'Unauthorized access'}), 403
+
+    SQLInstrumentation.reset()
+    return jsonify({'message': 'SQL report cleared'}), 200
+
+@main.route('/admin/db-pool', methods=['GET'])
+@jwt_required()
+def db_pool_stats():
+    claims = get_jwt()
+    if claims['role'] != 'super_admin':
+        return jsonify({'error': 'Unauthorized access'}), 403
+
+    engines = {key or 'default': pool_stats(engine) for key, engine in db.engines.items()}
+    replica = current_app.extensions.get('read_replica')
+    if replica:
+        engines['replica'] = pool_stats(replica.engine)
+    return jsonify({'engines': engines, 'replica': replica_status()}), 200
+
+@main.route('/admin/db-pool/reset', methods=['POST'])
+@jwt_required()
+def reset_db_pool_stats():
+    claims = get_jwt()
+    if claims['role'] != 'super_admin':
+        return jsonify({'error': 'Unauthorized access'}), 403
+
+    engines = list(db.engines.values())
+    replica = current_app.extensions.get('read_replica')
+    if replica:
+        engines.append(replica.engine)
+    for engine in engines:
+        if isinstance(engine.pool, InstrumentedQueuePool):
+            engine.pool.stats.reset()
+    return jsonify({'message': 'Pool statistics cleared'}), 200
+
+@main.route('/admin/dashboard-cache', methods=['GET'])
+@jwt_required()
+def dashboard_cache_stats():
+    claims = get_jwt()
+    if claims['role'] != 'super_admin':
+        return jsonify({'error': 'Unauthorized access'}), 403
+
+    return jsonify(DashboardCache.stats()), 200
+
+@main.route('/admin/dashboard-cache/reset', methods=['POST'])
+@jwt_required()
+def reset_dashboard_cache():
+    claims = get_jwt()
+    if claims['role'] != 'super_admin':
+        return jsonify({'error': 'Unauthorized access'}), 403
+
+    DashboardCache.clear()
+    DashboardCache.reset_stats()
+    return jsonify({'message': 'Dashboard cache cleared'}), 200
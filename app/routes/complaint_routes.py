@@ -102,7 +102,7 @@ def delete_existing_complaint(id):
 
 @main.route('/complaints/search-customer', methods=['GET'])
 @jwt_required()
-def search_customer():
+async def search_customer():
     search_term = request.args.get('search_term')
     if not search_term:
         return jsonify({'error': 'Search term is required'}), 400
@@ -110,7 +110,7 @@ def search_customer():
     claims = get_jwt()
     company_id = claims['company_id']
     
-    customer = customer_crud.search_customer(company_id, search_term)
+    customer = await customer_crud.search_customer(company_id, search_term)
     if customer:
         return jsonify(customer), 200
     else:
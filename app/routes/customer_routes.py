@@ -2,7 +2,9 @@ from flask import jsonify, request, send_file, current_app
 from flask_jwt_extended import jwt_required, get_jwt, get_jwt_identity
 from . import main
 from ..crud import customer_crud
+from ..services.export_service import ExportService
 from werkzeug.utils import secure_filename
+import asyncio
 import os
 import tempfile
 import csv
@@ -19,7 +21,7 @@ PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..
 UPLOAD_FOLDER = os.path.join(PROJECT_ROOT, 'uploads', 'cnic_images')
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'pdf'}
 
-async def allowed_file(filename):
+def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 # New route for handling immediate file uploads
@@ -111,9 +113,32 @@ async def get_customers():
     company_id = claims['company_id']
     user_role = claims['role']
     employee_id = get_jwt_identity()
-    customers = await customer_crud.get_all_customers(company_id, user_role, employee_id)
+
+    # Optional ?fields=id,first_name,... and ?page=1&page_size=50
+    fields = [f.strip() for f in request.args.get('fields', '').split(',') if f.strip()]
+    page = request.args.get('page', type=int)
+    page_size = min(request.args.get('page_size', 50, type=int), 500)
+
+    customers = await customer_crud.get_all_customers(
+        company_id, user_role, employee_id, fields=fields, page=page, page_size=page_size
+    )
     return jsonify(customers), 200
 
+@main.route('/customers/export', methods=['GET'])
+@jwt_required()
+def export_customers():
+    claims = get_jwt()
+    company_id = claims['company_id']
+    user_role = claims['role']
+
+    query = customer_crud.export_customers_query(company_id, user_role, q=request.args.get('q'))
+    if query is None:
+        return jsonify({'error': 'Unauthorized access'}), 403
+    try:
+        return ExportService.response(query, 'customers', request.args.get('format', 'csv'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
 @main.route('/customers/check-internet-id/<string:internet_id>', methods=['GET'])
 @jwt_required()
 def check_internet_id_availability(internet_id):
@@ -402,10 +427,12 @@ async def get_customer_template():
     
     # Fetch dropdown data from database
     try:
-        # Get areas, service plans, and ISPs for dropdowns
-        areas = await customer_crud.get_company_areas(company_id)
-        service_plans = await customer_crud.get_company_service_plans(company_id)
-        isps = await customer_crud.get_company_isps(company_id)
+        # Get areas, service plans, and ISPs for dropdowns (concurrently, each on its own connection)
+        areas, service_plans, isps = await asyncio.gather(
+            customer_crud.get_company_areas(company_id),
+            customer_crud.get_company_service_plans(company_id),
+            customer_crud.get_company_isps(company_id)
+        )
         
         # Create hidden sheets for dropdown data
         area_sheet = wb.create_sheet("Areas")
@@ -607,9 +634,11 @@ async def get_reference_data():
     company_id = claims['company_id']
     
     try:
-        areas = await customer_crud.get_company_areas(company_id)
-        service_plans = await customer_crud.get_company_service_plans(company_id)
-        isps = await customer_crud.get_company_isps(company_id)
+        areas, service_plans, isps = await asyncio.gather(
+            customer_crud.get_company_areas(company_id),
+            customer_crud.get_company_service_plans(company_id),
+            customer_crud.get_company_isps(company_id)
+        )
         
         return jsonify({
             'areas': areas,
@@ -2,7 +2,14 @@ from flask import Blueprint, jsonify,request
 from flask_jwt_extended import jwt_required, get_jwt_identity,get_jwt
 from app.crud import dashboard_crud
 from app.models import User
+from app.services.export_service import ExportService
+from app.services.dashboard_cache import DashboardCache
+from app.utils.read_replica import read_replica
+from app.utils.keyset_pagination import CursorError
 from . import main
+import logging
+
+logger = logging.getLogger(__name__)
 dashboard = Blueprint('dashboard', __name__)
 
 @main.route('/dashboard/executive-summary', methods=['GET'])
@@ -119,7 +126,11 @@ def get_bank_account_analytics():
         'payment_method': request.args.get('payment_method', 'all')
     }
     
-    data = dashboard_crud.get_bank_account_analytics_data(company_id, filters)
+    data = DashboardCache.get_or_compute(
+        'bank-account-analytics', company_id, filters,
+        (DashboardCache.TAG_INVOICE, DashboardCache.TAG_PAYMENT, DashboardCache.TAG_BANK_ACCOUNT),
+        lambda: dashboard_crud.get_bank_account_analytics_data(company_id, filters)
+    )
     return jsonify(data)
 
 @main.route('/dashboard/unified-financial', methods=['GET'])
@@ -139,7 +150,10 @@ def get_unified_financial_data():
     }
     
     try:
-        data = dashboard_crud.get_unified_financial_data(company_id, filters)
+        data = DashboardCache.get_or_compute(
+            'unified-financial', company_id, filters, DashboardCache.FINANCIAL_TAGS,
+            lambda: dashboard_crud.get_unified_financial_data(company_id, filters)
+        )
         return jsonify(data), 200
     except Exception as e:
         logger.error(f"Error fetching unified financial data: {str(e)}")
@@ -158,5 +172,46 @@ def get_ledger():
         'invoice_status': request.args.get('invoice_status', 'all'),
         'isp_payment_type': request.args.get('isp_payment_type', 'all'),
     }
-    data = dashboard_crud.get_ledger_data(company_id, filters)
+
+    # Opt-in keyset pagination: ?pagination=cursor[&cursor=<token>][&page_size=N]
+    if request.args.get('pagination') == 'cursor' or request.args.get('cursor'):
+        cursor = request.args.get('cursor')
+        page_size = request.args.get('page_size', dashboard_crud.LEDGER_PAGE_SIZE, type=int)
+        try:
+            data = DashboardCache.get_or_compute(
+                'ledger-page', company_id, {**filters, 'cursor': cursor, 'page_size': page_size},
+                DashboardCache.FINANCIAL_TAGS,
+                lambda: dashboard_crud.get_ledger_page(company_id, filters, page_size, cursor)
+            )
+            return jsonify(data), 200
+        except CursorError as e:
+            return jsonify({'error': str(e)}), 400
+        except Exception as e:
+            logger.error(f"Error fetching ledger page: {str(e)}")
+            return jsonify({'error': 'Failed to fetch ledger'}), 500
+
+    data = DashboardCache.get_or_compute(
+        'ledger', company_id, filters, DashboardCache.FINANCIAL_TAGS,
+        lambda: dashboard_crud.get_ledger_data(company_id, filters)
+    )
     return jsonify(data), 200
+
+@main.route('/dashboard/ledger/export', methods=['GET'])
+@jwt_required()
+@read_replica
+def export_ledger():
+    claims = get_jwt()
+    company_id = claims['company_id']
+    filters = {
+        'start_date': request.args.get('start_date'),
+        'end_date': request.args.get('end_date'),
+        'bank_account_id': request.args.get('bank_account_id', 'all'),
+        'payment_method': request.args.get('payment_method', 'all'),
+        'invoice_status': request.args.get('invoice_status', 'all'),
+        'isp_payment_type': request.args.get('isp_payment_type', 'all'),
+    }
+    query = dashboard_crud.ledger_export_query(company_id, filters)
+    try:
+        return ExportService.response(query, 'ledger', request.args.get('format', 'csv'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
@@ -2,6 +2,8 @@ from flask import jsonify, request, Blueprint
 from flask_jwt_extended import jwt_required, get_jwt, get_jwt_identity
 from app.crud import invoice_crud
 from app.models import Customer, ServicePlan
+from app.utils.keyset_pagination import CursorError
+from app.services.export_service import ExportService
 from datetime import datetime, timedelta
 import logging
 from . import main
@@ -272,6 +274,22 @@ def get_public_bank_accounts():
         logger.error(f"Error fetching public bank accounts: {str(e)}")
         return jsonify({'error': 'Failed to fetch bank accounts'}), 500
 
+@main.route('/invoices/export', methods=['GET'])
+@jwt_required()
+def export_invoices():
+    claims = get_jwt()
+    company_id = claims['company_id']
+    user_role = claims['role']
+    employee_id = claims['id']
+
+    query = invoice_crud.export_invoices_query(
+        company_id, user_role, employee_id, sort=request.args.get('sort'), q=request.args.get('q')
+    )
+    try:
+        return ExportService.response(query, 'invoices', request.args.get('format', 'csv'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
 @main.route('/invoices/page', methods=['GET'])
 @jwt_required()
 def get_invoices_page():
@@ -285,6 +303,23 @@ def get_invoices_page():
     sort = request.args.get('sort')  # e.g. "invoice_number:asc,due_date:desc"
     q = request.args.get('q')
 
+    # Opt-in keyset pagination: ?pagination=cursor[&cursor=<token>][&total=exact|capped|estimate|none]
+    if request.args.get('pagination') == 'cursor' or request.args.get('cursor'):
+        try:
+            result = invoice_crud.get_invoices_cursor_page(
+                company_id=company_id,
+                user_role=user_role,
+                employee_id=employee_id,
+                page_size=page_size,
+                sort=sort,
+                q=q,
+                cursor=request.args.get('cursor'),
+                total_mode=request.args.get('total', 'estimate'),
+            )
+        except (CursorError, ValueError) as e:
+            return jsonify({'error': str(e)}), 400
+        return jsonify(result), 200
+
     result = invoice_crud.get_invoices_page(
         company_id=company_id,
         user_role=user_role,
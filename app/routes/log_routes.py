@@ -1,8 +1,12 @@
 # log_routes.py - Updated with pagination endpoints
-from flask import jsonify, request, Response
+from flask import jsonify, request
 from flask_jwt_extended import jwt_required, get_jwt
 from . import main
 from ..crud import log_crud
+from app.utils.keyset_pagination import CursorError
+from app.services.audit_log_writer import AuditLogWriter
+from app.services.export_service import ExportService
+from app.utils.read_replica import read_replica
 
 @main.route('/logs/list', methods=['GET'])
 @jwt_required()
@@ -31,6 +35,26 @@ def list_logs_paginated():
     filters = {k.replace('filter_', ''): v for k, v in request.args.items() 
                if k.startswith('filter_') and v}
 
+    # Opt-in keyset pagination: ?pagination=cursor[&cursor=<token>][&total=exact|capped|estimate|none]
+    if request.args.get('pagination') == 'cursor' or request.args.get('cursor'):
+        try:
+            items, page_info = log_crud.get_logs_cursor_page(
+                company_id=company_id,
+                user_role=user_role,
+                page_size=page_size,
+                sort_by=sort_by,
+                sort_dir=sort_dir,
+                q=q,
+                filters=filters,
+                cursor=request.args.get('cursor'),
+                total_mode=request.args.get('total', 'estimate'),
+            )
+            return jsonify({'items': items, **page_info}), 200
+        except (CursorError, ValueError) as e:
+            return jsonify({'error': str(e)}), 400
+        except Exception as e:
+            return jsonify({'error': 'Failed to fetch logs', 'message': str(e)}), 500
+
     try:
         items, total = log_crud.get_all_logs_paginated(
             company_id=company_id,
@@ -53,14 +77,26 @@ def logs_summary():
     company_id = claims['company_id']
     user_role = claims['role']
 
+    filters = {k.replace('filter_', ''): v for k, v in request.args.items()
+               if k.startswith('filter_') and v}
+
     try:
-        summary = log_crud.get_logs_summary(company_id, user_role)
+        summary = log_crud.get_logs_summary(company_id, user_role, filters)
         return jsonify(summary), 200
     except Exception as e:
         return jsonify({'error': 'Failed to get summary', 'message': str(e)}), 500
 
+@main.route('/logs/writer-stats', methods=['GET'])
+@jwt_required()
+def audit_log_writer_stats():
+    claims = get_jwt()
+    if claims['role'] != 'super_admin':
+        return jsonify({'error': 'Unauthorized access'}), 403
+    return jsonify(AuditLogWriter.stats()), 200
+
 @main.route('/logs/export', methods=['GET'])
 @jwt_required()
+@read_replica
 def export_logs_csv():
     claims = get_jwt()
     company_id = claims['company_id']
@@ -72,13 +108,13 @@ def export_logs_csv():
     filters = {k.replace('filter_', ''): v for k, v in request.args.items() 
                if k.startswith('filter_') and v}
 
-    def generate():
-        yield "user_name,action,table_name,record_id,ip_address,timestamp\n"
-        for row in log_crud.stream_logs(company_id, user_role, sort_by, sort_dir, q, filters):
-            yield f"\"{row['user_name']}\",{row['action']},{row['table_name']},{row['record_id']},{row['ip_address']},{row['timestamp']}\n"
-
-    return Response(generate(), mimetype='text/csv',
-                    headers={"Content-Disposition": "attachment; filename=logs.csv"})
+    query = log_crud.export_logs_query(company_id, user_role, sort_by, sort_dir, q, filters)
+    if query is None:
+        return jsonify({'error': 'Unauthorized access'}), 403
+    try:
+        return ExportService.response(query, 'logs', request.args.get('format', 'csv'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
 @main.route('/logs/<string:id>', methods=['GET'])
 @jwt_required()
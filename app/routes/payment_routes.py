@@ -2,6 +2,9 @@ from flask import jsonify, request,send_file,current_app,Response
 from flask_jwt_extended import jwt_required, get_jwt, get_jwt_identity
 from . import main
 from ..crud import payment_crud,bank_account_crud
+from app.utils.keyset_pagination import CursorError
+from app.services.export_service import ExportService
+from app.utils.read_replica import read_replica
 import os
 from werkzeug.utils import secure_filename
 import uuid
@@ -183,6 +186,28 @@ def list_payments_paginated():
     # Column filters come as filter_<column>=value
     filters = {k.replace('filter_', ''): v for k, v in request.args.items() if k.startswith('filter_') and v}
 
+    # Opt-in keyset pagination: ?pagination=cursor[&cursor=<token>][&total=exact|capped|estimate|none]
+    if request.args.get('pagination') == 'cursor' or request.args.get('cursor'):
+      try:
+        items, page_info = payment_crud.list_payments_cursor(
+            company_id=company_id,
+            user_role=user_role,
+            employee_id=employee_id,
+            page_size=page_size,
+            sort_by=sort_by,
+            sort_dir=sort_dir,
+            q=q,
+            filters=filters,
+            cursor=request.args.get('cursor'),
+            total_mode=request.args.get('total', 'estimate'),
+        )
+        return jsonify({ 'items': items, **page_info }), 200
+      except (CursorError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+      except Exception as e:
+        current_app.logger.error(f"Cursor payments error: {e}")
+        return jsonify({'error': 'Failed to fetch payments'}), 500
+
     try:
       items, total = payment_crud.list_payments_paginated(
           company_id=company_id,
@@ -217,6 +242,7 @@ def payments_summary():
 
 @main.route('/payments/export', methods=['GET'])
 @jwt_required()
+@read_replica
 def export_payments_csv():
     claims = get_jwt()
     company_id = claims['company_id']
@@ -228,11 +254,9 @@ def export_payments_csv():
     q = request.args.get('q', '')
     filters = {k.replace('filter_', ''): v for k, v in request.args.items() if k.startswith('filter_') and v}
 
-    # Stream large CSV
-    def generate():
-        yield "invoice_number,customer_name,amount,payment_date,payment_method,status,received_by,bank_account\n"
-        for row in payment_crud.stream_payments(company_id, user_role, employee_id, sort_by, sort_dir, q, filters):
-            yield f"{row['invoice_number']},{row['customer_name']},{row['amount']},{row['payment_date']},{row['payment_method']},{row['status']},{row['received_by']},{row.get('bank_account_details','')}\n"
-
-    return Response(generate(), mimetype='text/csv',
-                    headers={"Content-Disposition": "attachment; filename=payments.csv"})
+    # Stream large CSV (or ?format=xlsx)
+    query = payment_crud.export_payments_query(company_id, user_role, employee_id, sort_by, sort_dir, q, filters)
+    try:
+        return ExportService.response(query, 'payments', request.args.get('format', 'csv'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
@@ -0,0 +1,217 @@
+"""
+Audit Log Writer
+Buffered, batched writer for DetailedLog rows.
+
+log_action used to add and commit one audit row per change, so every
+audited write cost a second commit. Buffered entries are collected in
+process memory instead. A background thread writes them with multi-row
+INSERTs on its own connection. A write happens when the buffer reaches
+AUDIT_LOG_BATCH_SIZE, every AUDIT_LOG_FLUSH_INTERVAL seconds, and when a
+request ends. Entries keep the time they were logged, not the time they
+were written. If the backlog grows past AUDIT_LOG_MAX_BACKLOG, the logging
+thread writes it synchronously rather than dropping entries.
+"""
+
+from app import db
+from app.models import DetailedLog
+from sqlalchemy import insert
+from datetime import datetime, timezone
+from flask import current_app, has_app_context
+import atexit
+import logging
+import os
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+
+class AuditLogWriter:
+    """Process-wide buffer of audit rows flushed in batches"""
+
+    DEFAULT_BATCH_SIZE = 200
+    DEFAULT_FLUSH_INTERVAL = 2.0
+    DEFAULT_MAX_BACKLOG = 10000
+    MAX_ATTEMPTS = 3
+
+    _app = None
+    _buffer = []
+    _lock = threading.Lock()
+    _flush_lock = threading.Lock()
+    _wakeup = threading.Event()
+    _thread = None
+    _pid = None
+    _counters = {
+        'enqueued': 0,
+        'written': 0,
+        'dropped': 0,
+        'flushes': 0,
+        'failed_flushes': 0,
+        'flush_seconds_total': 0.0,
+        'last_flush_ms': 0.0,
+        'max_flush_ms': 0.0
+    }
+
+    @classmethod
+    def init_app(cls, app):
+        """
+        Bind the writer to an application and flush at request end.
+
+        Args:
+            app: Flask application instance
+        """
+        cls._app = app
+        app.teardown_request(cls._on_request_end)
+        atexit.register(cls.flush)
+
+    @classmethod
+    def enqueue(cls, entry: dict):
+        """
+        Buffer one audit entry (same keys as log_action's arguments).
+
+        Args:
+            entry: Audit row values
+        """
+        row = {
+            **entry,
+            'id': entry.get('id') or uuid.uuid4(),
+            'created_at': entry.get('created_at') or datetime.now(timezone.utc)
+        }
+        if cls._app is None and has_app_context():
+            cls._app = current_app._get_current_object()
+
+        with cls._lock:
+            cls._buffer.append(row)
+            cls._counters['enqueued'] += 1
+            backlog = len(cls._buffer)
+
+        if backlog >= cls._config('AUDIT_LOG_MAX_BACKLOG', cls.DEFAULT_MAX_BACKLOG):
+            cls.flush()
+        else:
+            cls._ensure_thread()
+            if backlog >= cls._config('AUDIT_LOG_BATCH_SIZE', cls.DEFAULT_BATCH_SIZE):
+                cls._wakeup.set()
+
+    @classmethod
+    def flush(cls) -> int:
+        """
+        Write every buffered entry now.
+
+        Returns:
+            int: Number of rows written
+        """
+        with cls._flush_lock:
+            with cls._lock:
+                rows, cls._buffer = cls._buffer, []
+            if not rows or cls._app is None:
+                with cls._lock:
+                    cls._buffer[:0] = rows
+                return 0
+
+            batch_size = cls._config('AUDIT_LOG_BATCH_SIZE', cls.DEFAULT_BATCH_SIZE)
+            started = time.perf_counter()
+            written = 0
+            retry = []
+            with cls._app.app_context():
+                engine = db.engine
+                for start in range(0, len(rows), batch_size):
+                    chunk = rows[start:start + batch_size]
+                    try:
+                        with engine.begin() as connection:
+                            connection.execute(insert(DetailedLog), [cls._values(row) for row in chunk])
+                        written += len(chunk)
+                    except Exception as e:
+                        logger.error(f"Error writing {len(chunk)} audit log rows: {str(e)}")
+                        cls._counters['failed_flushes'] += 1
+                        written += cls._write_rows(engine, chunk, retry)
+
+            elapsed = time.perf_counter() - started
+            with cls._lock:
+                cls._buffer[:0] = retry
+                cls._counters['written'] += written
+                cls._counters['flushes'] += 1
+                cls._counters['flush_seconds_total'] += elapsed
+                cls._counters['last_flush_ms'] = round(elapsed * 1000, 3)
+                cls._counters['max_flush_ms'] = max(cls._counters['max_flush_ms'], cls._counters['last_flush_ms'])
+            return written
+
+    @classmethod
+    def stats(cls) -> dict:
+        """
+        Writer counters: throughput, flush latency and current backlog.
+
+        Returns:
+            dict: Counter values
+        """
+        with cls._lock:
+            counters = dict(cls._counters)
+            backlog = len(cls._buffer)
+            oldest = cls._buffer[0]['created_at'] if cls._buffer else None
+
+        flushes = counters.pop('flushes')
+        total = counters.pop('flush_seconds_total')
+        return {
+            **counters,
+            'flushes': flushes,
+            'avg_flush_ms': round(total * 1000 / flushes, 3) if flushes else 0.0,
+            'backlog': backlog,
+            'oldest_pending_seconds': round(
+                (datetime.now(timezone.utc) - oldest).total_seconds(), 3
+            ) if oldest else 0.0
+        }
+
+    @classmethod
+    def _write_rows(cls, engine, rows, retry):
+        """Row-by-row fallback so one bad entry does not sink its batch"""
+        written = 0
+        for row in rows:
+            try:
+                with engine.begin() as connection:
+                    connection.execute(insert(DetailedLog), [cls._values(row)])
+                written += 1
+            except Exception as e:
+                row['_attempts'] = row.get('_attempts', 0) + 1
+                if row['_attempts'] < cls.MAX_ATTEMPTS:
+                    retry.append(row)
+                else:
+                    cls._counters['dropped'] += 1
+                    logger.error(f"Dropping audit log row for {row.get('table_name')} {row.get('record_id')}: {str(e)}")
+        return written
+
+    @staticmethod
+    def _values(row):
+        return {key: value for key, value in row.items() if not key.startswith('_')}
+
+    @classmethod
+    def _config(cls, key, default):
+        if cls._app is None:
+            return default
+        return cls._app.config.get(key) or default
+
+    @classmethod
+    def _ensure_thread(cls):
+        # Started lazily, and again in forked worker processes
+        if cls._thread and cls._thread.is_alive() and cls._pid == os.getpid():
+            return
+        with cls._lock:
+            if cls._thread and cls._thread.is_alive() and cls._pid == os.getpid():
+                return
+            cls._pid = os.getpid()
+            cls._thread = threading.Thread(target=cls._run, name='audit-log-writer', daemon=True)
+            cls._thread.start()
+
+    @classmethod
+    def _run(cls):
+        while True:
+            cls._wakeup.wait(cls._config('AUDIT_LOG_FLUSH_INTERVAL', cls.DEFAULT_FLUSH_INTERVAL))
+            cls._wakeup.clear()
+            try:
+                cls.flush()
+            except Exception as e:
+                logger.error(f"Audit log writer error: {str(e)}")
+
+    @classmethod
+    def _on_request_end(cls, exception=None):
+        if cls._buffer:
+            cls._wakeup.set()
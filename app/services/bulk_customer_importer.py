@@ -0,0 +1,506 @@
+"""
+Bulk Customer Importer
+Vectorized validation and chunked insertion for customer CSV/Excel imports.
+
+Every check runs as a column operation over the whole upload (pandas Series.str
+methods and isin against sets preloaded with one query per lookup), so the
+number of database round trips no longer grows with the number of rows.
+Accepted customers and their audit rows are written with multi-row INSERTs,
+one transaction per chunk. Per-row problems are also returned as a compact
+[row, field, message] array.
+"""
+
+from app import db
+from app.models import Customer, Area, ServicePlan, ISP
+from app.utils.logging_utils import log_actions_bulk
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from datetime import date
+import numpy as np
+import pandas as pd
+import logging
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+REQUIRED_FIELDS = [
+    'internet_id', 'first_name', 'last_name', 'email', 'phone_1',
+    'area_id', 'installation_address', 'service_plan_id', 'isp_id',
+    'connection_type', 'cnic', 'installation_date'
+]
+
+ALL_COLUMNS = [
+    'internet_id', 'first_name', 'last_name', 'email', 'phone_1', 'phone_2',
+    'area_id', 'installation_address', 'service_plan_id', 'isp_id',
+    'connection_type', 'internet_connection_type', 'tv_cable_connection_type',
+    'installation_date', 'cnic', 'gps_coordinates',
+    # Optional fields
+    'wire_length', 'wire_ownership', 'router_ownership', 'router_id',
+    'router_serial_number', 'patch_cord_ownership', 'patch_cord_count',
+    'patch_cord_ethernet_ownership', 'patch_cord_ethernet_count',
+    'splicing_box_ownership', 'splicing_box_serial_number',
+    'ethernet_cable_ownership', 'ethernet_cable_length',
+    'dish_ownership', 'dish_id', 'dish_mac_address',
+    'node_count', 'stb_serial_number', 'discount_amount',
+    'recharge_date', 'miscellaneous_details', 'miscellaneous_charges'
+]
+
+FLOAT_FIELDS = ['wire_length', 'ethernet_cable_length', 'discount_amount', 'miscellaneous_charges']
+INTEGER_FIELDS = ['patch_cord_count', 'patch_cord_ethernet_count', 'node_count']
+OPTIONAL_UUID_FIELDS = ['router_id', 'dish_id']
+DOCUMENT_FIELDS = ['cnic_front_image', 'cnic_back_image', 'agreement_document']
+OPTIONAL_TEXT_FIELDS = [
+    'gps_coordinates', 'wire_ownership', 'router_ownership', 'router_serial_number',
+    'patch_cord_ownership', 'patch_cord_ethernet_ownership', 'splicing_box_ownership',
+    'splicing_box_serial_number', 'ethernet_cable_ownership', 'dish_ownership',
+    'dish_mac_address', 'stb_serial_number', 'miscellaneous_details'
+] + DOCUMENT_FIELDS
+
+CONNECTION_TYPES = ['internet', 'tv_cable', 'both']
+INTERNET_CONNECTION_TYPES = ['wire', 'wireless']
+TV_CABLE_CONNECTION_TYPES = ['analog', 'digital']
+EMAIL_PATTERN = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
+DATE_FORMAT = '%Y-%m-%d'
+
+
+class BulkCustomerImporter:
+    """Validate and insert customer uploads as whole columns instead of row by row"""
+
+    DEFAULT_CHUNK_SIZE = 500
+    LOOKUP_BATCH_SIZE = 1000
+
+    def __init__(
+        self,
+        company_id,
+        current_user_id=None,
+        ip_address: str = None,
+        user_agent: str = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE
+    ):
+        """
+        Initialize the importer.
+
+        Args:
+            company_id: Company UUID (or string) the customers belong to
+            current_user_id: User recorded on the audit rows
+            ip_address: IP address recorded on audit rows
+            user_agent: User agent recorded on audit rows
+            chunk_size: Number of customers written per transaction
+        """
+        self.company_id = self._to_uuid(company_id)
+        self.current_user_id = current_user_id
+        self.ip_address = ip_address
+        self.user_agent = user_agent
+        self.chunk_size = max(1, int(chunk_size))
+
+    @staticmethod
+    def _to_uuid(value):
+        if value is None or isinstance(value, uuid.UUID):
+            return value
+        return uuid.UUID(str(value))
+
+    # ------------------------------------------------------------------
+    # Column helpers
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _text(frame, column):
+        """Stripped string column with blanks (and absent columns) as NA"""
+        if column not in frame.columns:
+            return pd.Series(pd.NA, index=frame.index, dtype='string')
+        text = frame[column].astype('string').str.strip()
+        return text.mask(text == '')
+
+    @staticmethod
+    def _flag(mask):
+        return mask.fillna(False).astype(bool)
+
+    @staticmethod
+    def _digits(text):
+        return text.str.replace(r'\D', '', regex=True)
+
+    @staticmethod
+    def _parse_uuids(text):
+        """Parse each distinct value once; unparseable values become None"""
+        parsed = {}
+        for value in text.dropna().unique():
+            try:
+                parsed[value] = uuid.UUID(value)
+            except ValueError:
+                parsed[value] = None
+        result = text.astype(object).map(parsed)
+        return result.where(result.notna(), None)
+
+    @staticmethod
+    def _parse_dates(frame, column):
+        if column not in frame.columns:
+            return pd.Series(pd.NaT, index=frame.index, dtype='datetime64[ns]')
+        values = frame[column]
+        if pd.api.types.is_datetime64_any_dtype(values):
+            return values
+        values = values.where((values.astype('string').str.strip() != '').fillna(True), None)
+        return pd.to_datetime(values, format=DATE_FORMAT, errors='coerce')
+
+    @staticmethod
+    def _collect(errors, mask, field, message):
+        """Append [position, field, message] for every flagged row"""
+        positions = np.flatnonzero(mask.to_numpy())
+        if isinstance(message, pd.Series):
+            messages = message.to_numpy()[positions]
+        else:
+            messages = [message] * len(positions)
+        errors.extend([int(position), field, text] for position, text in zip(positions, messages))
+
+    def _existing(self, column, values, *criteria):
+        """Return the subset of values already present in column"""
+        values = [value for value in pd.unique(np.asarray(values, dtype=object)) if not pd.isna(value)]
+        found = set()
+        for offset in range(0, len(values), self.LOOKUP_BATCH_SIZE):
+            batch = values[offset:offset + self.LOOKUP_BATCH_SIZE]
+            found.update(row[0] for row in db.session.query(column).filter(column.in_(batch), *criteria).all())
+        return found
+
+    @staticmethod
+    def _group_errors(errors):
+        """Turn the compact array into per-row dicts keyed by position"""
+        grouped = {}
+        for position, field, message in sorted(errors, key=lambda item: item[0]):
+            grouped.setdefault(position, {})[field] = message
+        return grouped
+
+    # ------------------------------------------------------------------
+    # Validation
+    # ------------------------------------------------------------------
+
+    def validate(self, df) -> dict:
+        """
+        Validate an uploaded DataFrame without writing anything.
+
+        Args:
+            df: DataFrame read from the uploaded CSV/Excel file
+
+        Returns:
+            dict: counts, validRows (all columns, normalized), errors with
+            per-field messages, and rowErrors as [row, field, message] triples
+        """
+        started = time.perf_counter()
+        labels = df.index.tolist()
+        frame = df.reset_index(drop=True)
+        errors = []
+
+        text = {column: self._text(frame, column) for column in ALL_COLUMNS}
+
+        # Rows missing a required field only report the missing fields
+        incomplete = pd.Series(False, index=frame.index)
+        for field in REQUIRED_FIELDS:
+            missing = text[field].isna()
+            self._collect(errors, missing, field, f"Missing required field: {field}")
+            incomplete |= missing
+        checked = ~incomplete
+
+        self._collect(errors, checked & ~self._flag(text['email'].str.match(EMAIL_PATTERN)), 'email', "Invalid email format")
+
+        phones = {}
+        for field in ('phone_1', 'phone_2'):
+            digits = self._digits(text[field])
+            prefixed = digits.where(digits.str.startswith('92'), '92' + digits)
+            good = self._flag(prefixed.str.len().between(10, 13))
+            present = checked & text[field].notna()
+            self._collect(errors, present & ~good, field, f"Invalid phone number format for {field}")
+            phones[field] = (prefixed, present & good)
+
+        cnic = self._digits(text['cnic'])
+        cnic_ok = self._flag(cnic.str.len() == 13)
+        self._collect(errors, checked & ~cnic_ok, 'cnic', "CNIC must be exactly 13 digits")
+
+        connection_type = text['connection_type'].str.lower()
+        connection_ok = self._flag(connection_type.isin(CONNECTION_TYPES))
+        self._collect(
+            errors, checked & ~connection_ok, 'connection_type',
+            f"connection_type must be one of: {', '.join(CONNECTION_TYPES)}"
+        )
+
+        sub_types = {}
+        for field, parents, choices, label in (
+            ('internet_connection_type', ['internet', 'both'], INTERNET_CONNECTION_TYPES, 'internet or both'),
+            ('tv_cable_connection_type', ['tv_cable', 'both'], TV_CABLE_CONNECTION_TYPES, 'tv_cable or both'),
+        ):
+            needed = checked & self._flag(connection_type.isin(parents))
+            value = text[field].str.lower()
+            self._collect(
+                errors, needed & value.isna(), field,
+                f"{field} is required when connection_type is {label}"
+            )
+            good = self._flag(value.isin(choices))
+            self._collect(
+                errors, needed & value.notna() & ~good, field,
+                f"{field} must be one of: {', '.join(choices)}"
+            )
+            sub_types[field] = (value, needed & good)
+
+        installation_date = self._parse_dates(frame, 'installation_date')
+        date_ok = installation_date.notna()
+        self._collect(
+            errors, checked & ~date_ok, 'installation_date',
+            "Invalid installation_date format. Use YYYY-MM-DD"
+        )
+
+        references = {field: self._parse_uuids(text[field]) for field in ('area_id', 'service_plan_id', 'isp_id')}
+        uuids_ok = pd.Series(True, index=frame.index)
+        for parsed in references.values():
+            uuids_ok &= parsed.notna()
+        bad_uuid = "Invalid UUID format for area_id, service_plan_id, or isp_id"
+        for field in references:
+            self._collect(errors, checked & ~uuids_ok, field, bad_uuid)
+
+        for field, model, label in (
+            ('area_id', Area, 'Area'),
+            ('service_plan_id', ServicePlan, 'Service Plan'),
+            ('isp_id', ISP, 'ISP'),
+        ):
+            parsed = references[field]
+            known = self._existing(model.id, parsed[checked & uuids_ok], model.company_id == self.company_id)
+            unknown = checked & uuids_ok & ~parsed.isin(known)
+            self._collect(errors, unknown, field, f"{label} with ID " + parsed.astype(str) + " does not exist")
+
+        # Duplicates against the database and within the upload itself
+        internet_id = text['internet_id']
+        email = text['email']
+        taken_ids = self._existing(Customer.internet_id, internet_id[checked])
+        taken_emails = self._existing(Customer.email, email[checked])
+        taken_cnics = self._existing(Customer.cnic, cnic[checked & cnic_ok])
+        for field, values, taken, scope, label in (
+            ('internet_id', internet_id, taken_ids, checked, 'internet_id'),
+            ('email', email, taken_emails, checked, 'email'),
+            ('cnic', cnic, taken_cnics, checked & cnic_ok, 'CNIC'),
+        ):
+            self._collect(
+                errors, scope & self._flag(values.isin(taken)), field,
+                f"Customer with {label} " + values.astype(str) + " already exists"
+            )
+            repeated = scope & values.notna() & values.where(scope).duplicated(keep='first')
+            self._collect(
+                errors, repeated, field,
+                f"Duplicate {label} " + values.astype(str) + " appears earlier in the file"
+            )
+
+        # Preserve every column, overwriting the ones that were normalized
+        data = frame.reindex(columns=ALL_COLUMNS).astype(object)
+        data = data.where(data.notna(), None)
+        for field, (value, good) in {**phones, **sub_types}.items():
+            data.loc[good, field] = value[good]
+        data.loc[checked & cnic_ok, 'cnic'] = cnic[checked & cnic_ok]
+        data.loc[checked & connection_ok, 'connection_type'] = connection_type[checked & connection_ok]
+        data.loc[checked & date_ok, 'installation_date'] = installation_date[checked & date_ok].dt.strftime(DATE_FORMAT)
+        for field, parsed in references.items():
+            data.loc[checked & uuids_ok, field] = parsed[checked & uuids_ok].astype(str)
+        records = data.to_dict('records')
+
+        grouped = self._group_errors(errors)
+        failed = [
+            {
+                'row': labels[position],
+                'fieldErrors': field_errors,
+                'errors': list(field_errors.values()),
+                'data': records[position]
+            }
+            for position, field_errors in grouped.items()
+        ]
+        valid_positions = [position for position in range(len(records)) if position not in grouped]
+
+        elapsed = time.perf_counter() - started
+        logger.info(
+            f"Validated {len(records)} customer rows for company {self.company_id}: "
+            f"{len(valid_positions)} valid, {len(failed)} failed in {elapsed:.3f}s"
+        )
+
+        return {
+            'success': not failed,
+            'totalRecords': len(records),
+            'successCount': len(valid_positions),
+            'failedCount': len(failed),
+            'validRows': [records[position] for position in valid_positions],
+            'validRowLabels': [labels[position] for position in valid_positions],
+            'errors': failed,
+            'rowErrors': [[labels[position], field, message] for position, field, message in errors]
+        }
+
+    # ------------------------------------------------------------------
+    # Insertion
+    # ------------------------------------------------------------------
+
+    def _prepare(self, records):
+        """Normalize validated records into Customer rows; returns (rows, positions, errors)"""
+        frame = pd.DataFrame.from_records(records) if records else pd.DataFrame()
+        frame = frame.reindex(columns=ALL_COLUMNS + DOCUMENT_FIELDS)
+        errors = []
+
+        text = {column: self._text(frame, column) for column in frame.columns}
+        columns = {}
+        for field in ('first_name', 'last_name', 'email', 'internet_id', 'installation_address'):
+            columns[field] = text[field]
+
+        for field in ('phone_1', 'phone_2'):
+            digits = self._digits(text[field])
+            digits = digits.where(~self._flag(digits.str.startswith('92')), digits.str[2:])
+            columns[field] = ('92' + digits).where(text[field].notna())
+
+        columns['cnic'] = self._digits(text['cnic'])
+        for field in ('connection_type', 'internet_connection_type', 'tv_cable_connection_type'):
+            columns[field] = text[field].str.lower()
+
+        for field in ('area_id', 'service_plan_id', 'isp_id'):
+            columns[field] = self._parse_uuids(text[field])
+            self._collect(
+                errors, text[field].notna() & columns[field].isna(), field,
+                f"Invalid data format: {field} is not a valid UUID"
+            )
+        for field in OPTIONAL_UUID_FIELDS:
+            columns[field] = self._parse_uuids(text[field])
+
+        for field in ('installation_date', 'recharge_date'):
+            parsed = self._parse_dates(frame, field)
+            columns[field] = parsed.dt.date.astype(object).where(parsed.notna(), None)
+        self._collect(
+            errors, text['installation_date'].notna() & columns['installation_date'].isna(),
+            'installation_date', "Invalid data format: installation_date must be YYYY-MM-DD"
+        )
+
+        for field in FLOAT_FIELDS:
+            columns[field] = pd.to_numeric(text[field], errors='coerce')
+        for field in INTEGER_FIELDS:
+            number = pd.to_numeric(text[field], errors='coerce')
+            columns[field] = number.where(number == number.round()).astype('Int64')
+        for field in OPTIONAL_TEXT_FIELDS:
+            columns[field] = text[field]
+
+        for field in REQUIRED_FIELDS:
+            self._collect(errors, columns[field].isna(), field, f"Missing required field: {field}")
+
+        internet_id = columns['internet_id']
+        cnic = columns['cnic']
+        taken_ids = self._existing(Customer.internet_id, internet_id)
+        taken_cnics = self._existing(Customer.cnic, cnic)
+        for field, values, taken, message in (
+            ('internet_id', internet_id, taken_ids, "Internet ID '{}' is already taken"),
+            ('cnic', cnic, taken_cnics, "CNIC '{}' is already registered"),
+        ):
+            present = values.notna()
+            messages = values.astype(str).map(message.format)
+            self._collect(errors, present & self._flag(values.isin(taken)), field, messages)
+            self._collect(errors, present & values.duplicated(keep='first'), field, messages)
+
+        typed = pd.DataFrame(columns).astype(object)
+        typed = typed.where(typed.notna(), None)
+        rows = typed.to_dict('records')
+
+        rejected = {position for position, _, _ in errors}
+        positions = [position for position in range(len(rows)) if position not in rejected]
+        return [rows[position] for position in positions], positions, errors
+
+    @staticmethod
+    def _audit_values(row):
+        return {
+            key: (str(value) if isinstance(value, (uuid.UUID, date)) else value)
+            for key, value in row.items()
+            if value is not None and key not in ('id', 'company_id')
+        }
+
+    def _audit_entries(self, rows):
+        return [
+            {
+                'user_id': self.current_user_id,
+                'action': 'CREATE',
+                'table_name': 'customers',
+                'record_id': row['id'],
+                'old_values': None,
+                'new_values': self._audit_values(row),
+                'ip_address': self.ip_address,
+                'user_agent': self.user_agent,
+                'company_id': self.company_id
+            }
+            for row in rows
+        ]
+
+    def _write_chunk(self, rows):
+        db.session.execute(insert(Customer), rows)
+        log_actions_bulk(self._audit_entries(rows), commit=False)
+        db.session.commit()
+
+    def _write_rows(self, rows):
+        """Fallback for a rejected chunk: isolate the offending rows with savepoints"""
+        failed = {}
+        for index, row in enumerate(rows):
+            try:
+                with db.session.begin_nested():
+                    db.session.execute(insert(Customer), [row])
+                    log_actions_bulk(self._audit_entries([row]), commit=False)
+            except IntegrityError as e:
+                logger.error(f"Integrity error inserting customer {row.get('internet_id')}: {str(e)}")
+                failed[index] = "Database integrity error. This may be due to duplicate or invalid data."
+        db.session.commit()
+        return failed
+
+    def insert(self, records, row_labels=None) -> dict:
+        """
+        Insert already validated customer records.
+
+        Args:
+            records: List of customer dicts (validRows from validate)
+            row_labels: Row labels reported in errors (defaults to list positions)
+
+        Returns:
+            dict: counts, errors with the offending record, and rowErrors
+        """
+        started = time.perf_counter()
+        records = list(records or [])
+        labels = list(row_labels) if row_labels is not None else list(range(len(records)))
+        rows, positions, errors = self._prepare(records)
+
+        for row in rows:
+            row['id'] = uuid.uuid4()
+            row['company_id'] = self.company_id
+            row['is_active'] = True
+
+        for offset in range(0, len(rows), self.chunk_size):
+            chunk = rows[offset:offset + self.chunk_size]
+            try:
+                self._write_chunk(chunk)
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"Error writing customer chunk at offset {offset}: {str(e)}")
+                try:
+                    failed = self._write_rows(chunk)
+                except Exception as inner:
+                    db.session.rollback()
+                    logger.error(f"Error writing customer rows at offset {offset}: {str(inner)}")
+                    failed = {index: f"Database error: {str(inner)}" for index in range(len(chunk))}
+                for index, message in failed.items():
+                    errors.append([positions[offset + index], 'general', message])
+
+        grouped = self._group_errors(errors)
+        failed_rows = [
+            {
+                'row': labels[position],
+                'errors': list(field_errors.values()),
+                'data': records[position]
+            }
+            for position, field_errors in grouped.items()
+        ]
+        success_count = len(records) - len(failed_rows)
+
+        elapsed = time.perf_counter() - started
+        logger.info(
+            f"Imported {success_count} of {len(records)} customers for company {self.company_id} "
+            f"in {elapsed:.3f}s"
+        )
+
+        return {
+            'success': not failed_rows,
+            'totalRecords': len(records),
+            'successCount': success_count,
+            'failedCount': len(failed_rows),
+            'errors': failed_rows,
+            'rowErrors': [[labels[position], field, message] for position, field, message in errors]
+        }
@@ -0,0 +1,314 @@
+"""
+Bulk Invoice Generator
+Set-based engine for monthly subscription invoice runs.
+
+Customers, service plans and already-issued invoices are loaded once per run,
+amounts are computed in memory, and invoices, audit rows and WhatsApp queue
+rows are written with multi-row INSERTs, one transaction per chunk. The
+dashboard rollups are updated once per chunk with the merged totals.
+"""
+
+from app import db
+from app.models import Customer, Invoice, ServicePlan, WhatsAppMessageQueue
+from app.services.invoice_number_allocator import InvoiceNumberAllocator
+from app.services.dashboard_rollup_service import DashboardRollupService
+from app.services.whatsapp_invoice_sender import WhatsAppInvoiceSender
+from app.utils.logging_utils import log_actions_bulk
+from sqlalchemy import insert
+from datetime import date
+import logging
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+
+class BulkInvoiceGenerator:
+    """Generate subscription invoices for many customers in chunked transactions"""
+
+    DEFAULT_CHUNK_SIZE = 500
+
+    def __init__(
+        self,
+        generated_by,
+        ip_address: str = None,
+        user_agent: str = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        send_notifications: bool = True
+    ):
+        """
+        Initialize the generator.
+
+        Args:
+            generated_by: User UUID (or string) recorded on invoices and audit rows
+            ip_address: IP address recorded on audit rows
+            user_agent: User agent recorded on audit rows
+            chunk_size: Number of invoices written per transaction
+            send_notifications: Enqueue WhatsApp invoice notifications
+        """
+        self.generated_by = self._to_uuid(generated_by)
+        self.ip_address = ip_address
+        self.user_agent = user_agent
+        self.chunk_size = max(1, int(chunk_size))
+        self.send_notifications = send_notifications
+
+    @staticmethod
+    def _to_uuid(value):
+        if value is None or isinstance(value, uuid.UUID):
+            return value
+        return uuid.UUID(str(value))
+
+    def generate(
+        self,
+        customer_filters: list,
+        billing_start_date: date,
+        billing_end_date: date,
+        due_date: date,
+        existing_start: date,
+        existing_end: date,
+        notes_template: str,
+        active_invoices_only: bool = False
+    ) -> dict:
+        """
+        Run a bulk invoice generation.
+
+        Args:
+            customer_filters: SQLAlchemy criteria selecting the customers to bill
+            billing_start_date: Billing period start for new invoices
+            billing_end_date: Billing period end for new invoices
+            due_date: Due date for new invoices
+            existing_start: Start (inclusive) of the window checked for existing invoices
+            existing_end: End (exclusive) of the window checked for existing invoices
+            notes_template: Invoice notes, formatted with {plan_name}
+            active_invoices_only: Only active invoices count as existing
+
+        Returns:
+            dict: generated, skipped and failed entries plus throughput stats
+        """
+        started = time.perf_counter()
+
+        customers = self._load_customers(customer_filters)
+        company_ids = {c.company_id for c in customers}
+        plans = self._load_plans({c.service_plan_id for c in customers})
+        existing = self._load_existing_invoices(
+            company_ids, existing_start, existing_end, active_invoices_only
+        )
+        load_seconds = time.perf_counter() - started
+
+        pending, skipped, failed = self._prepare(
+            customers, plans, existing, billing_start_date, billing_end_date, due_date, notes_template
+        )
+
+        generated = []
+        chunks = 0
+        notifications = 0
+        for offset in range(0, len(pending), self.chunk_size):
+            chunk = pending[offset:offset + self.chunk_size]
+            chunks += 1
+            try:
+                notifications += self._write_chunk(chunk)
+                generated.extend(
+                    {
+                        'customer_id': str(item['customer_id']),
+                        'customer_name': f"{item['first_name']} {item['last_name']}",
+                        'invoice_id': str(item['id']),
+                        'invoice_number': item['invoice_number'],
+                        'amount': item['total_amount']
+                    }
+                    for item in chunk
+                )
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"Error writing invoice chunk {chunks} ({len(chunk)} invoices): {str(e)}")
+                failed.extend(
+                    {
+                        'customer_id': str(item['customer_id']),
+                        'customer_name': f"{item['first_name']} {item['last_name']}",
+                        'error': str(e)
+                    }
+                    for item in chunk
+                )
+
+        elapsed = time.perf_counter() - started
+        stats = {
+            'total_customers': len(customers),
+            'generated': len(generated),
+            'skipped': len(skipped),
+            'errors': len(failed),
+            'notifications_enqueued': notifications,
+            'chunks': chunks,
+            'chunk_size': self.chunk_size,
+            'load_seconds': round(load_seconds, 3),
+            'elapsed_seconds': round(elapsed, 3),
+            'invoices_per_second': round(len(generated) / elapsed, 2) if elapsed > 0 else 0
+        }
+        logger.info(
+            f"Bulk invoice run finished: {stats['generated']} generated, {stats['skipped']} skipped, "
+            f"{stats['errors']} errors in {stats['elapsed_seconds']}s ({stats['invoices_per_second']} invoices/s)"
+        )
+
+        return {
+            'generated': generated,
+            'skipped': skipped,
+            'failed': failed,
+            'stats': stats
+        }
+
+    def _load_customers(self, customer_filters):
+        return db.session.query(
+            Customer.id,
+            Customer.company_id,
+            Customer.first_name,
+            Customer.last_name,
+            Customer.phone_1,
+            Customer.area_id,
+            Customer.service_plan_id,
+            Customer.discount_amount
+        ).filter(*customer_filters).all()
+
+    def _load_plans(self, plan_ids):
+        plan_ids = [plan_id for plan_id in plan_ids if plan_id]
+        if not plan_ids:
+            return {}
+        rows = db.session.query(ServicePlan.id, ServicePlan.name, ServicePlan.price).filter(
+            ServicePlan.id.in_(plan_ids)
+        ).all()
+        return {row.id: row for row in rows}
+
+    def _load_existing_invoices(self, company_ids, existing_start, existing_end, active_only):
+        if not company_ids:
+            return {}
+        query = db.session.query(Invoice.customer_id, Invoice.invoice_number).filter(
+            Invoice.company_id.in_(company_ids),
+            Invoice.invoice_type == 'subscription',
+            Invoice.billing_start_date >= existing_start,
+            Invoice.billing_start_date < existing_end
+        )
+        if active_only:
+            query = query.filter(Invoice.is_active == True)
+        return {row.customer_id: row.invoice_number for row in query.all()}
+
+    def _prepare(self, customers, plans, existing, billing_start_date, billing_end_date, due_date, notes_template):
+        pending = []
+        skipped = []
+        failed = []
+
+        for customer in customers:
+            customer_name = f"{customer.first_name} {customer.last_name}"
+
+            if customer.id in existing:
+                skipped.append({
+                    'customer_id': str(customer.id),
+                    'customer_name': customer_name,
+                    'invoice_number': existing[customer.id]
+                })
+                continue
+
+            plan = plans.get(customer.service_plan_id)
+            if not plan:
+                failed.append({
+                    'customer_id': str(customer.id),
+                    'customer_name': customer_name,
+                    'error': 'Service plan not found'
+                })
+                continue
+
+            subtotal = float(plan.price)
+            discount_amount = float(customer.discount_amount) if customer.discount_amount else 0
+            discount_percentage = (discount_amount / subtotal * 100) if subtotal > 0 else 0
+
+            pending.append({
+                'id': uuid.uuid4(),
+                'company_id': customer.company_id,
+                'customer_id': customer.id,
+                'first_name': customer.first_name,
+                'last_name': customer.last_name,
+                'phone_1': customer.phone_1,
+                'area_id': customer.area_id,
+                'service_plan_id': customer.service_plan_id,
+                'plan_name': plan.name,
+                'billing_start_date': billing_start_date,
+                'billing_end_date': billing_end_date,
+                'due_date': due_date,
+                'subtotal': round(subtotal, 2),
+                'discount_percentage': round(discount_percentage, 2),
+                'total_amount': round(subtotal - discount_amount, 2),
+                'notes': notes_template.format(plan_name=plan.name)
+            })
+
+        return pending, skipped, failed
+
+    def _write_chunk(self, chunk) -> int:
+        for item, number in zip(chunk, InvoiceNumberAllocator.reserve(len(chunk))):
+            item['invoice_number'] = number
+
+        db.session.execute(insert(Invoice), [
+            {
+                'id': item['id'],
+                'invoice_number': item['invoice_number'],
+                'company_id': item['company_id'],
+                'customer_id': item['customer_id'],
+                'billing_start_date': item['billing_start_date'],
+                'billing_end_date': item['billing_end_date'],
+                'due_date': item['due_date'],
+                'subtotal': item['subtotal'],
+                'discount_percentage': item['discount_percentage'],
+                'total_amount': item['total_amount'],
+                'invoice_type': 'subscription',
+                'notes': item['notes'],
+                'generated_by': self.generated_by,
+                'status': 'pending',
+                'is_active': True
+            }
+            for item in chunk
+        ])
+
+        log_actions_bulk([
+            {
+                'user_id': self.generated_by,
+                'action': 'CREATE',
+                'table_name': 'invoices',
+                'record_id': item['id'],
+                'old_values': None,
+                'new_values': {
+                    'company_id': str(item['company_id']),
+                    'customer_id': str(item['customer_id']),
+                    'invoice_number': item['invoice_number'],
+                    'billing_start_date': item['billing_start_date'].isoformat(),
+                    'billing_end_date': item['billing_end_date'].isoformat(),
+                    'due_date': item['due_date'].isoformat(),
+                    'subtotal': item['subtotal'],
+                    'discount_percentage': item['discount_percentage'],
+                    'total_amount': item['total_amount'],
+                    'invoice_type': 'subscription',
+                    'notes': item['notes']
+                },
+                'ip_address': self.ip_address,
+                'user_agent': self.user_agent,
+                'company_id': item['company_id']
+            }
+            for item in chunk
+        ], commit=False)
+
+        DashboardRollupService.record_many(
+            DashboardRollupService.invoice_fact(
+                item['company_id'], item['billing_start_date'], item['total_amount'],
+                item['area_id'], item['service_plan_id']
+            )
+            for item in chunk
+        )
+
+        notifications = []
+        if self.send_notifications:
+            by_company = {}
+            for item in chunk:
+                by_company.setdefault(item['company_id'], []).append(item)
+            for company_id, items in by_company.items():
+                notifications.extend(
+                    WhatsAppInvoiceSender.build_bulk_notifications(str(company_id), items)
+                )
+            if notifications:
+                db.session.execute(insert(WhatsAppMessageQueue), notifications)
+
+        db.session.commit()
+        return len(notifications)
@@ -0,0 +1,398 @@
+"""
+Dashboard Cache
+Response cache for the polled financial dashboard endpoints.
+
+Entries are keyed by endpoint, company and the normalized filters, plus the
+current version of every tag the endpoint depends on. The financial write
+paths bump a company's tags when their transaction commits (see
+invalidate_on_commit), which makes the old entries unreachable; they age out
+of the in-process LRU and expire from Redis on their own. Each bump also
+records when it happened: a recompute within replication lag of the last
+bump reads from the primary (see read_replica.fresh_since), so data from a
+replica that hasn't replayed the write is never stored under the new
+versions.
+
+The in-process LRU always sits in front. With DASHBOARD_CACHE_REDIS_URL set
+(and the redis package installed), entries and tag versions are also kept in
+Redis so every worker sees the same data and the same invalidations. Redis
+errors are logged and the cache carries on in-process only. Hit ratio and
+recompute latency per endpoint are available from stats().
+"""
+
+from app import db
+from app.utils.read_replica import fresh_since, DEFAULT_MAX_LAG_SECONDS
+from flask import current_app
+from sqlalchemy import event
+from collections import OrderedDict
+import hashlib
+import json
+import logging
+import threading
+import time
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+
+class _LRU:
+    """Thread-safe LRU of (expires_at, value) with a size bound"""
+
+    def __init__(self, size):
+        self.size = size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class DashboardCache:
+    """Tag-invalidated response cache for dashboard endpoints"""
+
+    TAG_INVOICE = 'invoice'
+    TAG_PAYMENT = 'payment'
+    TAG_EXPENSE = 'expense'
+    TAG_EXTRA_INCOME = 'extra_income'
+    TAG_ISP_PAYMENT = 'isp_payment'
+    TAG_BANK_ACCOUNT = 'bank_account'
+    FINANCIAL_TAGS = (
+        TAG_INVOICE, TAG_PAYMENT, TAG_EXPENSE, TAG_EXTRA_INCOME, TAG_ISP_PAYMENT, TAG_BANK_ACCOUNT
+    )
+
+    DEFAULT_TTL = 300
+    DEFAULT_SIZE = 512
+    KEY_PREFIX = 'dashcache'
+    SESSION_KEY = 'dashboard_cache_tags'
+
+    _enabled = False
+    _ttl = DEFAULT_TTL
+    _lru = _LRU(DEFAULT_SIZE)
+    _redis = None
+    _versions = {}
+    _bumped = {}
+    _bump_ttl = DEFAULT_TTL
+    _lock = threading.Lock()
+    _inflight = {}
+    _stats = {}
+    _listening = False
+
+    @classmethod
+    def init_app(cls, app):
+        """
+        Configure the cache from DASHBOARD_CACHE_* settings and hook the
+        session so pending invalidations are applied on commit.
+
+        Args:
+            app: Flask application instance
+        """
+        cls._enabled = bool(app.config.get('DASHBOARD_CACHE_ENABLED', True))
+        cls._ttl = int(app.config.get('DASHBOARD_CACHE_TTL') or cls.DEFAULT_TTL)
+        cls._lru = _LRU(int(app.config.get('DASHBOARD_CACHE_SIZE') or cls.DEFAULT_SIZE))
+        cls._redis = None
+        # Bump times only matter while a replica could still be behind them
+        max_lag = float(app.config.get('REPLICA_MAX_LAG_SECONDS') or DEFAULT_MAX_LAG_SECONDS)
+        cls._bump_ttl = max(cls._ttl, int(max_lag) + 1)
+
+        url = app.config.get('DASHBOARD_CACHE_REDIS_URL')
+        if url:
+            if redis is None:
+                logger.warning("DASHBOARD_CACHE_REDIS_URL is set but the redis package is not installed")
+            else:
+                cls._redis = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+
+        with cls._lock:
+            if not cls._listening:
+                event.listen(db.session, 'after_commit', cls._after_commit)
+                event.listen(db.session, 'after_rollback', cls._after_rollback)
+                cls._listening = True
+
+    # ------------------------------------------------------------------
+    # Keys and tag versions
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def normalize_filters(filters) -> str:
+        """Stable text form of a filter dict; empty values are dropped"""
+        items = {str(k): str(v) for k, v in (filters or {}).items() if v not in (None, '')}
+        return json.dumps(items, sort_keys=True, separators=(',', ':'))
+
+    @classmethod
+    def _tag_key(cls, company_id, tag):
+        return f'{cls.KEY_PREFIX}:tag:{company_id}:{tag}'
+
+    @classmethod
+    def _bump_key(cls, company_id, tag):
+        return f'{cls.KEY_PREFIX}:bumped:{company_id}:{tag}'
+
+    @classmethod
+    def _tag_versions(cls, company_id, tags):
+        keys = [cls._tag_key(company_id, tag) for tag in tags]
+        if cls._redis is not None:
+            try:
+                return [int(value or 0) for value in cls._redis.mget(keys)]
+            except Exception as e:
+                logger.warning(f"Dashboard cache: reading tag versions from Redis failed: {str(e)}")
+        return [cls._versions.get(key, 0) for key in keys]
+
+    @classmethod
+    def last_bump(cls, company_id, tags):
+        """Epoch time of the latest bump of any of the tags, or None"""
+        keys = [cls._bump_key(str(company_id), tag) for tag in tags]
+        if cls._redis is not None:
+            try:
+                times = [float(value) for value in cls._redis.mget(keys) if value is not None]
+                return max(times) if times else None
+            except Exception as e:
+                logger.warning(f"Dashboard cache: reading bump times from Redis failed: {str(e)}")
+        times = [cls._bumped[key] for key in keys if key in cls._bumped]
+        return max(times) if times else None
+
+    @classmethod
+    def entry_key(cls, endpoint, company_id, filters, tags) -> str:
+        """Cache key for the current tag versions"""
+        versions = cls._tag_versions(company_id, tags)
+        digest = hashlib.sha1(cls.normalize_filters(filters).encode()).hexdigest()
+        tag_part = '.'.join(f'{tag}{version}' for tag, version in zip(tags, versions))
+        return f'{cls.KEY_PREFIX}:entry:{endpoint}:{company_id}:{digest}:{tag_part}'
+
+    # ------------------------------------------------------------------
+    # Lookup
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def _redis_get(cls, key):
+        if cls._redis is None:
+            return None
+        try:
+            raw = cls._redis.get(key)
+        except Exception as e:
+            logger.warning(f"Dashboard cache: Redis get failed: {str(e)}")
+            return None
+        return json.loads(raw) if raw is not None else None
+
+    @classmethod
+    def _redis_set(cls, key, value):
+        if cls._redis is None:
+            return
+        try:
+            cls._redis.set(key, current_app.json.dumps(value), ex=cls._ttl)
+        except Exception as e:
+            logger.warning(f"Dashboard cache: Redis set failed: {str(e)}")
+
+    @classmethod
+    def _endpoint_stats(cls, endpoint):
+        return cls._stats.setdefault(endpoint, {
+            'hits': 0, 'misses': 0, 'recomputes': 0,
+            'recompute_total_ms': 0.0, 'recompute_max_ms': 0.0, 'recompute_last_ms': 0.0
+        })
+
+    @classmethod
+    def _count(cls, endpoint, field):
+        with cls._lock:
+            cls._endpoint_stats(endpoint)[field] += 1
+
+    @classmethod
+    def _record_recompute(cls, endpoint, elapsed_ms):
+        with cls._lock:
+            stats = cls._endpoint_stats(endpoint)
+            stats['recomputes'] += 1
+            stats['recompute_total_ms'] += elapsed_ms
+            stats['recompute_max_ms'] = max(stats['recompute_max_ms'], elapsed_ms)
+            stats['recompute_last_ms'] = elapsed_ms
+
+    @classmethod
+    def get_or_compute(cls, endpoint, company_id, filters, tags, compute):
+        """
+        Return the cached result for (endpoint, company, filters) or compute
+        and store it. Concurrent misses for the same key in this process wait
+        for a single computation. Results must be JSON-serializable and are
+        shared between callers, so treat them as read-only. A dict with an
+        'error' key (how the dashboard CRUD reports failures) is not stored.
+        The computation only reads from the replica if it has caught up with
+        the last bump of the tags.
+
+        Args:
+            endpoint: Endpoint name used in the key and the stats
+            company_id: Company the result belongs to
+            filters: Dict of request filters
+            tags: Tags whose bump invalidates the result
+            compute: Zero-argument callable producing the result
+
+        Returns:
+            The cached or freshly computed result
+        """
+        if not cls._enabled:
+            return compute()
+
+        company_id = str(company_id)
+        key = cls.entry_key(endpoint, company_id, filters, tags)
+        value = cls._lru.get(key)
+        if value is None:
+            value = cls._redis_get(key)
+            if value is not None:
+                cls._lru.set(key, value, cls._ttl)
+        if value is not None:
+            cls._count(endpoint, 'hits')
+            return value
+
+        with cls._lock:
+            key_lock = cls._inflight.setdefault(key, threading.Lock())
+        try:
+            with key_lock:
+                value = cls._lru.get(key)
+                if value is not None:
+                    cls._count(endpoint, 'hits')
+                    return value
+
+                cls._count(endpoint, 'misses')
+                started = time.perf_counter()
+                with fresh_since(cls.last_bump(company_id, tags)):
+                    value = compute()
+                cls._record_recompute(endpoint, (time.perf_counter() - started) * 1000)
+                if not (isinstance(value, dict) and 'error' in value):
+                    cls._lru.set(key, value, cls._ttl)
+                    cls._redis_set(key, value)
+                return value
+        finally:
+            with cls._lock:
+                cls._inflight.pop(key, None)
+
+    # ------------------------------------------------------------------
+    # Invalidation
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def invalidate(cls, company_id, *tags):
+        """
+        Bump tags for a company now; every tag when none are given.
+
+        Args:
+            company_id: Company whose entries are invalidated
+            tags: Tags to bump
+        """
+        tags = tags or cls.FINANCIAL_TAGS
+        keys = [cls._tag_key(str(company_id), tag) for tag in tags]
+        bump_keys = [cls._bump_key(str(company_id), tag) for tag in tags]
+        bumped_at = time.time()
+        with cls._lock:
+            for key in keys:
+                cls._versions[key] = cls._versions.get(key, 0) + 1
+            for key in bump_keys:
+                cls._bumped[key] = bumped_at
+        if cls._redis is not None:
+            try:
+                pipeline = cls._redis.pipeline()
+                for key in keys:
+                    pipeline.incr(key)
+                for key in bump_keys:
+                    pipeline.set(key, bumped_at, ex=cls._bump_ttl)
+                pipeline.execute()
+            except Exception as e:
+                logger.warning(f"Dashboard cache: Redis invalidation failed: {str(e)}")
+
+    @classmethod
+    def invalidate_on_commit(cls, company_id, *tags):
+        """
+        Bump tags once the current transaction commits. Bumping earlier would
+        let a concurrent request cache the pre-commit data under the new
+        versions; a rollback discards the pending bumps.
+
+        Args:
+            company_id: Company whose entries are invalidated
+            tags: Tags to bump; every tag when none are given
+        """
+        pending = db.session().info.setdefault(cls.SESSION_KEY, set())
+        for tag in (tags or cls.FINANCIAL_TAGS):
+            pending.add((str(company_id), tag))
+
+    @classmethod
+    def _after_commit(cls, session):
+        # Savepoint releases fire this too; wait for the outermost commit
+        if session.in_nested_transaction():
+            return
+        pending = session.info.pop(cls.SESSION_KEY, None)
+        if not pending:
+            return
+        by_company = {}
+        for company_id, tag in pending:
+            by_company.setdefault(company_id, []).append(tag)
+        for company_id, tags in by_company.items():
+            cls.invalidate(company_id, *tags)
+
+    @classmethod
+    def _after_rollback(cls, session):
+        if not session.in_nested_transaction():
+            session.info.pop(cls.SESSION_KEY, None)
+
+    @classmethod
+    def clear(cls):
+        """Drop every in-process entry (Redis entries expire with their TTL)"""
+        cls._lru.clear()
+        with cls._lock:
+            cls._versions.clear()
+            cls._bumped.clear()
+
+    # ------------------------------------------------------------------
+    # Reporting
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def stats(cls) -> dict:
+        """Hit ratio and recompute latency per endpoint"""
+        with cls._lock:
+            endpoints = {}
+            for endpoint, stats in cls._stats.items():
+                lookups = stats['hits'] + stats['misses']
+                endpoints[endpoint] = {
+                    'hits': stats['hits'],
+                    'misses': stats['misses'],
+                    'hit_ratio': round(stats['hits'] / lookups, 4) if lookups else None,
+                    'recompute_ms': {
+                        'count': stats['recomputes'],
+                        'mean': round(stats['recompute_total_ms'] / stats['recomputes'], 3)
+                        if stats['recomputes'] else None,
+                        'max': round(stats['recompute_max_ms'], 3),
+                        'last': round(stats['recompute_last_ms'], 3)
+                    }
+                }
+            hits = sum(stats['hits'] for stats in cls._stats.values())
+            lookups = hits + sum(stats['misses'] for stats in cls._stats.values())
+        return {
+            'enabled': cls._enabled,
+            'backend': 'lru+redis' if cls._redis is not None else 'lru',
+            'ttl_seconds': cls._ttl,
+            'entries': len(cls._lru),
+            'hit_ratio': round(hits / lookups, 4) if lookups else None,
+            'endpoints': endpoints
+        }
+
+    @classmethod
+    def reset_stats(cls):
+        with cls._lock:
+            cls._stats = {}
@@ -0,0 +1,515 @@
+"""
+Dashboard Rollup Service
+Maintains the financial_daily_rollups and financial_monthly_rollups tables.
+
+Every invoice, payment, expense, extra income and ISP payment contributes one
+"fact" (company, day, flow type, dimensions, amount). The CRUD write paths add
+a fact when a row is created, subtract it when the row is deleted and swap the
+old fact for the new one on update, inside the same transaction as the write,
+so the dashboards can read small pre-aggregated tables instead of scanning
+the transactional ones. rebuild() recomputes everything from scratch and is
+exposed as the `flask rebuild-rollups` command and a nightly scheduler job.
+
+Invoices and payments are attributed to their customer's current area and
+service plan, in both paths: moving a customer moves their history with them
+(reattribute_customer), just as rebuild() joins to the customer's current row.
+"""
+
+from app import db
+from app.services.dashboard_cache import DashboardCache
+from app.utils.db_engine import without_statement_timeout
+from app.models import (
+    Invoice, Payment, Expense, ExtraIncome, ISPPayment, Customer,
+    FinancialDailyRollup, FinancialMonthlyRollup
+)
+from sqlalchemy import insert, null
+from sqlalchemy.exc import IntegrityError
+from datetime import date, datetime
+from decimal import Decimal
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+DIMENSIONS = (
+    'bank_account_id', 'payment_method', 'area_id', 'service_plan_id',
+    'category', 'status', 'is_active'
+)
+
+
+class DashboardRollupService:
+    """Incremental maintenance and full rebuild of the financial rollups"""
+
+    FLOW_INVOICE = 'invoice'
+    FLOW_PAYMENT = 'payment'
+    FLOW_EXPENSE = 'expense'
+    FLOW_EXTRA_INCOME = 'extra_income'
+    FLOW_ISP_PAYMENT = 'isp_payment'
+
+    INSERT_BATCH_SIZE = 5000
+
+    # ------------------------------------------------------------------
+    # Facts
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def dimension_key(flow_type: str, dims: dict) -> str:
+        """
+        Build the unique key of a rollup row from its flow type and dimensions.
+
+        Args:
+            flow_type: Fact flow type
+            dims: Dimension values keyed by DIMENSIONS
+
+        Returns:
+            str: Pipe-separated key, empty segments for NULL dimensions
+        """
+        parts = [flow_type]
+        for name in DIMENSIONS:
+            value = dims.get(name)
+            parts.append('' if value is None else str(value))
+        return '|'.join(parts)
+
+    @staticmethod
+    def _to_date(value):
+        if value is None:
+            return None
+        if isinstance(value, datetime):
+            return value.date()
+        if isinstance(value, date):
+            return value
+        return date.fromisoformat(str(value)[:10])
+
+    @staticmethod
+    def _to_decimal(value) -> Decimal:
+        if value is None:
+            return Decimal('0')
+        if isinstance(value, Decimal):
+            return value
+        return Decimal(str(value))
+
+    @classmethod
+    def _fact(cls, company_id, flow_type, day, amount, **dims):
+        if company_id is None or day is None:
+            return None
+        dims = {name: dims.get(name) for name in DIMENSIONS}
+        dims['category'] = None if dims['category'] is None else str(dims['category'])
+        dims['is_active'] = True if dims['is_active'] is None else bool(dims['is_active'])
+        return {
+            'company_id': company_id,
+            'flow_type': flow_type,
+            'day': cls._to_date(day),
+            'amount': cls._to_decimal(amount),
+            'dims': dims
+        }
+
+    @classmethod
+    def invoice_fact(cls, company_id, billing_start_date, total_amount, area_id, service_plan_id,
+                     invoice_type: str = 'subscription', is_active: bool = True):
+        """
+        Build the fact of an invoice that is written without an ORM instance.
+
+        Args:
+            company_id: Invoice company
+            billing_start_date: Billing period start (the fact's day)
+            total_amount: Invoice total
+            area_id: Customer's current area
+            service_plan_id: Customer's current service plan
+            invoice_type: Invoice type
+            is_active: Invoice active flag
+
+        Returns:
+            dict: Fact
+        """
+        return cls._fact(
+            company_id, cls.FLOW_INVOICE, billing_start_date, total_amount,
+            area_id=area_id, service_plan_id=service_plan_id,
+            category=invoice_type, is_active=is_active
+        )
+
+    @classmethod
+    def snapshot(cls, record):
+        """
+        Compute the rollup fact a transactional row currently contributes.
+
+        Call it before modifying a row to capture the old contribution and
+        again afterwards for the new one.
+
+        Args:
+            record: Invoice, Payment, Expense, ExtraIncome or ISPPayment instance
+
+        Returns:
+            dict: Fact, or None when the row does not contribute
+        """
+        if isinstance(record, Invoice):
+            area_id, service_plan_id = cls._customer_dims(record.customer_id)
+            return cls.invoice_fact(
+                record.company_id, record.billing_start_date, record.total_amount,
+                area_id, service_plan_id, record.invoice_type, record.is_active
+            )
+
+        if isinstance(record, Payment):
+            return cls._payment_fact(record, *cls._invoice_dims(record.invoice_id))
+
+        if isinstance(record, Expense):
+            return cls._fact(
+                record.company_id, cls.FLOW_EXPENSE, record.expense_date, record.amount,
+                bank_account_id=record.bank_account_id, payment_method=record.payment_method,
+                category=record.expense_type_id, is_active=record.is_active
+            )
+
+        if isinstance(record, ExtraIncome):
+            return cls._fact(
+                record.company_id, cls.FLOW_EXTRA_INCOME, record.income_date, record.amount,
+                bank_account_id=record.bank_account_id, payment_method=record.payment_method,
+                category=record.income_type_id, is_active=record.is_active
+            )
+
+        if isinstance(record, ISPPayment):
+            return cls._fact(
+                record.company_id, cls.FLOW_ISP_PAYMENT, record.payment_date, record.amount,
+                bank_account_id=record.bank_account_id, payment_method=record.payment_method,
+                category=record.payment_type, status=record.status, is_active=record.is_active
+            )
+
+        return None
+
+    @classmethod
+    def _payment_fact(cls, payment, invoice_type, area_id, service_plan_id):
+        return cls._fact(
+            payment.company_id, cls.FLOW_PAYMENT, payment.payment_date, payment.amount,
+            bank_account_id=payment.bank_account_id, payment_method=payment.payment_method,
+            area_id=area_id, service_plan_id=service_plan_id,
+            category=invoice_type, status=payment.status, is_active=payment.is_active
+        )
+
+    @staticmethod
+    def _customer_dims(customer_id):
+        if not customer_id:
+            return None, None
+        row = db.session.query(Customer.area_id, Customer.service_plan_id).filter(
+            Customer.id == customer_id
+        ).first()
+        return (row.area_id, row.service_plan_id) if row else (None, None)
+
+    @staticmethod
+    def _invoice_dims(invoice_id):
+        if not invoice_id:
+            return None, None, None
+        row = db.session.query(
+            Invoice.invoice_type, Customer.area_id, Customer.service_plan_id
+        ).outerjoin(Customer, Customer.id == Invoice.customer_id
+        ).filter(Invoice.id == invoice_id).first()
+        return (row.invoice_type, row.area_id, row.service_plan_id) if row else (None, None, None)
+
+    # ------------------------------------------------------------------
+    # Incremental maintenance
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def record(cls, fact, sign: int = 1):
+        """
+        Add (sign=1) or remove (sign=-1) a fact in the caller's transaction.
+
+        Args:
+            fact: Fact from snapshot(), None is ignored
+            sign: 1 to add the fact, -1 to subtract it
+        """
+        if fact is None:
+            return
+        cls.record_many([fact], sign)
+
+    @classmethod
+    def record_change(cls, before, after):
+        """
+        Replace a row's old contribution with its new one.
+
+        Args:
+            before: Fact captured before the update
+            after: Fact captured after the update
+        """
+        if before == after:
+            # Nothing moves in the rollups, but the dashboards may still show the row
+            for fact in (before, after):
+                if fact is not None:
+                    DashboardCache.invalidate_on_commit(fact['company_id'], fact['flow_type'])
+            return
+        cls.record(before, -1)
+        cls.record(after, 1)
+
+    @classmethod
+    def reattribute_customer(cls, customer_id, before, after):
+        """
+        Move a customer's invoice and payment facts from their old area and
+        service plan to the new ones, in the caller's transaction.
+
+        Args:
+            customer_id: Customer whose area or service plan changed
+            before: (area_id, service_plan_id) before the change
+            after: (area_id, service_plan_id) after the change
+        """
+        if tuple(before) == tuple(after):
+            return
+        invoices = db.session.query(Invoice).filter(Invoice.customer_id == customer_id).all()
+        payments = db.session.query(Payment, Invoice.invoice_type).join(
+            Invoice, Invoice.id == Payment.invoice_id
+        ).filter(Invoice.customer_id == customer_id).all()
+
+        for (area_id, service_plan_id), sign in ((before, -1), (after, 1)):
+            cls.record_many([
+                cls.invoice_fact(
+                    invoice.company_id, invoice.billing_start_date, invoice.total_amount,
+                    area_id, service_plan_id, invoice.invoice_type, invoice.is_active
+                ) for invoice in invoices
+            ], sign)
+            cls.record_many([
+                cls._payment_fact(payment, invoice_type, area_id, service_plan_id)
+                for payment, invoice_type in payments
+            ], sign)
+
+    @classmethod
+    def record_many(cls, facts, sign: int = 1):
+        """
+        Apply many facts, merging those that land on the same rollup rows.
+
+        Args:
+            facts: Iterable of facts
+            sign: 1 to add the facts, -1 to subtract them
+        """
+        merged = {}
+        for fact in facts:
+            if fact is None:
+                continue
+            # Every financial write passes through here; drop the cached dashboards on commit
+            DashboardCache.invalidate_on_commit(fact['company_id'], fact['flow_type'])
+            key = cls.dimension_key(fact['flow_type'], fact['dims'])
+            for model, period_start in (
+                (FinancialDailyRollup, fact['day']),
+                (FinancialMonthlyRollup, fact['day'].replace(day=1))
+            ):
+                entry = merged.setdefault(
+                    (model, fact['company_id'], period_start, key),
+                    {'fact': fact, 'amount': Decimal('0'), 'count': 0}
+                )
+                entry['amount'] += fact['amount'] * sign
+                entry['count'] += sign
+
+        for (model, company_id, period_start, key), entry in merged.items():
+            cls._apply(model, company_id, period_start, key, entry['fact'], entry['amount'], entry['count'])
+
+    @staticmethod
+    def _apply(model, company_id, period_start, key, fact, amount, count):
+        def add_to_existing():
+            return db.session.query(model).filter(
+                model.company_id == company_id,
+                model.period_start == period_start,
+                model.dimension_key == key
+            ).update({
+                model.amount: model.amount + amount,
+                model.txn_count: model.txn_count + count
+            }, synchronize_session=False)
+
+        if add_to_existing():
+            return
+
+        try:
+            with db.session.begin_nested():
+                db.session.execute(insert(model).values(
+                    company_id=company_id,
+                    period_start=period_start,
+                    dimension_key=key,
+                    flow_type=fact['flow_type'],
+                    amount=amount,
+                    txn_count=count,
+                    **fact['dims']
+                ))
+        except IntegrityError:
+            # A concurrent writer created the row first
+            add_to_existing()
+
+    # ------------------------------------------------------------------
+    # Full rebuild
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def _source_queries(cls, company_id=None):
+        def day_of(column):
+            return db.func.date(column)
+
+        invoices = db.session.query(
+            Invoice.company_id,
+            Invoice.billing_start_date.label('day'),
+            null().label('bank_account_id'),
+            null().label('payment_method'),
+            Customer.area_id,
+            Customer.service_plan_id,
+            Invoice.invoice_type.label('category'),
+            null().label('status'),
+            Invoice.is_active,
+            db.func.sum(Invoice.total_amount).label('amount'),
+            db.func.count(Invoice.id).label('txn_count')
+        ).outerjoin(Customer, Customer.id == Invoice.customer_id
+        ).group_by(
+            Invoice.company_id, Invoice.billing_start_date, Customer.area_id,
+            Customer.service_plan_id, Invoice.invoice_type, Invoice.is_active
+        )
+
+        payments = db.session.query(
+            Payment.company_id,
+            day_of(Payment.payment_date).label('day'),
+            Payment.bank_account_id,
+            Payment.payment_method,
+            Customer.area_id,
+            Customer.service_plan_id,
+            Invoice.invoice_type.label('category'),
+            Payment.status,
+            Payment.is_active,
+            db.func.sum(Payment.amount).label('amount'),
+            db.func.count(Payment.id).label('txn_count')
+        ).outerjoin(Invoice, Invoice.id == Payment.invoice_id
+        ).outerjoin(Customer, Customer.id == Invoice.customer_id
+        ).group_by(
+            Payment.company_id, day_of(Payment.payment_date), Payment.bank_account_id,
+            Payment.payment_method, Customer.area_id, Customer.service_plan_id,
+            Invoice.invoice_type, Payment.status, Payment.is_active
+        )
+
+        expenses = db.session.query(
+            Expense.company_id,
+            day_of(Expense.expense_date).label('day'),
+            Expense.bank_account_id,
+            Expense.payment_method,
+            null().label('area_id'),
+            null().label('service_plan_id'),
+            Expense.expense_type_id.label('category'),
+            null().label('status'),
+            Expense.is_active,
+            db.func.sum(Expense.amount).label('amount'),
+            db.func.count(Expense.id).label('txn_count')
+        ).group_by(
+            Expense.company_id, day_of(Expense.expense_date), Expense.bank_account_id,
+            Expense.payment_method, Expense.expense_type_id, Expense.is_active
+        )
+
+        extra_incomes = db.session.query(
+            ExtraIncome.company_id,
+            day_of(ExtraIncome.income_date).label('day'),
+            ExtraIncome.bank_account_id,
+            ExtraIncome.payment_method,
+            null().label('area_id'),
+            null().label('service_plan_id'),
+            ExtraIncome.income_type_id.label('category'),
+            null().label('status'),
+            ExtraIncome.is_active,
+            db.func.sum(ExtraIncome.amount).label('amount'),
+            db.func.count(ExtraIncome.id).label('txn_count')
+        ).group_by(
+            ExtraIncome.company_id, day_of(ExtraIncome.income_date), ExtraIncome.bank_account_id,
+            ExtraIncome.payment_method, ExtraIncome.income_type_id, ExtraIncome.is_active
+        )
+
+        isp_payments = db.session.query(
+            ISPPayment.company_id,
+            day_of(ISPPayment.payment_date).label('day'),
+            ISPPayment.bank_account_id,
+            ISPPayment.payment_method,
+            null().label('area_id'),
+            null().label('service_plan_id'),
+            ISPPayment.payment_type.label('category'),
+            ISPPayment.status,
+            ISPPayment.is_active,
+            db.func.sum(ISPPayment.amount).label('amount'),
+            db.func.count(ISPPayment.id).label('txn_count')
+        ).group_by(
+            ISPPayment.company_id, day_of(ISPPayment.payment_date), ISPPayment.bank_account_id,
+            ISPPayment.payment_method, ISPPayment.payment_type, ISPPayment.status, ISPPayment.is_active
+        )
+
+        sources = [
+            (cls.FLOW_INVOICE, invoices, Invoice),
+            (cls.FLOW_PAYMENT, payments, Payment),
+            (cls.FLOW_EXPENSE, expenses, Expense),
+            (cls.FLOW_EXTRA_INCOME, extra_incomes, ExtraIncome),
+            (cls.FLOW_ISP_PAYMENT, isp_payments, ISPPayment),
+        ]
+        if company_id is not None:
+            sources = [(flow, query.filter(model.company_id == company_id), model) for flow, query, model in sources]
+        return [(flow, query) for flow, query, _ in sources]
+
+    @classmethod
+    @without_statement_timeout()
+    def rebuild(cls, company_id=None) -> dict:
+        """
+        Recompute the daily and monthly rollups from the transactional tables.
+
+        Runs in one transaction, so readers keep seeing the previous rollups
+        until the rebuilt ones are committed.
+
+        Args:
+            company_id: Rebuild only this company; all companies when None
+
+        Returns:
+            dict: Row counts and elapsed seconds
+        """
+        started = time.perf_counter()
+        daily = {}
+        monthly = {}
+
+        try:
+            for flow_type, query in cls._source_queries(company_id):
+                for row in query.all():
+                    fact = cls._fact(
+                        row.company_id, flow_type, row.day, row.amount,
+                        **{name: getattr(row, name) for name in DIMENSIONS}
+                    )
+                    if fact is None:
+                        continue
+                    key = cls.dimension_key(flow_type, fact['dims'])
+                    for target, period_start in (
+                        (daily, fact['day']),
+                        (monthly, fact['day'].replace(day=1))
+                    ):
+                        entry = target.get((fact['company_id'], period_start, key))
+                        if entry is None:
+                            target[(fact['company_id'], period_start, key)] = {
+                                'company_id': fact['company_id'],
+                                'period_start': period_start,
+                                'dimension_key': key,
+                                'flow_type': flow_type,
+                                'amount': fact['amount'],
+                                'txn_count': row.txn_count,
+                                **fact['dims']
+                            }
+                        else:
+                            entry['amount'] += fact['amount']
+                            entry['txn_count'] += row.txn_count
+
+            for model, rows in ((FinancialDailyRollup, daily), (FinancialMonthlyRollup, monthly)):
+                stale = db.session.query(model)
+                if company_id is not None:
+                    stale = stale.filter(model.company_id == company_id)
+                stale.delete(synchronize_session=False)
+
+                rows = list(rows.values())
+                for offset in range(0, len(rows), cls.INSERT_BATCH_SIZE):
+                    db.session.execute(insert(model), rows[offset:offset + cls.INSERT_BATCH_SIZE])
+
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error rebuilding dashboard rollups: {str(e)}")
+            raise
+
+        for rebuilt_company_id in {key[0] for key in monthly} | ({company_id} if company_id else set()):
+            DashboardCache.invalidate(rebuilt_company_id)
+
+        stats = {
+            'daily_rows': len(daily),
+            'monthly_rows': len(monthly),
+            'elapsed_seconds': round(time.perf_counter() - started, 3)
+        }
+        logger.info(
+            f"Rebuilt dashboard rollups{' for company ' + str(company_id) if company_id else ''}: "
+            f"{stats['daily_rows']} daily, {stats['monthly_rows']} monthly rows in {stats['elapsed_seconds']}s"
+        )
+        return stats
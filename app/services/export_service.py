@@ -0,0 +1,248 @@
+"""
+Export Service
+Streams filtered, sorted query results to CSV or XLSX downloads.
+
+An export is a SQLAlchemy column query whose labels become the header row.
+On PostgreSQL the CSV variant compiles the query and runs it as
+COPY (...) TO STDOUT WITH CSV. The server formats and escapes the rows, and
+psycopg2's copy_expert feeds them through a bounded queue into the HTTP
+response in large chunks. The XLSX variant reads the same query through a
+server-side cursor into an openpyxl write-only workbook. Other dialects
+fall back to the stdlib csv writer. Inside a read_replica scope every
+variant reads from the replica.
+"""
+
+from app import db
+from app.utils.csv_export import stream_csv, DEFAULT_CHUNK_BYTES
+from app.utils.read_replica import read_engine, preserve_routing
+from app.utils.db_engine import NO_STATEMENT_TIMEOUT_SQL
+from flask import Response, stream_with_context
+from openpyxl import Workbook
+from psycopg2.extras import register_uuid
+from datetime import datetime
+from decimal import Decimal
+import logging
+import queue
+import tempfile
+import threading
+import uuid
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ('csv', 'xlsx')
+
+XLSX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+
+class ExportCancelled(Exception):
+    """Raised in the COPY thread when the client stops reading"""
+    pass
+
+
+class _QueueSink:
+    """File-like target for copy_expert that hands chunks to the response"""
+
+    def __init__(self, chunks, cancelled, chunk_bytes):
+        self.chunks = chunks
+        self.cancelled = cancelled
+        self.chunk_bytes = chunk_bytes
+        self.buffer = []
+        self.size = 0
+
+    def write(self, data):
+        self.buffer.append(data)
+        self.size += len(data)
+        if self.size >= self.chunk_bytes:
+            self.flush()
+
+    def flush(self):
+        if self.buffer:
+            self.put(b''.join(self.buffer))
+            self.buffer = []
+            self.size = 0
+
+    def put(self, item):
+        while not self.cancelled.is_set():
+            try:
+                self.chunks.put(item, timeout=1)
+                return
+            except queue.Full:
+                continue
+        raise ExportCancelled()
+
+
+class ExportService:
+    """Generic CSV/XLSX export for column queries"""
+
+    QUEUE_CHUNKS = 8
+    XLSX_BATCH_SIZE = 5000
+
+    @staticmethod
+    def headers(query) -> list:
+        """Column labels of a query, in select order"""
+        return [column['name'] for column in query.column_descriptions]
+
+    @classmethod
+    def response(cls, query, filename: str, fmt: str = 'csv') -> Response:
+        """
+        Build a streaming download response for a column query.
+
+        Args:
+            query: Filtered and sorted SQLAlchemy column query
+            filename: Download name without extension
+            fmt: 'csv' or 'xlsx'
+
+        Returns:
+            Response: Streaming attachment response
+        """
+        if fmt not in FORMATS:
+            raise ValueError(f"Unsupported export format: {fmt}")
+
+        # The body is read after the view returns; keep a read_replica scope for it
+        engine = read_engine()
+        if fmt == 'xlsx':
+            body = stream_with_context(preserve_routing(cls.stream_xlsx(query, title=filename)))
+            mimetype = XLSX_MIMETYPE
+        elif engine.dialect.name == 'postgresql':
+            body = cls.stream_copy(query, engine=engine)
+            mimetype = 'text/csv'
+        else:
+            body = stream_with_context(preserve_routing(cls.stream_rows_csv(query)))
+            mimetype = 'text/csv'
+
+        return Response(body, mimetype=mimetype,
+                        headers={"Content-Disposition": f"attachment; filename={filename}.{fmt}"})
+
+    @staticmethod
+    def compile_sql(query, dialect) -> tuple:
+        """
+        Compile a query for COPY.
+
+        Args:
+            query: SQLAlchemy query
+            dialect: Dialect of the target engine
+
+        Returns:
+            tuple: (SQL with pyformat placeholders, parameter dict) for cursor.mogrify
+        """
+        compiled = query.statement.compile(
+            dialect=dialect,
+            compile_kwargs={'render_postcompile': True}
+        )
+        return str(compiled), compiled.params
+
+    @classmethod
+    def stream_copy(cls, query, chunk_bytes: int = DEFAULT_CHUNK_BYTES, engine=None):
+        """
+        Yield CSV bytes produced by PostgreSQL COPY.
+
+        copy_expert runs on its own pooled connection in a background thread;
+        the bounded queue holds it back when the client reads slowly, and it
+        is cancelled if the client goes away.
+
+        Args:
+            query: SQLAlchemy column query
+            chunk_bytes: Approximate size of each yielded chunk
+            engine: Engine to run COPY on; defaults to the primary
+
+        Yields:
+            bytes: CSV data including the header row
+        """
+        engine = engine or db.engine
+        statement, params = cls.compile_sql(query, engine.dialect)
+        chunks = queue.Queue(maxsize=cls.QUEUE_CHUNKS)
+        cancelled = threading.Event()
+        done = object()
+        sink = _QueueSink(chunks, cancelled, chunk_bytes)
+
+        def produce():
+            raw = engine.raw_connection()
+            try:
+                register_uuid(conn_or_curs=raw.dbapi_connection)
+                with raw.cursor() as cursor:
+                    # One statement for the whole export, so the web role's cap would cancel it
+                    cursor.execute(NO_STATEMENT_TIMEOUT_SQL)
+                    sql = cursor.mogrify(statement, params).decode()
+                    cursor.copy_expert(f"COPY ({sql}) TO STDOUT WITH (FORMAT csv, HEADER true)", sink)
+                sink.flush()
+                raw.rollback()
+            except ExportCancelled:
+                raw.rollback()
+            except Exception as e:
+                logger.error(f"Error exporting with COPY: {str(e)}")
+                raw.rollback()
+                try:
+                    sink.put(e)
+                except ExportCancelled:
+                    pass
+            finally:
+                raw.close()
+                try:
+                    sink.put(done)
+                except ExportCancelled:
+                    pass
+
+        def generate():
+            thread = threading.Thread(target=produce, name='export-copy', daemon=True)
+            thread.start()
+            try:
+                while True:
+                    item = chunks.get()
+                    if item is done:
+                        break
+                    if isinstance(item, Exception):
+                        raise item
+                    yield item
+            finally:
+                cancelled.set()
+
+        return generate()
+
+    @classmethod
+    def stream_rows_csv(cls, query, chunk_bytes: int = DEFAULT_CHUNK_BYTES):
+        """CSV through the stdlib writer, for dialects without COPY"""
+        rows = query.execution_options(stream_results=True, yield_per=cls.XLSX_BATCH_SIZE)
+        for chunk in stream_csv(cls.headers(query), rows, chunk_bytes):
+            yield chunk.encode()
+
+    @classmethod
+    def stream_xlsx(cls, query, title: str = 'export', chunk_bytes: int = DEFAULT_CHUNK_BYTES):
+        """
+        Yield an XLSX workbook built in openpyxl write-only mode.
+
+        Rows are read through a server-side cursor and written straight to a
+        temporary file, which is then streamed and removed.
+
+        Args:
+            query: SQLAlchemy column query
+            title: Worksheet title
+            chunk_bytes: Size of each yielded chunk
+
+        Yields:
+            bytes: Workbook contents
+        """
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet(title=title[:31])
+        sheet.append(cls.headers(query))
+        for row in query.execution_options(stream_results=True, yield_per=cls.XLSX_BATCH_SIZE):
+            sheet.append([cls._xlsx_value(value) for value in row])
+
+        with tempfile.TemporaryFile(suffix='.xlsx') as spool:
+            workbook.save(spool)
+            spool.seek(0)
+            while True:
+                chunk = spool.read(chunk_bytes)
+                if not chunk:
+                    break
+                yield chunk
+
+    @staticmethod
+    def _xlsx_value(value):
+        # Excel has no timezone-aware datetimes or UUID cells
+        if isinstance(value, datetime) and value.tzinfo is not None:
+            return value.replace(tzinfo=None)
+        if isinstance(value, uuid.UUID):
+            return str(value)
+        if isinstance(value, Decimal):
+            return float(value)
+        return value
@@ -0,0 +1,131 @@
+"""
+Invoice Number Allocator
+Hands out INV-YYYY-NNNN numbers from the invoice_number_counters table.
+
+Every reservation is one UPDATE ... RETURNING on the year's counter row in its
+own short transaction, so concurrent writers never see the same number and the
+row lock is held only for that statement. Single allocations are served from a
+process-local block of BLOCK_SIZE numbers; bulk callers reserve exact ranges.
+Numbers from a block that is never used (process restart, rolled back insert)
+are skipped, so the sequence can have gaps but never duplicates.
+"""
+
+from app import db
+from app.models import Invoice, InvoiceNumberCounter
+from sqlalchemy import func, insert, update
+from sqlalchemy.exc import IntegrityError
+from datetime import datetime
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class InvoiceNumberAllocator:
+    """Sequence-backed allocator for invoice numbers"""
+
+    BLOCK_SIZE = int(os.getenv('INVOICE_NUMBER_BLOCK_SIZE', '20'))
+
+    _lock = threading.Lock()
+    _blocks = {}  # year -> [next_value, last_value]
+
+    @staticmethod
+    def format_number(year: int, number: int) -> str:
+        """
+        Format a sequence value as an invoice number.
+
+        Args:
+            year: Invoice year
+            number: Sequence value
+
+        Returns:
+            str: Invoice number e.g. INV-2025-0042
+        """
+        return f'INV-{year}-{number:04d}'
+
+    @classmethod
+    def next_number(cls) -> str:
+        """
+        Get the next invoice number, refilling the local block when empty.
+
+        Returns:
+            str: Invoice number
+        """
+        year = datetime.now().year
+
+        with cls._lock:
+            block = cls._blocks.get(year)
+            if not block or block[0] > block[1]:
+                first, last = cls._reserve_range(year, cls.BLOCK_SIZE)
+                block = [first, last]
+                cls._blocks = {year: block}
+
+            number = block[0]
+            block[0] += 1
+
+        return cls.format_number(year, number)
+
+    @classmethod
+    def reserve(cls, count: int) -> list:
+        """
+        Reserve `count` consecutive invoice numbers in one round trip.
+
+        Args:
+            count: Number of invoice numbers needed
+
+        Returns:
+            list: Invoice numbers in ascending order
+        """
+        if count <= 0:
+            return []
+
+        year = datetime.now().year
+        first, last = cls._reserve_range(year, count)
+        return [cls.format_number(year, number) for number in range(first, last + 1)]
+
+    @classmethod
+    def _reserve_range(cls, year: int, count: int) -> tuple:
+        advance = (
+            update(InvoiceNumberCounter)
+            .where(InvoiceNumberCounter.year == year)
+            .values(last_value=InvoiceNumberCounter.last_value + count)
+            .returning(InvoiceNumberCounter.last_value)
+        )
+
+        with db.engine.begin() as conn:
+            last = conn.execute(advance).scalar()
+
+            if last is None:
+                # First allocation of the year: seed the counter from any
+                # numbers issued before the counter existed
+                seed = cls._highest_issued_number(conn, year)
+                try:
+                    with conn.begin_nested():
+                        conn.execute(insert(InvoiceNumberCounter).values(year=year, last_value=seed))
+                    logger.info(f"Created invoice number counter for {year} starting at {seed}")
+                except IntegrityError:
+                    # Another process created it first
+                    pass
+                last = conn.execute(advance).scalar()
+
+        return last - count + 1, last
+
+    @staticmethod
+    def _highest_issued_number(conn, year: int) -> int:
+        prefix = f'INV-{year}-'
+        last_invoice_number = conn.execute(
+            db.select(Invoice.invoice_number)
+            .where(Invoice.invoice_number.like(f'{prefix}%'))
+            .order_by(func.length(Invoice.invoice_number).desc(), Invoice.invoice_number.desc())
+            .limit(1)
+        ).scalar()
+
+        if not last_invoice_number:
+            return 0
+
+        try:
+            return int(last_invoice_number.split('-')[-1])
+        except (ValueError, IndexError):
+            logger.error(f"Error parsing invoice number: {last_invoice_number}")
+            raise
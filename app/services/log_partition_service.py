@@ -0,0 +1,224 @@
+"""
+Log Partition Service
+Monthly range partitions for detailed_logs, with retention and archival.
+
+Once migration 8d1e6b2f9a07 has run, detailed_logs is partitioned by
+created_at with one partition per calendar month, named
+detailed_logs_yYYYYmMM, plus a default partition as a safety net.
+maintain() creates the partitions for the coming months. It then archives
+every partition older than the retention window to a gzip CSV under the
+backup directory and drops it. Archival, detach and drop run in one
+transaction, so a failed archive leaves the partition attached. On an
+unpartitioned table (a fresh create_all database, SQLite) every operation
+is a no-op.
+"""
+
+from app import db
+from app.utils.db_engine import without_statement_timeout
+from sqlalchemy import text
+from flask import current_app, has_app_context
+from datetime import date, datetime
+from pathlib import Path
+import gzip
+import logging
+import os
+import re
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class LogPartitionService:
+    """Create, list and retire monthly partitions of detailed_logs"""
+
+    TABLE = 'detailed_logs'
+    DEFAULT_MONTHS_AHEAD = 3
+    DEFAULT_RETENTION_MONTHS = 12
+    PARTITION_PATTERN = re.compile(r'^detailed_logs_y(\d{4})m(\d{2})$')
+
+    @staticmethod
+    def month_start(value) -> date:
+        """First day of the month containing value"""
+        return date(value.year, value.month, 1)
+
+    @staticmethod
+    def add_months(month: date, months: int) -> date:
+        """Shift a month start by a number of months"""
+        index = month.year * 12 + month.month - 1 + months
+        return date(index // 12, index % 12 + 1, 1)
+
+    @classmethod
+    def partition_name(cls, month: date) -> str:
+        """Partition table name for a month start"""
+        return f"{cls.TABLE}_y{month.year:04d}m{month.month:02d}"
+
+    @classmethod
+    def is_partitioned(cls) -> bool:
+        """
+        Check whether detailed_logs is a partitioned table.
+
+        Returns:
+            bool: False on other dialects or an unpartitioned table
+        """
+        if db.engine.dialect.name != 'postgresql':
+            return False
+        return bool(db.session.execute(text(
+            "SELECT 1 FROM pg_partitioned_table p "
+            "JOIN pg_class c ON c.oid = p.partrelid "
+            "WHERE c.relname = :table AND c.relnamespace = 'public'::regnamespace"
+        ), {'table': cls.TABLE}).scalar())
+
+    @classmethod
+    def list_partitions(cls) -> list:
+        """
+        List the monthly partitions currently attached.
+
+        Returns:
+            list: Dicts with name, month (date) and approximate row count, oldest first
+        """
+        if not cls.is_partitioned():
+            return []
+        rows = db.session.execute(text(
+            "SELECT c.relname, c.reltuples::bigint FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = :table AND p.relnamespace = 'public'::regnamespace"
+        ), {'table': cls.TABLE}).all()
+
+        partitions = []
+        for name, estimated_rows in rows:
+            match = cls.PARTITION_PATTERN.match(name)
+            if match:
+                partitions.append({
+                    'name': name,
+                    'month': date(int(match.group(1)), int(match.group(2)), 1),
+                    'estimated_rows': max(int(estimated_rows), 0)
+                })
+        return sorted(partitions, key=lambda partition: partition['month'])
+
+    @classmethod
+    def ensure_partitions(cls, months_ahead: int = None, today: date = None) -> list:
+        """
+        Create the partitions from the current month through months_ahead.
+
+        Args:
+            months_ahead: Future months to pre-create
+            today: Reference date (defaults to today)
+
+        Returns:
+            list: Names of the partitions that were created
+        """
+        if not cls.is_partitioned():
+            return []
+        if months_ahead is None:
+            months_ahead = cls._config('LOG_PARTITION_MONTHS_AHEAD', cls.DEFAULT_MONTHS_AHEAD)
+
+        current = cls.month_start(today or date.today())
+        existing = {partition['name'] for partition in cls.list_partitions()}
+        created = []
+        try:
+            for offset in range(months_ahead + 1):
+                month = cls.add_months(current, offset)
+                name = cls.partition_name(month)
+                if name in existing:
+                    continue
+                db.session.execute(text(
+                    f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {cls.TABLE} "
+                    f"FOR VALUES FROM ('{month.isoformat()}') TO ('{cls.add_months(month, 1).isoformat()}')"
+                ))
+                created.append(name)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        if created:
+            logger.info(f"Created log partitions: {', '.join(created)}")
+        return created
+
+    @classmethod
+    @without_statement_timeout()
+    def apply_retention(cls, archive_dir, retention_months: int = None, today: date = None) -> list:
+        """
+        Archive and drop partitions older than the retention window.
+
+        Args:
+            archive_dir: Directory that receives detailed_logs_yYYYYmMM.csv.gz files
+            retention_months: Whole months to keep besides the current one
+            today: Reference date (defaults to today)
+
+        Returns:
+            list: Dicts with name, rows and archive path for each retired partition
+        """
+        if not cls.is_partitioned():
+            return []
+        if retention_months is None:
+            retention_months = cls._config('LOG_RETENTION_MONTHS', cls.DEFAULT_RETENTION_MONTHS)
+
+        cutoff = cls.add_months(cls.month_start(today or date.today()), -retention_months)
+        archive_dir = Path(archive_dir)
+        archive_dir.mkdir(parents=True, exist_ok=True)
+
+        retired = []
+        for partition in cls.list_partitions():
+            if partition['month'] >= cutoff:
+                break
+            try:
+                retired.append(cls._archive_partition(partition['name'], archive_dir))
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"Error archiving log partition {partition['name']}: {str(e)}")
+        return retired
+
+    @classmethod
+    def maintain(cls, archive_dir) -> dict:
+        """
+        Run the full maintenance cycle: pre-create, then retire.
+
+        Args:
+            archive_dir: Directory for archived partitions
+
+        Returns:
+            dict: Created and retired partitions, and elapsed time
+        """
+        started = time.perf_counter()
+        created = cls.ensure_partitions()
+        retired = cls.apply_retention(archive_dir)
+        return {
+            'partitioned': cls.is_partitioned(),
+            'created': created,
+            'retired': retired,
+            'elapsed_seconds': round(time.perf_counter() - started, 3)
+        }
+
+    @classmethod
+    def _archive_partition(cls, name, archive_dir):
+        """Copy a partition to a gzip CSV, then detach and drop it in the same transaction"""
+        path = archive_dir / f"{name}.csv.gz"
+        partial = path.with_name(path.name + '.partial')
+        connection = db.session.connection()
+        # Blocks writes to this partition only, so the archive is complete when it is dropped
+        connection.execute(text(f"LOCK TABLE {name} IN SHARE MODE"))
+
+        raw = connection.connection.dbapi_connection
+        with gzip.open(partial, 'wb') as archive:
+            with raw.cursor() as cursor:
+                cursor.copy_expert(f"COPY {name} TO STDOUT WITH (FORMAT csv, HEADER true)", archive)
+                rows = cursor.rowcount
+            archive.flush()
+        with open(partial, 'rb') as archive:
+            os.fsync(archive.fileno())
+        os.replace(partial, path)
+
+        connection.execute(text(f"ALTER TABLE {cls.TABLE} DETACH PARTITION {name}"))
+        connection.execute(text(f"DROP TABLE {name}"))
+        db.session.commit()
+
+        logger.info(f"Archived log partition {name} ({rows} rows) to {path}")
+        return {'name': name, 'rows': rows, 'archive': str(path), 'archived_at': datetime.now().isoformat()}
+
+    @staticmethod
+    def _config(key, default):
+        if has_app_context():
+            return current_app.config.get(key, default)
+        return default
@@ -0,0 +1,149 @@
+"""
+Scheduler Leader Election
+Ensures the APScheduler job set runs in exactly one process per deployment.
+
+Every process that starts the scheduler competes for a PostgreSQL
+session-level advisory lock on a dedicated connection. The holder is the
+leader and runs the jobs; the others keep their scheduler paused and retry
+on every heartbeat. The leader pings its connection on the same heartbeat.
+If the ping fails the lock is gone with the connection, so it pauses its
+jobs and becomes a candidate again. When the leader process exits,
+PostgreSQL drops the lock and another process takes over within one
+heartbeat.
+"""
+
+from app import db
+from sqlalchemy import text
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class SchedulerLeader:
+    """Advisory-lock based leadership with heartbeat and failover"""
+
+    DEFAULT_LOCK_KEY = 7021931
+    DEFAULT_HEARTBEAT_SECONDS = 15
+
+    def __init__(self, app, on_elected, on_demoted, lock_key: int = None, heartbeat_seconds: float = None):
+        """
+        Initialize the election.
+
+        Args:
+            app: Flask application (for the database engine and config)
+            on_elected: Called when this process becomes the leader
+            on_demoted: Called when this process loses leadership
+            lock_key: Advisory lock key shared by every process of the deployment
+            heartbeat_seconds: Interval between lock attempts / liveness pings
+        """
+        self.app = app
+        self.on_elected = on_elected
+        self.on_demoted = on_demoted
+        self.lock_key = int(lock_key or app.config.get('SCHEDULER_LOCK_KEY') or self.DEFAULT_LOCK_KEY)
+        self.heartbeat_seconds = float(
+            heartbeat_seconds or app.config.get('SCHEDULER_HEARTBEAT_SECONDS') or self.DEFAULT_HEARTBEAT_SECONDS
+        )
+        self.is_leader = False
+        self._connection = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start campaigning in a background thread."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='scheduler-leader', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop campaigning and give up leadership if held."""
+        self._stop.set()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=self.heartbeat_seconds + 5)
+        self._release()
+        self._set_leader(False)
+
+    def step(self):
+        """Run one election round: try to acquire, or check the held lock."""
+        if self._connection is None and not self.is_leader:
+            self._try_acquire()
+        elif self._connection is not None:
+            self._heartbeat()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.step()
+            except Exception as e:
+                logger.error(f"Scheduler leader election error: {str(e)}")
+            self._stop.wait(self.heartbeat_seconds)
+
+    def _try_acquire(self):
+        with self.app.app_context():
+            engine = db.engine
+
+        if engine.dialect.name != 'postgresql':
+            # No advisory locks (e.g. SQLite in development): single process assumed
+            logger.warning(f"Advisory locks unavailable on {engine.dialect.name}; running scheduler without election")
+            self._set_leader(True)
+            return
+
+        connection = engine.connect()
+        try:
+            acquired = connection.execute(
+                text('SELECT pg_try_advisory_lock(:key)'), {'key': self.lock_key}
+            ).scalar()
+            connection.commit()
+        except Exception:
+            connection.invalidate()
+            connection.close()
+            raise
+
+        if acquired:
+            self._connection = connection
+            logger.info(f"Acquired scheduler leadership (advisory lock {self.lock_key})")
+            self._set_leader(True)
+        else:
+            connection.close()
+
+    def _heartbeat(self):
+        try:
+            self._connection.execute(text('SELECT 1'))
+            self._connection.commit()
+        except Exception as e:
+            logger.error(f"Lost scheduler leadership, heartbeat failed: {str(e)}")
+            self._discard_connection()
+            self._set_leader(False)
+
+    def _release(self):
+        if self._connection is None:
+            return
+        try:
+            self._connection.execute(text('SELECT pg_advisory_unlock(:key)'), {'key': self.lock_key})
+            self._connection.commit()
+            logger.info("Released scheduler leadership")
+        except Exception as e:
+            logger.error(f"Error releasing scheduler leadership: {str(e)}")
+        finally:
+            self._discard_connection()
+
+    def _discard_connection(self):
+        # Invalidate so a connection that may still hold the lock never goes back to the pool
+        try:
+            self._connection.invalidate()
+            self._connection.close()
+        except Exception:
+            pass
+        self._connection = None
+
+    def _set_leader(self, leader):
+        if leader == self.is_leader:
+            return
+        self.is_leader = leader
+        callback = self.on_elected if leader else self.on_demoted
+        try:
+            callback()
+        except Exception as e:
+            logger.error(f"Error in scheduler leadership callback: {str(e)}")
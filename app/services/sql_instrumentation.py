@@ -0,0 +1,224 @@
+"""
+SQL Instrumentation
+Per-request query counting, timing and N+1 detection.
+
+Enabled with SQL_INSTRUMENTATION=true. Engine cursor events time every
+statement issued while a request is being handled. On the way out, the
+request gets a Server-Timing header with database time, query count and
+total time. Statements that repeat SQL_N_PLUS_ONE_THRESHOLD or more times
+with the same SQL text (only the bound parameters differ) are logged as
+N+1 suspects. A summary of each request is kept in a rolling in-process
+window (SQL_REPORT_SIZE requests), and report() aggregates it per endpoint.
+"""
+
+from flask import g, request, has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from collections import Counter, deque
+from datetime import datetime
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class SQLInstrumentation:
+    """Opt-in SQL profiler for Flask requests"""
+
+    DEFAULT_N_PLUS_ONE_THRESHOLD = 10
+    DEFAULT_SLOWEST = 5
+    DEFAULT_REPORT_SIZE = 500
+    STATEMENT_PREVIEW = 300
+
+    _installed = False
+    _lock = threading.Lock()
+    _window = deque(maxlen=DEFAULT_REPORT_SIZE)
+    _settings = {
+        'threshold': DEFAULT_N_PLUS_ONE_THRESHOLD,
+        'slowest': DEFAULT_SLOWEST
+    }
+
+    @classmethod
+    def init_app(cls, app):
+        """
+        Install the profiler if SQL_INSTRUMENTATION is enabled.
+
+        Args:
+            app: Flask application instance
+        """
+        if not app.config.get('SQL_INSTRUMENTATION'):
+            return
+
+        cls._settings['threshold'] = int(
+            app.config.get('SQL_N_PLUS_ONE_THRESHOLD') or cls.DEFAULT_N_PLUS_ONE_THRESHOLD
+        )
+        cls._settings['slowest'] = int(app.config.get('SQL_SLOWEST_STATEMENTS') or cls.DEFAULT_SLOWEST)
+        cls._window = deque(cls._window, maxlen=int(app.config.get('SQL_REPORT_SIZE') or cls.DEFAULT_REPORT_SIZE))
+
+        app.before_request(cls._start_request)
+        app.after_request(cls._finish_request)
+
+        with cls._lock:
+            if not cls._installed:
+                # Listening on the Engine class covers every engine (primary and replicas)
+                event.listen(Engine, 'before_cursor_execute', cls._before_cursor_execute)
+                event.listen(Engine, 'after_cursor_execute', cls._after_cursor_execute)
+                cls._installed = True
+
+    @classmethod
+    def enabled(cls) -> bool:
+        """Whether the engine listeners are installed"""
+        return cls._installed
+
+    @classmethod
+    def current(cls):
+        """Profile of the current request, or None"""
+        if has_request_context():
+            return g.get('sql_profile')
+        return None
+
+    @classmethod
+    def report(cls, limit: int = 20) -> dict:
+        """
+        Aggregate the rolling window per endpoint.
+
+        Args:
+            limit: Maximum endpoints and recent N+1 suspects to return
+
+        Returns:
+            dict: Per-endpoint totals sorted by database time, plus recent suspects
+        """
+        with cls._lock:
+            window = list(cls._window)
+
+        endpoints = {}
+        for entry in window:
+            stats = endpoints.setdefault(entry['endpoint'], {
+                'endpoint': entry['endpoint'],
+                'requests': 0,
+                'queries': 0,
+                'max_queries': 0,
+                'db_ms': 0.0,
+                'max_db_ms': 0.0,
+                'n_plus_one_requests': 0
+            })
+            stats['requests'] += 1
+            stats['queries'] += entry['query_count']
+            stats['max_queries'] = max(stats['max_queries'], entry['query_count'])
+            stats['db_ms'] += entry['db_ms']
+            stats['max_db_ms'] = max(stats['max_db_ms'], entry['db_ms'])
+            if entry['n_plus_one']:
+                stats['n_plus_one_requests'] += 1
+
+        rows = []
+        for stats in endpoints.values():
+            requests = stats['requests']
+            rows.append({
+                'endpoint': stats['endpoint'],
+                'requests': requests,
+                'avg_queries': round(stats['queries'] / requests, 1),
+                'max_queries': stats['max_queries'],
+                'avg_db_ms': round(stats['db_ms'] / requests, 3),
+                'max_db_ms': round(stats['max_db_ms'], 3),
+                'total_db_ms': round(stats['db_ms'], 3),
+                'n_plus_one_requests': stats['n_plus_one_requests']
+            })
+        rows.sort(key=lambda row: row['total_db_ms'], reverse=True)
+
+        suspects = [
+            {'endpoint': entry['endpoint'], 'path': entry['path'], 'at': entry['at'], 'statements': entry['n_plus_one']}
+            for entry in reversed(window) if entry['n_plus_one']
+        ]
+        return {
+            'enabled': cls._installed,
+            'window': len(window),
+            'endpoints': rows[:limit],
+            'recent_n_plus_one': suspects[:limit],
+            'slowest': sorted(
+                (statement for entry in window for statement in entry['slowest']),
+                key=lambda statement: statement['ms'], reverse=True
+            )[:limit]
+        }
+
+    @classmethod
+    def reset(cls):
+        """Clear the rolling window."""
+        with cls._lock:
+            cls._window.clear()
+
+    @classmethod
+    def _start_request(cls):
+        g.sql_profile = {
+            'started': time.perf_counter(),
+            'count': 0,
+            'seconds': 0.0,
+            'statements': Counter(),
+            'slowest': []
+        }
+
+    @classmethod
+    def _before_cursor_execute(cls, conn, cursor, statement, parameters, context, executemany):
+        if cls.current() is not None:
+            conn.info.setdefault('sql_profile_start', []).append(time.perf_counter())
+
+    @classmethod
+    def _after_cursor_execute(cls, conn, cursor, statement, parameters, context, executemany):
+        profile = cls.current()
+        starts = conn.info.get('sql_profile_start')
+        if profile is None or not starts:
+            return
+
+        elapsed = time.perf_counter() - starts.pop()
+        profile['count'] += 1
+        profile['seconds'] += elapsed
+        profile['statements'][statement] += 1
+
+        slowest = profile['slowest']
+        if len(slowest) < cls._settings['slowest'] or elapsed > slowest[-1][0]:
+            slowest.append((elapsed, statement))
+            slowest.sort(key=lambda item: item[0], reverse=True)
+            del slowest[cls._settings['slowest']:]
+
+    @classmethod
+    def _finish_request(cls, response):
+        profile = cls.current()
+        if profile is None:
+            return response
+
+        total_ms = (time.perf_counter() - profile['started']) * 1000
+        db_ms = profile['seconds'] * 1000
+        response.headers.add(
+            'Server-Timing',
+            f'db;dur={db_ms:.2f};desc="{profile["count"]} queries", app;dur={total_ms:.2f}'
+        )
+
+        suspects = [
+            {'statement': statement[:cls.STATEMENT_PREVIEW], 'count': count}
+            for statement, count in profile['statements'].most_common()
+            if count >= cls._settings['threshold']
+        ]
+        if suspects:
+            logger.warning(
+                f"Possible N+1 in {request.method} {request.path}: "
+                f"{profile['count']} queries, top statement repeated {suspects[0]['count']} times"
+            )
+
+        entry = {
+            'endpoint': request.endpoint or request.path,
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'query_count': profile['count'],
+            'db_ms': round(db_ms, 3),
+            'total_ms': round(total_ms, 3),
+            'n_plus_one': suspects,
+            'slowest': [
+                {'statement': statement[:cls.STATEMENT_PREVIEW], 'ms': round(seconds * 1000, 3)}
+                for seconds, statement in profile['slowest']
+            ],
+            'at': datetime.now().isoformat()
+        }
+        with cls._lock:
+            cls._window.append(entry)
+        return response
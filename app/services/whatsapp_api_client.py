@@ -1,39 +1,99 @@
 """
 WhatsApp API Client
 Wrapper for third-party WhatsApp API integration.
+
+Requests go through a keep-alive requests.Session. Clients built with
+from_config share one pooled session per company, so repeated sends reuse
+open TCP/TLS connections and the session can be used from several threads.
 """
 
 import requests
+from requests.adapters import HTTPAdapter
 import logging
+import threading
 from app.models import WhatsAppConfig
 from app.utils.phone_formatter import format_phone_number
 from typing import Dict, Any
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_POOL_SIZE = 10
+
 
 class WhatsAppAPIClient:
     """Client for interacting with WhatsApp API"""
     
-    def __init__(self, api_key: str = None, server_address: str = None):
+    _sessions = {}
+    _sessions_lock = threading.Lock()
+    
+    def __init__(self, api_key: str = None, server_address: str = None, session: requests.Session = None):
         """
         Initialize WhatsApp API client.
         
         Args:
             api_key: WhatsApp API key
             server_address: WhatsApp API server URL
+            session: Optional shared session (a private one is created otherwise)
         """
         self.api_key = api_key
         self.server_address = server_address
         self.send_endpoint = f"{server_address}/api/send.php" if server_address else None
+        self.session = session or self.build_session()
+    
+    @staticmethod
+    def build_session(pool_size: int = DEFAULT_POOL_SIZE) -> requests.Session:
+        """
+        Create a keep-alive session whose connection pool fits pool_size
+        concurrent requests.
+        
+        Args:
+            pool_size: Maximum pooled connections per host
+            
+        Returns:
+            requests.Session: Configured session
+        """
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+    
+    @classmethod
+    def session_for(cls, company_id: str, pool_size: int = DEFAULT_POOL_SIZE) -> requests.Session:
+        """
+        Get the pooled session shared by all clients of a company.
+        
+        Args:
+            company_id: Company UUID
+            pool_size: Pool size used if the session has to be created
+            
+        Returns:
+            requests.Session: Shared session
+        """
+        key = str(company_id)
+        with cls._sessions_lock:
+            session = cls._sessions.get(key)
+            if session is None:
+                session = cls.build_session(pool_size)
+                cls._sessions[key] = session
+            return session
+    
+    @classmethod
+    def close_sessions(cls):
+        """Close every pooled session (used on shutdown and in tests)."""
+        with cls._sessions_lock:
+            for session in cls._sessions.values():
+                session.close()
+            cls._sessions.clear()
     
     @classmethod
-    def from_config(cls, company_id: str):
+    def from_config(cls, company_id: str, pool_size: int = DEFAULT_POOL_SIZE):
         """
         Create client from company configuration.
         
         Args:
             company_id: Company UUID
+            pool_size: Pool size used if the company's session has to be created
             
         Returns:
             WhatsAppAPIClient: Configured client instance
@@ -43,7 +103,11 @@ class WhatsAppAPIClient:
         if not config:
             raise ValueError(f"WhatsApp configuration not found for company {company_id}")
         
-        return cls(api_key=config.api_key, server_address=config.server_address)
+        return cls(
+            api_key=config.api_key,
+            server_address=config.server_address,
+            session=cls.session_for(company_id, pool_size)
+        )
     
     def send_text_message(
         self,
@@ -78,7 +142,7 @@ class WhatsAppAPIClient:
             logger.debug(f"Request URL: {self.send_endpoint}")
             logger.debug(f"Request params: {params}")
             
-            response = requests.get(self.send_endpoint, params=params, timeout=30)
+            response = self.session.get(self.send_endpoint, params=params, timeout=30)
             response.raise_for_status()
             
             # Log the response
@@ -143,7 +207,7 @@ class WhatsAppAPIClient:
             }
             
             logger.info(f"Sending document to {mobile}: {document_url}")
-            response = requests.post(self.send_endpoint, data=data, timeout=30)
+            response = self.session.post(self.send_endpoint, data=data, timeout=30)
             response.raise_for_status()
             
             result = response.json() if response.headers.get('content-type') == 'application/json' else {'raw': response.text}
@@ -196,7 +260,7 @@ class WhatsAppAPIClient:
             }
             
             logger.info(f"Sending image to {mobile}: {image_url}")
-            response = requests.post(self.send_endpoint, data=data, timeout=30)
+            response = self.session.post(self.send_endpoint, data=data, timeout=30)
             response.raise_for_status()
             
             result = response.json() if response.headers.get('content-type') == 'application/json' else {'raw': response.text}
@@ -248,7 +312,7 @@ class WhatsAppAPIClient:
             }
             
             logger.info(f"Sending personalized bulk messages to {len(messages_data)} recipients")
-            response = requests.post(self.send_endpoint, data=data, timeout=60)
+            response = self.session.post(self.send_endpoint, data=data, timeout=60)
             response.raise_for_status()
             
             result = response.json() if response.headers.get('content-type') == 'application/json' else {'raw': response.text}
@@ -268,6 +332,54 @@ class WhatsAppAPIClient:
                 'status_code': getattr(e.response, 'status_code', None) if hasattr(e, 'response') else None
             }
     
+    @staticmethod
+    def split_bulk_result(result: Dict[str, Any], count: int) -> list:
+        """
+        Map a send_personalized_bulk result onto its individual messages.
+        
+        When the API returns one entry per recipient (a list, or a list under
+        'results', 'data' or 'messages') in request order, each message gets
+        its own entry; otherwise every message shares the batch outcome.
+        
+        Args:
+            result: Return value of send_personalized_bulk
+            count: Number of messages in the batch
+            
+        Returns:
+            list: One result dict (success, response/error) per message
+        """
+        if not result.get('success'):
+            return [{'success': False, 'error': result.get('error')} for _ in range(count)]
+        
+        response = result.get('response')
+        entries = response
+        if isinstance(response, dict):
+            entries = next(
+                (response[key] for key in ('results', 'data', 'messages') if isinstance(response.get(key), list)),
+                None
+            )
+        
+        if not isinstance(entries, list) or len(entries) != count:
+            return [{'success': True, 'response': response} for _ in range(count)]
+        
+        results = []
+        for entry in entries:
+            if not isinstance(entry, dict):
+                results.append({'success': True, 'response': entry})
+                continue
+            status = str(entry.get('status', '')).lower()
+            failed = entry.get('success') is False or 'error' in entry or status in ('error', 'failed', 'fail')
+            if failed:
+                results.append({'success': False, 'error': str(entry.get('error') or entry.get('message') or entry)})
+            else:
+                api_message_id = entry.get('id') or entry.get('message_id')
+                results.append({
+                    'success': True,
+                    'response': entry,
+                    'api_message_id': str(api_message_id) if api_message_id else None
+                })
+        return results
+    
     def test_connection(self) -> Dict[str, Any]:
         """
         Test API connection by verifying credentials.
@@ -282,7 +394,7 @@ class WhatsAppAPIClient:
                 'api_key': self.api_key
             }
             
-            response = requests.post(self.send_endpoint, data=test_data, timeout=10)
+            response = self.session.post(self.send_endpoint, data=test_data, timeout=10)
             
             # Even if request fails, if we get a response it means API is reachable
             return {
@@ -0,0 +1,324 @@
+"""
+WhatsApp Dispatcher
+Concurrent sender for the WhatsApp message queue.
+
+Pending messages are claimed per company (never more than the company's
+remaining daily quota, less messages other workers hold under lease) and
+sent from a bounded thread pool. Claims use SKIP LOCKED, so several
+dispatchers can run against the same queue; the dispatcher renews its leases
+every third of the lease while it still holds messages, and only writes
+results for rows it still holds. Companies are
+served round-robin with a per-company concurrency cap, so one large backlog
+cannot starve the others. Each company's requests share one pooled
+keep-alive session, and consecutive text messages of the same priority are
+coalesced into send_personalized_bulk calls. Worker threads only make HTTP
+calls; results come back to the calling thread, which writes them as bulk
+status UPDATEs and charges the quota once per batch.
+"""
+
+from app import db
+from app.models import WhatsAppConfig
+from app.services.whatsapp_api_client import WhatsAppAPIClient
+from app.services.whatsapp_queue_service import WhatsAppQueueService
+from app.services.whatsapp_rate_limiter import WhatsAppRateLimiter
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from collections import deque, Counter
+from flask import current_app, has_app_context
+import logging
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+
+class WhatsAppDispatcher:
+    """Send queued WhatsApp messages concurrently while honouring per-company quotas"""
+
+    DEFAULT_MAX_WORKERS = 8
+    DEFAULT_PER_COMPANY_CONCURRENCY = 4
+    DEFAULT_STATUS_BATCH_SIZE = 50
+    DEFAULT_PERSONALIZED_BATCH_SIZE = 50
+    DEFAULT_LEASE_SECONDS = 600
+
+    def __init__(
+        self,
+        max_workers: int = None,
+        per_company_concurrency: int = None,
+        status_batch_size: int = None,
+        personalized_batch_size: int = None,
+        lease_seconds: int = None
+    ):
+        """
+        Initialize the dispatcher. Unset values come from the app config
+        (WHATSAPP_DISPATCH_WORKERS, WHATSAPP_DISPATCH_PER_COMPANY,
+        WHATSAPP_STATUS_BATCH_SIZE, WHATSAPP_PERSONALIZED_BATCH_SIZE,
+        WHATSAPP_CLAIM_LEASE_SECONDS) or the class defaults.
+
+        Args:
+            max_workers: Size of the shared sender thread pool
+            per_company_concurrency: Maximum in-flight requests per company
+            status_batch_size: Results buffered before they are written
+            personalized_batch_size: Text messages per personalized bulk
+                call (1 sends every message individually)
+            lease_seconds: How long claimed messages stay reserved before
+                another worker may reclaim them; renewed while sending
+        """
+        config = current_app.config if has_app_context() else {}
+        self.max_workers = max(1, int(
+            max_workers or config.get('WHATSAPP_DISPATCH_WORKERS') or self.DEFAULT_MAX_WORKERS
+        ))
+        self.per_company_concurrency = max(1, int(
+            per_company_concurrency or config.get('WHATSAPP_DISPATCH_PER_COMPANY')
+            or self.DEFAULT_PER_COMPANY_CONCURRENCY
+        ))
+        self.status_batch_size = max(1, int(
+            status_batch_size or config.get('WHATSAPP_STATUS_BATCH_SIZE') or self.DEFAULT_STATUS_BATCH_SIZE
+        ))
+        self.personalized_batch_size = max(1, int(
+            personalized_batch_size or config.get('WHATSAPP_PERSONALIZED_BATCH_SIZE')
+            or self.DEFAULT_PERSONALIZED_BATCH_SIZE
+        ))
+        self.lease_seconds = max(1, int(
+            lease_seconds or config.get('WHATSAPP_CLAIM_LEASE_SECONDS') or self.DEFAULT_LEASE_SECONDS
+        ))
+        # Unique per run, so two dispatchers in one process never renew or
+        # report on each other's claims
+        self.worker_id = f"{WhatsAppQueueService.default_worker_id()}:{uuid.uuid4().hex[:8]}"
+
+    def run(self, configs: list = None) -> dict:
+        """
+        Send pending messages for every company with auto-send enabled.
+
+        Args:
+            configs: Optional list of WhatsAppConfig rows to process
+
+        Returns:
+            dict: Totals, per-company sent/failed counts and timing
+        """
+        started = time.perf_counter()
+        try:
+            WhatsAppQueueService.reap_expired_leases()
+        except Exception as e:
+            logger.error(f"Error reclaiming expired WhatsApp leases: {str(e)}")
+
+        if configs is None:
+            configs = WhatsAppConfig.query.filter_by(auto_send_invoices=True).all()
+
+        companies = deque(company for company in map(self._load_company, configs) if company)
+        self.stats = {
+            'sent': Counter(),
+            'failed': Counter(),
+            'requests': 0,
+            'status_batches': 0
+        }
+
+        outcomes = []
+        in_flight = {}
+        renew_every = self.lease_seconds / 3
+        renewed_at = time.monotonic()
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='whatsapp-dispatch') as pool:
+            while True:
+                while len(in_flight) < self.max_workers:
+                    company = self._next_company(companies)
+                    if company is None:
+                        break
+                    job = company['jobs'].popleft()
+                    company['in_flight'] += 1
+                    in_flight[pool.submit(self._send, company['client'], job)] = company
+
+                if not in_flight:
+                    break
+
+                # Wake up in time to renew the leases even if every request is slow
+                done, _ = wait(in_flight, timeout=renew_every, return_when=FIRST_COMPLETED)
+                for future in done:
+                    company = in_flight.pop(future)
+                    company['in_flight'] -= 1
+                    outcomes.extend(future.result())
+                    self.stats['requests'] += 1
+
+                if len(outcomes) >= self.status_batch_size:
+                    self._flush(outcomes)
+                    outcomes = []
+
+                if time.monotonic() - renewed_at >= renew_every:
+                    self._extend_leases()
+                    renewed_at = time.monotonic()
+
+        self._flush(outcomes)
+
+        elapsed = time.perf_counter() - started
+        result = {
+            'companies': len(configs),
+            'sent': sum(self.stats['sent'].values()),
+            'failed': sum(self.stats['failed'].values()),
+            'http_requests': self.stats['requests'],
+            'status_batches': self.stats['status_batches'],
+            'per_company': {
+                company_id: {
+                    'sent': self.stats['sent'][company_id],
+                    'failed': self.stats['failed'][company_id]
+                }
+                for company_id in set(self.stats['sent']) | set(self.stats['failed'])
+            },
+            'elapsed_seconds': round(elapsed, 3)
+        }
+        logger.info(
+            f"WhatsApp dispatch finished: {result['sent']} sent, {result['failed']} failed, "
+            f"{result['http_requests']} requests in {result['elapsed_seconds']}s"
+        )
+        return result
+
+    def _load_company(self, config):
+        """Claim a company's sendable messages, capped by its remaining quota"""
+        company_id = config.company_id
+        try:
+            # The quota row stays locked until the claim commits, so concurrent
+            # dispatchers cannot both spend the same remaining quota
+            remaining = WhatsAppRateLimiter.get_remaining_quota(company_id, lock=True)
+            remaining -= WhatsAppQueueService.count_claimed_messages(company_id)
+            if remaining <= 0:
+                db.session.commit()
+                logger.info(f"Quota exhausted for company {company_id}")
+                return None
+
+            messages = WhatsAppQueueService.claim_pending_messages(
+                limit=remaining,
+                company_id=company_id,
+                lease_seconds=self.lease_seconds,
+                worker_id=self.worker_id
+            )
+            if not messages:
+                return None
+
+            logger.info(f"Processing {len(messages)} messages for company {company_id}")
+            return {
+                'company_id': str(company_id),
+                'client': WhatsAppAPIClient.from_config(company_id, pool_size=self.per_company_concurrency),
+                'jobs': deque(self._jobs(str(company_id), messages)),
+                'in_flight': 0
+            }
+
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error preparing WhatsApp messages for company {company_id}: {str(e)}")
+            return None
+
+    def _jobs(self, company_id, messages):
+        """
+        Snapshot queue rows into plain dicts that worker threads can use.
+        Each job is one HTTP call: a media message on its own, or a run of
+        text messages with the same priority (up to personalized_batch_size).
+        """
+        jobs = []
+        batch = []
+        for message in messages:
+            item = {
+                'id': message.id,
+                'company_id': company_id,
+                'mobile': message.mobile,
+                'media_type': message.media_type,
+                'media_url': message.media_url,
+                'content': message.message_content,
+                'priority': message.priority
+            }
+            if item['media_type'] not in ('document', 'image'):
+                if batch and (batch[0]['priority'] != item['priority'] or len(batch) >= self.personalized_batch_size):
+                    jobs.append(batch)
+                    batch = []
+                batch.append(item)
+            else:
+                jobs.append([item])
+        if batch:
+            jobs.append(batch)
+        return jobs
+
+    def _next_company(self, companies):
+        """Round-robin over companies that have work and spare concurrency"""
+        for _ in range(len(companies)):
+            company = companies[0]
+            companies.rotate(-1)
+            if company['jobs'] and company['in_flight'] < self.per_company_concurrency:
+                return company
+        return None
+
+    @staticmethod
+    def _send(client, job):
+        """Send one job from a worker thread; never touches the database"""
+        message = job[0]
+        try:
+            if len(job) > 1:
+                result = client.send_personalized_bulk(
+                    [{'mobile': item['mobile'], 'message': item['content']} for item in job],
+                    priority=message['priority']
+                )
+                return list(zip(job, WhatsAppAPIClient.split_bulk_result(result, len(job))))
+            elif message['media_type'] == 'document':
+                result = client.send_document_message(
+                    mobile=message['mobile'],
+                    document_url=message['media_url'],
+                    caption=message['content'],
+                    priority=message['priority']
+                )
+            elif message['media_type'] == 'image':
+                result = client.send_image_message(
+                    mobile=message['mobile'],
+                    image_url=message['media_url'],
+                    caption=message['content'],
+                    priority=message['priority']
+                )
+            else:  # text
+                result = client.send_text_message(
+                    mobile=message['mobile'],
+                    message=message['content'],
+                    priority=message['priority']
+                )
+        except Exception as e:
+            logger.error(f"Error sending {len(job)} message(s) starting with {message['id']}: {str(e)}")
+            return [(item, {'success': False, 'error': str(e)}) for item in job]
+
+        return [(message, result)]
+
+    def _extend_leases(self):
+        """Keep this run's claimed messages from being reaped while it sends"""
+        try:
+            WhatsAppQueueService.extend_leases(self.worker_id, self.lease_seconds)
+        except Exception as e:
+            logger.error(f"Error extending WhatsApp leases for {self.worker_id}: {str(e)}")
+
+    def _flush(self, outcomes):
+        """Write a batch of results and charge the quota once per company"""
+        if not outcomes:
+            return
+
+        updates = []
+        sent = Counter()
+        failed = Counter()
+        for message, result in outcomes:
+            if result['success']:
+                updates.append({
+                    'message_id': message['id'],
+                    'status': 'sent',
+                    'api_response': result.get('response'),
+                    'api_message_id': result.get('api_message_id')
+                })
+                sent[message['company_id']] += 1
+            else:
+                updates.append({
+                    'message_id': message['id'],
+                    'status': 'failed',
+                    'error_message': result.get('error')
+                })
+                failed[message['company_id']] += 1
+
+        try:
+            WhatsAppQueueService.bulk_update_message_status(updates, commit=False, worker_id=self.worker_id)
+            for company_id, count in sent.items():
+                WhatsAppRateLimiter.increment_sent_count(uuid.UUID(company_id), count, commit=False)
+            db.session.commit()
+            self.stats['sent'].update(sent)
+            self.stats['failed'].update(failed)
+            self.stats['status_batches'] += 1
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error recording {len(updates)} WhatsApp send results: {str(e)}")
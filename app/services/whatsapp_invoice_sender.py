@@ -9,6 +9,7 @@ from app.utils.phone_formatter import format_phone_number
 from app import db
 import logging
 import os
+import uuid
 
 logger = logging.getLogger(__name__)
 
@@ -101,6 +102,53 @@ Thank you for your business!
         base_url = os.getenv('FRONTEND_URL', 'http://localhost:3000')
         return f"{base_url}/public/invoice/{invoice_id}"
     
+    @staticmethod
+    def render_invoice_message(
+        template: str,
+        first_name: str,
+        last_name: str,
+        invoice_number: str,
+        total_amount,
+        due_date,
+        billing_start_date,
+        billing_end_date,
+        invoice_url: str,
+        plan_name: str = None
+    ) -> str:
+        """
+        Replace invoice placeholders in a template
+        
+        Args:
+            template: Template text
+            first_name: Customer first name
+            last_name: Customer last name
+            invoice_number: Invoice number
+            total_amount: Invoice total
+            due_date: Invoice due date
+            billing_start_date: Billing period start
+            billing_end_date: Billing period end
+            invoice_url: Public invoice URL
+            plan_name: Optional service plan name
+            
+        Returns:
+            str: Rendered message
+        """
+        message = template
+        message = message.replace('{{customer_name}}', f"{first_name} {last_name}")
+        message = message.replace('{{first_name}}', first_name)
+        message = message.replace('{{invoice_number}}', invoice_number)
+        message = message.replace('{{amount}}', str(int(total_amount)))
+        message = message.replace('{{due_date}}', due_date.strftime('%d/%m/%Y'))
+        message = message.replace('{{billing_start_date}}', billing_start_date.strftime('%d/%m/%Y'))
+        message = message.replace('{{billing_end_date}}', billing_end_date.strftime('%d/%m/%Y'))
+        message = message.replace('{{invoice_link}}', invoice_url)
+        
+        # Add plan name if available
+        if plan_name:
+            message = message.replace('{{plan_name}}', plan_name)
+        
+        return message
+    
     @staticmethod
     def send_invoice_notification(invoice: Invoice, company_id: str) -> bool:
         """
@@ -144,19 +192,18 @@ Thank you for your business!
             invoice_url = WhatsAppInvoiceSender.generate_invoice_url(str(invoice.id))
             
             # Replace placeholders
-            message = template
-            message = message.replace('{{customer_name}}', f"{customer.first_name} {customer.last_name}")
-            message = message.replace('{{first_name}}', customer.first_name)
-            message = message.replace('{{invoice_number}}', invoice.invoice_number)
-            message = message.replace('{{amount}}', str(int(invoice.total_amount)))
-            message = message.replace('{{due_date}}', invoice.due_date.strftime('%d/%m/%Y'))
-            message = message.replace('{{billing_start_date}}', invoice.billing_start_date.strftime('%d/%m/%Y'))
-            message = message.replace('{{billing_end_date}}', invoice.billing_end_date.strftime('%d/%m/%Y'))
-            message = message.replace('{{invoice_link}}', invoice_url)
-            
-            # Add plan name if available
-            if customer.service_plan:
-                message = message.replace('{{plan_name}}', customer.service_plan.name)
+            message = WhatsAppInvoiceSender.render_invoice_message(
+                template,
+                first_name=customer.first_name,
+                last_name=customer.last_name,
+                invoice_number=invoice.invoice_number,
+                total_amount=invoice.total_amount,
+                due_date=invoice.due_date,
+                billing_start_date=invoice.billing_start_date,
+                billing_end_date=invoice.billing_end_date,
+                invoice_url=invoice_url,
+                plan_name=customer.service_plan.name if customer.service_plan else None
+            )
             
             # Enqueue message with high priority (priority 0)
             WhatsAppQueueService.enqueue_message(
@@ -176,3 +223,67 @@ Thank you for your business!
         except Exception as e:
             logger.error(f"Error sending invoice notification: {str(e)}")
             return False
+    
+    @staticmethod
+    def build_bulk_notifications(company_id: str, invoices: list) -> list:
+        """
+        Render queue rows for a batch of invoices without touching the session.
+        Used by the bulk invoice generator so notifications are inserted in the
+        same multi-row statement as the rest of the chunk.
+        
+        Args:
+            company_id: Company UUID string
+            invoices: List of dicts with keys id, invoice_number, total_amount,
+                due_date, billing_start_date, billing_end_date, customer_id,
+                first_name, last_name, phone_1 and optional plan_name
+            
+        Returns:
+            list: Row dicts for WhatsAppMessageQueue (empty if auto-send is off)
+        """
+        if not invoices or not WhatsAppInvoiceSender.is_auto_send_enabled(company_id):
+            return []
+        
+        template = WhatsAppInvoiceSender.get_invoice_template(company_id)
+        rows = []
+        
+        for invoice in invoices:
+            if not invoice.get('phone_1'):
+                logger.warning(f"Customer {invoice['customer_id']} has no phone number, skipping invoice notification")
+                continue
+            
+            try:
+                formatted_mobile = format_phone_number(invoice['phone_1'])
+            except ValueError as e:
+                logger.error(f"Invalid phone number for customer {invoice['customer_id']}: {str(e)}")
+                continue
+            
+            message = WhatsAppInvoiceSender.render_invoice_message(
+                template,
+                first_name=invoice['first_name'],
+                last_name=invoice['last_name'],
+                invoice_number=invoice['invoice_number'],
+                total_amount=invoice['total_amount'],
+                due_date=invoice['due_date'],
+                billing_start_date=invoice['billing_start_date'],
+                billing_end_date=invoice['billing_end_date'],
+                invoice_url=WhatsAppInvoiceSender.generate_invoice_url(str(invoice['id'])),
+                plan_name=invoice.get('plan_name')
+            )
+            
+            rows.append({
+                'id': uuid.uuid4(),
+                'company_id': invoice['company_id'],
+                'customer_id': invoice['customer_id'],
+                'mobile': formatted_mobile,
+                'message_content': message,
+                'message_type': 'invoice',
+                'media_type': 'text',
+                'priority': 0,  # High priority
+                'status': 'pending',
+                'related_invoice_id': invoice['id'],
+                'retry_count': 0,
+                'max_retry': 3,
+                'is_active': True
+            })
+        
+        return rows
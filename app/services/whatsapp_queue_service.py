@@ -1,15 +1,24 @@
 """
 WhatsApp Message Queue Service
 Handles enqueueing, fetching, and updating WhatsApp messages.
+
+Workers take messages with claim_pending_messages, which locks candidate rows
+with SELECT ... FOR UPDATE SKIP LOCKED and marks them 'processing' under a
+time-limited lease, so several processes can drain the queue without sending
+a message twice. A worker keeps its claims alive with extend_leases while it
+is still sending; reap_expired_leases returns messages whose worker died
+before reporting back.
 """
 
 from app import db
 from app.models import WhatsAppMessageQueue, WhatsAppConfig
 from app.models import Customer, Invoice
 from app.utils.phone_formatter import format_phone_number
-from datetime import datetime
+from datetime import datetime, timedelta
+import os
 import re
-from sqlalchemy import and_, or_
+import socket
+from sqlalchemy import and_, or_, bindparam, case, cast, func, literal
 import logging
 
 logger = logging.getLogger(__name__)
@@ -303,6 +312,155 @@ class WhatsAppQueueService:
             logger.error(f"Error fetching pending messages: {str(e)}")
             raise
     
+    @staticmethod
+    def default_worker_id() -> str:
+        """Identify this process in claimed_by (host:pid)."""
+        return f"{socket.gethostname()}:{os.getpid()}"
+    
+    @staticmethod
+    def claim_pending_messages(
+        limit: int = 200,
+        company_id: str = None,
+        lease_seconds: int = 600,
+        worker_id: str = None
+    ) -> list:
+        """
+        Claim pending messages for this worker.
+        
+        Candidate rows are locked with FOR UPDATE SKIP LOCKED (rows another
+        worker is claiming are skipped, not waited on), switched to
+        'processing' with a lease expiry and committed. Ordering matches
+        get_pending_messages.
+        
+        Args:
+            limit: Maximum number of messages to claim
+            company_id: Optional company filter
+            lease_seconds: How long the claim is valid before it can be reaped
+            worker_id: Recorded in claimed_by (defaults to host:pid)
+            
+        Returns:
+            list: Claimed WhatsAppMessageQueue objects
+        """
+        try:
+            if limit is not None and limit <= 0:
+                return []
+            
+            now = datetime.now()
+            query = db.session.query(WhatsAppMessageQueue.id).filter(
+                WhatsAppMessageQueue.status == 'pending',
+                WhatsAppMessageQueue.is_active == True,
+                or_(
+                    WhatsAppMessageQueue.scheduled_date == None,
+                    WhatsAppMessageQueue.scheduled_date <= now
+                )
+            )
+            if company_id:
+                query = query.filter(WhatsAppMessageQueue.company_id == company_id)
+            
+            ids = [row.id for row in query.order_by(
+                WhatsAppMessageQueue.priority.asc(),
+                WhatsAppMessageQueue.created_at.asc()
+            ).limit(limit).with_for_update(skip_locked=True).all()]
+            
+            if not ids:
+                db.session.commit()
+                return []
+            
+            WhatsAppMessageQueue.query.filter(WhatsAppMessageQueue.id.in_(ids)).update(
+                {
+                    'status': 'processing',
+                    'lease_expires_at': now + timedelta(seconds=lease_seconds),
+                    'claimed_by': worker_id or WhatsAppQueueService.default_worker_id()
+                },
+                synchronize_session=False
+            )
+            db.session.commit()
+            
+            messages = WhatsAppMessageQueue.query.filter(WhatsAppMessageQueue.id.in_(ids)).order_by(
+                WhatsAppMessageQueue.priority.asc(),
+                WhatsAppMessageQueue.created_at.asc()
+            ).all()
+            
+            logger.info(f"Claimed {len(messages)} messages for {company_id or 'all companies'}")
+            return messages
+            
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error claiming pending messages: {str(e)}")
+            raise
+    
+    @staticmethod
+    def count_claimed_messages(company_id: str) -> int:
+        """
+        Count messages currently held under a live lease for a company.
+        
+        Args:
+            company_id: Company UUID
+            
+        Returns:
+            int: Number of claimed, not yet reported messages
+        """
+        return WhatsAppMessageQueue.query.filter(
+            WhatsAppMessageQueue.company_id == company_id,
+            WhatsAppMessageQueue.status == 'processing',
+            WhatsAppMessageQueue.lease_expires_at > datetime.now()
+        ).count()
+    
+    @staticmethod
+    def extend_leases(worker_id: str, lease_seconds: int = 600) -> int:
+        """
+        Renew the lease on every message a worker still holds.
+        
+        Args:
+            worker_id: The claimed_by value the messages were claimed with
+            lease_seconds: New lease length, counted from now
+            
+        Returns:
+            int: Number of messages whose lease was extended
+        """
+        try:
+            extended = WhatsAppMessageQueue.query.filter(
+                WhatsAppMessageQueue.status == 'processing',
+                WhatsAppMessageQueue.claimed_by == worker_id
+            ).update(
+                {'lease_expires_at': datetime.now() + timedelta(seconds=lease_seconds)},
+                synchronize_session=False
+            )
+            db.session.commit()
+            return extended
+            
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error extending leases for {worker_id}: {str(e)}")
+            raise
+    
+    @staticmethod
+    def reap_expired_leases() -> int:
+        """
+        Return messages whose lease has expired to 'pending'.
+        
+        Returns:
+            int: Number of messages reclaimed
+        """
+        try:
+            reclaimed = WhatsAppMessageQueue.query.filter(
+                WhatsAppMessageQueue.status == 'processing',
+                WhatsAppMessageQueue.lease_expires_at <= datetime.now()
+            ).update(
+                {'status': 'pending', 'lease_expires_at': None, 'claimed_by': None},
+                synchronize_session=False
+            )
+            db.session.commit()
+            
+            if reclaimed:
+                logger.warning(f"Reclaimed {reclaimed} WhatsApp messages with expired leases")
+            return reclaimed
+            
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error reaping expired leases: {str(e)}")
+            raise
+    
     @staticmethod
     def update_message_status(
         message_id: str,
@@ -331,6 +489,8 @@ class WhatsAppQueueService:
                 raise ValueError(f"Message {message_id} not found")
             
             message.status = status
+            message.lease_expires_at = None
+            message.claimed_by = None
             
             if status == 'sent':
                 message.sent_at = datetime.now()
@@ -359,6 +519,93 @@ class WhatsAppQueueService:
             logger.error(f"Error updating message status: {str(e)}")
             raise
     
+    @staticmethod
+    def bulk_update_message_status(updates: list, commit: bool = True, worker_id: str = None) -> int:
+        """
+        Apply many send results with one executemany UPDATE per outcome.
+        Same rules as update_message_status: sent rows get sent_at, failed
+        rows get their retry_count bumped and become failed_permanent once
+        max_retry is reached.
+        
+        With worker_id, only rows still claimed by that worker are updated:
+        a message whose lease was reaped (and possibly reclaimed by another
+        worker) keeps its new state.
+        
+        Args:
+            updates: List of dicts with keys message_id, status ('sent' or
+                'failed'), and optional api_response, api_message_id,
+                error_message
+            commit: Commit immediately; pass False to keep the updates in the
+                caller's transaction
+            worker_id: Optional claimed_by value the rows must still carry
+            
+        Returns:
+            int: Number of results submitted
+        """
+        try:
+            table = WhatsAppMessageQueue.__table__
+            sent_at = datetime.now()
+            sent = [
+                {
+                    'b_id': update['message_id'],
+                    'b_response': update.get('api_response'),
+                    'b_api_message_id': update.get('api_message_id')
+                }
+                for update in updates if update['status'] == 'sent'
+            ]
+            failed = [
+                {
+                    'b_id': update['message_id'],
+                    'b_status': update['status'],
+                    'b_error': update.get('error_message') or 'Unknown error'
+                }
+                for update in updates if update['status'] != 'sent'
+            ]
+            target = table.c.id == bindparam('b_id')
+            if worker_id:
+                target = and_(target, table.c.claimed_by == worker_id)
+            
+            if sent:
+                db.session.execute(
+                    table.update().where(target).values(
+                        status='sent',
+                        sent_at=sent_at,
+                        lease_expires_at=None,
+                        claimed_by=None,
+                        api_response=bindparam('b_response', type_=table.c.api_response.type),
+                        api_message_id=func.coalesce(bindparam('b_api_message_id'), table.c.api_message_id)
+                    ),
+                    sent
+                )
+            
+            if failed:
+                status_type = table.c.status.type
+                retry_count = func.coalesce(table.c.retry_count, 0) + 1
+                db.session.execute(
+                    table.update().where(target).values(
+                        status=case(
+                            (retry_count >= table.c.max_retry, cast(literal('failed_permanent'), status_type)),
+                            else_=cast(bindparam('b_status'), status_type)
+                        ),
+                        retry_count=retry_count,
+                        error_message=bindparam('b_error'),
+                        lease_expires_at=None,
+                        claimed_by=None
+                    ),
+                    failed
+                )
+            
+            if commit:
+                db.session.commit()
+            logger.info(f"Updated {len(sent)} sent and {len(failed)} failed messages")
+            
+            return len(sent) + len(failed)
+            
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error bulk updating message status: {str(e)}")
+            raise
+    
     @staticmethod
     def get_queue_stats(company_id: str = None) -> dict:
         """
@@ -378,6 +625,7 @@ class WhatsAppQueueService:
             
             total = query.count()
             pending = query.filter(WhatsAppMessageQueue.status == 'pending').count()
+            processing = query.filter(WhatsAppMessageQueue.status == 'processing').count()
             sent = query.filter(WhatsAppMessageQueue.status == 'sent').count()
             failed = query.filter(WhatsAppMessageQueue.status == 'failed').count()
             failed_permanent = query.filter(WhatsAppMessageQueue.status == 'failed_permanent').count()
@@ -385,6 +633,7 @@ class WhatsAppQueueService:
             return {
                 'total': total,
                 'pending': pending,
+                'processing': processing,
                 'sent': sent,
                 'failed': failed,
                 'failed_permanent': failed_permanent
@@ -15,12 +15,14 @@ class WhatsAppRateLimiter:
     """Service for managing WhatsApp daily message quota"""
     
     @staticmethod
-    def get_or_create_today_quota(company_id: str) -> WhatsAppDailyQuota:
+    def get_or_create_today_quota(company_id: str, lock: bool = False) -> WhatsAppDailyQuota:
         """
         Get today's quota record or create if doesn't exist.
         
         Args:
             company_id: Company UUID
+            lock: Lock the row (SELECT ... FOR UPDATE) until the caller's
+                transaction ends, serializing quota checks across workers
             
         Returns:
             WhatsAppDailyQuota: Today's quota object
@@ -28,10 +30,11 @@ class WhatsAppRateLimiter:
         try:
             today = date.today()
             
-            quota = WhatsAppDailyQuota.query.filter(
+            query = WhatsAppDailyQuota.query.filter(
                 WhatsAppDailyQuota.company_id == company_id,
                 WhatsAppDailyQuota.date == today
-            ).first()
+            )
+            quota = query.with_for_update().first() if lock else query.first()
             
             if not quota:
                 # Get configuration for quota limit
@@ -49,6 +52,9 @@ class WhatsAppRateLimiter:
                 db.session.add(quota)
                 db.session.commit()
                 logger.info(f"Created new quota record for {today} with limit {quota_limit}")
+                
+                if lock:
+                    quota = query.with_for_update().first()
             
             return quota
             
@@ -58,18 +64,19 @@ class WhatsAppRateLimiter:
             raise
     
     @staticmethod
-    def get_remaining_quota(company_id: str) -> int:
+    def get_remaining_quota(company_id: str, lock: bool = False) -> int:
         """
         Get remaining message quota for today.
         
         Args:
             company_id: Company UUID
+            lock: Keep today's quota row locked until the caller commits
             
         Returns:
             int: Number of messages that can still be sent today
         """
         try:
-            quota = WhatsAppRateLimiter.get_or_create_today_quota(company_id)
+            quota = WhatsAppRateLimiter.get_or_create_today_quota(company_id, lock=lock)
             
             # Get buffer setting from config
             config = WhatsAppConfig.query.filter_by(company_id=company_id).first()
@@ -106,13 +113,15 @@ class WhatsAppRateLimiter:
             return False
     
     @staticmethod
-    def increment_sent_count(company_id: str, count: int = 1) -> WhatsAppDailyQuota:
+    def increment_sent_count(company_id: str, count: int = 1, commit: bool = True) -> WhatsAppDailyQuota:
         """
         Increment sent message counter after successful send.
         
         Args:
             company_id: Company UUID
             count: Number of messages to increment (default 1)
+            commit: Commit immediately; pass False to keep the increment in
+                the caller's transaction (e.g. with a batch of status updates)
             
         Returns:
             WhatsAppDailyQuota: Updated quota object
@@ -120,7 +129,10 @@ class WhatsAppRateLimiter:
         try:
             quota = WhatsAppRateLimiter.get_or_create_today_quota(company_id)
             quota.messages_sent += count
-            db.session.commit()
+            if commit:
+                db.session.commit()
+            else:
+                db.session.flush()
             
             logger.info(f"Incremented sent count to {quota.messages_sent}/{quota.quota_limit}")
             return quota
@@ -0,0 +1,39 @@
+from asgiref.sync import sync_to_async
+from asgiref.wsgi import WsgiToAsgi, WsgiToAsgiInstance
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_THREADS = 16
+
+# The undecorated body of WsgiToAsgiInstance.run_wsgi_app. This leans on
+# asgiref internals, hence the pin in requirements.txt; fail at import rather
+# than on the first request if an upgrade changes them
+_run_wsgi_app = getattr(WsgiToAsgiInstance.__dict__.get('run_wsgi_app'), 'func', None)
+if not callable(_run_wsgi_app):
+    raise ImportError('Unsupported asgiref version: WsgiToAsgiInstance.run_wsgi_app is not a sync_to_async wrapper')
+
+
+class _PooledWsgiToAsgiInstance(WsgiToAsgiInstance):
+    def __init__(self, wsgi_application, executor):
+        super().__init__(wsgi_application)
+        self.executor = executor
+
+    async def run_wsgi_app(self, body):
+        run = sync_to_async(_run_wsgi_app, thread_sensitive=False, executor=self.executor)
+        return await run(self, body)
+
+
+class ThreadPoolWsgiToAsgi(WsgiToAsgi):
+    """
+    WsgiToAsgi that serves requests on a bounded thread pool.
+
+    asgiref's adapter runs every request with thread_sensitive=True, i.e. on
+    one shared thread, so requests are handled one at a time however many
+    the server accepts. Here up to max_workers requests run in parallel.
+    """
+
+    def __init__(self, wsgi_application, max_workers=DEFAULT_THREADS):
+        super().__init__(wsgi_application)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='http-worker')
+
+    async def __call__(self, scope, receive, send):
+        await _PooledWsgiToAsgiInstance(self.wsgi_application, self.executor)(scope, receive, send)
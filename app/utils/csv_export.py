@@ -0,0 +1,22 @@
+import csv
+import io
+
+DEFAULT_CHUNK_BYTES = 256 * 1024
+
+def stream_csv(header, rows, chunk_bytes=DEFAULT_CHUNK_BYTES):
+    """
+    Encode rows as CSV and yield the text in chunks of about chunk_bytes.
+    Values are quoted/escaped by the stdlib csv writer, and yielding large
+    chunks keeps per-row overhead off the WSGI/ASGI response path.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    for row in rows:
+        writer.writerow(row)
+        if buffer.tell() >= chunk_bytes:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
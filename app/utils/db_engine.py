@@ -0,0 +1,217 @@
+from contextlib import contextmanager
+from flask import g, has_app_context
+from sqlalchemy import event, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import QueuePool
+from collections import deque
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+ROLES = ('web', 'scheduler', 'maintenance')
+WAIT_WINDOW = 1000
+# Lifts the role's statement_timeout until the current transaction ends
+NO_STATEMENT_TIMEOUT_SQL = 'SET LOCAL statement_timeout = 0'
+
+
+class PoolStats:
+    """Checkout counters and a rolling window of checkout wait times"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.checkouts = 0
+            self.timeouts = 0
+            self.peak_checked_out = 0
+            self.total_wait = 0.0
+            self.max_wait = 0.0
+            self.waits = deque(maxlen=WAIT_WINDOW)
+
+    def record_checkout(self, wait, checked_out):
+        with self._lock:
+            self.checkouts += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+            self.waits.append(wait)
+            self.peak_checked_out = max(self.peak_checked_out, checked_out)
+
+    def record_timeout(self, wait):
+        with self._lock:
+            self.timeouts += 1
+            self.max_wait = max(self.max_wait, wait)
+
+    def as_dict(self):
+        with self._lock:
+            recent = sorted(self.waits)
+            p95 = recent[min(len(recent) - 1, int(len(recent) * 0.95))] if recent else 0.0
+            return {
+                'checkouts': self.checkouts,
+                'timeouts': self.timeouts,
+                'peak_checked_out': self.peak_checked_out,
+                'wait_ms': {
+                    'mean': round(self.total_wait / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                    'p95_recent': round(p95 * 1000, 3),
+                    'max': round(self.max_wait * 1000, 3)
+                }
+            }
+
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    QueuePool that records checkouts, timeouts and how long each checkout
+    waited for a connection (including opening a new overflow connection).
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            record = super()._do_get()
+        except exc.TimeoutError:
+            self.stats.record_timeout(time.perf_counter() - started)
+            raise
+        self.stats.record_checkout(time.perf_counter() - started, self.checkedout())
+        return record
+
+    def recreate(self):
+        # engine.dispose() swaps in a new pool; keep the counters
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+
+def engine_options(config):
+    """
+    SQLAlchemy engine options built from the DB_* settings.
+
+    Pool sizing and the instrumented pool apply to server databases; SQLite
+    keeps the pools Flask-SQLAlchemy picks for it. On PostgreSQL each
+    connection is tagged with application_name "<DB_APPLICATION_NAME>-<role>"
+    and gets the role's statement_timeout (0 disables it).
+
+    Args:
+        config: Flask config (or any mapping) holding the DB_* settings
+
+    Returns:
+        dict: Options for SQLALCHEMY_ENGINE_OPTIONS
+    """
+    role = config.get('DB_ROLE') or 'web'
+    if role not in ROLES:
+        raise ValueError(f"Unknown DB_ROLE '{role}', expected one of {', '.join(ROLES)}")
+
+    options = {
+        'pool_pre_ping': bool(config.get('DB_POOL_PRE_PING', True)),
+        'pool_recycle': int(config.get('DB_POOL_RECYCLE', 1800))
+    }
+    url = make_url(config['SQLALCHEMY_DATABASE_URI'])
+    if url.get_backend_name() == 'sqlite':
+        return options
+
+    options.update({
+        'poolclass': InstrumentedQueuePool,
+        'pool_size': int(config.get('DB_POOL_SIZE', 20)),
+        'max_overflow': int(config.get('DB_MAX_OVERFLOW', 10)),
+        'pool_timeout': float(config.get('DB_POOL_TIMEOUT', 10))
+    })
+    if url.get_backend_name() == 'postgresql':
+        timeout = int((config.get('DB_STATEMENT_TIMEOUTS_MS') or {}).get(role, 0))
+        options['connect_args'] = {
+            'application_name': f"{config.get('DB_APPLICATION_NAME') or 'isp-management'}-{role}",
+            'options': f'-c statement_timeout={timeout}'
+        }
+    return options
+
+
+def init_engine_options(app, role=None):
+    """
+    Set SQLALCHEMY_ENGINE_OPTIONS for the app. Must run before db.init_app.
+
+    Args:
+        app: Flask application instance
+        role: Process role (web, scheduler, maintenance); defaults to DB_ROLE
+    """
+    if role:
+        app.config['DB_ROLE'] = role
+    options = engine_options(app.config)
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {**options, **app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})}
+
+    if 'pool_size' in options:
+        capacity = options['pool_size'] + options['max_overflow']
+        demand = int(app.config.get('HTTP_WORKER_THREADS') or 0) + int(app.config.get('DB_EXECUTOR_WORKERS') or 0)
+        if app.config['DB_ROLE'] == 'web' and demand > capacity:
+            logger.warning(
+                f"HTTP_WORKER_THREADS + DB_EXECUTOR_WORKERS ({demand}) exceed DB_POOL_SIZE + "
+                f"DB_MAX_OVERFLOW ({capacity}); requests may wait on connection checkout"
+            )
+
+
+def pool_stats(engine):
+    """
+    Live state of an engine's connection pool.
+
+    Args:
+        engine: SQLAlchemy engine
+
+    Returns:
+        dict: Pool class and status, plus checkout/overflow counts and wait
+            times when the pool is a queue pool
+    """
+    pool = engine.pool
+    stats = {
+        'url': engine.url.render_as_string(hide_password=True),
+        'pool_class': type(pool).__name__,
+        'status': pool.status()
+    }
+    if isinstance(pool, QueuePool):
+        stats.update({
+            'pool_size': pool.size(),
+            'max_overflow': pool._max_overflow,
+            'timeout_seconds': pool.timeout(),
+            'checked_in': pool.checkedin(),
+            'checked_out': pool.checkedout(),
+            'overflow': max(pool.overflow(), 0)
+        })
+    if isinstance(pool, InstrumentedQueuePool):
+        stats.update(pool.stats.as_dict())
+    return stats
+
+
+def _lift_statement_timeout(connection):
+    if connection.dialect.name == 'postgresql':
+        connection.exec_driver_sql(NO_STATEMENT_TIMEOUT_SQL)
+
+
+@event.listens_for(Session, 'after_begin')
+def _on_session_begin(session, transaction, connection):
+    if has_app_context() and g.get('db_no_statement_timeout'):
+        _lift_statement_timeout(connection)
+
+
+@contextmanager
+def without_statement_timeout():
+    """
+    Run long work (bulk jobs, rebuilds, archiving) without the role's
+    statement_timeout. Every transaction db.session begins inside the block
+    runs SET LOCAL statement_timeout = 0, so pooled connections keep the cap
+    for later requests. Usable as a decorator.
+    """
+    from app import db
+
+    previous = g.get('db_no_statement_timeout')
+    g.db_no_statement_timeout = True
+    try:
+        session = db.session()
+        if session.in_transaction():
+            _lift_statement_timeout(session.connection())
+        yield
+    finally:
+        g.db_no_statement_timeout = previous
@@ -0,0 +1,66 @@
+from asgiref.sync import sync_to_async
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app, g
+import functools
+import threading
+
+DEFAULT_WORKERS = 8
+
+_executor = None
+_lock = threading.Lock()
+
+
+def get_executor():
+    """
+    Shared pool for blocking database work, sized by DB_EXECUTOR_WORKERS.
+    Keep it at or below the engine's pool_size + max_overflow so offloaded
+    calls wait here rather than on connection checkout.
+    """
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                workers = int(current_app.config.get('DB_EXECUTOR_WORKERS') or DEFAULT_WORKERS)
+                _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='db-executor')
+    return _executor
+
+
+def shutdown_executor(wait=True):
+    global _executor
+    with _lock:
+        if _executor is not None:
+            _executor.shutdown(wait=wait)
+            _executor = None
+
+
+def _call_in_app_context(app, parent_g, func, args, kwargs):
+    # A fresh app context gives the call its own scoped session, whose
+    # connection goes back to the pool as soon as the call returns
+    with app.app_context():
+        g.__dict__.update(parent_g)
+        return func(*args, **kwargs)
+
+
+async def run_blocking(func, *args, **kwargs):
+    """
+    Await a blocking function on the database executor.
+
+    The calling coroutine's event loop stays free while the function runs.
+    Context variables (the request, JWT claims) are carried over and g is
+    copied; independent calls may be awaited together with asyncio.gather.
+    """
+    app = current_app._get_current_object()
+    parent_g = dict(g.__dict__)
+    call = sync_to_async(_call_in_app_context, thread_sensitive=False, executor=get_executor())
+    return await call(app, parent_g, func, args, kwargs)
+
+
+def offload(func):
+    """
+    Turn a blocking function into a coroutine function that runs it with
+    run_blocking. The blocking version stays available as __wrapped__.
+    """
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        return await run_blocking(func, *args, **kwargs)
+    return wrapper
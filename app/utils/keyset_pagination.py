@@ -0,0 +1,173 @@
+from app import db
+from app.utils.query_plans import explain
+from sqlalchemy import and_, asc, desc, func, or_, tuple_
+from datetime import date, datetime
+from decimal import Decimal
+import base64
+import json
+import uuid
+
+DEFAULT_COUNT_CAP = 10000
+TOTAL_MODES = ('exact', 'capped', 'estimate', 'none')
+
+
+class CursorError(ValueError):
+    """Raised for malformed or mismatched pagination cursors"""
+    pass
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {'t': 'dt', 'v': value.isoformat()}
+    if isinstance(value, date):
+        return {'t': 'd', 'v': value.isoformat()}
+    if isinstance(value, Decimal):
+        return {'t': 'n', 'v': str(value)}
+    if isinstance(value, uuid.UUID):
+        return {'t': 'u', 'v': str(value)}
+    return {'t': 'j', 'v': value}
+
+
+def _decode_value(data):
+    kind, value = data['t'], data['v']
+    if kind == 'dt':
+        return datetime.fromisoformat(value)
+    if kind == 'd':
+        return date.fromisoformat(value)
+    if kind == 'n':
+        return Decimal(value)
+    if kind == 'u':
+        return uuid.UUID(value)
+    return value
+
+
+def encode_cursor(sort_key, direction, sort_value, row_id):
+    """
+    Build an opaque cursor pointing at a row.
+    sort_key identifies the ordering the cursor belongs to, direction is
+    'next' (rows after the boundary) or 'prev' (rows before it).
+    """
+    payload = {
+        's': sort_key,
+        'd': direction,
+        'v': _encode_value(sort_value),
+        'i': _encode_value(row_id),
+    }
+    raw = json.dumps(payload, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token, sort_key):
+    """
+    Decode a cursor produced by encode_cursor for the same sort_key.
+    Returns (direction, sort_value, row_id); raises CursorError otherwise.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        payload = json.loads(raw)
+        direction = payload['d']
+        sort_value = _decode_value(payload['v'])
+        row_id = _decode_value(payload['i'])
+    except (ValueError, KeyError, TypeError) as e:
+        raise CursorError(f"Invalid cursor: {str(e)}")
+
+    if payload.get('s') != sort_key:
+        raise CursorError("Cursor does not match the requested sort order")
+    if direction not in ('next', 'prev'):
+        raise CursorError("Invalid cursor direction")
+    return direction, sort_value, row_id
+
+
+def _seek_condition(sort_column, id_column, boundary, descending):
+    sort_value, row_id = boundary
+    if not getattr(sort_column, 'nullable', True):
+        key = tuple_(sort_column, id_column)
+        return key < boundary if descending else key > boundary
+
+    # A row comparison is never true when the sort value is NULL, which would
+    # skip those rows; NULL sorts after every value, as PostgreSQL orders it
+    if descending:
+        if sort_value is None:
+            return or_(sort_column.isnot(None), id_column < row_id)
+        return or_(sort_column < sort_value, and_(sort_column == sort_value, id_column < row_id))
+    if sort_value is None:
+        return and_(sort_column.is_(None), id_column > row_id)
+    return or_(
+        sort_column > sort_value,
+        and_(sort_column == sort_value, id_column > row_id),
+        sort_column.is_(None)
+    )
+
+
+def keyset_page(query, sort_column, id_column, descending, page_size, cursor=None, sort_key=''):
+    """
+    Fetch one page by seeking on (sort_column, id_column) instead of OFFSET.
+
+    The query must not be ordered yet. Each returned row carries the extra
+    columns keyset_sort and keyset_id; for single-entity queries the entity
+    is row[0]. A nullable sort column is sought NULL-aware, with NULLs after
+    every value. Returns (rows, next_cursor, prev_cursor).
+    """
+    direction = 'next'
+    boundary = None
+    if cursor:
+        direction, sort_value, row_id = decode_cursor(cursor, sort_key)
+        boundary = (sort_value, row_id)
+
+    backwards = direction == 'prev'
+    seek_descending = descending != backwards
+
+    q = query.add_columns(sort_column.label('keyset_sort'), id_column.label('keyset_id'))
+    if boundary is not None:
+        q = q.filter(_seek_condition(sort_column, id_column, boundary, seek_descending))
+
+    order = desc if seek_descending else asc
+    sort_order = order(sort_column)
+    if getattr(sort_column, 'nullable', True):
+        sort_order = sort_order.nulls_first() if seek_descending else sort_order.nulls_last()
+    rows = q.order_by(sort_order, order(id_column)).limit(page_size + 1).all()
+
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    if backwards:
+        rows.reverse()
+
+    next_cursor = None
+    prev_cursor = None
+    if rows:
+        first, last = rows[0], rows[-1]
+        if (has_more and not backwards) or (backwards and boundary is not None):
+            next_cursor = encode_cursor(sort_key, 'next', last.keyset_sort, last.keyset_id)
+        if (has_more and backwards) or (not backwards and boundary is not None):
+            prev_cursor = encode_cursor(sort_key, 'prev', first.keyset_sort, first.keyset_id)
+
+    return rows, next_cursor, prev_cursor
+
+
+def count_total(query, mode='exact', cap=DEFAULT_COUNT_CAP):
+    """
+    Count the rows of an unpaginated query.
+
+    mode 'exact' runs COUNT(*); 'capped' stops counting after `cap` rows;
+    'estimate' uses the planner's row estimate (derived from
+    pg_class.reltuples and column statistics) on PostgreSQL and falls back
+    to a capped count elsewhere; 'none' skips counting.
+    Returns (total, is_estimate).
+    """
+    if mode not in TOTAL_MODES:
+        raise ValueError(f"Invalid total mode: {mode}")
+
+    if mode == 'none':
+        return None, True
+
+    if mode == 'exact':
+        return query.order_by(None).count(), False
+
+    if mode == 'estimate' and db.session.get_bind().dialect.name == 'postgresql':
+        return int(explain(query.order_by(None))['Plan Rows']), True
+
+    limited = query.order_by(None).limit(cap + 1).subquery()
+    total = db.session.query(func.count()).select_from(limited).scalar()
+    if total > cap:
+        return cap, True
+    return total, False
@@ -1,9 +1,28 @@
 from app import db
 from app.models import DetailedLog
+from app.services.audit_log_writer import AuditLogWriter
+from flask import current_app, has_app_context
+from sqlalchemy import insert
 import uuid
 
-def log_action(user_id, action, table_name, record_id, old_values, new_values, ip_address, user_agent, company_id):
-    log = DetailedLog(
+DURABILITY_MODES = ('buffered', 'transaction', 'immediate')
+
+def log_action(user_id, action, table_name, record_id, old_values, new_values, ip_address, user_agent, company_id=None, durability=None):
+    """
+    Record an audit row.
+
+    durability selects when the row reaches the database:
+      'buffered'    - queued and written in batches by AuditLogWriter (default)
+      'transaction' - added to the caller's session, committed with its changes
+      'immediate'   - added and committed now
+    The default comes from AUDIT_LOG_DURABILITY.
+    """
+    if durability is None:
+        durability = current_app.config.get('AUDIT_LOG_DURABILITY', 'buffered') if has_app_context() else 'buffered'
+    if durability not in DURABILITY_MODES:
+        raise ValueError(f"Unknown audit log durability: {durability}")
+
+    values = dict(
         user_id=user_id,
         action=action,
         table_name=table_name,
@@ -14,6 +33,24 @@ def log_action(user_id, action, table_name, record_id, old_values, new_values, i
         user_agent=user_agent,
         company_id=company_id
     )
-    db.session.add(log)
-    db.session.commit()
+    if durability == 'buffered':
+        AuditLogWriter.enqueue(values)
+        return
+
+    db.session.add(DetailedLog(**values))
+    if durability == 'immediate':
+        db.session.commit()
 
+def log_actions_bulk(entries, commit=True):
+    """
+    Insert many audit rows with one multi-row INSERT.
+    Each entry is a dict with the same keys as log_action's arguments.
+    Pass commit=False to keep the rows in the caller's transaction.
+    """
+    if not entries:
+        return 0
+    rows = [{**entry, 'id': entry.get('id') or uuid.uuid4()} for entry in entries]
+    db.session.execute(insert(DetailedLog), rows)
+    if commit:
+        db.session.commit()
+    return len(rows)
@@ -0,0 +1,84 @@
+from app import db
+from app.utils.db_executor import get_executor
+from app.utils.read_replica import read_engine, pin_engine
+from flask import current_app, g
+from sqlalchemy import text
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class SnapshotUnavailable(Exception):
+    """Raised when a snapshot cannot be exported for the parallel calls"""
+    pass
+
+
+def _call_in_snapshot(app, parent_g, engine, snapshot_id, func, args, kwargs):
+    # Own app context, so its own session and pooled connection
+    with app.app_context():
+        g.__dict__.update(parent_g)
+        with pin_engine(engine):
+            try:
+                if snapshot_id is not None:
+                    connection = db.session.connection(execution_options={'isolation_level': 'REPEATABLE READ'})
+                    # Must come before the transaction's first query
+                    connection.exec_driver_sql('SET TRANSACTION SNAPSHOT %s', (snapshot_id,))
+                    connection.exec_driver_sql('SET TRANSACTION READ ONLY')
+                return func(*args, **kwargs)
+            finally:
+                db.session.rollback()
+
+
+def _export_snapshot(coordinator):
+    try:
+        coordinator.begin()
+        return coordinator.execute(text('SELECT pg_export_snapshot()')).scalar()
+    except Exception as e:
+        raise SnapshotUnavailable(str(e)) from e
+
+
+def run_parallel(calls, snapshot=True):
+    """
+    Run independent read-only calls concurrently on the database executor.
+
+    Each call gets its own app context, session and pooled connection. On
+    PostgreSQL a coordinating REPEATABLE READ transaction exports its
+    snapshot and every call imports it (SET TRANSACTION SNAPSHOT), so all
+    results describe the same instant, as they would in one transaction.
+    Elsewhere, or when the snapshot cannot be exported, or when called from
+    an executor thread (waiting on the same bounded pool could deadlock),
+    the calls run one after another in the current session.
+
+    Args:
+        calls: Dict of name -> (func, args) or (func, args, kwargs)
+        snapshot: Share one snapshot across the calls; False only fans out
+
+    Returns:
+        dict: name -> result, in the order of calls
+    """
+    calls = {name: (call + ({},))[:3] for name, call in calls.items()}
+
+    engine = read_engine()
+    in_executor = threading.current_thread().name.startswith('db-executor')
+    if in_executor or (snapshot and engine.dialect.name != 'postgresql'):
+        return {name: func(*args, **kwargs) for name, (func, args, kwargs) in calls.items()}
+
+    app = current_app._get_current_object()
+    parent_g = dict(g.__dict__)
+    with engine.connect() as coordinator:
+        snapshot_id = None
+        if snapshot:
+            coordinator = coordinator.execution_options(isolation_level='REPEATABLE READ')
+            try:
+                snapshot_id = _export_snapshot(coordinator)
+            except SnapshotUnavailable as e:
+                logger.warning(f"Could not export a snapshot, running the calls serially: {str(e)}")
+                return {name: func(*args, **kwargs) for name, (func, args, kwargs) in calls.items()}
+
+        # The exported snapshot stays importable while the coordinator's transaction is open
+        futures = {
+            name: get_executor().submit(_call_in_snapshot, app, parent_g, engine, snapshot_id, func, args, kwargs)
+            for name, (func, args, kwargs) in calls.items()
+        }
+        return {name: future.result() for name, future in futures.items()}
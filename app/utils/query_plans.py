@@ -0,0 +1,70 @@
+from app import db
+from psycopg2.extras import register_uuid
+import json
+
+
+def explain(query):
+    """
+    Plan of a query without running it.
+
+    Returns the root plan node (a dict) on PostgreSQL and the list of
+    EXPLAIN QUERY PLAN detail strings on other dialects. The EXPLAIN runs
+    as driver SQL, so the explained statement's column types (e.g. Numeric)
+    are never applied to the plan row.
+    """
+    statement = query.statement if hasattr(query, 'statement') else query
+    connection = db.session.connection()
+    dialect = connection.dialect
+
+    if dialect.name == 'postgresql':
+        compiled = statement.compile(dialect=dialect, compile_kwargs={'render_postcompile': True})
+        cursor = connection.connection.cursor()
+        try:
+            register_uuid(conn_or_curs=cursor)
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {compiled}', compiled.params)
+            plan = cursor.fetchone()[0]
+        finally:
+            cursor.close()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return plan[0]['Plan']
+
+    compiled = statement.compile(dialect=dialect, compile_kwargs={'literal_binds': True})
+    rows = connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {compiled}').fetchall()
+    return [row[-1] for row in rows]
+
+
+def _plan_nodes(node):
+    yield node
+    for child in node.get('Plans', []):
+        yield from _plan_nodes(child)
+
+
+def sequential_scans(query, tables=None):
+    """
+    Tables a query reads with a full sequential scan.
+
+    Args:
+        query: SQLAlchemy query or select statement
+        tables: Only report these table names (default: all)
+
+    Returns:
+        list: Table names scanned sequentially, in plan order
+    """
+    plan = explain(query)
+    if isinstance(plan, dict):
+        scanned = [
+            node['Relation Name'] for node in _plan_nodes(plan)
+            if node['Node Type'] == 'Seq Scan'
+        ]
+    else:
+        # SQLite reports "SCAN <table>" for a full scan and "SEARCH ... USING INDEX" otherwise
+        scanned = []
+        for detail in plan:
+            words = detail.split()
+            if len(words) >= 2 and words[0] == 'SCAN' and 'USING' not in words:
+                scanned.append(words[1])
+
+    if tables is not None:
+        scanned = [table for table in scanned if table in tables]
+    return scanned
@@ -0,0 +1,255 @@
+from contextlib import contextmanager
+from flask import current_app, g, has_app_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.sql.dml import UpdateBase
+import functools
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_LAG_SECONDS = 30
+DEFAULT_CHECK_INTERVAL = 5
+DEFAULT_RETRY_SECONDS = 30
+
+# Seconds the replica is behind; 0 for a primary or a replica with all received WAL replayed
+LAG_SQL = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+
+class ReplicaHealth:
+    """Cached replication lag of the replica engine and a cooldown after failures"""
+
+    def __init__(self, engine, check_interval=DEFAULT_CHECK_INTERVAL, retry_seconds=DEFAULT_RETRY_SECONDS):
+        self.engine = engine
+        self.check_interval = check_interval
+        self.retry_seconds = retry_seconds
+        self.lag = None
+        self.checked_at = 0.0
+        self.down_until = 0.0
+        self.last_error = None
+        self._lock = threading.Lock()
+
+    def measure_lag(self):
+        if self.engine.dialect.name != 'postgresql':
+            return 0.0
+        with self.engine.connect() as connection:
+            return float(connection.execute(LAG_SQL).scalar() or 0)
+
+    def mark_down(self, error):
+        self.down_until = time.monotonic() + self.retry_seconds
+        self.last_error = str(error)
+        self.lag = None
+        logger.warning(f"Read replica unavailable, using the primary for {self.retry_seconds}s: {error}")
+
+    def current_lag(self):
+        """Replication lag in seconds, or None while the replica is down"""
+        now = time.monotonic()
+        if now < self.down_until:
+            return None
+        if self.lag is not None and now - self.checked_at < self.check_interval:
+            return self.lag
+        with self._lock:
+            if self.lag is None or time.monotonic() - self.checked_at >= self.check_interval:
+                try:
+                    self.lag = self.measure_lag()
+                    self.checked_at = time.monotonic()
+                    self.last_error = None
+                except Exception as e:
+                    self.mark_down(e)
+            return self.lag
+
+    def worst_case_lag(self):
+        """
+        Upper bound on the lag right now: the last measurement plus the time
+        since it was taken. None while the replica is down.
+        """
+        lag = self.current_lag()
+        if lag is None:
+            return None
+        return lag + max(time.monotonic() - self.checked_at, 0.0)
+
+    def status(self):
+        return {
+            'url': self.engine.url.render_as_string(hide_password=True),
+            'available': time.monotonic() >= self.down_until,
+            'lag_seconds': self.lag,
+            'last_error': self.last_error
+        }
+
+
+class RoutingSession(Session):
+    """
+    Session that sends reads to the replica inside use_replica()/read_replica
+    scopes. Flushes and INSERT/UPDATE/DELETE statements always use the
+    primary, so only designate functions that read. Inside pin_engine()
+    every statement goes to the pinned engine.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_app_context() and g.get('db_pinned_engine') is not None:
+            return g.db_pinned_engine
+        if bind is None and not self._flushing and not isinstance(clause, UpdateBase):
+            engine = replica_engine()
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def init_app(app):
+    """
+    Create the replica engine when REPLICA_DATABASE_URL is set, with the
+    same SQLALCHEMY_ENGINE_OPTIONS as the primary, and track its health.
+
+    The replica is not a Flask-SQLAlchemy bind: binds get a metadata of
+    their own, which create_all/drop_all would then expect on every app.
+
+    Args:
+        app: Flask application instance
+    """
+    url = app.config.get('REPLICA_DATABASE_URL')
+    if not url:
+        app.extensions['read_replica'] = None
+        return
+
+    engine = create_engine(url, **app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}))
+
+    health = ReplicaHealth(
+        engine,
+        check_interval=float(app.config.get('REPLICA_CHECK_INTERVAL') or DEFAULT_CHECK_INTERVAL),
+        retry_seconds=float(app.config.get('REPLICA_RETRY_SECONDS') or DEFAULT_RETRY_SECONDS)
+    )
+
+    @event.listens_for(engine, 'handle_error')
+    def _on_replica_error(context):
+        # A dropped replica connection sends the following reads to the primary
+        if context.is_disconnect:
+            health.mark_down(context.original_exception)
+
+    app.extensions['read_replica'] = health
+
+
+def _health():
+    return current_app.extensions.get('read_replica') if has_app_context() else None
+
+
+def replica_engine():
+    """
+    The replica engine if the current scope is routed to it and the replica
+    is up and within its lag limit; None means use the primary.
+    """
+    if not has_app_context():
+        return None
+    max_lag = g.get('read_replica_max_lag')
+    health = _health()
+    if max_lag is None or health is None:
+        return None
+    lag = health.current_lag()
+    if lag is None or lag > max_lag:
+        return None
+    fresh_since = g.get('read_replica_fresh_since')
+    if fresh_since is not None and health.worst_case_lag() > time.time() - fresh_since:
+        return None
+    return health.engine
+
+
+def read_engine():
+    """Engine that reads in the current scope go to (replica or primary)"""
+    return replica_engine() or current_app.extensions['sqlalchemy'].engine
+
+
+def replica_status():
+    """Health of the replica, or None when no replica is configured"""
+    health = _health()
+    return health.status() if health else None
+
+
+@contextmanager
+def use_replica(max_lag_seconds=None, enabled=True):
+    """
+    Route reads to the replica for the duration of the block.
+
+    Args:
+        max_lag_seconds: Staleness limit; defaults to REPLICA_MAX_LAG_SECONDS
+        enabled: Pass False to force the primary inside a routed scope
+    """
+    previous = g.get('read_replica_max_lag')
+    if enabled:
+        if max_lag_seconds is None:
+            max_lag_seconds = float(current_app.config.get('REPLICA_MAX_LAG_SECONDS') or DEFAULT_MAX_LAG_SECONDS)
+        g.read_replica_max_lag = max_lag_seconds
+    else:
+        g.read_replica_max_lag = None
+    try:
+        yield
+    finally:
+        g.read_replica_max_lag = previous
+
+
+@contextmanager
+def fresh_since(timestamp):
+    """
+    Only use the replica for reads in the block if it has caught up with
+    commits made up to `timestamp` (epoch seconds), e.g. before caching a
+    result under a version bumped by a write. Nested routed scopes keep
+    the requirement; None lifts it.
+    """
+    previous = g.get('read_replica_fresh_since')
+    g.read_replica_fresh_since = timestamp
+    try:
+        yield
+    finally:
+        g.read_replica_fresh_since = previous
+
+
+@contextmanager
+def pin_engine(engine):
+    """
+    Send every statement of the current app context's session to one
+    engine, whatever the routing scope, e.g. to stay on the server a
+    snapshot was exported from.
+    """
+    previous = g.get('db_pinned_engine')
+    g.db_pinned_engine = engine
+    try:
+        yield
+    finally:
+        g.db_pinned_engine = previous
+
+
+def read_replica(func=None, *, max_lag_seconds=None):
+    """
+    Decorator that runs a read-only function with use_replica().
+    Usable bare or as read_replica(max_lag_seconds=...).
+    """
+    if func is None:
+        return functools.partial(read_replica, max_lag_seconds=max_lag_seconds)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with use_replica(max_lag_seconds):
+            return func(*args, **kwargs)
+    return wrapper
+
+
+def preserve_routing(generator):
+    """
+    Keep the current routing for a generator consumed after the routed
+    scope has returned, e.g. a streamed response body.
+    """
+    max_lag = g.get('read_replica_max_lag') if has_app_context() else None
+
+    def generate():
+        if max_lag is None:
+            yield from generator
+        else:
+            with use_replica(max_lag):
+                yield from generator
+    return generate()
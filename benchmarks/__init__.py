@@ -0,0 +1,7 @@
+"""
+Performance benchmarks.
+
+Run against a disposable PostgreSQL database selected with DATABASE_URL;
+the scripts seed synthetic rows through the real app models.
+benchmarks.suite runs every scenario and writes a comparable JSON report.
+"""
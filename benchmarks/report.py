@@ -0,0 +1,168 @@
+"""
+Benchmark reports.
+
+A report is a JSON document with the environment, dataset sizes and one
+timing summary per scenario. compare_reports() lines two reports up by
+scenario name so a run can be checked against a baseline from another
+commit.
+"""
+
+from datetime import datetime
+import json
+import math
+import platform
+import statistics
+import subprocess
+
+REPORT_VERSION = 1
+
+# Slowdowns below this many milliseconds are treated as noise
+DEFAULT_MIN_DELTA_MS = 5.0
+DEFAULT_TOLERANCE = 0.2
+
+
+def summarize(timings_ms: list) -> dict:
+    """
+    Timing summary of one scenario.
+
+    Args:
+        timings_ms: Wall-clock duration of each timed run, in milliseconds
+
+    Returns:
+        dict: runs, min/median/mean/p95/max in milliseconds
+    """
+    ordered = sorted(timings_ms)
+    p95_index = max(0, math.ceil(0.95 * len(ordered)) - 1)
+    return {
+        'runs': len(ordered),
+        'min_ms': round(ordered[0], 2),
+        'median_ms': round(statistics.median(ordered), 2),
+        'mean_ms': round(statistics.fmean(ordered), 2),
+        'p95_ms': round(ordered[p95_index], 2),
+        'max_ms': round(ordered[-1], 2)
+    }
+
+
+def git_revision() -> dict:
+    """Current commit and whether the work tree has local changes"""
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = bool(subprocess.run(
+            ['git', 'status', '--porcelain', '--untracked-files=no'], capture_output=True, text=True, check=True
+        ).stdout.strip())
+        return {'commit': commit, 'dirty': dirty}
+    except (OSError, subprocess.CalledProcessError):
+        return {'commit': None, 'dirty': None}
+
+
+def build_report(scenarios: dict, dataset: dict, database: dict, options: dict) -> dict:
+    """
+    Assemble a report.
+
+    Args:
+        scenarios: Scenario name -> summarize() result (plus group, and error if it failed)
+        dataset: Table name -> seeded rows
+        database: Dialect and server version
+        options: Command line options the suite ran with
+
+    Returns:
+        dict: JSON-serializable report
+    """
+    return {
+        'version': REPORT_VERSION,
+        'created_at': datetime.now().isoformat(),
+        'git': git_revision(),
+        'python': platform.python_version(),
+        'database': database,
+        'options': options,
+        'dataset': dataset,
+        'scenarios': scenarios
+    }
+
+
+def load_report(path: str) -> dict:
+    with open(path) as handle:
+        return json.load(handle)
+
+
+def compare_reports(baseline: dict, current: dict, tolerance: float = DEFAULT_TOLERANCE,
+                    min_delta_ms: float = DEFAULT_MIN_DELTA_MS, metric: str = 'median_ms') -> dict:
+    """
+    Compare two reports scenario by scenario.
+
+    A scenario regresses when its metric grew by more than `tolerance`
+    (a fraction) and by more than `min_delta_ms`; it improves under the
+    mirror condition.
+
+    Args:
+        baseline: Report to compare against
+        current: New report
+        tolerance: Allowed relative slowdown
+        min_delta_ms: Absolute noise floor in milliseconds
+        metric: Summary field to compare
+
+    Returns:
+        dict: rows (one per shared scenario), regressions, improvements,
+        and the scenarios only present on one side
+    """
+    before = baseline.get('scenarios', {})
+    after = current.get('scenarios', {})
+    rows = []
+    for name in sorted(set(before) & set(after)):
+        old, new = before[name].get(metric), after[name].get(metric)
+        if old is None or new is None:
+            rows.append({'scenario': name, 'baseline': old, 'current': new, 'change': None, 'status': 'error'})
+            continue
+        delta = new - old
+        change = delta / old if old else None
+        status = 'ok'
+        if change is not None and abs(delta) > min_delta_ms:
+            if change > tolerance:
+                status = 'regression'
+            elif change < -tolerance:
+                status = 'improvement'
+        rows.append({
+            'scenario': name,
+            'baseline': old,
+            'current': new,
+            'change': round(change, 4) if change is not None else None,
+            'status': status
+        })
+
+    if baseline.get('dataset') != current.get('dataset'):
+        dataset_note = 'datasets differ; timings may not be comparable'
+    else:
+        dataset_note = None
+
+    return {
+        'metric': metric,
+        'tolerance': tolerance,
+        'min_delta_ms': min_delta_ms,
+        'baseline_commit': baseline.get('git', {}).get('commit'),
+        'current_commit': current.get('git', {}).get('commit'),
+        'dataset_note': dataset_note,
+        'rows': rows,
+        'regressions': [row['scenario'] for row in rows if row['status'] == 'regression'],
+        'improvements': [row['scenario'] for row in rows if row['status'] == 'improvement'],
+        'added': sorted(set(after) - set(before)),
+        'removed': sorted(set(before) - set(after))
+    }
+
+
+def format_comparison(comparison: dict) -> str:
+    """Plain-text table of a compare_reports() result"""
+    lines = [f"{'scenario':<40} {'baseline':>10} {'current':>10} {'change':>8}  status"]
+    for row in comparison['rows']:
+        change = f"{row['change'] * 100:+.1f}%" if row['change'] is not None else '-'
+        baseline = f"{row['baseline']:.2f}" if row['baseline'] is not None else '-'
+        current = f"{row['current']:.2f}" if row['current'] is not None else '-'
+        lines.append(f"{row['scenario']:<40} {baseline:>10} {current:>10} {change:>8}  {row['status']}")
+    if comparison['dataset_note']:
+        lines.append(f"note: {comparison['dataset_note']}")
+    if comparison['added']:
+        lines.append(f"new scenarios: {', '.join(comparison['added'])}")
+    if comparison['removed']:
+        lines.append(f"missing scenarios: {', '.join(comparison['removed'])}")
+    return '\n'.join(lines)
@@ -0,0 +1,470 @@
+"""
+Synthetic data seeding for benchmarks.
+Rows are written with multi-row INSERTs in batches so millions of rows can be
+generated in minutes. Every seed_* function tops a company up to a target
+count, so re-running with the same sizes reuses what is already there.
+"""
+
+from app import db
+from app.models import (
+    Company, Area, ISP, ServicePlan, Customer, Invoice, Complaint, User, BankAccount,
+    Payment, DetailedLog, WhatsAppConfig, WhatsAppMessageQueue
+)
+from sqlalchemy import insert, func
+from datetime import datetime, timedelta
+import random
+import uuid
+
+BATCH_SIZE = 10000
+
+# generated_by of invoices created by the scheduler (see scheduler._process_invoices)
+SYSTEM_USER_ID = uuid.UUID('00000000-0000-0000-0000-000000000000')
+
+
+def _insert_batched(model, rows):
+    for offset in range(0, len(rows), BATCH_SIZE):
+        db.session.execute(insert(model), rows[offset:offset + BATCH_SIZE])
+        db.session.commit()
+
+
+def get_or_create_company(name='Benchmark Company', plans=5, areas=10):
+    """
+    Get the benchmark company or create it with its reference data.
+
+    Returns:
+        Company: Benchmark company
+    """
+    company = Company.query.filter_by(name=name).first()
+    if company:
+        return company
+
+    company = Company(id=uuid.uuid4(), name=name, is_active=True)
+    db.session.add(company)
+    # The reference rows only carry company_id, so the flush would not order them after the company
+    db.session.flush()
+    db.session.add(ISP(id=uuid.uuid4(), company_id=company.id, name='Benchmark ISP'))
+    db.session.add_all(
+        Area(id=uuid.uuid4(), company_id=company.id, name=f'Area {i}') for i in range(areas)
+    )
+    db.session.add_all(
+        ServicePlan(id=uuid.uuid4(), company_id=company.id, name=f'Plan {i}', price=1000 + 500 * i)
+        for i in range(plans)
+    )
+    db.session.commit()
+    return company
+
+
+def seed_customers(company, target, rng=None):
+    """
+    Top up the company's customers to `target` rows.
+
+    Returns:
+        int: Number of customers inserted
+    """
+    rng = rng or random.Random(42)
+    existing = db.session.query(func.count(Customer.id)).filter(Customer.company_id == company.id).scalar()
+    missing = target - existing
+    if missing <= 0:
+        return 0
+
+    area_ids = [a.id for a in Area.query.filter_by(company_id=company.id).all()]
+    plan_ids = [p.id for p in ServicePlan.query.filter_by(company_id=company.id).all()]
+    isp_id = ISP.query.filter_by(company_id=company.id).first().id
+    now = datetime.now()
+    prefix = str(company.id)[:8]
+
+    rows = []
+    for n in range(existing, target):
+        rows.append({
+            'id': uuid.uuid4(),
+            'company_id': company.id,
+            'area_id': rng.choice(area_ids),
+            'service_plan_id': rng.choice(plan_ids),
+            'isp_id': isp_id,
+            'first_name': f'First{n}',
+            'last_name': f'Last{n}',
+            'email': f'customer{n}@example.com',
+            'internet_id': f'{prefix}-{n}',
+            'phone_1': f'0300{n:07d}'[-11:],
+            'installation_address': f'{n} Benchmark Street',
+            'installation_date': (now - timedelta(days=rng.randint(0, 720))).date(),
+            'cnic': f'{prefix[:4]}{n:011d}'[-15:],
+            'connection_type': 'internet',
+            'recharge_date': (now - timedelta(days=rng.randint(0, 30))).date(),
+            'discount_amount': rng.choice([None, 0, 100, 250]),
+            'is_active': rng.random() > 0.1,
+            'created_at': now - timedelta(days=rng.randint(0, 720))
+        })
+    _insert_batched(Customer, rows)
+    return missing
+
+
+def seed_invoices(company, target, rng=None):
+    """
+    Top up the company's invoices to `target` rows spread over its customers.
+
+    Returns:
+        int: Number of invoices inserted
+    """
+    rng = rng or random.Random(43)
+    existing = db.session.query(func.count(Invoice.id)).filter(Invoice.company_id == company.id).scalar()
+    missing = target - existing
+    if missing <= 0:
+        return 0
+
+    customer_ids = [row.id for row in db.session.query(Customer.id).filter(Customer.company_id == company.id).all()]
+    today = datetime.now().date()
+    prefix = str(company.id)[:8]
+
+    for offset in range(existing, target, BATCH_SIZE):
+        rows = []
+        for n in range(offset, min(offset + BATCH_SIZE, target)):
+            start = today - timedelta(days=rng.randint(0, 720))
+            amount = rng.choice([1000, 1500, 2000, 2500, 3000])
+            rows.append({
+                'id': uuid.uuid4(),
+                'invoice_number': f'BENCH-{prefix}-{n}',
+                'company_id': company.id,
+                'customer_id': rng.choice(customer_ids),
+                'billing_start_date': start,
+                'billing_end_date': start + timedelta(days=30),
+                'due_date': start + timedelta(days=5),
+                'subtotal': amount,
+                'discount_percentage': 0,
+                'total_amount': amount,
+                'invoice_type': rng.choice(['subscription'] * 9 + ['installation']),
+                'status': rng.choice(['paid', 'paid', 'pending', 'partially_paid', 'overdue']),
+                'is_active': True
+            })
+        db.session.execute(insert(Invoice), rows)
+        db.session.commit()
+    return missing
+
+
+def seed_complaints(company, target, rng=None):
+    """
+    Top up the company's complaints to `target` rows.
+
+    Returns:
+        int: Number of complaints inserted
+    """
+    rng = rng or random.Random(44)
+    existing = db.session.query(func.count(Complaint.id)).join(
+        Customer, Complaint.customer_id == Customer.id
+    ).filter(Customer.company_id == company.id).scalar()
+    missing = target - existing
+    if missing <= 0:
+        return 0
+
+    customer_ids = [row.id for row in db.session.query(Customer.id).filter(Customer.company_id == company.id).all()]
+    prefix = str(company.id)[:8]
+    rows = [
+        {
+            'id': uuid.uuid4(),
+            'customer_id': rng.choice(customer_ids),
+            'description': 'Benchmark complaint',
+            'status': rng.choice(['open', 'in_progress', 'resolved', 'closed']),
+            'ticket_number': f'BENCH-{prefix}-{n}',
+            'is_active': True
+        }
+        for n in range(existing, target)
+    ]
+    _insert_batched(Complaint, rows)
+    return missing
+
+
+def ensure_system_user():
+    """
+    Create the user the automatic invoice job records as generator, so its
+    invoices satisfy the users foreign key.
+
+    Returns:
+        User: System user
+    """
+    user = db.session.get(User, SYSTEM_USER_ID)
+    if user:
+        return user
+    user = User(
+        id=SYSTEM_USER_ID,
+        username='system',
+        password='!',
+        email='system@benchmark.local',
+        role='super_admin',
+        first_name='System',
+        last_name='User',
+        is_active=True
+    )
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+def get_or_create_user(company):
+    """
+    Get or create the company's benchmark owner (payment receiver and log author).
+
+    Returns:
+        User: Benchmark user
+    """
+    username = f'bench-{str(company.id)[:8]}'
+    user = User.query.filter_by(username=username).first()
+    if user:
+        return user
+    user = User(
+        id=uuid.uuid4(),
+        company_id=company.id,
+        username=username,
+        password='!',
+        email=f'{username}@benchmark.local',
+        role='company_owner',
+        first_name='Benchmark',
+        last_name='Owner',
+        is_active=True
+    )
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+def get_or_create_bank_account(company):
+    """
+    Get or create the company's benchmark bank account.
+
+    Returns:
+        BankAccount: Benchmark bank account
+    """
+    account = BankAccount.query.filter_by(company_id=company.id, bank_name='Benchmark Bank').first()
+    if account:
+        return account
+    account = BankAccount(
+        id=uuid.uuid4(),
+        company_id=company.id,
+        bank_name='Benchmark Bank',
+        account_title='Benchmark',
+        account_number=str(company.id)[:12],
+        is_active=True
+    )
+    db.session.add(account)
+    db.session.commit()
+    return account
+
+
+def seed_payments(company, target, rng=None):
+    """
+    Top up the company's payments to `target` rows against its paid and
+    partially paid invoices.
+
+    Returns:
+        int: Number of payments inserted
+    """
+    rng = rng or random.Random(45)
+    existing = db.session.query(func.count(Payment.id)).filter(Payment.company_id == company.id).scalar()
+    missing = target - existing
+    if missing <= 0:
+        return 0
+
+    invoices = db.session.query(Invoice.id, Invoice.total_amount, Invoice.billing_start_date).filter(
+        Invoice.company_id == company.id,
+        Invoice.status.in_(['paid', 'partially_paid'])
+    ).all()
+    if not invoices:
+        return 0
+    user_id = get_or_create_user(company).id
+    account_id = get_or_create_bank_account(company).id
+
+    for offset in range(existing, target, BATCH_SIZE):
+        rows = []
+        for n in range(offset, min(offset + BATCH_SIZE, target)):
+            invoice = rng.choice(invoices)
+            method = rng.choice(['cash', 'cash', 'bank_transfer', 'online'])
+            rows.append({
+                'id': uuid.uuid4(),
+                'company_id': company.id,
+                'invoice_id': invoice.id,
+                'amount': invoice.total_amount,
+                'payment_date': datetime.combine(invoice.billing_start_date, datetime.min.time())
+                    + timedelta(days=rng.randint(0, 10), minutes=rng.randint(0, 1439)),
+                'payment_method': method,
+                'status': rng.choice(['paid'] * 19 + ['failed']),
+                'received_by': user_id,
+                'bank_account_id': None if method == 'cash' else account_id,
+                'is_active': True
+            })
+        db.session.execute(insert(Payment), rows)
+        db.session.commit()
+    return missing
+
+
+def seed_logs(company, target, rng=None, days=365):
+    """
+    Top up the company's audit log to `target` rows spread over `days`.
+
+    Returns:
+        int: Number of log rows inserted
+    """
+    rng = rng or random.Random(46)
+    existing = db.session.query(func.count(DetailedLog.id)).filter(DetailedLog.company_id == company.id).scalar()
+    missing = target - existing
+    if missing <= 0:
+        return 0
+
+    user_id = get_or_create_user(company).id
+    now = datetime.now()
+    for offset in range(existing, target, BATCH_SIZE):
+        rows = [
+            {
+                'id': uuid.uuid4(),
+                'user_id': user_id,
+                'company_id': company.id,
+                'action': rng.choice(['CREATE', 'UPDATE', 'UPDATE', 'DELETE']),
+                'table_name': rng.choice(['customers', 'invoices', 'payments', 'complaints']),
+                'record_id': uuid.uuid4(),
+                'new_values': {'benchmark': n},
+                'ip_address': '127.0.0.1',
+                'user_agent': 'benchmark',
+                'created_at': now - timedelta(seconds=rng.randint(0, days * 86400))
+            }
+            for n in range(offset, min(offset + BATCH_SIZE, target))
+        ]
+        db.session.execute(insert(DetailedLog), rows)
+        db.session.commit()
+    return missing
+
+
+def ensure_whatsapp_config(company, daily_quota=100000):
+    """
+    Enable auto-send for the company with a quota large enough for the
+    dispatch benchmark.
+
+    Returns:
+        WhatsAppConfig: The company's config
+    """
+    config = WhatsAppConfig.query.filter_by(company_id=company.id).first()
+    if config is None:
+        config = WhatsAppConfig(
+            id=uuid.uuid4(),
+            company_id=company.id,
+            api_key='benchmark',
+            server_address='http://whatsapp.benchmark.invalid'
+        )
+        db.session.add(config)
+    config.auto_send_invoices = True
+    config.daily_quota_limit = daily_quota
+    config.quota_buffer = 0
+    db.session.commit()
+    return config
+
+
+def _queue_rows(company, customers, count, status, rng, created_from):
+    return [
+        {
+            'id': uuid.uuid4(),
+            'company_id': company.id,
+            'customer_id': customer.id,
+            'mobile': f'92300{n % 10000000:07d}',
+            'message_type': 'invoice',
+            'message_content': f'Dear {customer.first_name}, your invoice is ready.',
+            'media_type': 'text',
+            'priority': rng.choice([0, 10, 10, 20]),
+            'status': status if status else rng.choice(['sent'] * 9 + ['failed']),
+            'retry_count': 0,
+            'max_retry': 3,
+            'is_active': True,
+            'created_at': created_from + timedelta(seconds=n)
+        }
+        for n, customer in ((n, rng.choice(customers)) for n in range(count))
+    ]
+
+
+def seed_queue_messages(company, target, rng=None):
+    """
+    Top up the company's WhatsApp queue history (sent and failed rows) to
+    `target` rows.
+
+    Returns:
+        int: Number of queue rows inserted
+    """
+    rng = rng or random.Random(47)
+    existing = db.session.query(func.count(WhatsAppMessageQueue.id)).filter(
+        WhatsAppMessageQueue.company_id == company.id
+    ).scalar()
+    missing = target - existing
+    if missing <= 0:
+        return 0
+
+    customers = db.session.query(Customer.id, Customer.first_name).filter(Customer.company_id == company.id).all()
+    started = datetime.now() - timedelta(days=180)
+    for offset in range(0, missing, BATCH_SIZE):
+        rows = _queue_rows(company, customers, min(BATCH_SIZE, missing - offset), None, rng, started)
+        db.session.execute(insert(WhatsAppMessageQueue), rows)
+        db.session.commit()
+    return missing
+
+
+def add_pending_messages(company, count, rng=None):
+    """
+    Queue `count` pending text messages for the company.
+
+    Returns:
+        list: Ids of the inserted messages
+    """
+    rng = rng or random.Random(48)
+    customers = db.session.query(Customer.id, Customer.first_name).filter(Customer.company_id == company.id).all()
+    rows = _queue_rows(company, customers, count, 'pending', rng, datetime.now() - timedelta(hours=1))
+    _insert_batched(WhatsAppMessageQueue, rows)
+    return [row['id'] for row in rows]
+
+
+def seed_tenants(companies, customers, invoices_per_customer=12, payments_per_invoice=0.7,
+                 logs=0, messages=0, complaints_per_customer=0.05):
+    """
+    Seed `companies` benchmark tenants of the same shape.
+
+    Args:
+        companies: Number of companies
+        customers: Customers per company
+        invoices_per_customer: Invoices per customer
+        payments_per_invoice: Payments per invoice
+        logs: Audit log rows per company
+        messages: WhatsApp queue history rows per company
+        complaints_per_customer: Complaints per customer
+
+    Returns:
+        list: The benchmark companies
+    """
+    ensure_system_user()
+    tenants = []
+    for index in range(companies):
+        company = get_or_create_company(name=f'Benchmark Company {index + 1}')
+        rng = random.Random(index)
+        get_or_create_user(company)
+        get_or_create_bank_account(company)
+        seed_customers(company, customers, rng)
+        invoices = customers * invoices_per_customer
+        seed_invoices(company, invoices, rng)
+        seed_payments(company, int(invoices * payments_per_invoice), rng)
+        seed_complaints(company, max(1, int(customers * complaints_per_customer)), rng)
+        if logs:
+            seed_logs(company, logs, rng)
+        if messages:
+            seed_queue_messages(company, messages, rng)
+        tenants.append(company)
+    return tenants
+
+
+def dataset_counts(company_ids):
+    """
+    Row counts of the benchmark tenants, for the report.
+
+    Returns:
+        dict: Table name -> rows belonging to the given companies
+    """
+    counts = {}
+    for model in (Customer, Invoice, Payment, DetailedLog, WhatsAppMessageQueue):
+        counts[model.__tablename__] = db.session.query(func.count(model.id)).filter(
+            model.company_id.in_(company_ids)
+        ).scalar()
+    counts[Complaint.__tablename__] = db.session.query(func.count(Complaint.id)).join(
+        Customer, Complaint.customer_id == Customer.id
+    ).filter(Customer.company_id.in_(company_ids)).scalar()
+    return counts
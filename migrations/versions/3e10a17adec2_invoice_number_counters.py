@@ -0,0 +1,32 @@
+"""invoice number counters
+
+Revision ID: 3e10a17adec2
+Revises: c71e5a9d3b24
+Create Date: 2026-10-17 22:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3e10a17adec2'
+down_revision = 'c71e5a9d3b24'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # The allocator seeds a year's row from the highest issued invoice number
+    # on its first allocation, so existing invoices need no backfill
+    op.create_table(
+        'invoice_number_counters',
+        sa.Column('year', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('last_value', sa.BigInteger(), nullable=False),
+        sa.Column('updated_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=True),
+        sa.PrimaryKeyConstraint('year')
+    )
+
+
+def downgrade():
+    op.drop_table('invoice_number_counters')
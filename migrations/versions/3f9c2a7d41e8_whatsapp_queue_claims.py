@@ -0,0 +1,64 @@
+"""whatsapp queue claims
+
+Revision ID: 3f9c2a7d41e8
+Revises: b4a0eb84caa3
+Create Date: 2026-10-17 18:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9c2a7d41e8'
+down_revision = 'b4a0eb84caa3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # New enum values cannot be added inside a transaction block
+    with op.get_context().autocommit_block():
+        op.execute("ALTER TYPE whatsapp_message_status ADD VALUE IF NOT EXISTS 'processing' AFTER 'pending'")
+
+    with op.batch_alter_table('whatsapp_message_queue', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('lease_expires_at', sa.DateTime(timezone=True), nullable=True))
+        batch_op.add_column(sa.Column('claimed_by', sa.String(length=100), nullable=True))
+
+    op.create_index(
+        'idx_whatsapp_queue_pending_claim',
+        'whatsapp_message_queue',
+        ['company_id', 'priority', 'created_at'],
+        unique=False,
+        postgresql_where=sa.text("status = 'pending'")
+    )
+    op.create_index(
+        'idx_whatsapp_queue_processing_lease',
+        'whatsapp_message_queue',
+        ['lease_expires_at'],
+        unique=False,
+        postgresql_where=sa.text("status = 'processing'")
+    )
+
+    # Quota rows are per company and day, and are locked per company when claiming
+    with op.batch_alter_table('whatsapp_daily_quota', schema=None) as batch_op:
+        batch_op.drop_constraint('whatsapp_daily_quota_date_key', type_='unique')
+        batch_op.create_unique_constraint('uq_whatsapp_quota_company_date', ['company_id', 'date'])
+
+
+def downgrade():
+    with op.batch_alter_table('whatsapp_daily_quota', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_whatsapp_quota_company_date', type_='unique')
+        batch_op.create_unique_constraint('whatsapp_daily_quota_date_key', ['date'])
+
+    op.execute(
+        "UPDATE whatsapp_message_queue SET status = 'pending' WHERE status = 'processing'"
+    )
+    op.drop_index('idx_whatsapp_queue_processing_lease', table_name='whatsapp_message_queue')
+    op.drop_index('idx_whatsapp_queue_pending_claim', table_name='whatsapp_message_queue')
+
+    with op.batch_alter_table('whatsapp_message_queue', schema=None) as batch_op:
+        batch_op.drop_column('claimed_by')
+        batch_op.drop_column('lease_expires_at')
+
+    # PostgreSQL cannot drop an enum value; 'processing' stays defined but unused
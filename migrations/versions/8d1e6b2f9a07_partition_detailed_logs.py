@@ -0,0 +1,109 @@
+"""partition detailed_logs by month
+
+Revision ID: 8d1e6b2f9a07
+Revises: 3f9c2a7d41e8
+Create Date: 2026-10-17 19:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d1e6b2f9a07'
+down_revision = '3f9c2a7d41e8'
+branch_labels = None
+depends_on = None
+
+# Partitions created ahead of the current month; the maintenance job keeps this window
+MONTHS_AHEAD = 3
+
+COLUMNS = (
+    "id, user_id, company_id, action, table_name, record_id, "
+    "old_values, new_values, ip_address, user_agent, created_at"
+)
+
+
+def upgrade():
+    op.execute("ALTER TABLE detailed_logs RENAME TO detailed_logs_unpartitioned")
+    op.execute("ALTER TABLE detailed_logs_unpartitioned RENAME CONSTRAINT detailed_logs_pkey TO detailed_logs_unpartitioned_pkey")
+
+    # The partition key has to be part of the primary key
+    op.execute("""
+        CREATE TABLE detailed_logs (
+            id UUID NOT NULL,
+            user_id UUID REFERENCES users (id),
+            company_id UUID REFERENCES companies (id),
+            action VARCHAR(255) NOT NULL,
+            table_name VARCHAR(50) NOT NULL,
+            record_id UUID NOT NULL,
+            old_values JSON,
+            new_values JSON,
+            ip_address VARCHAR(45),
+            user_agent VARCHAR(255),
+            created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            CONSTRAINT detailed_logs_pkey PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    op.execute("CREATE TABLE detailed_logs_default PARTITION OF detailed_logs DEFAULT")
+
+    # One partition per month from the oldest row through MONTHS_AHEAD months from now
+    op.execute(f"""
+        DO $$
+        DECLARE
+            month DATE;
+            last_month DATE := date_trunc('month', CURRENT_DATE + INTERVAL '{MONTHS_AHEAD} months')::date;
+        BEGIN
+            SELECT date_trunc('month', COALESCE(MIN(created_at), CURRENT_TIMESTAMP))::date
+              INTO month FROM detailed_logs_unpartitioned;
+            WHILE month <= last_month LOOP
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF detailed_logs FOR VALUES FROM (%L) TO (%L)',
+                    'detailed_logs_y' || to_char(month, 'YYYY') || 'm' || to_char(month, 'MM'),
+                    month, (month + INTERVAL '1 month')::date
+                );
+                month := (month + INTERVAL '1 month')::date;
+            END LOOP;
+        END $$
+    """)
+
+    op.execute(f"""
+        INSERT INTO detailed_logs ({COLUMNS})
+        SELECT id, user_id, company_id, action, table_name, record_id,
+               old_values, new_values, ip_address, user_agent,
+               COALESCE(created_at, CURRENT_TIMESTAMP)
+        FROM detailed_logs_unpartitioned
+    """)
+    op.execute("DROP TABLE detailed_logs_unpartitioned")
+
+    # Created on the parent, so every partition gets a local copy
+    op.create_index('idx_detailed_logs_company_created', 'detailed_logs', ['company_id', 'created_at'], unique=False)
+    op.create_index('idx_detailed_logs_created', 'detailed_logs', ['created_at'], unique=False)
+
+
+def downgrade():
+    op.execute("ALTER TABLE detailed_logs RENAME TO detailed_logs_partitioned")
+    op.execute("ALTER TABLE detailed_logs_partitioned RENAME CONSTRAINT detailed_logs_pkey TO detailed_logs_partitioned_pkey")
+    op.execute("ALTER INDEX idx_detailed_logs_company_created RENAME TO idx_detailed_logs_partitioned_company_created")
+    op.execute("ALTER INDEX idx_detailed_logs_created RENAME TO idx_detailed_logs_partitioned_created")
+
+    op.create_table(
+        'detailed_logs',
+        sa.Column('id', sa.UUID(), nullable=False),
+        sa.Column('user_id', sa.UUID(), sa.ForeignKey('users.id'), nullable=True),
+        sa.Column('company_id', sa.UUID(), sa.ForeignKey('companies.id'), nullable=True),
+        sa.Column('action', sa.String(length=255), nullable=False),
+        sa.Column('table_name', sa.String(length=50), nullable=False),
+        sa.Column('record_id', sa.UUID(), nullable=False),
+        sa.Column('old_values', sa.JSON(), nullable=True),
+        sa.Column('new_values', sa.JSON(), nullable=True),
+        sa.Column('ip_address', sa.String(length=45), nullable=True),
+        sa.Column('user_agent', sa.String(length=255), nullable=True),
+        sa.Column('created_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=True),
+        sa.PrimaryKeyConstraint('id', name='detailed_logs_pkey')
+    )
+    op.execute(f"INSERT INTO detailed_logs ({COLUMNS}) SELECT {COLUMNS} FROM detailed_logs_partitioned")
+    # Dropping the parent drops every partition with it
+    op.execute("DROP TABLE detailed_logs_partitioned")
+    op.create_index('idx_detailed_logs_company_created', 'detailed_logs', ['company_id', 'created_at'], unique=False)
+    op.create_index('idx_detailed_logs_created', 'detailed_logs', ['created_at'], unique=False)
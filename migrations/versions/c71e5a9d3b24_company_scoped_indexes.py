@@ -0,0 +1,63 @@
+"""company scoped indexes for hot filter paths
+
+Revision ID: c71e5a9d3b24
+Revises: 8d1e6b2f9a07
+Create Date: 2026-10-17 20:05:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c71e5a9d3b24'
+down_revision = '8d1e6b2f9a07'
+branch_labels = None
+depends_on = None
+
+# (name, table, columns, partial predicate). detailed_logs (company_id, created_at)
+# is already created by the partitioning revision.
+INDEXES = [
+    ('idx_customers_company_created', 'customers', ['company_id', 'created_at'], None),
+    ('idx_customers_company_active', 'customers', ['company_id'], "is_active"),
+    ('idx_invoices_company_status', 'invoices', ['company_id', 'status'], None),
+    ('idx_invoices_company_created', 'invoices', ['company_id', 'created_at'], None),
+    ('idx_invoices_customer_type_start', 'invoices', ['customer_id', 'invoice_type', 'billing_start_date'], None),
+    ('idx_invoices_company_type_start', 'invoices', ['company_id', 'invoice_type', 'billing_start_date'], None),
+    ('idx_invoices_open_due', 'invoices', ['company_id', 'due_date'], "status <> 'paid'"),
+    ('idx_payments_company_date', 'payments', ['company_id', 'payment_date'], None),
+    ('idx_payments_invoice', 'payments', ['invoice_id'], None),
+    ('idx_payments_paid_company_date', 'payments', ['company_id', 'payment_date'], "status = 'paid' AND is_active"),
+    ('idx_isp_payments_company_date', 'isp_payments', ['company_id', 'payment_date'], None),
+    ('idx_expenses_company_date', 'expenses', ['company_id', 'expense_date'], None),
+    ('idx_extra_incomes_company_date', 'extra_incomes', ['company_id', 'income_date'], None),
+    ('idx_complaints_customer', 'complaints', ['customer_id'], None),
+    ('idx_tasks_company_status', 'tasks', ['company_id', 'status'], None),
+    ('idx_recovery_tasks_company_status', 'recovery_tasks', ['company_id', 'status'], None),
+    ('idx_recovery_tasks_invoice', 'recovery_tasks', ['invoice_id'], None),
+]
+
+
+def upgrade():
+    # Built concurrently so writes to these tables are not blocked; that cannot
+    # run inside a transaction block. IF NOT EXISTS covers tables that
+    # db.create_all() created with the model indexes already in place.
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                unique=False,
+                if_not_exists=True,
+                postgresql_concurrently=True,
+                postgresql_where=sa.text(where) if where else None
+            )
+        for table in sorted({table for _, table, _, _ in INDEXES}):
+            op.execute(f"ANALYZE {table}")
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
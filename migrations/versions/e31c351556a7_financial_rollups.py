@@ -0,0 +1,55 @@
+"""financial rollups
+
+Revision ID: e31c351556a7
+Revises: 3e10a17adec2
+Create Date: 2026-10-17 22:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e31c351556a7'
+down_revision = '3e10a17adec2'
+branch_labels = None
+depends_on = None
+
+ROLLUP_TABLES = (
+    ('financial_daily_rollups', 'uq_financial_daily_rollup', 'idx_financial_daily_rollup_flow'),
+    ('financial_monthly_rollups', 'uq_financial_monthly_rollup', 'idx_financial_monthly_rollup_flow'),
+)
+
+
+def upgrade():
+    # The tables start empty; run `flask rebuild-rollups` after upgrading
+    # (the nightly rebuild repairs them too) before the dashboards read them
+    for table, unique_name, index_name in ROLLUP_TABLES:
+        op.create_table(
+            table,
+            sa.Column('id', sa.UUID(), nullable=False),
+            sa.Column('company_id', sa.UUID(), nullable=False),
+            sa.Column('period_start', sa.Date(), nullable=False),
+            sa.Column('dimension_key', sa.String(length=255), nullable=False),
+            sa.Column('flow_type', sa.String(length=20), nullable=False),
+            sa.Column('bank_account_id', sa.UUID(), nullable=True),
+            sa.Column('payment_method', sa.String(length=50), nullable=True),
+            sa.Column('area_id', sa.UUID(), nullable=True),
+            sa.Column('service_plan_id', sa.UUID(), nullable=True),
+            sa.Column('category', sa.String(length=50), nullable=True),
+            sa.Column('status', sa.String(length=20), nullable=True),
+            sa.Column('is_active', sa.Boolean(), nullable=False),
+            sa.Column('amount', sa.Numeric(precision=15, scale=2), nullable=False),
+            sa.Column('txn_count', sa.Integer(), nullable=False),
+            sa.Column('updated_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=True),
+            sa.ForeignKeyConstraint(['company_id'], ['companies.id']),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('company_id', 'period_start', 'dimension_key', name=unique_name)
+        )
+        op.create_index(index_name, table, ['company_id', 'flow_type', 'period_start'], unique=False)
+
+
+def downgrade():
+    for table, unique_name, index_name in reversed(ROLLUP_TABLES):
+        op.drop_index(index_name, table_name=table)
+        op.drop_table(table)
@@ -1,10 +1,14 @@
 from app import create_app
 from scheduler import init_scheduler
-from asgiref.wsgi import WsgiToAsgi  # Import the ASGI adapter
+from app.utils.asgi import ThreadPoolWsgiToAsgi
 
 app = create_app()
-init_scheduler(app)
-asgi_app = WsgiToAsgi(app)
+# Disable in web workers when the scheduler runs as its own process (run_scheduler.py)
+if app.config.get('SCHEDULER_ENABLED', True):
+    init_scheduler(app)
+# Requests run on a bounded thread pool; blocking work in async views is
+# offloaded to the database executor (app.utils.db_executor)
+asgi_app = ThreadPoolWsgiToAsgi(app, max_workers=app.config['HTTP_WORKER_THREADS'])
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,7 @@
+from app import create_app
+from scheduler import run_scheduler
+
+app = create_app(role='scheduler')
+
+if __name__ == "__main__":
+    run_scheduler(app)
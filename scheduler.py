@@ -1,26 +1,38 @@
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
 from datetime import datetime, timedelta, date
 import logging
 from app import db
 from app.models import Customer, Invoice, ServicePlan
-from app.crud.invoice_crud import generate_invoice_number, add_invoice
+from app.services.bulk_invoice_generator import BulkInvoiceGenerator
+from app.services.dashboard_rollup_service import DashboardRollupService
+from app.services.scheduler_leader import SchedulerLeader
+from app.services.log_partition_service import LogPartitionService
+from app.utils.db_engine import without_statement_timeout
 import uuid
 from app.utils.backup_utils import PostgreSQLBackupManager  # Updated import
 import os
+import atexit
+import signal
+import threading
 
 # WhatsApp imports
 from app.models import WhatsAppConfig
 from app.services.whatsapp_queue_service import WhatsAppQueueService
 from app.services.whatsapp_rate_limiter import WhatsAppRateLimiter
-from app.services.whatsapp_api_client import WhatsAppAPIClient
+from app.services.whatsapp_dispatcher import WhatsAppDispatcher
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Global scheduler instance
+# Global scheduler instance and its leader election
 scheduler = None
+scheduler_leader = None
+
+# Recorded as generated_by on automatic invoices
+SYSTEM_USER_ID = "00000000-0000-0000-0000-000000000000"  # Replace with your actual system user ID
 
 def generate_automatic_invoices(app=None):
     """
@@ -38,6 +50,7 @@ def generate_automatic_invoices(app=None):
     else:
         logger.error("No Flask app provided to generate_automatic_invoices")
 
+@without_statement_timeout()
 def _process_invoices():
     """
     Internal function to process invoices within an application context
@@ -45,92 +58,42 @@ def _process_invoices():
     today = datetime.now().date()
     
     try:
-        # Get all active customers whose recharge date is today
-        customers = Customer.query.filter(
-            Customer.is_active == True,
-            Customer.recharge_date != None,
-            db.func.extract('day', Customer.recharge_date) == today.day,
-            db.func.extract('month', Customer.recharge_date) == today.month
-        ).all()
-        
-        logger.info(f"Found {len(customers)} customers with recharge date today")
-        
         # Check if invoices have already been generated this month for these customers
-        current_month_start = datetime(today.year, today.month, 1).date()
-        next_month_start = (datetime(today.year, today.month, 1) + timedelta(days=32)).replace(day=1).date()
+        current_month_start = today.replace(day=1)
+        next_month_start = (current_month_start + timedelta(days=32)).replace(day=1)
         
-        invoice_count = 0
+        generator = BulkInvoiceGenerator(
+            SYSTEM_USER_ID,
+            '127.0.0.1',  # IP address
+            'Automatic Invoice Generator'  # User agent
+        )
+        result = generator.generate(
+            # All active customers whose recharge date is today
+            customer_filters=[
+                Customer.is_active == True,
+                Customer.recharge_date != None,
+                db.func.extract('day', Customer.recharge_date) == today.day,
+                db.func.extract('month', Customer.recharge_date) == today.month
+            ],
+            billing_start_date=today,
+            billing_end_date=next_month_start - timedelta(days=1),
+            # Due date is 7 days from today
+            due_date=today + timedelta(days=7),
+            existing_start=current_month_start,
+            existing_end=next_month_start,
+            notes_template="Automatically generated invoice for {plan_name} plan"
+        )
         
-        for customer in customers:
-            # Check if an invoice already exists for this customer in the current month
-            existing_invoice = Invoice.query.filter(
-                Invoice.customer_id == customer.id,
-                Invoice.billing_start_date >= current_month_start,
-                Invoice.billing_start_date < next_month_start,
-                Invoice.invoice_type == 'subscription'
-            ).first()
-            
-            if existing_invoice:
-                logger.info(f"Invoice already exists for customer {customer.id} ({customer.first_name} {customer.last_name}) this month")
-                continue
-            
-            try:
-                # Get the customer's service plan
-                service_plan = ServicePlan.query.get(customer.service_plan_id)
-                if not service_plan:
-                    logger.error(f"Service plan not found for customer {customer.id}")
-                    continue
-                
-                # Calculate billing period
-                billing_start_date = today
-                # Calculate the end date (same day next month - 1 day)
-                next_month = (today.replace(day=1) + timedelta(days=32)).replace(day=1)
-                billing_end_date = (next_month - timedelta(days=1))
-                
-                # Calculate due date (7 days from today)
-                due_date = today + timedelta(days=7)
-                
-                # Calculate amounts
-                subtotal = float(service_plan.price)
-                discount_percentage = 0
-                if customer.discount_amount:
-                    discount_percentage = (float(customer.discount_amount) / subtotal) * 100
-                
-                total_amount = subtotal - (subtotal * discount_percentage / 100)
-                
-                # Create invoice data
-                invoice_data = {
-                    'company_id': str(customer.company_id),
-                    'customer_id': str(customer.id),
-                    'billing_start_date': billing_start_date.isoformat(),
-                    'billing_end_date': billing_end_date.isoformat(),
-                    'due_date': due_date.isoformat(),
-                    'subtotal': subtotal,
-                    'discount_percentage': discount_percentage,
-                    'total_amount': total_amount,
-                    'invoice_type': 'subscription',
-                    'notes': f"Automatically generated invoice for {service_plan.name} plan"
-                }
-                
-                # Use the system user ID for generated_by
-                system_user_id = "00000000-0000-0000-0000-000000000000"  # Replace with your actual system user ID
-                
-                # Add the invoice
-                new_invoice = add_invoice(
-                    invoice_data, 
-                    system_user_id, 
-                    'system', 
-                    '127.0.0.1',  # IP address
-                    'Automatic Invoice Generator'  # User agent
-                )
-                
-                logger.info(f"Successfully generated invoice {new_invoice.invoice_number} for customer {customer.id} ({customer.first_name} {customer.last_name})")
-                invoice_count += 1
-                
-            except Exception as e:
-                logger.error(f"Error generating invoice for customer {customer.id}: {str(e)}")
+        for failure in result['failed']:
+            logger.error(f"Error generating invoice for customer {failure['customer_id']}: {failure['error']}")
         
-        logger.info(f"Automatic invoice generation completed. Generated {invoice_count} invoices.")
+        stats = result['stats']
+        logger.info(
+            f"Automatic invoice generation completed. Generated {stats['generated']} invoices, "
+            f"skipped {stats['skipped']}, errors {stats['errors']} "
+            f"({stats['invoices_per_second']} invoices/s over {stats['elapsed_seconds']}s)."
+        )
+        return stats
     except Exception as e:
         logger.error(f"Error in invoice generation process: {str(e)}")
 
@@ -253,7 +216,8 @@ def cleanup_old_backups_job(app=None):
 def process_whatsapp_queue(app=None):
     """
     Process pending WhatsApp messages in queue.
-    Sends up to remaining daily quota ordered by priority.
+    Sends up to remaining daily quota ordered by priority, concurrently and
+    round-robin across companies (see WhatsAppDispatcher).
     Runs daily at configured time (default 9:00 AM).
     """
     logger.info(f"Running WhatsApp queue processor: {datetime.now()}")
@@ -264,88 +228,7 @@ def process_whatsapp_queue(app=None):
     
     with app.app_context():
         try:
-            # Get all companies with WhatsApp configured
-            configs = WhatsAppConfig.query.filter_by(auto_send_invoices=True).all()
-            
-            for config in configs:
-                company_id = str(config.company_id)
-                
-                # Check remaining quota
-                remaining = WhatsAppRateLimiter.get_remaining_quota(company_id)
-                
-                if remaining <= 0:
-                    logger.info(f"Quota exhausted for company {company_id}")
-                    continue
-                
-                # Get pending messages
-                messages = WhatsAppQueueService.get_pending_messages(
-                    limit=remaining,
-                    company_id=company_id
-                )
-                
-                logger.info(f"Processing {len(messages)} messages for company {company_id}")
-                
-                # Initialize API client
-                client = WhatsAppAPIClient.from_config(company_id)
-                
-                sent_count = 0
-                failed_count = 0
-                
-                for message in messages:
-                    try:
-                        # Send message based on media type
-                        if message.media_type == 'document':
-                            result = client.send_document_message(
-                                mobile=message.mobile,
-                                document_url=message.media_url,
-                                caption=message.message_content,
-                                priority=message.priority
-                            )
-                        elif message.media_type == 'image':
-                            result = client.send_image_message(
-                                mobile=message.mobile,
-                                image_url=message.media_url,
-                                caption=message.message_content,
-                                priority=message.priority
-                            )
-                        else:  # text
-                            result = client.send_text_message(
-                                mobile=message.mobile,
-                                message=message.message_content,
-                                priority=message.priority
-                            )
-                        
-                        if result['success']:
-                            # Update message status to sent
-                            WhatsAppQueueService.update_message_status(
-                                message_id=str(message.id),
-                                status='sent',
-                                api_response=result.get('response')
-                            )
-                            
-                            # Increment quota
-                            WhatsAppRateLimiter.increment_sent_count(company_id)
-                            sent_count += 1
-                            
-                        else:
-                            # Update message status to failed
-                            WhatsAppQueueService.update_message_status(
-                                message_id=str(message.id),
-                                status='failed',
-                                error_message=result.get('error')
-                            )
-                            failed_count += 1
-                        
-                    except Exception as e:
-                        logger.error(f"Error sending message {message.id}: {str(e)}")
-                        WhatsAppQueueService.update_message_status(
-                            message_id=str(message.id),
-                            status='failed',
-                            error_message=str(e)
-                        )
-                        failed_count += 1
-                
-                logger.info(f"Completed WhatsApp queue processing for company {company_id}: {sent_count} sent, {failed_count} failed")
+            WhatsAppDispatcher().run()
             
         except Exception as e:
             logger.error(f"Error in WhatsApp queue processing: {str(e)}")
@@ -436,6 +319,65 @@ def reset_whatsapp_quota(app=None):
         except Exception as e:
             logger.error(f"Error resetting WhatsApp quota: {str(e)}")
 
+def reap_whatsapp_leases(app=None):
+    """
+    Return claimed WhatsApp messages whose worker lease expired to the queue.
+    """
+    if not app:
+        logger.error("No Flask app provided to reap_whatsapp_leases")
+        return
+    
+    with app.app_context():
+        try:
+            WhatsAppQueueService.reap_expired_leases()
+            
+        except Exception as e:
+            logger.error(f"Error reaping WhatsApp leases: {str(e)}")
+
+def rebuild_dashboard_rollups(app=None):
+    """
+    Recompute the dashboard rollup tables from the transactional tables.
+    The write paths keep them current; the nightly rebuild repairs any drift.
+    """
+    logger.info(f"Rebuilding dashboard rollups: {datetime.now()}")
+
+    if not app:
+        logger.error("No Flask app provided to rebuild_dashboard_rollups")
+        return
+
+    with app.app_context():
+        try:
+            stats = DashboardRollupService.rebuild()
+            logger.info(f"Dashboard rollup rebuild completed: {stats}")
+
+        except Exception as e:
+            logger.error(f"Error rebuilding dashboard rollups: {str(e)}")
+
+def maintain_log_partitions(app=None):
+    """
+    Pre-create upcoming detailed_logs partitions and archive expired ones
+    to the log_archive folder of the daily backup directory.
+    """
+    logger.info(f"Running log partition maintenance: {datetime.now()}")
+
+    if not app:
+        logger.error("No Flask app provided to maintain_log_partitions")
+        return
+
+    with app.app_context():
+        try:
+            archive_dir = app.config.get('LOG_ARCHIVE_DIR')
+            if not archive_dir:
+                project_root = os.path.dirname(os.path.abspath(__file__))
+                app_root = os.path.dirname(os.path.dirname(project_root))
+                archive_dir = os.path.join(app_root, 'database_backups', 'log_archive')
+
+            stats = LogPartitionService.maintain(archive_dir)
+            logger.info(f"Log partition maintenance completed: {stats}")
+
+        except Exception as e:
+            logger.error(f"Error maintaining log partitions: {str(e)}")
+
 def init_scheduler(app):
     """
     Initialize the background scheduler with the Flask app context.
@@ -511,18 +453,92 @@ def init_scheduler(app):
         replace_existing=True
     )
     
-    # Start the scheduler
-    scheduler.start()
+    # WhatsApp Lease Reaper Job - Run every 10 minutes
+    scheduler.add_job(
+        func=reap_whatsapp_leases,
+        args=[app],
+        trigger=IntervalTrigger(minutes=10),
+        id='whatsapp_lease_reaper_job',
+        name='Reclaim expired WhatsApp queue leases',
+        replace_existing=True
+    )
+    
+    # Dashboard Rollup Rebuild Job - Run daily at 3:30 AM
+    scheduler.add_job(
+        func=rebuild_dashboard_rollups,
+        args=[app],
+        trigger=CronTrigger(hour=3, minute=30),
+        id='dashboard_rollup_rebuild_job',
+        name='Rebuild dashboard rollups',
+        replace_existing=True
+    )
+    
+    # Log Partition Maintenance Job - Run daily at 2:30 AM (after the daily backup)
+    scheduler.add_job(
+        func=maintain_log_partitions,
+        args=[app],
+        trigger=CronTrigger(hour=2, minute=30),
+        id='log_partition_maintenance_job',
+        name='Maintain detailed_logs partitions',
+        replace_existing=True
+    )
+    
+    # Start paused; jobs only run in the process that holds the scheduler lock
+    scheduler.start(paused=True)
     logger.info("Background scheduler started with jobs:")
     for job in scheduler.get_jobs():
         logger.info(f"  - {job.name} (next run: {job.next_run_time})")
-    
-    # Shut down the scheduler when the app is shutting down
-    @app.teardown_appcontext
-    def shutdown_scheduler(exception=None):
-        if scheduler and scheduler.running:
-            logger.info("Shutting down background scheduler...")
-            scheduler.shutdown(wait=False)  # Do not wait for jobs to complete
+
+    global scheduler_leader
+    scheduler_leader = SchedulerLeader(
+        app,
+        on_elected=_resume_jobs,
+        on_demoted=_pause_jobs
+    )
+    scheduler_leader.start()
+
+    # Shut down when the process exits (not per request/app context)
+    atexit.register(shutdown_scheduler)
+
+def _resume_jobs():
+    if scheduler and scheduler.running:
+        logger.info("Scheduler leadership acquired, resuming jobs")
+        scheduler.resume()
+
+def _pause_jobs():
+    if scheduler and scheduler.running:
+        logger.info("Scheduler leadership lost, pausing jobs")
+        scheduler.pause()
+
+def shutdown_scheduler():
+    """Stop the leader election and the background scheduler."""
+    global scheduler_leader
+    if scheduler_leader:
+        scheduler_leader.stop()
+        scheduler_leader = None
+    if scheduler and scheduler.running:
+        logger.info("Shutting down background scheduler...")
+        scheduler.shutdown(wait=False)  # Do not wait for jobs to complete
+
+def run_scheduler(app):
+    """
+    Run the scheduler as a standalone process and block until SIGINT/SIGTERM.
+
+    Web workers should then be started with SCHEDULER_ENABLED=false. Several
+    standalone processes may run at once; only the elected leader runs jobs.
+
+    Args:
+        app: Flask application instance
+    """
+    stop = threading.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda signum, frame: stop.set())
+
+    init_scheduler(app)
+    logger.info("Standalone scheduler running, waiting for leadership")
+    while not stop.wait(1):
+        pass
+    shutdown_scheduler()
 
 def manual_backup(app, backup_type='daily'):
     """
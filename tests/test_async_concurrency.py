@@ -0,0 +1,129 @@
+import asyncio
+import threading
+import time
+import unittest
+from unittest.mock import patch
+from asgiref.wsgi import WsgiToAsgi
+from flask import Flask, g, request
+from app import create_app, db
+from app.models import Company, Area
+from app.utils.asgi import ThreadPoolWsgiToAsgi
+from app.utils.db_executor import run_blocking, offload
+from config import Config
+import uuid
+
+# Never the app's own database: tearDown drops every table
+DATABASE_URL = 'sqlite:///:memory:'
+
+
+async def asgi_get(asgi_app, path):
+    """Drive one GET request through an ASGI app and return (status, body)"""
+    messages = []
+    received = False
+
+    async def receive():
+        nonlocal received
+        if received:
+            await asyncio.sleep(3600)
+        received = True
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+        'scheme': 'http', 'path': path, 'raw_path': path.encode(), 'query_string': b'',
+        'root_path': '', 'headers': [], 'client': ('127.0.0.1', 1234), 'server': ('testserver', 80)
+    }
+    await asgi_app(scope, receive, send)
+    status = next(message['status'] for message in messages if message['type'] == 'http.response.start')
+    body = b''.join(message.get('body', b'') for message in messages if message['type'] == 'http.response.body')
+    return status, body
+
+
+def slow_app(delay):
+    app = Flask(__name__)
+
+    @app.route('/slow')
+    def slow():
+        time.sleep(delay)
+        return 'ok'
+
+    return app
+
+
+class TestThreadPoolWsgiToAsgi(unittest.TestCase):
+    def run_concurrently(self, asgi_app, count):
+        async def burst():
+            return await asyncio.gather(*(asgi_get(asgi_app, '/slow') for _ in range(count)))
+
+        started = time.perf_counter()
+        responses = asyncio.run(burst())
+        return responses, time.perf_counter() - started
+
+    def test_requests_run_in_parallel(self):
+        responses, elapsed = self.run_concurrently(ThreadPoolWsgiToAsgi(slow_app(0.2), max_workers=8), 8)
+        self.assertEqual(responses, [(200, b'ok')] * 8)
+        self.assertLess(elapsed, 0.2 * 4)
+
+    def test_plain_adapter_serializes_requests(self):
+        # asgiref's WsgiToAsgi runs every request on one shared thread
+        responses, elapsed = self.run_concurrently(WsgiToAsgi(slow_app(0.1)), 4)
+        self.assertEqual(responses, [(200, b'ok')] * 4)
+        self.assertGreaterEqual(elapsed, 0.1 * 4)
+
+
+class TestDbExecutor(unittest.TestCase):
+    def setUp(self):
+        with patch.object(Config, 'SQLALCHEMY_DATABASE_URI', DATABASE_URL):
+            self.app = create_app()
+        self.app.config['TESTING'] = True
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        self.company_id = uuid.uuid4()
+        db.session.add(Company(id=self.company_id, name="Test Company", is_active=True))
+        db.session.add(Area(id=uuid.uuid4(), company_id=self.company_id, name="Area 1"))
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_offloaded_call_runs_on_executor_with_request_context(self):
+        @offload
+        def lookup():
+            return (
+                threading.current_thread().name,
+                g.get('marker'),
+                request.path,
+                [area.name for area in Area.query.filter_by(company_id=self.company_id).all()],
+                db.session
+            )
+
+        with self.app.test_request_context('/customers/list'):
+            g.marker = 'from-request'
+            thread_name, marker, path, areas, session = asyncio.run(lookup())
+
+            self.assertTrue(thread_name.startswith('db-executor'))
+            self.assertEqual(marker, 'from-request')
+            self.assertEqual(path, '/customers/list')
+            self.assertEqual(areas, ['Area 1'])
+            # The call used its own scoped session, not the caller's
+            self.assertIsNot(session, db.session())
+            self.assertEqual(lookup.__wrapped__()[3], ['Area 1'])
+
+    def test_gathered_calls_overlap(self):
+        async def burst():
+            return await asyncio.gather(*(run_blocking(time.sleep, 0.2) for _ in range(4)))
+
+        started = time.perf_counter()
+        asyncio.run(burst())
+        self.assertLess(time.perf_counter() - started, 0.2 * 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
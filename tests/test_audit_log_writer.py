@@ -0,0 +1,82 @@
+import unittest
+from unittest.mock import patch
+from app import create_app, db
+from app.models import Company, DetailedLog
+from app.services.audit_log_writer import AuditLogWriter
+from app.utils.logging_utils import log_action
+from config import Config
+import uuid
+
+# Never the app's own database: tearDown drops every table
+DATABASE_URL = 'sqlite:///:memory:'
+
+class TestAuditLogWriter(unittest.TestCase):
+    def setUp(self):
+        with patch.object(Config, 'SQLALCHEMY_DATABASE_URI', DATABASE_URL):
+            self.app = create_app()
+        self.app.config['TESTING'] = True
+        self.app.config['AUDIT_LOG_FLUSH_INTERVAL'] = 3600
+        self.app.config['AUDIT_LOG_BATCH_SIZE'] = 100
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.company = Company(id=uuid.uuid4(), name="Test Company", is_active=True)
+        db.session.add(self.company)
+        db.session.commit()
+        AuditLogWriter.flush()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def log(self, durability=None, action='UPDATE'):
+        log_action(
+            None, action, 'customers', uuid.uuid4(), None, {'name': 'x'},
+            '127.0.0.1', 'tests', self.company.id, durability=durability
+        )
+
+    def test_buffered_entries_are_written_in_batches(self):
+        before = AuditLogWriter.stats()
+        for _ in range(5):
+            self.log()
+        self.assertEqual(DetailedLog.query.count(), 0)
+        self.assertEqual(AuditLogWriter.stats()['backlog'], 5)
+
+        self.assertEqual(AuditLogWriter.flush(), 5)
+        stats = AuditLogWriter.stats()
+        self.assertEqual(DetailedLog.query.count(), 5)
+        self.assertEqual(stats['backlog'], 0)
+        self.assertEqual(stats['written'] - before['written'], 5)
+        self.assertGreater(stats['max_flush_ms'], 0)
+        self.assertIsNotNone(DetailedLog.query.first().created_at)
+
+    def test_transaction_and_immediate_durability(self):
+        self.log(durability='transaction')
+        db.session.rollback()
+        self.assertEqual(DetailedLog.query.count(), 0)
+
+        self.log(durability='transaction')
+        db.session.commit()
+        self.log(durability='immediate')
+        db.session.rollback()
+        self.assertEqual(DetailedLog.query.count(), 2)
+        self.assertEqual(AuditLogWriter.stats()['backlog'], 0)
+
+        with self.assertRaises(ValueError):
+            self.log(durability='eventually')
+
+    def test_rows_that_keep_failing_are_dropped(self):
+        dropped = AuditLogWriter.stats()['dropped']
+        self.log()
+        self.log(action=None)
+        for _ in range(AuditLogWriter.MAX_ATTEMPTS):
+            AuditLogWriter.flush()
+
+        self.assertEqual(DetailedLog.query.count(), 1)
+        stats = AuditLogWriter.stats()
+        self.assertEqual(stats['dropped'] - dropped, 1)
+        self.assertEqual(stats['backlog'], 0)
+
+if __name__ == '__main__':
+    unittest.main()
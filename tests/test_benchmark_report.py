@@ -0,0 +1,65 @@
+import unittest
+from benchmarks.report import build_report, compare_reports, format_comparison, summarize
+
+
+def report(scenarios, dataset=None):
+    return build_report(
+        {name: {'group': name.split('.')[0], **summarize(timings)} for name, timings in scenarios.items()},
+        dataset or {'invoices': 1000},
+        {'dialect': 'postgresql', 'server_version': '16.2'},
+        {'repeat': len(next(iter(scenarios.values())))}
+    )
+
+
+class TestBenchmarkReport(unittest.TestCase):
+    def test_summarize(self):
+        summary = summarize([30.0, 10.0, 20.0, 40.0])
+        self.assertEqual(summary['runs'], 4)
+        self.assertEqual(summary['min_ms'], 10.0)
+        self.assertEqual(summary['median_ms'], 25.0)
+        self.assertEqual(summary['mean_ms'], 25.0)
+        self.assertEqual(summary['p95_ms'], 40.0)
+        self.assertEqual(summary['max_ms'], 40.0)
+
+    def test_compare_flags_regressions_above_tolerance_and_noise_floor(self):
+        baseline = report({
+            'dashboard.slower': [100, 100, 100],
+            'dashboard.faster': [100, 100, 100],
+            'list.noise': [2, 2, 2],
+            'list.same': [50, 50, 50],
+            'jobs.dropped': [10, 10, 10]
+        })
+        current = report({
+            'dashboard.slower': [150, 150, 150],
+            'dashboard.faster': [40, 40, 40],
+            'list.noise': [4, 4, 4],
+            'list.same': [55, 55, 55],
+            'jobs.added': [10, 10, 10]
+        })
+
+        comparison = compare_reports(baseline, current, tolerance=0.2, min_delta_ms=5)
+
+        self.assertEqual(comparison['regressions'], ['dashboard.slower'])
+        self.assertEqual(comparison['improvements'], ['dashboard.faster'])
+        self.assertEqual(comparison['added'], ['jobs.added'])
+        self.assertEqual(comparison['removed'], ['jobs.dropped'])
+        statuses = {row['scenario']: row['status'] for row in comparison['rows']}
+        self.assertEqual(statuses['list.noise'], 'ok')
+        self.assertEqual(statuses['list.same'], 'ok')
+        self.assertIsNone(comparison['dataset_note'])
+        self.assertIn('dashboard.slower', format_comparison(comparison))
+
+    def test_failed_scenarios_and_dataset_changes_are_reported(self):
+        baseline = report({'dashboard.summary': [10, 10]})
+        current = report({'dashboard.summary': [10, 10]}, dataset={'invoices': 5000})
+        current['scenarios']['dashboard.summary'] = {'group': 'dashboard', 'error': 'boom'}
+
+        comparison = compare_reports(baseline, current)
+
+        self.assertEqual(comparison['rows'][0]['status'], 'error')
+        self.assertEqual(comparison['regressions'], [])
+        self.assertIsNotNone(comparison['dataset_note'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,136 @@
+import asyncio
+import unittest
+from unittest.mock import patch
+from datetime import datetime, timedelta
+import pandas as pd
+from app import create_app, db
+from app.models import Company, Customer, Area, ServicePlan, ISP, DetailedLog
+from app.crud.customer_crud import validate_bulk_customers, bulk_add_customers, process_validated_customers
+from config import Config
+import uuid
+
+# Never the app's own database: tearDown drops every table
+DATABASE_URL = 'sqlite:///:memory:'
+
+class TestBulkCustomerImport(unittest.TestCase):
+    def setUp(self):
+        with patch.object(Config, 'SQLALCHEMY_DATABASE_URI', DATABASE_URL):
+            self.app = create_app()
+        self.app.config['TESTING'] = True
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.create_test_data()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def create_test_data(self):
+        self.company = Company(id=uuid.uuid4(), name="Test Company", is_active=True)
+        self.area = Area(id=uuid.uuid4(), company_id=self.company.id, name="North")
+        self.plan = ServicePlan(id=uuid.uuid4(), company_id=self.company.id, name="Basic Plan", price=1000.00, is_active=True)
+        self.isp = ISP(id=uuid.uuid4(), company_id=self.company.id, name="Upstream")
+        db.session.add_all([self.company, self.area, self.plan, self.isp])
+        db.session.add(Customer(
+            id=uuid.uuid4(),
+            company_id=self.company.id,
+            area_id=self.area.id,
+            service_plan_id=self.plan.id,
+            isp_id=self.isp.id,
+            first_name="Existing",
+            last_name="Customer",
+            email="existing@example.com",
+            internet_id="INT000",
+            phone_1="923001234567",
+            installation_address="123 Main St",
+            installation_date=datetime.now().date() - timedelta(days=30),
+            cnic="3520212345670",
+            connection_type="internet",
+            is_active=True
+        ))
+        db.session.commit()
+
+    def row(self, i, **overrides):
+        row = {
+            'internet_id': f"INT10{i}",
+            'first_name': f"Customer{i}",
+            'last_name': "Test",
+            'email': f"c{i}@example.com",
+            'phone_1': f"0300-123456{i}",
+            'area_id': str(self.area.id),
+            'installation_address': "456 Side St",
+            'service_plan_id': str(self.plan.id),
+            'isp_id': str(self.isp.id),
+            'connection_type': "Internet",
+            'internet_connection_type': "wire",
+            'cnic': f"35202-123456{i}-1",
+            'installation_date': "2025-01-15",
+            'node_count': "2",
+        }
+        row.update(overrides)
+        return row
+
+    def test_validation_reports_compact_row_errors(self):
+        df = pd.DataFrame([
+            self.row(1),
+            self.row(2, email="not-an-email", cnic="123"),
+            self.row(3, first_name=" "),
+            self.row(4, internet_id="INT000", area_id=str(uuid.uuid4())),
+            self.row(5, internet_id="INT101", connection_type="both"),
+            self.row(6, installation_date="15/01/2025", isp_id="bogus"),
+        ])
+        results = asyncio.run(validate_bulk_customers(df, str(self.company.id)))
+
+        self.assertEqual(results['totalRecords'], 6)
+        self.assertEqual(results['successCount'], 1)
+        self.assertEqual(results['failedCount'], 5)
+        self.assertEqual(results['validRows'][0]['phone_1'], '9203001234561')
+        self.assertEqual(results['validRows'][0]['connection_type'], 'internet')
+        self.assertEqual(results['validRows'][0]['cnic'], '3520212345611')
+
+        row_errors = {(row, field) for row, field, _ in results['rowErrors']}
+        self.assertEqual(row_errors, {
+            (1, 'email'), (1, 'cnic'),
+            (2, 'first_name'),
+            (3, 'internet_id'), (3, 'area_id'),
+            (4, 'internet_id'), (4, 'tv_cable_connection_type'),
+            (5, 'installation_date'), (5, 'area_id'), (5, 'service_plan_id'), (5, 'isp_id'),
+        })
+        by_row = {error['row']: error for error in results['errors']}
+        self.assertEqual(by_row[2]['fieldErrors'], {'first_name': "Missing required field: first_name"})
+        self.assertEqual(by_row[3]['data']['internet_id'], "INT000")
+
+    def test_bulk_add_inserts_valid_rows_with_audit_logs(self):
+        df = pd.DataFrame([self.row(i) for i in range(1, 5)] + [self.row(5, cnic="3520212345670")])
+        results = asyncio.run(bulk_add_customers(
+            df, str(self.company.id), 'company_owner', None, '127.0.0.1', 'tests'
+        ))
+
+        self.assertEqual(results['successCount'], 4)
+        self.assertEqual(results['failedCount'], 1)
+        self.assertEqual(results['errors'][0]['row'], 4)
+        self.assertEqual(Customer.query.count(), 5)
+        self.assertEqual(DetailedLog.query.filter_by(table_name='customers', action='CREATE').count(), 4)
+
+        customer = Customer.query.filter_by(internet_id="INT101").one()
+        self.assertEqual(customer.phone_1, '9203001234561')
+        self.assertEqual(customer.node_count, 2)
+        self.assertEqual(customer.installation_date.isoformat(), "2025-01-15")
+
+    def test_process_validated_rejects_duplicates_in_batch(self):
+        validated = asyncio.run(validate_bulk_customers(
+            pd.DataFrame([self.row(1), self.row(2)]), str(self.company.id)
+        ))['validRows']
+        results = asyncio.run(process_validated_customers(
+            validated + [dict(validated[0])], str(self.company.id), 'company_owner', None, None, None
+        ))
+
+        self.assertEqual(results['successCount'], 2)
+        self.assertEqual(results['failedCount'], 1)
+        self.assertEqual(results['errors'][0]['row'], 2)
+        self.assertIn("Internet ID 'INT101' is already taken", results['errors'][0]['errors'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,221 @@
+import unittest
+from unittest.mock import patch
+from datetime import datetime, timedelta
+from decimal import Decimal
+from app import create_app, db
+from app.models import Company, Customer, Invoice, ServicePlan
+from app.crud.invoice_crud import generate_monthly_invoices, generate_bulk_monthly_invoices
+from app.services.bulk_invoice_generator import BulkInvoiceGenerator
+from app.services.invoice_number_allocator import InvoiceNumberAllocator
+from config import Config
+import uuid
+
+# Never the app's own database: tearDown drops every table
+DATABASE_URL = 'sqlite:///:memory:'
+
+class TestBulkInvoiceGenerator(unittest.TestCase):
+    def setUp(self):
+        with patch.object(Config, 'SQLALCHEMY_DATABASE_URI', DATABASE_URL):
+            self.app = create_app()
+        self.app.config['TESTING'] = True
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        InvoiceNumberAllocator._blocks = {}
+
+        self.today = datetime.now().date()
+        self.year = self.today.year
+        self.month_start = self.today.replace(day=1)
+        self.next_month_start = (self.month_start + timedelta(days=32)).replace(day=1)
+        self.user_id = uuid.uuid4()
+
+        self.company = Company(id=uuid.uuid4(), name="Test Company", is_active=True)
+        self.basic = ServicePlan(id=uuid.uuid4(), company_id=self.company.id, name="Basic", price=1000.00, is_active=True)
+        self.premium = ServicePlan(id=uuid.uuid4(), company_id=self.company.id, name="Premium", price=2500.00, is_active=True)
+        db.session.add_all([self.company, self.basic, self.premium])
+        db.session.commit()
+        self.customer_count = 0
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def add_customer(self, service_plan_id, discount_amount=None, recharge_date=None, is_active=True):
+        self.customer_count += 1
+        n = self.customer_count
+        customer = Customer(
+            id=uuid.uuid4(),
+            company_id=self.company.id,
+            area_id=uuid.uuid4(),
+            service_plan_id=service_plan_id,
+            isp_id=uuid.uuid4(),
+            first_name=f"Customer{n}",
+            last_name="Test",
+            email=f"customer{n}@example.com",
+            internet_id=f"INT{n:03d}",
+            phone_1=f"0300{n:07d}",
+            installation_address=f"{n} Main St",
+            installation_date=self.today - timedelta(days=60),
+            cnic=f"12345-{n:07d}-1",
+            connection_type="internet",
+            discount_amount=discount_amount,
+            recharge_date=recharge_date or self.today,
+            is_active=is_active
+        )
+        db.session.add(customer)
+        db.session.commit()
+        return customer
+
+    def add_invoice(self, customer, invoice_number, billing_start_date=None):
+        invoice = Invoice(
+            id=uuid.uuid4(),
+            invoice_number=invoice_number,
+            company_id=self.company.id,
+            customer_id=customer.id,
+            billing_start_date=billing_start_date or self.month_start,
+            billing_end_date=self.next_month_start - timedelta(days=1),
+            due_date=self.today + timedelta(days=7),
+            subtotal=1000.00,
+            discount_percentage=0,
+            total_amount=1000.00,
+            invoice_type="subscription",
+            status="pending",
+            is_active=True
+        )
+        db.session.add(invoice)
+        db.session.commit()
+        return invoice
+
+    def test_monthly_run_amounts_discounts_and_skips(self):
+        plain = self.add_customer(self.basic.id)
+        discounted = self.add_customer(self.premium.id, discount_amount=500)
+        invoiced = self.add_customer(self.basic.id)
+        self.add_invoice(invoiced, f"INV-{self.year}-0007")
+        self.add_customer(self.basic.id, recharge_date=self.today + timedelta(days=1))
+        self.add_customer(self.basic.id, is_active=False)
+
+        result = generate_monthly_invoices(self.company.id, 'company_owner', self.user_id, '127.0.0.1', 'tests')
+
+        self.assertEqual(
+            (result['generated'], result['skipped'], result['errors'], result['total_customers']),
+            (2, 1, 0, 3)
+        )
+
+        invoice = Invoice.query.filter_by(customer_id=plain.id).one()
+        self.assertEqual(
+            (invoice.subtotal, invoice.discount_percentage, invoice.total_amount),
+            (Decimal('1000.00'), Decimal('0.00'), Decimal('1000.00'))
+        )
+        self.assertEqual(invoice.billing_start_date, self.today)
+        self.assertEqual(invoice.billing_end_date, self.next_month_start - timedelta(days=1))
+        self.assertEqual(invoice.due_date, self.today + timedelta(days=5))
+        self.assertEqual((invoice.status, invoice.invoice_type), ('pending', 'subscription'))
+        self.assertEqual(invoice.generated_by, self.user_id)
+        self.assertEqual(invoice.notes, "Manually generated invoice for Basic plan")
+
+        invoice = Invoice.query.filter_by(customer_id=discounted.id).one()
+        self.assertEqual(
+            (invoice.subtotal, invoice.discount_percentage, invoice.total_amount),
+            (Decimal('2500.00'), Decimal('20.00'), Decimal('2000.00'))
+        )
+
+        # The customer invoiced earlier this month keeps a single invoice
+        self.assertEqual(Invoice.query.filter_by(customer_id=invoiced.id).count(), 1)
+
+        # Numbering continues after the highest issued number of the year
+        numbers = sorted(i.invoice_number for i in Invoice.query.filter(Invoice.customer_id != invoiced.id))
+        self.assertEqual(numbers, [f"INV-{self.year}-0008", f"INV-{self.year}-0009"])
+
+    def test_numbers_are_sequential_across_chunks(self):
+        customers = [self.add_customer(self.basic.id) for _ in range(5)]
+
+        generator = BulkInvoiceGenerator(self.user_id, chunk_size=2, send_notifications=False)
+        result = generator.generate(
+            customer_filters=[Customer.company_id == self.company.id],
+            billing_start_date=self.month_start,
+            billing_end_date=self.next_month_start - timedelta(days=1),
+            due_date=self.month_start + timedelta(days=5),
+            existing_start=self.month_start,
+            existing_end=self.next_month_start,
+            notes_template="Monthly subscription invoice for {plan_name} plan"
+        )
+
+        self.assertEqual(result['stats']['chunks'], 3)
+        self.assertEqual(
+            [item['invoice_number'] for item in result['generated']],
+            [f"INV-{self.year}-{n:04d}" for n in range(1, 6)]
+        )
+        stored = {i.customer_id: i.invoice_number for i in Invoice.query.all()}
+        self.assertEqual(
+            {uuid.UUID(item['customer_id']): item['invoice_number'] for item in result['generated']},
+            stored
+        )
+        self.assertEqual(set(stored), {c.id for c in customers})
+
+    def test_bulk_run_reports_per_customer_failures(self):
+        billed = self.add_customer(self.basic.id)
+        invoiced = self.add_customer(self.basic.id)
+        self.add_invoice(invoiced, f"INV-{self.year}-0001")
+        without_plan = self.add_customer(uuid.uuid4())
+        inactive = self.add_customer(self.basic.id, is_active=False)
+        unknown_id = uuid.uuid4()
+
+        result = generate_bulk_monthly_invoices(
+            self.company.id,
+            [str(c.id) for c in (billed, invoiced, without_plan, inactive)] + [str(unknown_id)],
+            self.today.month, self.user_id, 'company_owner', '127.0.0.1', 'tests'
+        )
+
+        self.assertEqual(result['total_generated'], 1)
+        self.assertEqual(result['generated'][0]['customer_id'], str(billed.id))
+        self.assertEqual(result['generated'][0]['amount'], 1000.0)
+        self.assertEqual(result['total_failed'], 4)
+        errors = {item['customer_id']: item['error'] for item in result['failed']}
+        self.assertEqual(errors, {
+            str(invoiced.id): f"Invoice already exists: INV-{self.year}-0001",
+            str(without_plan.id): "Service plan not found",
+            str(inactive.id): "Customer not found or inactive",
+            str(unknown_id): "Customer not found or inactive",
+        })
+
+        invoice = Invoice.query.filter_by(customer_id=billed.id).one()
+        self.assertEqual(invoice.billing_start_date, self.month_start)
+        self.assertEqual(invoice.due_date, self.month_start + timedelta(days=5))
+
+    def test_failed_chunk_is_rolled_back_and_reported(self):
+        customers = [self.add_customer(self.basic.id) for _ in range(4)]
+        calls = []
+
+        def failing_second_chunk(entries, commit=True):
+            calls.append(len(entries))
+            if len(calls) == 2:
+                raise RuntimeError("audit log unavailable")
+
+        generator = BulkInvoiceGenerator(self.user_id, chunk_size=2, send_notifications=False)
+        with patch('app.services.bulk_invoice_generator.log_actions_bulk', failing_second_chunk):
+            result = generator.generate(
+                customer_filters=[Customer.company_id == self.company.id],
+                billing_start_date=self.month_start,
+                billing_end_date=self.next_month_start - timedelta(days=1),
+                due_date=self.month_start + timedelta(days=5),
+                existing_start=self.month_start,
+                existing_end=self.next_month_start,
+                notes_template="Monthly subscription invoice for {plan_name} plan"
+            )
+
+        self.assertEqual(len(result['generated']), 2)
+        self.assertEqual(len(result['failed']), 2)
+        self.assertTrue(all(item['error'] == "audit log unavailable" for item in result['failed']))
+        self.assertEqual(
+            {item['customer_id'] for item in result['generated'] + result['failed']},
+            {str(c.id) for c in customers}
+        )
+        # Only the first chunk's invoices were committed
+        self.assertEqual(
+            {str(i.customer_id) for i in Invoice.query.all()},
+            {item['customer_id'] for item in result['generated']}
+        )
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,157 @@
+import unittest
+from unittest.mock import patch
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+from app import create_app, db
+from app.crud import dashboard_crud
+from app.models import (
+    Company, Customer, Invoice, Payment, ISPPayment, Expense, ExtraIncome, BankAccount
+)
+from config import Config
+import uuid
+
+# Never the app's own database: tearDown drops every table
+DATABASE_URL = 'sqlite:///:memory:'
+
+class TestCashFlowQuery(unittest.TestCase):
+    def setUp(self):
+        with patch.object(Config, 'SQLALCHEMY_DATABASE_URI', DATABASE_URL):
+            self.app = create_app()
+        self.app.config['TESTING'] = True
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.create_test_data()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def create_test_data(self):
+        today = datetime.now().date()
+        now = datetime.now()
+        self.company = Company(id=uuid.uuid4(), name="Test Company", is_active=True)
+        customer = Customer(
+            id=uuid.uuid4(),
+            company_id=self.company.id,
+            area_id=uuid.uuid4(),
+            service_plan_id=uuid.uuid4(),
+            isp_id=uuid.uuid4(),
+            first_name="John",
+            last_name="Doe",
+            email="john@example.com",
+            internet_id="INT001",
+            phone_1="1234567890",
+            installation_address="123 Main St",
+            installation_date=today - timedelta(days=30),
+            cnic="12345-6789012-3",
+            connection_type="internet",
+            is_active=True
+        )
+        self.bank = BankAccount(id=uuid.uuid4(), company_id=self.company.id, bank_name="Meezan",
+                                account_title="Main", account_number="0001", initial_balance=500, is_active=True)
+        db.session.add_all([self.company, customer, self.bank])
+
+        def invoice(number, invoice_type):
+            return Invoice(
+                id=uuid.uuid4(), invoice_number=number, company_id=self.company.id, customer_id=customer.id,
+                billing_start_date=today, billing_end_date=today + timedelta(days=30),
+                due_date=today + timedelta(days=7), subtotal=1000.00, discount_percentage=0,
+                total_amount=1000.00, invoice_type=invoice_type, status="paid", is_active=True
+            )
+
+        subscription = invoice("INV-0001", "subscription")
+        refund = invoice("INV-0002", "refund")
+        db.session.add_all([subscription, refund])
+
+        def payment(invoice_id, amount, status='paid', method='bank_transfer', bank_account_id=None):
+            return Payment(
+                id=uuid.uuid4(), company_id=self.company.id, invoice_id=invoice_id, amount=amount,
+                payment_date=now, payment_method=method, bank_account_id=bank_account_id or self.bank.id,
+                status=status, is_active=True
+            )
+
+        def isp_payment(amount, status):
+            return ISPPayment(
+                id=uuid.uuid4(), company_id=self.company.id, isp_id=uuid.uuid4(), bank_account_id=self.bank.id,
+                payment_type='monthly_subscription', description="Bandwidth", amount=amount, payment_date=now,
+                billing_period="2025-01", payment_method='bank_transfer', status=status,
+                processed_by=uuid.uuid4(), is_active=True
+            )
+
+        db.session.add_all([
+            payment(subscription.id, 1000),
+            payment(subscription.id, 300, method='cash'),
+            payment(refund.id, 200),
+            payment(subscription.id, 999, status='pending'),
+            # Another account's collection only counts towards the company totals
+            payment(subscription.id, 50, bank_account_id=uuid.uuid4()),
+            ExtraIncome(id=uuid.uuid4(), company_id=self.company.id, bank_account_id=self.bank.id,
+                        income_type_id=uuid.uuid4(), amount=120, income_date=now,
+                        payment_method='cash', is_active=True),
+            isp_payment(400, 'completed'),
+            isp_payment(700, 'pending'),
+            Expense(id=uuid.uuid4(), company_id=self.company.id, bank_account_id=self.bank.id,
+                    expense_type_id=uuid.uuid4(), amount=80, expense_date=now,
+                    payment_method='cash', is_active=True),
+            Expense(id=uuid.uuid4(), company_id=self.company.id, bank_account_id=self.bank.id,
+                    expense_type_id=uuid.uuid4(), amount=60, expense_date=now,
+                    payment_method='cash', is_active=False),
+        ])
+        db.session.commit()
+
+    def test_signed_flows_and_filters(self):
+        totals = dashboard_crud._cash_flow_totals(
+            dashboard_crud.cash_flow_query(self.company.id, granularity=None).all()
+        )
+        self.assertEqual(totals, {
+            'collection': Decimal('1150'), 'extra_income': Decimal('120'),
+            'isp_payment': Decimal('400'), 'expense': Decimal('80')
+        })
+
+        cash_only = dashboard_crud._cash_flow_totals(
+            dashboard_crud.cash_flow_query(self.company.id, payment_method='cash', granularity=None).all()
+        )
+        self.assertEqual((cash_only['collection'], cash_only['extra_income'], cash_only['expense']),
+                         (Decimal('300'), Decimal('120'), Decimal('80')))
+
+        with self.assertRaises(ValueError):
+            dashboard_crud.cash_flow_query(self.company.id, granularity='year')
+
+    def test_kpis_and_bank_performance_agree(self):
+        kpis = dashboard_crud.get_financial_kpis(self.company.id)
+        self.assertEqual(kpis['total_collections'], 1150.0)
+        self.assertEqual(kpis['net_cash_flow'], 1150.0 + 120.0 - 400.0 - 80.0)
+
+        performance, = dashboard_crud.get_bank_account_performance(self.company.id)
+        self.assertEqual(performance['collections'], 1100.0)
+        self.assertEqual(performance['extra_income'], 120.0)
+        self.assertEqual(performance['payments'], 480.0)
+        self.assertEqual(performance['net_flow'], 1100.0 + 120.0 - 480.0)
+
+    def test_trends_roll_daily_rows_up(self):
+        def row(day, flow_type, amount):
+            return SimpleNamespace(period=datetime(2025, 1, day), bank_account_id=None,
+                                   flow_type=flow_type, amount=Decimal(amount))
+
+        rows = [
+            row(3, 'collection', 100), row(3, 'expense', -30),
+            row(6, 'extra_income', 50), row(6, 'isp_payment', -20),
+        ]
+        monthly = dashboard_crud._cash_flow_trends(rows, 'month')
+        weekly = dashboard_crud._cash_flow_trends(rows, 'week')
+        daily = dashboard_crud._cash_flow_trends(rows, 'day')
+
+        self.assertEqual(monthly, [{
+            'month': '2025-01', 'inflow': 150.0, 'outflow': 50.0,
+            'isp_outflow': 20.0, 'expense_outflow': 30.0, 'net_flow': 100.0
+        }])
+        # 2025-01-03 is a Friday, 2025-01-06 the following Monday
+        self.assertEqual([(t['period'], t['net_flow']) for t in weekly],
+                         [('2024-12-30', 70.0), ('2025-01-06', 30.0)])
+        self.assertEqual([t['period'] for t in daily], ['2025-01-03', '2025-01-06'])
+
+if __name__ == '__main__':
+    unittest.main()
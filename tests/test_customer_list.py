@@ -0,0 +1,76 @@
+import asyncio
+import unittest
+from unittest.mock import patch
+from datetime import datetime, timedelta
+from app import create_app, db
+from app.models import Company, Customer, Area, ServicePlan, ISP
+from app.crud.customer_crud import get_all_customers
+from config import Config
+import uuid
+
+# Never the app's own database: tearDown drops every table
+DATABASE_URL = 'sqlite:///:memory:'
+
+class TestCustomerList(unittest.TestCase):
+    def setUp(self):
+        with patch.object(Config, 'SQLALCHEMY_DATABASE_URI', DATABASE_URL):
+            self.app = create_app()
+        self.app.config['TESTING'] = True
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.create_test_data()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def create_test_data(self):
+        today = datetime.now().date()
+        self.company = Company(id=uuid.uuid4(), name="Test Company", is_active=True)
+        area = Area(id=uuid.uuid4(), company_id=self.company.id, name="North")
+        plan = ServicePlan(id=uuid.uuid4(), company_id=self.company.id, name="Basic Plan", price=1000.00, is_active=True)
+        isp = ISP(id=uuid.uuid4(), company_id=self.company.id, name="Upstream")
+        db.session.add_all([self.company, area, plan, isp])
+        for i in range(5):
+            db.session.add(Customer(
+                id=uuid.uuid4(),
+                company_id=self.company.id,
+                area_id=area.id,
+                service_plan_id=plan.id,
+                isp_id=isp.id if i else uuid.uuid4(),
+                first_name=f"Customer{i}",
+                last_name="Test",
+                email=f"c{i}@example.com",
+                internet_id=f"INT00{i}",
+                phone_1="1234567890",
+                installation_address="123 Main St",
+                installation_date=today - timedelta(days=30),
+                cnic=f"12345-678901{i}-3",
+                connection_type="internet",
+                is_active=True
+            ))
+        db.session.commit()
+
+    def test_full_list_resolves_lookup_names(self):
+        customers = asyncio.run(get_all_customers(self.company.id, 'company_owner', None))
+
+        self.assertEqual(len(customers), 5)
+        self.assertEqual({c['area'] for c in customers}, {'North'})
+        self.assertEqual({c['service_plan'] for c in customers}, {'Basic Plan'})
+        self.assertEqual({c['servicePlanPrice'] for c in customers}, {1000.0})
+        self.assertEqual(sorted(c['isp'] for c in customers), ['Unassigned'] + ['Upstream'] * 4)
+
+    def test_field_selection_and_pagination(self):
+        page = asyncio.run(get_all_customers(
+            self.company.id, 'company_owner', None,
+            fields=['id', 'internet_id', 'area', 'bogus'], page=2, page_size=2
+        ))
+
+        self.assertEqual(page['total'], 5)
+        self.assertEqual(len(page['items']), 2)
+        self.assertEqual(set(page['items'][0]), {'id', 'internet_id', 'area'})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+import unittest
+from unittest.mock import patch
+from datetime import datetime
+from app import create_app, db
+from app.models import Company, Expense
+from app.services.dashboard_cache import DashboardCache
+from app.services.dashboard_rollup_service import DashboardRollupService
+from flask_jwt_extended import create_access_token
+from config import Config
+import uuid
+
+# Never the app's own database: tearDown drops every table
+DATABASE_URL = 'sqlite:///:memory:'
+
+
+class TestDashboardCache(unittest.TestCase):
+    def setUp(self):
+        with patch.object(Config, 'SQLALCHEMY_DATABASE_URI', DATABASE_URL):
+            self.app = create_app()
+        self.app.config['TESTING'] = True
+        self.app.config['DASHBOARD_CACHE_ENABLED'] = True
+        DashboardCache.init_app(self.app)
+        DashboardCache.clear()
+        DashboardCache.reset_stats()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        self.company_id = uuid.uuid4()
+        db.session.add(Company(id=self.company_id, name="Test Company", is_active=True))
+        db.session.commit()
+        self.computed = 0
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def lookup(self, filters, endpoint='ledger', tags=DashboardCache.FINANCIAL_TAGS):
+        def compute():
+            self.computed += 1
+            return {'computed': self.computed}
+        return DashboardCache.get_or_compute(endpoint, self.company_id, filters, tags, compute)
+
+    def add_expense(self, amount):
+        expense = Expense(
+            id=uuid.uuid4(), company_id=self.company_id, expense_type_id=uuid.uuid4(),
+            amount=amount, expense_date=datetime.now(), payment_method='cash', is_active=True
+        )
+        db.session.add(expense)
+        DashboardRollupService.record(DashboardRollupService.snapshot(expense))
+        return expense
+
+    def test_hits_use_normalized_filters(self):
+        first = self.lookup({'start_date': '2025-01-01', 'bank_account_id': 'all', 'end_date': None})
+        second = self.lookup({'bank_account_id': 'all', 'start_date': '2025-01-01'})
+        other = self.lookup({'bank_account_id': 'all', 'start_date': '2025-02-01'})
+
+        self.assertEqual(first, {'computed': 1})
+        self.assertIs(second, first)
+        self.assertEqual(other, {'computed': 2})
+
+        stats = DashboardCache.stats()
+        self.assertEqual(stats['endpoints']['ledger']['hits'], 1)
+        self.assertEqual(stats['endpoints']['ledger']['misses'], 2)
+        self.assertEqual(stats['hit_ratio'], round(1 / 3, 4))
+        self.assertEqual(stats['endpoints']['ledger']['recompute_ms']['count'], 2)
+
+    def test_write_paths_invalidate_on_commit_only(self):
+        self.lookup({})
+        self.add_expense(100)
+        # Not invalidated before the write is committed
+        self.assertEqual(self.lookup({}), {'computed': 1})
+        db.session.commit()
+        self.assertEqual(self.lookup({}), {'computed': 2})
+
+        self.add_expense(50)
+        db.session.rollback()
+        self.assertEqual(self.lookup({}), {'computed': 2})
+
+        # Endpoints that do not depend on the bumped tag keep their entries
+        self.lookup({}, endpoint='bank-account-analytics', tags=(DashboardCache.TAG_PAYMENT,))
+        self.add_expense(25)
+        db.session.commit()
+        self.assertEqual(self.lookup({}, endpoint='bank-account-analytics', tags=(DashboardCache.TAG_PAYMENT,)),
+                         {'computed': 3})
+        self.assertEqual(self.lookup({}), {'computed': 4})
+
+    def test_errors_are_not_cached(self):
+        def failing():
+            self.computed += 1
+            return {'error': 'Failed to fetch unified financial data'}
+
+        for _ in range(2):
+            DashboardCache.get_or_compute('unified-financial', self.company_id, {}, DashboardCache.FINANCIAL_TAGS, failing)
+        self.assertEqual(self.computed, 2)
+
+    def test_ledger_endpoint_is_cached(self):
+        token = create_access_token(
+            identity=str(uuid.uuid4()),
+            additional_claims={'company_id': str(self.company_id), 'role': 'company_owner'}
+        )
+        client = self.app.test_client()
+        headers = {'Authorization': f'Bearer {token}'}
+
+        first = client.get('/dashboard/ledger', headers=headers)
+        second = client.get('/dashboard/ledger', headers=headers)
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.get_json(), second.get_json())
+        stats = DashboardCache.stats()['endpoints']['ledger']
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
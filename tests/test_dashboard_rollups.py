@@ -0,0 +1,162 @@
+import asyncio
+import unittest
+from unittest.mock import patch
+from datetime import datetime, timedelta
+from decimal import Decimal
+from app import create_app, db
+from app.models import (
+    Company, Customer, Invoice, Payment, Expense,
+    FinancialDailyRollup, FinancialMonthlyRollup
+)
+from app.services.dashboard_rollup_service import DashboardRollupService
+from app.crud.customer_crud import update_customer
+from config import Config
+import uuid
+
+# Never the app's own database: tearDown drops every table
+DATABASE_URL = 'sqlite:///:memory:'
+
+class TestDashboardRollups(unittest.TestCase):
+    def setUp(self):
+        with patch.object(Config, 'SQLALCHEMY_DATABASE_URI', DATABASE_URL):
+            self.app = create_app()
+        self.app.config['TESTING'] = True
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.create_test_data()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def create_test_data(self):
+        today = datetime.now().date()
+        self.company = Company(id=uuid.uuid4(), name="Test Company", is_active=True)
+        self.customer = Customer(
+            id=uuid.uuid4(),
+            company_id=self.company.id,
+            area_id=uuid.uuid4(),
+            service_plan_id=uuid.uuid4(),
+            isp_id=uuid.uuid4(),
+            first_name="John",
+            last_name="Doe",
+            email="john@example.com",
+            internet_id="INT001",
+            phone_1="1234567890",
+            installation_address="123 Main St",
+            installation_date=today - timedelta(days=30),
+            cnic="12345-6789012-3",
+            connection_type="internet",
+            is_active=True
+        )
+        db.session.add_all([self.company, self.customer])
+        db.session.commit()
+
+    def add(self, record):
+        DashboardRollupService.record(DashboardRollupService.snapshot(record))
+        db.session.add(record)
+        db.session.commit()
+        return record
+
+    def rollup_rows(self, model):
+        return sorted(
+            (row.period_start, row.dimension_key, row.amount, row.txn_count)
+            for row in model.query.filter(model.txn_count != 0).all()
+        )
+
+    def test_incremental_updates_match_rebuild(self):
+        today = datetime.now().date()
+        bank_account_id = uuid.uuid4()
+
+        invoice = self.add(Invoice(
+            id=uuid.uuid4(),
+            invoice_number="INV-TEST-0001",
+            company_id=self.company.id,
+            customer_id=self.customer.id,
+            billing_start_date=today,
+            billing_end_date=today + timedelta(days=30),
+            due_date=today + timedelta(days=7),
+            subtotal=1000.00,
+            discount_percentage=0,
+            total_amount=1000.00,
+            invoice_type="subscription",
+            status="pending",
+            is_active=True
+        ))
+        for amount in (400, 600):
+            self.add(Payment(
+                id=uuid.uuid4(),
+                company_id=self.company.id,
+                invoice_id=invoice.id,
+                amount=amount,
+                payment_date=datetime.now(),
+                payment_method="bank_transfer",
+                bank_account_id=bank_account_id,
+                status="paid",
+                is_active=True
+            ))
+        expense = self.add(Expense(
+            id=uuid.uuid4(),
+            company_id=self.company.id,
+            expense_type_id=uuid.uuid4(),
+            amount=250,
+            expense_date=datetime.now() - timedelta(days=40),
+            payment_method="cash",
+            is_active=True
+        ))
+
+        # Deactivating the expense moves it to a different rollup row
+        before = DashboardRollupService.snapshot(expense)
+        expense.is_active = False
+        DashboardRollupService.record_change(before, DashboardRollupService.snapshot(expense))
+        db.session.commit()
+
+        payment_total = db.session.query(db.func.sum(FinancialMonthlyRollup.amount)).filter(
+            FinancialMonthlyRollup.flow_type == 'payment',
+            FinancialMonthlyRollup.bank_account_id == bank_account_id,
+            FinancialMonthlyRollup.area_id == self.customer.area_id
+        ).scalar()
+        self.assertEqual(Decimal(payment_total), Decimal('1000'))
+
+        incremental = (self.rollup_rows(FinancialDailyRollup), self.rollup_rows(FinancialMonthlyRollup))
+        DashboardRollupService.rebuild()
+        rebuilt = (self.rollup_rows(FinancialDailyRollup), self.rollup_rows(FinancialMonthlyRollup))
+
+        self.assertEqual(incremental, rebuilt)
+        self.assertEqual(len(rebuilt[0]), 3)
+
+    def test_moving_a_customer_moves_their_history(self):
+        today = datetime.now().date()
+        invoice = self.add(Invoice(
+            id=uuid.uuid4(), invoice_number="INV-TEST-0001", company_id=self.company.id,
+            customer_id=self.customer.id, billing_start_date=today - timedelta(days=40),
+            billing_end_date=today - timedelta(days=10), due_date=today - timedelta(days=33),
+            subtotal=1000.00, discount_percentage=0, total_amount=1000.00,
+            invoice_type="subscription", status="paid", is_active=True
+        ))
+        self.add(Payment(
+            id=uuid.uuid4(), company_id=self.company.id, invoice_id=invoice.id, amount=1000,
+            payment_date=datetime.now() - timedelta(days=35), payment_method="cash", status="paid", is_active=True
+        ))
+
+        new_area_id = uuid.uuid4()
+        asyncio.run(update_customer(
+            self.customer.id, {'area_id': str(new_area_id)}, self.company.id, 'company_owner',
+            uuid.uuid4(), '127.0.0.1', 'tests'
+        ))
+
+        areas = {
+            (row.flow_type, row.area_id)
+            for row in FinancialMonthlyRollup.query.filter(FinancialMonthlyRollup.txn_count != 0).all()
+        }
+        self.assertEqual(areas, {('invoice', new_area_id), ('payment', new_area_id)})
+
+        incremental = (self.rollup_rows(FinancialDailyRollup), self.rollup_rows(FinancialMonthlyRollup))
+        DashboardRollupService.rebuild()
+        rebuilt = (self.rollup_rows(FinancialDailyRollup), self.rollup_rows(FinancialMonthlyRollup))
+        self.assertEqual(incremental, rebuilt)
+
+if __name__ == '__main__':
+    unittest.main()
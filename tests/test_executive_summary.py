@@ -0,0 +1,184 @@
+import unittest
+from unittest.mock import patch
+from datetime import datetime, timedelta
+from pytz import UTC
+from app import create_app, db
+from app.models import Company, Customer, Invoice, Payment, Complaint, ServicePlan
+from app.crud.dashboard_crud import get_executive_summary_data
+from config import Config
+import uuid
+
+# Never the app's own database: tearDown drops every table
+DATABASE_URL = 'sqlite:///:memory:'
+
+
+def legacy_executive_summary(company_id):
+    # The per-metric implementation the aggregate query replaced: load the
+    # company's rows and compute every figure in Python
+    customers = Customer.query.filter_by(company_id=company_id).all()
+    invoices = Invoice.query.filter_by(company_id=company_id).all()
+    complaints = Complaint.query.join(Customer).filter(Customer.company_id == company_id).all()
+    service_plans = ServicePlan.query.filter_by(company_id=company_id).all()
+
+    today = datetime.now(UTC)
+    customer_growth_data = []
+    for i in range(5, -1, -1):
+        month_start = (today.replace(day=1) - timedelta(days=30 * i)).replace(tzinfo=UTC)
+        month_end = (month_start + timedelta(days=32)).replace(day=1, tzinfo=UTC) - timedelta(days=1)
+        customer_growth_data.append({
+            'month': month_start.strftime('%b'),
+            'customers': sum(1 for c in customers if c.created_at.replace(tzinfo=UTC) <= month_end)
+        })
+
+    return {
+        'total_active_customers': sum(1 for c in customers if c.is_active),
+        'monthly_recurring_revenue': sum(float(i.total_amount) for i in invoices if i.invoice_type == 'subscription'),
+        'outstanding_payments': sum(float(i.total_amount) for i in invoices if i.status == 'pending'),
+        'active_complaints': sum(1 for c in complaints if c.status in ['open', 'in_progress']),
+        'customer_growth_data': customer_growth_data,
+        'service_plan_data': [
+            {'name': plan.name, 'value': sum(1 for c in customers if c.service_plan_id == plan.id)}
+            for plan in service_plans
+        ]
+    }
+
+
+class TestExecutiveSummary(unittest.TestCase):
+    def setUp(self):
+        with patch.object(Config, 'SQLALCHEMY_DATABASE_URI', DATABASE_URL):
+            self.app = create_app()
+        self.app.config['TESTING'] = True
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.now = datetime.now(UTC).replace(tzinfo=None)
+        self.count = 0
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def seed_company(self, name):
+        company = Company(id=uuid.uuid4(), name=name, is_active=True)
+        plans = [
+            ServicePlan(id=uuid.uuid4(), company_id=company.id, name=plan_name, price=price,
+                        is_active=True, created_at=self.now - timedelta(days=days))
+            for plan_name, price, days in (("Basic", 1000, 300), ("Premium", 2500, 200), ("Unused", 4000, 100))
+        ]
+        db.session.add(company)
+        db.session.add_all(plans)
+        return company, plans
+
+    def add_customer(self, company, plan, days_ago, is_active=True):
+        self.count += 1
+        customer = Customer(
+            id=uuid.uuid4(),
+            company_id=company.id,
+            area_id=uuid.uuid4(),
+            service_plan_id=plan.id,
+            isp_id=uuid.uuid4(),
+            first_name=f"Customer{self.count}",
+            last_name="Test",
+            email=f"customer{self.count}@example.com",
+            internet_id=f"INT{self.count:03d}",
+            phone_1=f"0300{self.count:07d}",
+            installation_address=f"{self.count} Main St",
+            installation_date=(self.now - timedelta(days=days_ago)).date(),
+            cnic=f"12345-{self.count:07d}-1",
+            connection_type="internet",
+            is_active=is_active,
+            created_at=self.now - timedelta(days=days_ago)
+        )
+        db.session.add(customer)
+        return customer
+
+    def add_invoice(self, customer, amount, invoice_type="subscription", status="pending", paid=0):
+        self.count += 1
+        invoice = Invoice(
+            id=uuid.uuid4(),
+            invoice_number=f"INV-TEST-{self.count:04d}",
+            company_id=customer.company_id,
+            customer_id=customer.id,
+            billing_start_date=self.now.date(),
+            billing_end_date=(self.now + timedelta(days=30)).date(),
+            due_date=(self.now + timedelta(days=5)).date(),
+            subtotal=amount,
+            discount_percentage=0,
+            total_amount=amount,
+            invoice_type=invoice_type,
+            status=status,
+            is_active=True
+        )
+        db.session.add(invoice)
+        if paid:
+            db.session.add(Payment(
+                id=uuid.uuid4(), company_id=customer.company_id, invoice_id=invoice.id, amount=paid,
+                payment_date=self.now, payment_method="cash", status="paid", is_active=True
+            ))
+        return invoice
+
+    def add_complaint(self, customer, status):
+        self.count += 1
+        db.session.add(Complaint(
+            id=uuid.uuid4(), customer_id=customer.id, description="No signal",
+            status=status, ticket_number=f"TKT-{self.count:04d}"
+        ))
+
+    def test_matches_the_per_metric_results(self):
+        company, (basic, premium, _) = self.seed_company("Test Company")
+        recent = self.add_customer(company, basic, 3)
+        older = self.add_customer(company, premium, 75)
+        oldest = self.add_customer(company, basic, 400)
+        inactive = self.add_customer(company, premium, 140, is_active=False)
+
+        self.add_invoice(recent, 1000)
+        self.add_invoice(older, 2500, status="paid", paid=2500)
+        self.add_invoice(older, 2500, status="partially_paid", paid=1000)
+        self.add_invoice(oldest, 300, invoice_type="installation", status="pending")
+        self.add_invoice(oldest, 1000, status="paid", paid=1000)
+        self.add_invoice(inactive, 2500, status="overdue")
+        self.add_complaint(recent, "open")
+        self.add_complaint(older, "in_progress")
+        self.add_complaint(oldest, "resolved")
+
+        # Another company's rows must not leak into the totals
+        other, (other_plan, _, _) = self.seed_company("Other Company")
+        stranger = self.add_customer(other, other_plan, 10)
+        self.add_invoice(stranger, 9999, paid=9999)
+        self.add_complaint(stranger, "open")
+        db.session.commit()
+
+        summary = get_executive_summary_data(company.id)
+        expected = legacy_executive_summary(company.id)
+
+        self.assertEqual(set(summary), set(expected))
+        for key in ('total_active_customers', 'monthly_recurring_revenue', 'outstanding_payments', 'active_complaints'):
+            self.assertEqual(summary[key], expected[key], key)
+        self.assertEqual(summary['customer_growth_data'], expected['customer_growth_data'])
+        # The legacy plan list had no defined order
+        by_name = lambda plans: sorted(plans, key=lambda plan: plan['name'])
+        self.assertEqual(by_name(summary['service_plan_data']), by_name(expected['service_plan_data']))
+
+        self.assertEqual(
+            (summary['total_active_customers'], summary['monthly_recurring_revenue'],
+             summary['outstanding_payments'], summary['active_complaints']),
+            (3, 9500.0, 1300.0, 2)
+        )
+        self.assertEqual(summary['customer_growth_data'][-1]['customers'], 4)
+        self.assertEqual(summary['service_plan_data'], [
+            {'name': 'Basic', 'value': 2}, {'name': 'Premium', 'value': 2}, {'name': 'Unused', 'value': 0}
+        ])
+
+    def test_company_without_rows(self):
+        company, _ = self.seed_company("Empty Company")
+        db.session.commit()
+
+        summary = get_executive_summary_data(company.id)
+
+        self.assertEqual(summary, legacy_executive_summary(company.id))
+        self.assertEqual(summary['monthly_recurring_revenue'], 0.0)
+        self.assertEqual([month['customers'] for month in summary['customer_growth_data']], [0] * 6)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,270 @@
+import csv
+import io
+import os
+import threading
+import time
+import unittest
+from unittest.mock import patch
+from datetime import datetime, timedelta
+from openpyxl import load_workbook
+from sqlalchemy import func, text
+from sqlalchemy.dialects import postgresql
+from app import create_app, db
+from app.models import (
+    Company, Customer, Invoice, Payment, Expense, User, BankAccount, Area, ServicePlan, ISP
+)
+from app.crud.payment_crud import export_payments_query
+from app.crud.customer_crud import export_customers_query
+from app.crud.dashboard_crud import ledger_export_query
+from app.services.export_service import ExportService
+from config import Config
+import uuid
+
+# Never the app's own database: tearDown drops every table
+DATABASE_URL = 'sqlite:///:memory:'
+# Set to a scratch PostgreSQL database to exercise the COPY path
+COPY_DATABASE_URL = os.environ.get('TEST_DATABASE_URL', 'sqlite:///:memory:')
+
+class TestExportService(unittest.TestCase):
+    def setUp(self):
+        with patch.object(Config, 'SQLALCHEMY_DATABASE_URI', DATABASE_URL):
+            self.app = create_app()
+        self.app.config['TESTING'] = True
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.create_test_data()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def create_test_data(self):
+        today = datetime.now().date()
+        self.company_id = uuid.uuid4()
+        company = Company(id=self.company_id, name="Test Company", is_active=True)
+        customer = Customer(
+            id=uuid.uuid4(),
+            company_id=company.id,
+            area_id=uuid.uuid4(),
+            service_plan_id=uuid.uuid4(),
+            isp_id=uuid.uuid4(),
+            first_name="Doe, \"JJ\"",
+            last_name="Smith",
+            email="john@example.com",
+            internet_id="INT001",
+            phone_1="1234567890",
+            installation_address="123 Main St",
+            installation_date=today - timedelta(days=30),
+            cnic="1234567890123",
+            connection_type="internet",
+            is_active=True
+        )
+        user = User(id=uuid.uuid4(), company_id=company.id, username="cashier", password="x",
+                    email="cashier@example.com", role='employee', first_name="Cash", last_name="Ier")
+        bank = BankAccount(id=uuid.uuid4(), company_id=company.id, bank_name="Meezan",
+                           account_title="Main", account_number="0001", is_active=True)
+        invoice = Invoice(
+            id=uuid.uuid4(),
+            invoice_number="INV-0001",
+            company_id=company.id,
+            customer_id=customer.id,
+            billing_start_date=today,
+            billing_end_date=today + timedelta(days=30),
+            due_date=today + timedelta(days=7),
+            subtotal=1000.00,
+            discount_percentage=0,
+            total_amount=1000.00,
+            invoice_type="subscription",
+            status="paid",
+            is_active=True
+        )
+        payment = Payment(
+            id=uuid.uuid4(),
+            company_id=company.id,
+            invoice_id=invoice.id,
+            amount=1000,
+            payment_date=datetime.now() - timedelta(days=1),
+            payment_method="bank_transfer",
+            bank_account_id=bank.id,
+            received_by=user.id,
+            status="paid",
+            is_active=True
+        )
+        expense = Expense(
+            id=uuid.uuid4(),
+            company_id=company.id,
+            expense_type_id=uuid.uuid4(),
+            amount=250,
+            expense_date=datetime.now(),
+            payment_method="cash",
+            vendor_payee="Electric, Co",
+            is_active=True
+        )
+        db.session.add_all([company, customer, user, bank, invoice, payment, expense])
+        db.session.commit()
+
+    def payments_query(self):
+        return export_payments_query(self.company_id, 'company_owner', None, 'payment_date', 'desc', '', {})
+
+    def test_csv_rows_are_escaped(self):
+        data = b''.join(ExportService.stream_rows_csv(self.payments_query())).decode()
+        rows = list(csv.reader(io.StringIO(data)))
+
+        self.assertEqual(rows[0], [
+            'invoice_number', 'customer_name', 'amount', 'payment_date',
+            'payment_method', 'status', 'received_by', 'bank_account'
+        ])
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1][1], 'Doe, "JJ" Smith')
+        self.assertEqual(rows[1][6], 'Cash Ier')
+        self.assertEqual(rows[1][7], 'Meezan - 0001')
+
+    def test_xlsx_export(self):
+        data = b''.join(ExportService.stream_xlsx(export_customers_query(self.company_id, 'company_owner'), title='customers'))
+        sheet = load_workbook(io.BytesIO(data), read_only=True)['customers']
+        rows = list(sheet.values)
+
+        self.assertEqual(rows[0][:3], ('internet_id', 'first_name', 'last_name'))
+        self.assertEqual(rows[1][:3], ('INT001', 'Doe, "JJ"', 'Smith'))
+        self.assertEqual(len(rows), 2)
+
+    def test_ledger_union_is_newest_first(self):
+        rows = ledger_export_query(self.company_id, {'bank_account_id': 'all', 'payment_method': 'all'}).all()
+
+        self.assertEqual([row.type for row in rows], ['expense', 'invoice_payment'])
+        self.assertEqual([row.direction for row in rows], ['debit', 'credit'])
+        self.assertEqual(rows[1].bank_account, 'Meezan - 0001')
+        self.assertEqual(ExportService.headers(ledger_export_query(self.company_id))[:3], ['date', 'type', 'reference'])
+
+    def test_compiles_for_copy(self):
+        sql, params = ExportService.compile_sql(self.payments_query(), postgresql.psycopg2.dialect())
+        self.assertIn('ORDER BY payments.payment_date DESC', sql)
+        self.assertIn(self.company_id, params.values())
+
+    def test_rejects_unknown_format(self):
+        with self.app.test_request_context():
+            with self.assertRaises(ValueError):
+                ExportService.response(self.payments_query(), 'payments', 'pdf')
+
+
+class TestCopyExport(unittest.TestCase):
+    def setUp(self):
+        with patch.object(Config, 'SQLALCHEMY_DATABASE_URI', COPY_DATABASE_URL):
+            self.app = create_app()
+        self.app.config['TESTING'] = True
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        if db.engine.dialect.name != 'postgresql':
+            self.app_context.pop()
+            self.skipTest('Needs TEST_DATABASE_URL pointing at PostgreSQL')
+        db.create_all()
+        self.create_test_data()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def create_test_data(self):
+        today = datetime.now().date()
+        self.company_id = uuid.uuid4()
+        company = Company(id=self.company_id, name="Test Company", is_active=True)
+        area = Area(id=uuid.uuid4(), company_id=company.id, name="North")
+        plan = ServicePlan(id=uuid.uuid4(), company_id=company.id, name="Basic", price=1000.00)
+        isp = ISP(id=uuid.uuid4(), company_id=company.id, name="Upstream")
+        user = User(id=uuid.uuid4(), company_id=company.id, username="cashier", password="x",
+                    email="cashier@example.com", role='employee', first_name="Cash", last_name="Ier")
+        bank = BankAccount(id=uuid.uuid4(), company_id=company.id, bank_name='Meezan, "Islamic"',
+                           account_title="Main", account_number="0001", is_active=True)
+        customer = Customer(
+            id=uuid.uuid4(), company_id=company.id, area_id=area.id, service_plan_id=plan.id, isp_id=isp.id,
+            first_name="Doe, \"JJ\"", last_name="Smith", email="john@example.com", internet_id="INT001",
+            phone_1="1234567890", installation_address="123 Main St, Block \"B\"",
+            installation_date=today - timedelta(days=30), cnic="1234567890123",
+            connection_type="internet", is_active=True
+        )
+        self.invoice = Invoice(
+            id=uuid.uuid4(), invoice_number="INV-0001", company_id=company.id, customer_id=customer.id,
+            billing_start_date=today, billing_end_date=today + timedelta(days=30),
+            due_date=today + timedelta(days=7), subtotal=1350.50, discount_percentage=0,
+            total_amount=1350.50, invoice_type="subscription", generated_by=user.id, status="paid", is_active=True
+        )
+        self.payments = [
+            Payment(
+                id=uuid.uuid4(), company_id=company.id, invoice_id=self.invoice.id, amount=amount,
+                payment_date=datetime.now() - timedelta(days=n), payment_method="bank_transfer",
+                bank_account_id=bank.id, received_by=user.id, status="paid", is_active=True
+            )
+            for n, amount in enumerate((100, 250.50, 1000))
+        ]
+        # No relationships are mapped, so flush parents before the rows referencing them
+        for level in ([company], [area, plan, isp, user, bank], [customer], [self.invoice], self.payments):
+            db.session.add_all(level)
+            db.session.flush()
+        db.session.commit()
+
+    @staticmethod
+    def copy_threads():
+        return [t for t in threading.enumerate() if t.name == 'export-copy' and t.is_alive()]
+
+    def test_payments_export_streams_through_copy(self):
+        query = export_payments_query(self.company_id, 'company_owner', None, 'amount', 'asc', '', {})
+        fallback = AssertionError('fell back to the csv writer')
+        with self.app.test_request_context('/payments/export'), \
+                patch.object(ExportService, 'stream_rows_csv', side_effect=fallback):
+            response = ExportService.response(query, 'payments')
+            body = b''.join(response.response).decode()
+        rows = list(csv.reader(io.StringIO(body)))
+
+        self.assertEqual(rows[0], [
+            'invoice_number', 'customer_name', 'amount', 'payment_date',
+            'payment_method', 'status', 'received_by', 'bank_account'
+        ])
+        self.assertEqual([row[2] for row in rows[1:]], ['100.00', '250.50', '1000.00'])
+        self.assertEqual({row[1] for row in rows[1:]}, {'Doe, "JJ" Smith'})
+        self.assertEqual({row[7] for row in rows[1:]}, {'Meezan, "Islamic" - 0001'})
+        self.assertEqual({row[6] for row in rows[1:]}, {'Cash Ier'})
+
+    def test_uuid_values_and_parameters(self):
+        ids = [payment.id for payment in self.payments[:2]]
+        query = db.session.query(
+            Payment.id.label('id'),
+            Payment.invoice_id.label('invoice_id'),
+            Customer.installation_address.label('address')
+        ).join(Invoice, Invoice.id == Payment.invoice_id
+        ).join(Customer, Customer.id == Invoice.customer_id
+        ).filter(Payment.id.in_(ids), Payment.company_id == self.company_id
+        ).order_by(Payment.amount)
+
+        rows = list(csv.reader(io.StringIO(b''.join(ExportService.stream_copy(query)).decode())))
+        self.assertEqual(rows, [
+            ['id', 'invoice_id', 'address'],
+            [str(ids[0]), str(self.invoice.id), '123 Main St, Block "B"'],
+            [str(ids[1]), str(self.invoice.id), '123 Main St, Block "B"'],
+        ])
+
+    def test_client_disconnect_cancels_copy(self):
+        # Far more rows than the bounded queue holds, so COPY is mid-stream when the client leaves
+        query = db.session.query(func.generate_series(1, 500000).label('n'))
+        stream = ExportService.stream_copy(query, chunk_bytes=1024)
+        self.assertTrue(next(stream).startswith(b'n\n1\n2\n'))
+        stream.close()  # what the WSGI server does when the client goes away
+
+        deadline = time.monotonic() + 10
+        while self.copy_threads() and time.monotonic() < deadline:
+            time.sleep(0.05)
+        self.assertEqual(self.copy_threads(), [])
+
+        # The COPY connection went back to the pool in a usable state
+        db.session.remove()
+        self.assertEqual(db.engine.pool.checkedout(), 0)
+        self.assertEqual(db.session.execute(text('SELECT 1')).scalar(), 1)
+        rows = list(csv.reader(io.StringIO(b''.join(ExportService.stream_copy(
+            db.session.query(func.generate_series(1, 3).label('n'))
+        )).decode())))
+        self.assertEqual(rows, [['n'], ['1'], ['2'], ['3']])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import unittest
+from unittest.mock import patch
+from datetime import datetime, timedelta
+from app import create_app, db
+from app.models import Company, Customer, Invoice, InvoiceNumberCounter
+from app.services.invoice_number_allocator import InvoiceNumberAllocator
+from config import Config
+import uuid
+
+# Never the app's own database: tearDown drops every table
+DATABASE_URL = 'sqlite:///:memory:'
+
+class TestInvoiceNumberAllocator(unittest.TestCase):
+    def setUp(self):
+        with patch.object(Config, 'SQLALCHEMY_DATABASE_URI', DATABASE_URL):
+            self.app = create_app()
+        self.app.config['TESTING'] = True
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        InvoiceNumberAllocator._blocks = {}
+        self.year = datetime.now().year
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def create_existing_invoice(self, invoice_number):
+        today = datetime.now().date()
+        company = Company(id=uuid.uuid4(), name="Test Company", is_active=True)
+        invoice = Invoice(
+            id=uuid.uuid4(),
+            company_id=company.id,
+            invoice_number=invoice_number,
+            customer_id=uuid.uuid4(),
+            billing_start_date=today,
+            billing_end_date=today + timedelta(days=30),
+            due_date=today + timedelta(days=7),
+            subtotal=1000.00,
+            discount_percentage=0,
+            total_amount=1000.00,
+            invoice_type="subscription",
+            status="pending",
+            is_active=True
+        )
+        db.session.add_all([company, invoice])
+        db.session.commit()
+
+    def test_reserve_returns_consecutive_range(self):
+        first = InvoiceNumberAllocator.reserve(3)
+        second = InvoiceNumberAllocator.reserve(2)
+
+        self.assertEqual(first, [f'INV-{self.year}-0001', f'INV-{self.year}-0002', f'INV-{self.year}-0003'])
+        self.assertEqual(second, [f'INV-{self.year}-0004', f'INV-{self.year}-0005'])
+        self.assertEqual(db.session.get(InvoiceNumberCounter, self.year).last_value, 5)
+
+    def test_counter_is_seeded_from_existing_invoices(self):
+        # 10000 sorts before 9999 as a string; the seed must use the numeric maximum
+        self.create_existing_invoice(f'INV-{self.year}-9999')
+        self.create_existing_invoice(f'INV-{self.year}-10000')
+
+        self.assertEqual(InvoiceNumberAllocator.reserve(1), [f'INV-{self.year}-10001'])
+
+    def test_next_number_is_served_from_a_block(self):
+        numbers = [InvoiceNumberAllocator.next_number() for _ in range(3)]
+
+        self.assertEqual(len(set(numbers)), 3)
+        self.assertEqual(numbers[0], f'INV-{self.year}-0001')
+        # One block was reserved up front, so a bulk reservation starts after it
+        self.assertEqual(
+            InvoiceNumberAllocator.reserve(1),
+            [InvoiceNumberAllocator.format_number(self.year, InvoiceNumberAllocator.BLOCK_SIZE + 1)]
+        )
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,159 @@
+import unittest
+from unittest.mock import patch
+from datetime import datetime, timedelta
+from sqlalchemy import event
+from app import create_app, db
+from app.models import Company, Customer, DetailedLog, Invoice
+from app.crud.invoice_crud import get_invoices_cursor_page
+from app.crud.log_crud import get_all_logs_paginated, get_logs_cursor_page
+from app.utils.keyset_pagination import CursorError
+from config import Config
+import uuid
+
+# Never the app's own database: tearDown drops every table
+DATABASE_URL = 'sqlite:///:memory:'
+
+class TestKeysetPagination(unittest.TestCase):
+    def setUp(self):
+        with patch.object(Config, 'SQLALCHEMY_DATABASE_URI', DATABASE_URL):
+            self.app = create_app()
+        self.app.config['TESTING'] = True
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        self.company = Company(id=uuid.uuid4(), name="Test Company", is_active=True)
+        db.session.add(self.company)
+        start = datetime(2025, 1, 1, 12, 0, 0)
+        for i in range(23):
+            db.session.add(DetailedLog(
+                id=uuid.uuid4(),
+                company_id=self.company.id,
+                action='UPDATE',
+                table_name='invoices',
+                record_id=uuid.uuid4(),
+                # Pairs of rows share a timestamp so the id tie-breaker matters
+                created_at=start + timedelta(minutes=i // 2)
+            ))
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def walk(self, sort_dir, sort_by='created_at'):
+        pages = []
+        cursor = None
+        while True:
+            items, page_info = get_logs_cursor_page(
+                self.company.id, 'company_owner', page_size=5, sort_by=sort_by, sort_dir=sort_dir,
+                cursor=cursor, total_mode='exact'
+            )
+            pages.append((items, page_info))
+            cursor = page_info['next_cursor']
+            if not cursor:
+                return pages
+
+    def test_cursor_pages_cover_all_rows_in_order(self):
+        for sort_dir in ('desc', 'asc'):
+            pages = self.walk(sort_dir)
+            ids = [item['id'] for items, _ in pages for item in items]
+            created = [item['created_at'] for items, _ in pages for item in items]
+
+            self.assertEqual(len(pages), 5)
+            self.assertEqual(len(ids), 23)
+            self.assertEqual(len(set(ids)), 23)
+            self.assertEqual(created, sorted(created, reverse=(sort_dir == 'desc')))
+            self.assertEqual(pages[0][1]['total'], 23)
+            self.assertIsNone(pages[0][1]['prev_cursor'])
+
+    def test_prev_cursor_returns_previous_page(self):
+        pages = self.walk('desc')
+        items, page_info = get_logs_cursor_page(
+            self.company.id, 'company_owner', page_size=5, cursor=pages[2][1]['prev_cursor']
+        )
+        self.assertEqual([item['id'] for item in items], [item['id'] for item in pages[1][0]])
+
+    def test_capped_total(self):
+        _, page_info = get_logs_cursor_page(self.company.id, 'company_owner', page_size=5, total_mode='capped')
+        self.assertEqual(page_info['total'], 23)
+        self.assertFalse(page_info['total_is_estimate'])
+
+        items, total = get_all_logs_paginated(self.company.id, 'company_owner', page=1, page_size=5)
+        self.assertEqual(total, 23)
+
+    def test_cursor_for_other_sort_is_rejected(self):
+        pages = self.walk('desc')
+        with self.assertRaises(CursorError):
+            get_logs_cursor_page(
+                self.company.id, 'company_owner', page_size=5, sort_by='action',
+                cursor=pages[0][1]['next_cursor']
+            )
+
+    def test_nullable_sort_key_covers_all_rows(self):
+        # Every other log has no IP address
+        for i, log in enumerate(DetailedLog.query.order_by(DetailedLog.created_at).all()):
+            log.ip_address = f'10.0.0.{i:02d}' if i % 2 == 0 else None
+        db.session.commit()
+
+        for sort_dir in ('asc', 'desc'):
+            pages = self.walk(sort_dir, sort_by='ip_address')
+            ids = [item['id'] for items, _ in pages for item in items]
+            addresses = [item['ip_address'] for items, _ in pages for item in items]
+
+            self.assertEqual(len(set(ids)), 23)
+            # NULLs sort after every address, so they close an ascending walk and open a descending one
+            expected = sorted(a for a in addresses if a is not None)
+            if sort_dir == 'asc':
+                self.assertEqual(addresses, expected + [None] * 11)
+            else:
+                self.assertEqual(addresses, [None] * 11 + expected[::-1])
+
+            back, _ = get_logs_cursor_page(
+                self.company.id, 'company_owner', page_size=5, sort_by='ip_address', sort_dir=sort_dir,
+                cursor=pages[2][1]['prev_cursor']
+            )
+            self.assertEqual([item['id'] for item in back], [item['id'] for item in pages[1][0]])
+
+    def test_json_columns_are_not_cursor_sort_keys(self):
+        items, _ = get_logs_cursor_page(self.company.id, 'company_owner', page_size=23, sort_by='new_values')
+        created = [item['created_at'] for item in items]
+        self.assertEqual(created, sorted(created, reverse=True))
+
+    def test_invoice_stats_follow_the_total_mode(self):
+        today = datetime.now().date()
+        customer = Customer(
+            id=uuid.uuid4(), company_id=self.company.id, area_id=uuid.uuid4(), service_plan_id=uuid.uuid4(),
+            isp_id=uuid.uuid4(), first_name="John", last_name="Doe", email="john@example.com",
+            internet_id="INT001", phone_1="1234567890", installation_address="123 Main St",
+            installation_date=today, cnic="12345-6789012-3", connection_type="internet", is_active=True
+        )
+        db.session.add(customer)
+        for n, status in enumerate(['paid', 'paid', 'pending']):
+            db.session.add(Invoice(
+                id=uuid.uuid4(), invoice_number=f"INV-{n:04d}", company_id=self.company.id,
+                customer_id=customer.id, billing_start_date=today, billing_end_date=today + timedelta(days=30),
+                due_date=today + timedelta(days=7), subtotal=1000.00, discount_percentage=0,
+                total_amount=1000.00, invoice_type="subscription", status=status, is_active=True
+            ))
+        db.session.commit()
+        company_id = self.company.id
+
+        statements = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            page = get_invoices_cursor_page(company_id, 'company_owner', None, page_size=2, total_mode='none')
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+
+        # Only the page itself; no company-wide COUNTs per page turn
+        self.assertEqual(len(statements), 1)
+        self.assertEqual(page['stats'], {'total': None, 'paid': None, 'pending': None})
+
+        page = get_invoices_cursor_page(company_id, 'company_owner', None, page_size=2, total_mode='exact')
+        self.assertEqual(page['stats'], {'total': 3, 'paid': 2, 'pending': 1})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+import unittest
+from unittest.mock import patch
+from datetime import datetime, timedelta
+from app import create_app, db
+from app.crud import dashboard_crud
+from app.models import (
+    Company, Customer, Invoice, Payment, ISPPayment, Expense, ExtraIncome, BankAccount
+)
+from app.utils.keyset_pagination import CursorError
+from flask_jwt_extended import create_access_token
+from config import Config
+import uuid
+
+# Never the app's own database: tearDown drops every table
+DATABASE_URL = 'sqlite:///:memory:'
+
+class TestLedgerPage(unittest.TestCase):
+    def setUp(self):
+        with patch.object(Config, 'SQLALCHEMY_DATABASE_URI', DATABASE_URL):
+            self.app = create_app()
+        self.app.config['TESTING'] = True
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.create_test_data()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def create_test_data(self):
+        today = datetime.now().date()
+        start = datetime(2025, 1, 1, 9, 0)
+        self.company = Company(id=uuid.uuid4(), name="Test Company", is_active=True)
+        customer = Customer(
+            id=uuid.uuid4(),
+            company_id=self.company.id,
+            area_id=uuid.uuid4(),
+            service_plan_id=uuid.uuid4(),
+            isp_id=uuid.uuid4(),
+            first_name="John",
+            last_name="Doe",
+            email="john@example.com",
+            internet_id="INT001",
+            phone_1="1234567890",
+            installation_address="123 Main St",
+            installation_date=today - timedelta(days=30),
+            cnic="12345-6789012-3",
+            connection_type="internet",
+            is_active=True
+        )
+        bank = BankAccount(id=uuid.uuid4(), company_id=self.company.id, bank_name="Meezan",
+                           account_title="Main", account_number="0001", is_active=True)
+        invoice = Invoice(
+            id=uuid.uuid4(), invoice_number="INV-0001", company_id=self.company.id, customer_id=customer.id,
+            billing_start_date=today, billing_end_date=today + timedelta(days=30),
+            due_date=today + timedelta(days=7), subtotal=1000.00, discount_percentage=0,
+            total_amount=1000.00, invoice_type="subscription", status="paid", is_active=True
+        )
+        db.session.add_all([self.company, customer, bank, invoice])
+
+        # Oldest first: +1000, -300, +150, -100, +500
+        db.session.add_all([
+            Payment(id=uuid.uuid4(), company_id=self.company.id, invoice_id=invoice.id, amount=1000,
+                    payment_date=start, payment_method='bank_transfer', bank_account_id=bank.id,
+                    status='paid', is_active=True),
+            ISPPayment(id=uuid.uuid4(), company_id=self.company.id, isp_id=uuid.uuid4(), bank_account_id=bank.id,
+                       payment_type='monthly_subscription', description="Bandwidth", amount=300,
+                       payment_date=start + timedelta(days=1), billing_period="2025-01",
+                       payment_method='bank_transfer', status='completed', processed_by=uuid.uuid4(), is_active=True),
+            ExtraIncome(id=uuid.uuid4(), company_id=self.company.id, bank_account_id=bank.id,
+                        income_type_id=uuid.uuid4(), amount=150, income_date=start + timedelta(days=2),
+                        payment_method='cash', payer="Tenant", is_active=True),
+            Expense(id=uuid.uuid4(), company_id=self.company.id, bank_account_id=bank.id,
+                    expense_type_id=uuid.uuid4(), amount=100, expense_date=start + timedelta(days=3),
+                    payment_method='cash', vendor_payee="Hardware Store", is_active=True),
+            Payment(id=uuid.uuid4(), company_id=self.company.id, invoice_id=invoice.id, amount=500,
+                    payment_date=start + timedelta(days=4), payment_method='cash', bank_account_id=bank.id,
+                    status='paid', is_active=True),
+        ])
+        db.session.commit()
+
+    def test_pages_carry_running_balances_and_totals(self):
+        first = dashboard_crud.get_ledger_page(self.company.id, {}, page_size=2)
+        second = dashboard_crud.get_ledger_page(self.company.id, {}, page_size=2, cursor=first['next_cursor'])
+        third = dashboard_crud.get_ledger_page(self.company.id, {}, page_size=2, cursor=second['next_cursor'])
+
+        pages = [first['items'], second['items'], third['items']]
+        self.assertEqual([[i['type'] for i in page] for page in pages], [
+            ['invoice_payment', 'expense'], ['extra_income', 'isp_payment'], ['invoice_payment']
+        ])
+        self.assertEqual([[i['running_balance'] for i in page] for page in pages], [
+            [1250.0, 750.0], [850.0, 700.0], [1000.0]
+        ])
+        self.assertIsNone(third['next_cursor'])
+        self.assertIsNone(first['prev_cursor'])
+
+        for page in (first, second, third):
+            self.assertEqual(page['stats'], {'credits': 1650.0, 'debits': 400.0, 'net': 1250.0, 'count': 5})
+
+        back = dashboard_crud.get_ledger_page(self.company.id, {}, page_size=2, cursor=second['prev_cursor'])
+        self.assertEqual([i['id'] for i in back['items']], [i['id'] for i in first['items']])
+
+    def test_filters_apply_before_the_windows(self):
+        page = dashboard_crud.get_ledger_page(self.company.id, {'payment_method': 'cash'})
+        self.assertEqual([i['running_balance'] for i in page['items']], [550.0, 50.0, 150.0])
+        self.assertEqual(page['stats']['count'], 3)
+
+        with self.assertRaises(CursorError):
+            dashboard_crud.get_ledger_page(self.company.id, {}, cursor='not-a-cursor')
+
+    def test_ledger_route_rejects_bad_cursors(self):
+        token = create_access_token(
+            identity=str(uuid.uuid4()),
+            additional_claims={'company_id': str(self.company.id), 'role': 'company_owner'}
+        )
+        client = self.app.test_client()
+        headers = {'Authorization': f'Bearer {token}'}
+
+        response = client.get('/dashboard/ledger?pagination=cursor&cursor=not-a-cursor', headers=headers)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Invalid cursor', response.get_json()['error'])
+
+if __name__ == '__main__':
+    unittest.main()
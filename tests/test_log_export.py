@@ -0,0 +1,106 @@
+import csv
+import io
+import unittest
+from unittest.mock import patch
+from datetime import datetime, timedelta
+from sqlalchemy import event
+from app import create_app, db
+from app.models import Company, DetailedLog, User
+from app.crud.log_crud import get_all_logs_paginated, get_logs_cursor_page, stream_logs
+from app.utils.csv_export import stream_csv
+from config import Config
+import uuid
+
+# Never the app's own database: tearDown drops every table
+DATABASE_URL = 'sqlite:///:memory:'
+
+class TestLogExport(unittest.TestCase):
+    def setUp(self):
+        with patch.object(Config, 'SQLALCHEMY_DATABASE_URI', DATABASE_URL):
+            self.app = create_app()
+        self.app.config['TESTING'] = True
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        self.company = Company(id=uuid.uuid4(), name="Test Company", is_active=True)
+        db.session.add(self.company)
+        users = [
+            User(id=uuid.uuid4(), company_id=self.company.id, username=f"user{i}", password="x",
+                 email=f"user{i}@example.com", role='employee', first_name=f"First{i}", last_name="Last")
+            for i in range(3)
+        ]
+        db.session.add_all(users)
+        start = datetime(2025, 1, 1, 12, 0, 0)
+        for i in range(30):
+            db.session.add(DetailedLog(
+                id=uuid.uuid4(),
+                company_id=self.company.id,
+                user_id=users[i % 3].id if i % 10 else None,
+                action='UPDATE' if i % 2 else 'CREATE',
+                table_name='invoices',
+                record_id=uuid.uuid4(),
+                ip_address='10.0.0.1',
+                created_at=start + timedelta(minutes=i)
+            ))
+        db.session.commit()
+        self.company_id = self.company.id
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def count_queries(self, func):
+        statements = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            result = func()
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+        return result, len(statements)
+
+    def test_user_names_come_from_the_join(self):
+        (items, total), queries = self.count_queries(
+            lambda: get_all_logs_paginated(self.company_id, 'company_owner', page_size=30)
+        )
+        self.assertEqual(total, 30)
+        self.assertEqual(queries, 2)  # count + page
+        names = [item['user_name'] for item in items]
+        self.assertEqual(names.count('Unknown'), 3)
+        self.assertIn('First1 Last', names)
+
+        (items, _), queries = self.count_queries(
+            lambda: get_logs_cursor_page(self.company_id, 'company_owner', page_size=10, total_mode='none')
+        )
+        self.assertEqual(queries, 1)
+        self.assertEqual(len(items), 10)
+
+        items, total = get_all_logs_paginated(self.company_id, 'company_owner', filters={'user_name': 'first2'})
+        self.assertEqual(total, 9)
+        self.assertTrue(all(item['user_name'] == 'First2 Last' for item in items))
+
+    def test_stream_uses_one_query_and_honours_filters(self):
+        rows, queries = self.count_queries(lambda: list(stream_logs(
+            self.company_id, 'company_owner', 'created_at', 'asc', '', {'action': 'UPDATE'}, batch_size=4
+        )))
+        self.assertEqual(queries, 1)
+        self.assertEqual(len(rows), 15)
+        # timestamptz columns come back with the session's UTC offset on PostgreSQL
+        exported = datetime.fromisoformat(rows[0]['timestamp'])
+        self.assertEqual(exported.replace(tzinfo=None), datetime(2025, 1, 1, 12, 1))
+        self.assertEqual(list(stream_logs(self.company_id, 'employee', 'created_at', 'asc', '', {})), [])
+
+    def test_stream_csv_escapes_and_chunks(self):
+        rows = [['Doe, "Jim"', 'UPDATE', i] for i in range(100)]
+        chunks = list(stream_csv(['user_name', 'action', 'n'], rows, chunk_bytes=256))
+        self.assertGreater(len(chunks), 1)
+
+        parsed = list(csv.reader(io.StringIO(''.join(chunks))))
+        self.assertEqual(parsed[0], ['user_name', 'action', 'n'])
+        self.assertEqual(parsed[1], ['Doe, "Jim"', 'UPDATE', '0'])
+        self.assertEqual(len(parsed), 101)
+
+if __name__ == '__main__':
+    unittest.main()
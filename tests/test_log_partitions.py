@@ -0,0 +1,76 @@
+import tempfile
+import unittest
+from unittest.mock import patch
+from datetime import date, datetime, timedelta
+from app import create_app, db
+from app.models import Company, DetailedLog
+from app.crud.log_crud import get_all_logs_paginated, get_logs_summary, stream_logs
+from app.services.log_partition_service import LogPartitionService
+from config import Config
+import uuid
+
+# Never the app's own database: tearDown drops every table
+DATABASE_URL = 'sqlite:///:memory:'
+
+class TestLogPartitions(unittest.TestCase):
+    def setUp(self):
+        with patch.object(Config, 'SQLALCHEMY_DATABASE_URI', DATABASE_URL):
+            self.app = create_app()
+        self.app.config['TESTING'] = True
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        self.company = Company(id=uuid.uuid4(), name="Test Company", is_active=True)
+        db.session.add(self.company)
+        for month in range(1, 5):
+            for day in (1, 28):
+                db.session.add(DetailedLog(
+                    id=uuid.uuid4(),
+                    company_id=self.company.id,
+                    action='UPDATE',
+                    table_name='invoices',
+                    record_id=uuid.uuid4(),
+                    created_at=datetime(2025, month, day, 12, 0, 0)
+                ))
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_month_arithmetic_and_names(self):
+        self.assertEqual(LogPartitionService.add_months(date(2025, 11, 1), 3), date(2026, 2, 1))
+        self.assertEqual(LogPartitionService.add_months(date(2025, 1, 1), -13), date(2023, 12, 1))
+        self.assertEqual(LogPartitionService.month_start(datetime(2025, 7, 19, 8)), date(2025, 7, 1))
+        self.assertEqual(LogPartitionService.partition_name(date(2025, 7, 1)), 'detailed_logs_y2025m07')
+        self.assertTrue(LogPartitionService.PARTITION_PATTERN.match('detailed_logs_y2025m07'))
+        self.assertFalse(LogPartitionService.PARTITION_PATTERN.match('detailed_logs_default'))
+
+    def test_maintenance_is_a_no_op_without_partitioning(self):
+        with tempfile.TemporaryDirectory() as archive_dir:
+            stats = LogPartitionService.maintain(archive_dir)
+        self.assertFalse(stats['partitioned'])
+        self.assertEqual(stats['created'], [])
+        self.assertEqual(stats['retired'], [])
+        self.assertEqual(DetailedLog.query.count(), 8)
+
+    def test_date_filters_bound_created_at(self):
+        filters = {'date_from': '2025-02-01', 'date_to': '2025-03-28'}
+        items, total = get_all_logs_paginated(self.company.id, 'company_owner', filters=filters)
+        self.assertEqual(total, 4)
+        self.assertEqual(
+            {item['created_at'][:10] for item in items},
+            {'2025-02-01', '2025-02-28', '2025-03-01', '2025-03-28'}
+        )
+        self.assertEqual(get_logs_summary(self.company.id, 'company_owner', filters)['total'], 4)
+
+        streamed = list(stream_logs(self.company.id, 'company_owner', 'created_at', 'asc', '', {'date_from': '2025-04-01'}))
+        self.assertEqual(len(streamed), 2)
+
+        with self.assertRaises(ValueError):
+            get_all_logs_paginated(self.company.id, 'company_owner', filters={'date_from': 'yesterday'})
+
+if __name__ == '__main__':
+    unittest.main()
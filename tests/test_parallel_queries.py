@@ -0,0 +1,97 @@
+import os
+import threading
+import time
+import unittest
+from unittest.mock import patch
+from flask import g
+from sqlalchemy import insert
+from app import create_app, db
+from app.crud import dashboard_crud
+from app.models import Company
+from app.utils.parallel_queries import run_parallel
+from config import Config
+import uuid
+
+# Set to a scratch PostgreSQL database to exercise the shared snapshot
+DATABASE_URL = os.environ.get('TEST_DATABASE_URL', 'sqlite:///:memory:')
+
+
+def slow_probe(delay):
+    time.sleep(delay)
+    return threading.current_thread().name, g.get('marker'), g.get('db_pinned_engine') is db.engine
+
+
+def company_count():
+    return Company.query.count()
+
+
+class TestParallelQueries(unittest.TestCase):
+    def setUp(self):
+        with patch.object(Config, 'SQLALCHEMY_DATABASE_URI', DATABASE_URL):
+            self.app = create_app()
+        self.app.config['TESTING'] = True
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        self.company_id = uuid.uuid4()
+        db.session.add(Company(id=self.company_id, name="Test Company", is_active=True))
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_calls_fan_out_on_the_executor(self):
+        g.marker = 'request'
+        started = time.perf_counter()
+        results = run_parallel({f'probe{n}': (slow_probe, (0.2,)) for n in range(4)}, snapshot=False)
+        elapsed = time.perf_counter() - started
+
+        self.assertEqual(list(results), ['probe0', 'probe1', 'probe2', 'probe3'])
+        for thread_name, marker, pinned in results.values():
+            self.assertTrue(thread_name.startswith('db-executor'))
+            self.assertEqual(marker, 'request')
+            self.assertTrue(pinned)
+        self.assertLess(elapsed, 0.2 * 3)
+
+    def test_without_snapshot_support_calls_run_serially(self):
+        if db.engine.dialect.name == 'postgresql':
+            self.skipTest('PostgreSQL exports snapshots')
+        results = run_parallel({'count': (company_count, ()), 'probe': (slow_probe, (0,))})
+        self.assertEqual(results['count'], 1)
+        self.assertEqual(results['probe'][0], threading.current_thread().name)
+
+    def test_calls_share_one_snapshot(self):
+        if db.engine.dialect.name != 'postgresql':
+            self.skipTest('Needs TEST_DATABASE_URL pointing at PostgreSQL')
+
+        def late_count():
+            time.sleep(0.5)
+            return company_count()
+
+        def insert_company():
+            time.sleep(0.2)
+            with self.app.app_context(), db.engine.begin() as connection:
+                connection.execute(insert(Company.__table__).values(id=uuid.uuid4(), name="Late Co", is_active=True))
+
+        writer = threading.Thread(target=insert_company)
+        writer.start()
+        results = run_parallel({'early': (company_count, ()), 'late': (late_count, ())})
+        writer.join()
+
+        self.assertEqual(results, {'early': 1, 'late': 1})
+        self.assertEqual(company_count(), 2)
+
+    def test_unified_financial_modes_agree(self):
+        if db.engine.dialect.name != 'postgresql':
+            self.skipTest('The dashboard queries use date_trunc')
+        serial = dashboard_crud.get_unified_financial_data(self.company_id, {}, mode='serial')
+        parallel = dashboard_crud.get_unified_financial_data(self.company_id, {}, mode='parallel')
+        self.assertNotIn('error', serial)
+        self.assertEqual(serial, parallel)
+
+
+if __name__ == '__main__':
+    unittest.main()
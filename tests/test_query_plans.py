@@ -0,0 +1,203 @@
+import os
+import unittest
+from unittest.mock import patch
+from datetime import date, datetime, timedelta, timezone
+from sqlalchemy import desc, insert, text
+from app import create_app, db
+from app.models import (
+    Company, Area, ServicePlan, ISP, User, Customer, Invoice, Payment, ISPPayment,
+    ExpenseType, Expense, ExtraIncomeType, ExtraIncome, DetailedLog
+)
+from app.utils.query_plans import sequential_scans
+from config import Config
+import uuid
+
+# Point at a scratch PostgreSQL database to check the real planner; SQLite is used otherwise
+DATABASE_URL = os.environ.get('TEST_DATABASE_URL', 'sqlite:///:memory:')
+
+COMPANIES = 20
+CUSTOMERS_PER_COMPANY = 40
+MONTHS = 6
+
+HOT_TABLES = {
+    'customers', 'invoices', 'payments', 'isp_payments', 'expenses', 'extra_incomes', 'detailed_logs'
+}
+
+
+class TestQueryPlans(unittest.TestCase):
+    """Hot company-scoped queries must be answered from an index, not a sequential scan"""
+
+    def setUp(self):
+        with patch.object(Config, 'SQLALCHEMY_DATABASE_URI', DATABASE_URL):
+            self.app = create_app()
+        self.app.config['TESTING'] = True
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.seed()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def seed(self):
+        start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+        rows = {model: [] for model in (
+            Company, Area, ServicePlan, ISP, User, ExpenseType, ExtraIncomeType,
+            Customer, Invoice, Payment, ISPPayment, Expense, ExtraIncome, DetailedLog
+        )}
+        self.company_ids = []
+
+        for c in range(COMPANIES):
+            company_id = uuid.uuid4()
+            self.company_ids.append(company_id)
+            area_id, plan_id, isp_id, user_id = uuid.uuid4(), uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+            expense_type_id, income_type_id = uuid.uuid4(), uuid.uuid4()
+            rows[Company].append({'id': company_id, 'name': f'Company {c}', 'is_active': True})
+            rows[Area].append({'id': area_id, 'company_id': company_id, 'name': f'Area {c}'})
+            rows[ServicePlan].append({'id': plan_id, 'company_id': company_id, 'name': f'Plan {c}', 'price': 2500})
+            rows[ISP].append({'id': isp_id, 'company_id': company_id, 'name': f'ISP {c}'})
+            rows[User].append({
+                'id': user_id, 'company_id': company_id, 'username': f'owner{c}', 'password': 'x',
+                'email': f'owner{c}@example.com', 'role': 'company_owner'
+            })
+            rows[ExpenseType].append({'id': expense_type_id, 'company_id': company_id, 'name': 'Rent'})
+            rows[ExtraIncomeType].append({'id': income_type_id, 'company_id': company_id, 'name': 'Repairs'})
+
+            for n in range(CUSTOMERS_PER_COMPANY):
+                customer_id = uuid.uuid4()
+                rows[Customer].append({
+                    'id': customer_id, 'company_id': company_id, 'area_id': area_id,
+                    'service_plan_id': plan_id, 'isp_id': isp_id,
+                    'first_name': 'Customer', 'last_name': str(n), 'email': f'c{c}-{n}@example.com',
+                    'internet_id': f'NET-{c}-{n}', 'phone_1': '03000000000',
+                    'installation_address': 'Street 1', 'installation_date': date(2024, 12, 1),
+                    'cnic': f'{c:05d}-{n:07d}-1', 'connection_type': 'internet',
+                    'is_active': n % 10 != 0, 'created_at': start + timedelta(hours=n)
+                })
+                for month in range(MONTHS):
+                    invoice_id = uuid.uuid4()
+                    issued = start + timedelta(days=30 * month)
+                    rows[Invoice].append({
+                        'id': invoice_id, 'company_id': company_id, 'customer_id': customer_id,
+                        'invoice_number': f'INV-{c}-{n}-{month}', 'invoice_type': 'subscription',
+                        'billing_start_date': issued.date(), 'billing_end_date': (issued + timedelta(days=29)).date(),
+                        'due_date': (issued + timedelta(days=5)).date(), 'subtotal': 2500,
+                        'discount_percentage': 0, 'total_amount': 2500,
+                        'status': 'paid' if month < MONTHS - 1 else 'pending',
+                        'created_at': issued, 'is_active': True
+                    })
+                    if month < MONTHS - 1:
+                        rows[Payment].append({
+                            'id': uuid.uuid4(), 'company_id': company_id, 'invoice_id': invoice_id,
+                            'amount': 2500, 'payment_date': issued + timedelta(days=3),
+                            'payment_method': 'cash', 'status': 'paid', 'received_by': user_id,
+                            'is_active': True
+                        })
+                    rows[DetailedLog].append({
+                        'id': uuid.uuid4(), 'company_id': company_id, 'user_id': user_id,
+                        'action': 'CREATE', 'table_name': 'invoices', 'record_id': invoice_id,
+                        'created_at': issued
+                    })
+
+            for month in range(MONTHS):
+                day = start + timedelta(days=30 * month + 10)
+                rows[ISPPayment].append({
+                    'id': uuid.uuid4(), 'company_id': company_id, 'isp_id': isp_id,
+                    'payment_type': 'monthly_subscription', 'description': 'Bandwidth', 'amount': 50000,
+                    'payment_date': day, 'billing_period': day.strftime('%Y-%m'), 'payment_method': 'cash',
+                    'status': 'completed', 'processed_by': user_id, 'is_active': True
+                })
+                rows[Expense].append({
+                    'id': uuid.uuid4(), 'company_id': company_id, 'expense_type_id': expense_type_id,
+                    'amount': 10000, 'expense_date': day, 'is_active': True
+                })
+                rows[ExtraIncome].append({
+                    'id': uuid.uuid4(), 'company_id': company_id, 'income_type_id': income_type_id,
+                    'amount': 3000, 'income_date': day, 'is_active': True
+                })
+
+        for model, values in rows.items():
+            db.session.execute(insert(model), values)
+        db.session.commit()
+        db.session.execute(text('ANALYZE'))
+        db.session.commit()
+
+    def hot_queries(self):
+        company_id = self.company_ids[COMPANIES // 2]
+        customer_id = db.session.query(Customer.id).filter(Customer.company_id == company_id).limit(1).scalar()
+        invoice_id = db.session.query(Invoice.id).filter(Invoice.customer_id == customer_id).limit(1).scalar()
+        month_start = datetime(2025, 3, 1, tzinfo=timezone.utc)
+        month_end = datetime(2025, 4, 1, tzinfo=timezone.utc)
+
+        return {
+            # Invoice list and status cards
+            'invoices by status': db.session.query(Invoice.id).filter(
+                Invoice.company_id == company_id, Invoice.status == 'pending'
+            ),
+            'invoice page': db.session.query(Invoice.id).filter(
+                Invoice.company_id == company_id
+            ).order_by(desc(Invoice.created_at)).limit(20),
+            # Duplicate check before generating a customer's monthly invoice
+            'existing subscription invoice': db.session.query(Invoice.id).filter(
+                Invoice.customer_id == customer_id,
+                Invoice.invoice_type == 'subscription',
+                Invoice.billing_start_date >= month_start.date(),
+                Invoice.billing_start_date < month_end.date()
+            ),
+            # Bulk generation loads a company's invoices for the period at once
+            'existing subscription invoices for company': db.session.query(Invoice.customer_id).filter(
+                Invoice.company_id == company_id,
+                Invoice.invoice_type == 'subscription',
+                Invoice.billing_start_date >= month_start.date(),
+                Invoice.billing_start_date < month_end.date()
+            ),
+            # Outstanding and overdue invoices
+            'open invoices by due date': db.session.query(Invoice.id).filter(
+                Invoice.company_id == company_id, Invoice.status != 'paid',
+                Invoice.due_date < month_end.date()
+            ),
+            'payments by date': db.session.query(Payment.id).filter(
+                Payment.company_id == company_id,
+                Payment.payment_date >= month_start, Payment.payment_date < month_end
+            ),
+            # Collections in the financial dashboard
+            'paid payments by date': db.session.query(Payment.amount).filter(
+                Payment.company_id == company_id, Payment.status == 'paid', Payment.is_active == True,
+                Payment.payment_date >= month_start, Payment.payment_date < month_end
+            ),
+            'payments of an invoice': db.session.query(Payment.amount).filter(Payment.invoice_id == invoice_id),
+            'active customers': db.session.query(Customer.id).filter(
+                Customer.company_id == company_id, Customer.is_active == True
+            ),
+            'isp payments by date': db.session.query(ISPPayment.amount).filter(
+                ISPPayment.company_id == company_id,
+                ISPPayment.payment_date >= month_start, ISPPayment.payment_date < month_end
+            ),
+            'expenses by date': db.session.query(Expense.amount).filter(
+                Expense.company_id == company_id,
+                Expense.expense_date >= month_start, Expense.expense_date < month_end
+            ),
+            'extra income by date': db.session.query(ExtraIncome.amount).filter(
+                ExtraIncome.company_id == company_id,
+                ExtraIncome.income_date >= month_start, ExtraIncome.income_date < month_end
+            ),
+            'log page': db.session.query(DetailedLog.id).filter(
+                DetailedLog.company_id == company_id
+            ).order_by(desc(DetailedLog.created_at)).limit(20),
+        }
+
+    def test_hot_queries_use_indexes(self):
+        for name, query in self.hot_queries().items():
+            with self.subTest(query=name):
+                self.assertEqual(sequential_scans(query, HOT_TABLES), [])
+
+    def test_unindexed_filter_is_reported(self):
+        # Guards the check itself: nothing indexes invoice notes
+        query = db.session.query(Invoice.id).filter(Invoice.notes == 'none')
+        self.assertEqual(sequential_scans(query), ['invoices'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,139 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+from sqlalchemy import insert
+from sqlalchemy.exc import OperationalError
+from app import create_app, db
+from app.models import Company
+from app.services.dashboard_cache import DashboardCache
+from app.services.export_service import ExportService
+from app.utils.read_replica import read_replica, use_replica, read_engine, replica_status
+from config import Config
+import uuid
+
+# Two independent local PostgreSQL databases can stand in for primary and replica;
+# by default the primary is in-memory SQLite and the replica a SQLite file
+PRIMARY_URL = os.environ.get('TEST_DATABASE_URL', 'sqlite:///:memory:')
+REPLICA_URL = os.environ.get('TEST_REPLICA_DATABASE_URL')
+
+
+class TestReadReplica(unittest.TestCase):
+    def setUp(self):
+        self.replica_path = None
+        replica_url = REPLICA_URL
+        if replica_url is None:
+            handle, self.replica_path = tempfile.mkstemp(suffix='.db')
+            os.close(handle)
+            replica_url = f'sqlite:///{self.replica_path}'
+
+        with patch.multiple(Config, SQLALCHEMY_DATABASE_URI=PRIMARY_URL, REPLICA_DATABASE_URL=replica_url):
+            self.app = create_app()
+        self.app.config['TESTING'] = True
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        self.replica = self.app.extensions['read_replica'].engine
+        db.create_all()
+        db.metadata.create_all(self.replica)
+
+        db.session.add(Company(id=uuid.uuid4(), name="Primary Co", is_active=True))
+        db.session.commit()
+        with self.replica.begin() as connection:
+            connection.execute(insert(Company.__table__).values(id=uuid.uuid4(), name="Replica Co", is_active=True))
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        db.metadata.drop_all(self.replica)
+        self.app_context.pop()
+        self.replica.dispose()
+        if self.replica_path:
+            os.remove(self.replica_path)
+
+    def company_names(self):
+        names = [company.name for company in Company.query.order_by(Company.name).all()]
+        db.session.remove()
+        return names
+
+    def test_reads_in_scope_use_replica(self):
+        self.assertEqual(self.company_names(), ['Primary Co'])
+        with use_replica():
+            self.assertEqual(self.company_names(), ['Replica Co'])
+            self.assertIs(read_engine(), self.replica)
+            with use_replica(enabled=False):
+                self.assertEqual(self.company_names(), ['Primary Co'])
+        self.assertIs(read_engine(), db.engine)
+        self.assertEqual(replica_status()['lag_seconds'], 0.0)
+
+    def test_writes_in_scope_go_to_primary(self):
+        @read_replica
+        def add_and_read():
+            db.session.add(Company(id=uuid.uuid4(), name="Written Co", is_active=True))
+            db.session.commit()
+            return self.company_names()
+
+        self.assertEqual(add_and_read(), ['Replica Co'])
+        self.assertEqual(self.company_names(), ['Primary Co', 'Written Co'])
+
+    def test_stale_replica_falls_back_to_primary(self):
+        health = self.app.extensions['read_replica']
+        health.measure_lag = lambda: 120.0
+
+        with use_replica():
+            self.assertEqual(self.company_names(), ['Primary Co'])
+        with use_replica(max_lag_seconds=300):
+            self.assertEqual(self.company_names(), ['Replica Co'])
+
+    def test_unavailable_replica_falls_back_to_primary(self):
+        health = self.app.extensions['read_replica']
+        calls = []
+
+        def unavailable():
+            calls.append(1)
+            raise OperationalError('SELECT 1', {}, Exception('connection refused'))
+
+        health.measure_lag = unavailable
+        with use_replica():
+            self.assertEqual(self.company_names(), ['Primary Co'])
+            self.assertEqual(self.company_names(), ['Primary Co'])
+        # Not retried until REPLICA_RETRY_SECONDS have passed
+        self.assertEqual(len(calls), 1)
+        self.assertFalse(replica_status()['available'])
+
+    def test_cache_recompute_after_a_bump_waits_for_the_replica(self):
+        health = self.app.extensions['read_replica']
+        health.measure_lag = lambda: 10.0
+        company_id = uuid.uuid4()
+        DashboardCache.clear()
+        names = read_replica(self.company_names)
+
+        def lookup(endpoint):
+            return DashboardCache.get_or_compute(endpoint, company_id, {}, (DashboardCache.TAG_EXPENSE,), names)
+
+        # The replica is 10s behind a bump made just now: caching its rows
+        # under the new version would serve pre-write data for the full TTL
+        DashboardCache.invalidate(company_id, DashboardCache.TAG_EXPENSE)
+        self.assertEqual(lookup('just-bumped'), ['Primary Co'])
+
+        with patch('app.services.dashboard_cache.time.time', return_value=time.time() - 60):
+            DashboardCache.invalidate(company_id, DashboardCache.TAG_EXPENSE)
+        self.assertEqual(lookup('bumped-a-minute-ago'), ['Replica Co'])
+
+        never_bumped = DashboardCache.get_or_compute(
+            'never-bumped', uuid.uuid4(), {}, (DashboardCache.TAG_EXPENSE,), names
+        )
+        self.assertEqual(never_bumped, ['Replica Co'])
+
+    def test_streamed_export_keeps_routing(self):
+        query = db.session.query(Company.name.label('name'))
+        with self.app.test_request_context('/companies/export'):
+            with use_replica():
+                response = ExportService.response(query, 'companies')
+            body = b''.join(response.response).decode()
+        self.assertIn('Replica Co', body)
+        self.assertNotIn('Primary Co', body)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,15 +1,20 @@
 import unittest
+from unittest.mock import patch
 from datetime import datetime, timedelta
 from app import create_app, db
 from app.models import Customer, Invoice, ServicePlan, Company
 from scheduler import _process_invoices
+from config import Config
 import uuid
 
+# Never the app's own database: tearDown drops every table
+DATABASE_URL = 'sqlite:///:memory:'
+
 class TestScheduler(unittest.TestCase):
     def setUp(self):
-        self.app = create_app()
+        with patch.object(Config, 'SQLALCHEMY_DATABASE_URI', DATABASE_URL):
+            self.app = create_app()
         self.app.config['TESTING'] = True
-        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
         self.app_context = self.app.app_context()
         self.app_context.push()
         db.create_all()
@@ -139,8 +144,9 @@ class TestScheduler(unittest.TestCase):
         # Count invoices before
         invoices_before = Invoice.query.count()
         
-        # Run the scheduler function
-        with self.app.app_context():
+        # Run the scheduler function. SQLite's NUMERIC affinity would store the
+        # all-zero system user id as the integer 0, so record a random one
+        with self.app.app_context(), patch('scheduler.SYSTEM_USER_ID', str(uuid.uuid4())):
             _process_invoices()
         
         # Count invoices after
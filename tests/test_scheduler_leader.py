@@ -0,0 +1,47 @@
+import unittest
+from unittest.mock import MagicMock, patch
+from app import create_app, db
+from app.services.scheduler_leader import SchedulerLeader
+from config import Config
+
+# Never the app's own database: tearDown drops every table
+DATABASE_URL = 'sqlite:///:memory:'
+
+class TestSchedulerLeader(unittest.TestCase):
+    def setUp(self):
+        with patch.object(Config, 'SQLALCHEMY_DATABASE_URI', DATABASE_URL):
+            self.app = create_app()
+        self.app.config['TESTING'] = True
+        self.events = []
+        self.leader = SchedulerLeader(
+            self.app,
+            on_elected=lambda: self.events.append('elected'),
+            on_demoted=lambda: self.events.append('demoted'),
+            heartbeat_seconds=1
+        )
+
+    def test_single_process_without_advisory_locks_is_leader(self):
+        self.leader.step()
+        self.leader.step()
+        self.assertTrue(self.leader.is_leader)
+        self.assertEqual(self.events, ['elected'])
+
+        self.leader.stop()
+        self.assertFalse(self.leader.is_leader)
+        self.assertEqual(self.events, ['elected', 'demoted'])
+
+    def test_failed_heartbeat_demotes_and_discards_connection(self):
+        connection = MagicMock()
+        connection.execute.side_effect = Exception("server closed the connection")
+        self.leader._connection = connection
+        self.leader._set_leader(True)
+
+        self.leader.step()
+
+        self.assertFalse(self.leader.is_leader)
+        self.assertIsNone(self.leader._connection)
+        connection.invalidate.assert_called_once()
+        self.assertEqual(self.events, ['elected', 'demoted'])
+
+if __name__ == '__main__':
+    unittest.main()
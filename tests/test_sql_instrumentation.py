@@ -0,0 +1,67 @@
+import unittest
+from unittest.mock import patch
+from app import create_app, db
+from app.models import Company
+from app.services.sql_instrumentation import SQLInstrumentation
+from config import Config
+import uuid
+
+# Never the app's own database: tearDown drops every table
+DATABASE_URL = 'sqlite:///:memory:'
+
+class TestSQLInstrumentation(unittest.TestCase):
+    def setUp(self):
+        with patch.object(Config, 'SQLALCHEMY_DATABASE_URI', DATABASE_URL):
+            self.app = create_app()
+        self.app.config['TESTING'] = True
+        self.app.config['SQL_INSTRUMENTATION'] = True
+        self.app.config['SQL_N_PLUS_ONE_THRESHOLD'] = 5
+        SQLInstrumentation.init_app(self.app)
+        SQLInstrumentation.reset()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        company_ids = [uuid.uuid4() for _ in range(8)]
+        db.session.add_all(Company(id=company_id, name=f"Company {i}", is_active=True)
+                           for i, company_id in enumerate(company_ids))
+        db.session.commit()
+
+        def per_row():
+            names = [db.session.get(Company, company_id).name for company_id in company_ids]
+            return {'names': names}
+
+        def single():
+            return {'count': Company.query.count()}
+
+        self.app.add_url_rule('/_test/per-row', 'per_row', per_row)
+        self.app.add_url_rule('/_test/single', 'single', single)
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_server_timing_and_n_plus_one_report(self):
+        client = self.app.test_client()
+        db.session.expire_all()
+        response = client.get('/_test/per-row')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('db;dur=', response.headers['Server-Timing'])
+        self.assertIn('desc="8 queries"', response.headers['Server-Timing'])
+
+        response = client.get('/_test/single')
+        self.assertIn('desc="1 queries"', response.headers['Server-Timing'])
+
+        report = SQLInstrumentation.report()
+        self.assertTrue(report['enabled'])
+        self.assertEqual(report['window'], 2)
+        by_endpoint = {row['endpoint']: row for row in report['endpoints']}
+        self.assertEqual(by_endpoint['per_row']['max_queries'], 8)
+        self.assertEqual(by_endpoint['per_row']['n_plus_one_requests'], 1)
+        self.assertEqual(by_endpoint['single']['n_plus_one_requests'], 0)
+        self.assertEqual(report['recent_n_plus_one'][0]['statements'][0]['count'], 8)
+        self.assertLessEqual(len(report['slowest']), 20)
+
+if __name__ == '__main__':
+    unittest.main()
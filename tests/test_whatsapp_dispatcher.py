@@ -0,0 +1,252 @@
+import threading
+import time
+import unittest
+from unittest.mock import patch
+from app import create_app, db
+from app.models import (
+    Company, Customer, WhatsAppConfig, WhatsAppMessageQueue, WhatsAppDailyQuota
+)
+from app.services.whatsapp_dispatcher import WhatsAppDispatcher
+from app.services.whatsapp_queue_service import WhatsAppQueueService
+from datetime import datetime, timedelta
+from config import Config
+import uuid
+
+# Never the app's own database: tearDown drops every table
+DATABASE_URL = 'sqlite:///:memory:'
+
+class FakeClient:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.calls = []
+        self.delay = 0.01
+
+    def send_text_message(self, mobile, message, priority=10):
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            self.calls.append(mobile)
+        time.sleep(self.delay)
+        with self.lock:
+            self.in_flight -= 1
+        if message == 'fail':
+            return {'success': False, 'error': 'rejected'}
+        return {'success': True, 'response': {'status': 'queued'}}
+
+    def send_personalized_bulk(self, messages_data, priority=20):
+        with self.lock:
+            self.calls.append([msg['mobile'] for msg in messages_data])
+        results = [
+            {'status': 'failed', 'error': 'rejected'} if msg['message'] == 'fail'
+            else {'status': 'queued', 'id': f"api-{msg['mobile']}"}
+            for msg in messages_data
+        ]
+        return {'success': True, 'response': {'results': results}}
+
+class TestWhatsAppDispatcher(unittest.TestCase):
+    def setUp(self):
+        with patch.object(Config, 'SQLALCHEMY_DATABASE_URI', DATABASE_URL):
+            self.app = create_app()
+        self.app.config['TESTING'] = True
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.clients = {}
+        self.companies = [self.create_company(f"Company {i}") for i in range(2)]
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def create_company(self, name):
+        company = Company(id=uuid.uuid4(), name=name, is_active=True)
+        customer = Customer(
+            id=uuid.uuid4(),
+            company_id=company.id,
+            area_id=uuid.uuid4(),
+            service_plan_id=uuid.uuid4(),
+            isp_id=uuid.uuid4(),
+            first_name="John",
+            last_name="Doe",
+            email=f"{uuid.uuid4().hex}@example.com",
+            internet_id=uuid.uuid4().hex[:12],
+            phone_1="923001234567",
+            installation_address="123 Main St",
+            installation_date=datetime.now().date(),
+            cnic=uuid.uuid4().hex[:13],
+            connection_type="internet",
+            is_active=True
+        )
+        config = WhatsAppConfig(
+            id=uuid.uuid4(),
+            company_id=company.id,
+            api_key='key',
+            server_address='http://whatsapp.test',
+            auto_send_invoices=True,
+            daily_quota_limit=8,
+            quota_buffer=2
+        )
+        db.session.add_all([company, customer, config])
+        self.clients[str(company.id)] = FakeClient()
+        return company, customer
+
+    def enqueue(self, company, customer, count, content='hello', priority=10):
+        created = datetime.now() - timedelta(minutes=10)
+        for i in range(count):
+            db.session.add(WhatsAppMessageQueue(
+                id=uuid.uuid4(),
+                company_id=company.id,
+                customer_id=customer.id,
+                mobile=f"9230012345{i:02d}",
+                message_content=content,
+                message_type='invoice',
+                media_type='text',
+                priority=priority,
+                status='pending',
+                retry_count=0,
+                max_retry=3,
+                is_active=True,
+                created_at=created + timedelta(seconds=i)
+            ))
+        db.session.commit()
+
+    def dispatch(self, **kwargs):
+        with patch(
+            'app.services.whatsapp_dispatcher.WhatsAppAPIClient.from_config',
+            side_effect=lambda company_id, pool_size=None: self.clients[str(company_id)]
+        ):
+            return WhatsAppDispatcher(**kwargs).run()
+
+    def statuses(self, company):
+        rows = WhatsAppMessageQueue.query.filter_by(company_id=company.id).all()
+        counts = {}
+        for row in rows:
+            counts[row.status] = counts.get(row.status, 0) + 1
+        return counts
+
+    def test_dispatch_respects_quota_and_batches_updates(self):
+        (big, big_customer), (small, small_customer) = self.companies
+        self.enqueue(big, big_customer, 10)
+        self.enqueue(small, small_customer, 2)
+        self.enqueue(small, small_customer, 1, content='fail')
+
+        result = self.dispatch(
+            max_workers=4, per_company_concurrency=2, status_batch_size=2, personalized_batch_size=1
+        )
+        db.session.expire_all()
+
+        self.assertEqual(result['sent'], 8)
+        self.assertEqual(result['failed'], 1)
+        self.assertEqual(result['per_company'][str(big.id)], {'sent': 6, 'failed': 0})
+        self.assertEqual(self.statuses(big), {'sent': 6, 'pending': 4})
+        self.assertEqual(self.statuses(small), {'sent': 2, 'failed': 1})
+        self.assertLessEqual(self.clients[str(big.id)].max_in_flight, 2)
+        self.assertLess(result['status_batches'], result['http_requests'])
+
+        failed = WhatsAppMessageQueue.query.filter_by(status='failed').one()
+        self.assertEqual(failed.retry_count, 1)
+        self.assertEqual(failed.error_message, 'rejected')
+
+        quota = WhatsAppDailyQuota.query.filter_by(company_id=big.id).one()
+        self.assertEqual(quota.messages_sent, 6)
+
+        # Quota is exhausted for the big company, so a second run sends nothing more
+        result = self.dispatch(max_workers=4)
+        self.assertEqual(result['per_company'].get(str(big.id), {'sent': 0})['sent'], 0)
+
+    def test_text_messages_are_coalesced_into_personalized_calls(self):
+        (company, customer), _ = self.companies
+        self.enqueue(company, customer, 4)
+        self.enqueue(company, customer, 1, content='fail')
+        self.enqueue(company, customer, 1, priority=20)
+
+        result = self.dispatch(personalized_batch_size=3)
+        db.session.expire_all()
+
+        # Priority 10: batches of 3 and 2; priority 20 goes on its own
+        calls = self.clients[str(company.id)].calls
+        self.assertEqual(result['http_requests'], 3)
+        self.assertEqual(sorted(len(call) if isinstance(call, list) else 1 for call in calls), [1, 2, 3])
+        self.assertEqual(result['sent'], 5)
+        self.assertEqual(result['failed'], 1)
+
+        failed = WhatsAppMessageQueue.query.filter_by(status='failed').one()
+        self.assertEqual(failed.message_content, 'fail')
+        sent = WhatsAppMessageQueue.query.filter_by(status='sent', priority=10).all()
+        self.assertEqual({row.api_message_id for row in sent}, {f"api-{row.mobile}" for row in sent})
+
+    def test_claims_are_exclusive_and_expired_leases_are_reaped(self):
+        (company, customer), _ = self.companies
+        self.enqueue(company, customer, 5)
+
+        first = WhatsAppQueueService.claim_pending_messages(limit=3, company_id=company.id, worker_id='a')
+        second = WhatsAppQueueService.claim_pending_messages(limit=3, company_id=company.id, worker_id='b')
+
+        self.assertEqual(len(first), 3)
+        self.assertEqual(len(second), 2)
+        self.assertFalse({m.id for m in first} & {m.id for m in second})
+        self.assertEqual(WhatsAppQueueService.count_claimed_messages(company.id), 5)
+
+        # Claimed messages count against the quota of the next dispatcher run
+        self.assertEqual(self.dispatch()['sent'], 0)
+
+        WhatsAppMessageQueue.query.filter(
+            WhatsAppMessageQueue.id.in_([m.id for m in first])
+        ).update({'lease_expires_at': datetime.now() - timedelta(seconds=1)}, synchronize_session=False)
+        db.session.commit()
+
+        self.assertEqual(WhatsAppQueueService.reap_expired_leases(), 3)
+        self.assertEqual(self.statuses(company), {'pending': 3, 'processing': 2})
+
+    def test_results_for_lost_claims_are_not_written(self):
+        (company, customer), _ = self.companies
+        self.enqueue(company, customer, 2)
+        lost, kept = [m.id for m in WhatsAppQueueService.claim_pending_messages(
+            limit=2, company_id=company.id, worker_id='a'
+        )]
+
+        # Worker a stalls past its lease; the message is reaped and b claims it
+        WhatsAppMessageQueue.query.filter_by(id=lost).update(
+            {'lease_expires_at': datetime.now() - timedelta(seconds=1)}, synchronize_session=False
+        )
+        db.session.commit()
+        WhatsAppQueueService.reap_expired_leases()
+        WhatsAppQueueService.claim_pending_messages(limit=1, company_id=company.id, worker_id='b')
+        self.assertEqual(WhatsAppQueueService.extend_leases('a', lease_seconds=60), 1)
+
+        WhatsAppQueueService.bulk_update_message_status([
+            {'message_id': lost, 'status': 'sent'},
+            {'message_id': kept, 'status': 'failed', 'error_message': 'rejected'}
+        ], worker_id='a')
+        db.session.expire_all()
+
+        lost_row = db.session.get(WhatsAppMessageQueue, lost)
+        self.assertEqual((lost_row.status, lost_row.claimed_by), ('processing', 'b'))
+        kept_row = db.session.get(WhatsAppMessageQueue, kept)
+        self.assertEqual((kept_row.status, kept_row.retry_count, kept_row.claimed_by), ('failed', 1, None))
+
+    def test_leases_are_renewed_while_sending(self):
+        (company, customer), _ = self.companies
+        self.enqueue(company, customer, 5)
+        self.clients[str(company.id)].delay = 0.4
+        flush = WhatsAppDispatcher._flush
+
+        def reap_then_flush(dispatcher, outcomes):
+            # Another dispatcher starting up meanwhile reaps whatever has expired
+            WhatsAppQueueService.reap_expired_leases()
+            flush(dispatcher, outcomes)
+
+        # Sending one message at a time takes twice the 1s lease
+        with patch.object(WhatsAppDispatcher, '_flush', reap_then_flush):
+            self.dispatch(
+                per_company_concurrency=1, status_batch_size=1, personalized_batch_size=1, lease_seconds=1
+            )
+        db.session.expire_all()
+
+        self.assertEqual(self.statuses(company), {'sent': 5})
+
+if __name__ == '__main__':
+    unittest.main()